@@ -17,13 +17,14 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import time
 
+import indicators as ta
 from upbit_client import upbit_client
 from market_analyzer import market_analyzer
 
 
 # OpenRouter API 설정
-from config import OPENROUTER_API_KEY
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
+from config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL
+OPENROUTER_CHAT_URL = f"{OPENROUTER_BASE_URL}/chat/completions"
 
 
 @dataclass
@@ -145,7 +146,7 @@ class AIDebate:
         
         try:
             response = requests.post(
-                OPENROUTER_BASE_URL,
+                OPENROUTER_CHAT_URL,
                 headers=headers,
                 json=payload,
                 timeout=90
@@ -178,7 +179,7 @@ class AIDebate:
         price_change_7d = ((df['close'].iloc[-1] - df['close'].iloc[-7]) / df['close'].iloc[-7]) * 100 if len(df) >= 7 else 0
         
         # 거래량
-        avg_volume = df['volume'].rolling(20).mean().iloc[-1]
+        avg_volume = ta.sma(df['volume'], 20)[-1]
         current_volume = df['volume'].iloc[-1]
         volume_ratio = current_volume / avg_volume if avg_volume > 0 else 1
         
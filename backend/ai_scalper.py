@@ -9,16 +9,23 @@ import ssl
 import certifi
 import json
 import pyupbit
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Mapping
+from types import MappingProxyType
 from datetime import datetime
 from dataclasses import dataclass, asdict
-from threading import Thread, Event
 import time
 
 from config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL
-from upbit_client import upbit_client
+import indicators as ta
+from streaming_indicators import CandleIndicators
+from scan_state import IncrementalScanState
+from scan_service import scan_service
+from bot_runtime import bot_runtime
+from exit_engine import exit_engine, ExitEvent, ExitRule, TrailingRule, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT
+from upbit_client import upbit_client, request_priority, PRIORITY_ORDER, PRIORITY_EXIT, PRIORITY_SCAN
 from scalping_strategies import STRATEGIES, StrategyType
 from database import db
+from execution_router import execution_router, MIN_ORDER_KRW
 from strategies import ProfitMaximizer
 
 
@@ -95,11 +102,19 @@ class AIScalper:
     MIN_BUY_SCORE = 80          # 매수 최소 점수 (90 → 80)
     MIN_AI_CONFIDENCE = 75      # AI 신뢰도 최소 (85 → 75)
     FALLBACK_SCORE = 100        # 폴백 매수 점수 (140 → 100)
+    MIN_TRADE_VALUE = 100_000_000  # 스캔 최소 거래대금 (1억원)
     
     STOP_LOSS_PCT = -2.0        # 손절선 (-5% → -2%)
     MIN_PROFIT_EXIT = 0.8       # 최소 익절 수익률 (1.5% → 0.8%)
     TRAILING_ACTIVATE = 1.0     # 트레일링 활성화 (3% → 1%)
     
+    # ===== 보유 포지션 청산 (청산 엔진이 체결가마다 평가) =====
+    EXIT_OWNER = "ai_scalper"
+    EXIT_STOP_LOSS_PCT = -3.0       # 손절: -3%
+    EXIT_TARGET_PROFIT = 10.0       # 목표 수익률: 10%
+    EXIT_TRAILING = TrailingRule()  # 5% 이상 수익 시 트레일링 (최고 수익의 78~85% 보존)
+    EXIT_RETRY_DELAY = 30.0         # 매도 실패 후 청산 조건 재등록까지 대기 (초)
+    
     # 전략별 AI 프롬프트
     STRATEGY_PROMPTS = {
         "volatility_breakout": """
@@ -346,6 +361,15 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
         self.max_positions: int = 3
         self.check_interval: int = 60
         
+        # 후보 스캔 설정 (동시 조회 수, 1회 스캔 제한 시간(초) - 0이면 제한 없음)
+        self.scan_concurrency: int = 8
+        self.scan_deadline: float = 20.0
+        self.liquidity_threshold: float = self.MIN_TRADE_VALUE  # 캔들 조회 전 24시간 거래대금 사전 필터
+        self.incremental_scan: bool = True  # 시세/캔들이 바뀐 종목만 재계산
+        self.scan_state = IncrementalScanState("day")
+        self._scan_subscription = None  # 공유 스캔 서비스 구독 (실행 중에만)
+        self.last_scan_stats: Dict[str, Any] = {}
+        
         # AI 모델 설정
         self.selected_ai_model: str = DEFAULT_AI_MODEL
         self.ai_model_id: str = AI_MODELS[DEFAULT_AI_MODEL]["id"]
@@ -355,13 +379,12 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
         self.trade_logs: List[TradeExecution] = []
         self.ai_decisions: List[AITradeDecision] = []
         
+        # 보유 종목별 5분봉 스트리밍 지표 (매 체크마다 재조회하지 않음)
+        self._exit_indicators: Dict[str, CandleIndicators] = {}
+        
         # 실시간 활동 로그 & 발견된 신호
         self.activity_logs: List[Dict] = []
         self.discovered_signals: List[Dict] = []
-        
-        # 스레드 관리
-        self._stop_event = Event()
-        self._thread: Optional[Thread] = None
     
     def set_broadcast_callback(self, callback):
         """WebSocket 브로드캐스트 콜백 설정"""
@@ -457,6 +480,9 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
             "trade_amount": self.trade_amount,
             "max_positions": self.max_positions,
             "check_interval": self.check_interval,
+            "scan_concurrency": self.scan_concurrency,
+            "scan_deadline": self.scan_deadline,
+            "last_scan": self.last_scan_stats,
             "current_positions": len(self.positions),
             "positions": list(self.positions.values()),
             "recent_decisions": [asdict(d) for d in self.ai_decisions[-5:]],
@@ -471,7 +497,9 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
         strategies: List[str] = None,
         trade_amount: float = 10000,
         max_positions: int = 3,
-        check_interval: int = 60
+        check_interval: int = 60,
+        scan_concurrency: Optional[int] = None,
+        scan_deadline: Optional[float] = None
     ) -> Dict[str, Any]:
         """설정 (복수 전략 지원)"""
         # 복수 전략 처리
@@ -492,6 +520,10 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
         self.trade_amount = max(5000, trade_amount)
         self.max_positions = max(1, min(5, max_positions))
         self.check_interval = max(30, check_interval)
+        if scan_concurrency is not None:
+            self.scan_concurrency = max(1, min(32, scan_concurrency))
+        if scan_deadline is not None:
+            self.scan_deadline = max(0.0, scan_deadline)
         
         return self.get_status()
     
@@ -507,9 +539,7 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
         self._sync_existing_positions()
         
         self.is_running = True
-        self._stop_event.clear()
-        self._thread = Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        bot_runtime.start_bot("ai_scalper", self._run)
         
         strategy_names = [STRATEGIES[StrategyType(s)].name_kr for s in self.selected_strategies]
         return {
@@ -550,7 +580,8 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
                         'max_profit': float(pos.get("max_profit", 0)) if pos.get("max_profit") else None,
                         'trailing_stop': float(pos.get("trailing_stop", 0)) if pos.get("trailing_stop") else None
                     }
-                    print(f"[{datetime.now()}] 🔄 AI 포지션 복구: {currency} @ ₩{pos.get('entry_price'):,.0f}")
+                    if self._register_exit(ticker):
+                        print(f"[{datetime.now()}] 🔄 AI 포지션 복구: {currency} @ ₩{pos.get('entry_price'):,.0f}")
                 else:
                     # 잔고 없으면 DB에서도 청산 처리
                     db.close_position(ticker)
@@ -573,11 +604,7 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
             btc_change = (recent_close - hour_ago_close) / hour_ago_close * 100
             
             # RSI 계산
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            btc_rsi = float((100 - (100 / (1 + rs))).iloc[-1])
+            btc_rsi = float(ta.rsi(df['close'], 14)[-1])
             
             print(f"[{datetime.now()}] 📊 BTC 추세: {btc_change:+.2f}% (RSI: {btc_rsi:.0f})")
             
@@ -592,60 +619,60 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
             return {"status": "not_running"}
         
         self.is_running = False
-        self._stop_event.set()
+        bot_runtime.stop_bot("ai_scalper")
+        exit_engine.unregister_owner(self.EXIT_OWNER)
         
-        if self._thread:
-            self._thread.join(timeout=5)
+        # 공유 스캔 구독 해제 (다른 봇의 스캔 범위에서 제외)
+        if self._scan_subscription is not None:
+            self._scan_subscription.close()
+            self._scan_subscription = None
         
         return {"status": "stopped", "message": "AI 자동매매 중지됨"}
     
-    def _run_loop(self):
-        """메인 루프 - 적극적 포지션 모니터링 + 주기적 스캔"""
+    async def _run(self):
+        """메인 루프 - 적극적 포지션 모니터링 + 주기적 스캔 (봇 런타임 태스크 - 중지 시 취소됨)"""
         strategy_names = [STRATEGIES[StrategyType(s)].name_kr for s in self.selected_strategies]
         print(f"[{datetime.now()}] 🤖 AI 복합 전략 시작 - {', '.join(strategy_names)}")
         
         last_scan_time = 0
         last_ai_check_time = 0
         
-        while not self._stop_event.is_set():
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
+        try:
+            while self.is_running:
                 try:
                     current_time = time.time()
                     
                     # 포지션이 있으면 매우 적극적으로 모니터링
                     if self.positions:
                         # 10초마다 가격 체크 및 기본 청산 조건 확인
-                        loop.run_until_complete(self._check_exit_positions())
+                        with request_priority(PRIORITY_EXIT):
+                            await self._check_exit_positions()
                         
                         # 30초마다 AI에게 매도 타이밍 판단 요청
                         if current_time - last_ai_check_time >= 30:
-                            loop.run_until_complete(self._ai_monitor_positions())
+                            with request_priority(PRIORITY_EXIT):
+                                await self._ai_monitor_positions()
                             last_ai_check_time = current_time
                     
                     # 전체 스캔은 check_interval 마다 (새 매수 기회 탐색)
                     if current_time - last_scan_time >= self.check_interval:
-                        loop.run_until_complete(self._analyze_and_trade())
+                        with request_priority(PRIORITY_SCAN):
+                            await self._analyze_and_trade()
                         last_scan_time = current_time
                         
-                finally:
-                    loop.close()
-                    
-            except Exception as e:
-                print(f"[{datetime.now()}] ❌ AI 분석 오류: {e}")
-            
-            # 포지션 있으면 10초, 없으면 30초 대기 (더 빠른 모니터링)
-            wait_time = 10 if self.positions else 30
-            self._stop_event.wait(wait_time)
-        
-        print(f"[{datetime.now()}] 🛑 AI 단타 종료")
+                except Exception as e:
+                    print(f"[{datetime.now()}] ❌ AI 분석 오류: {e}")
+                
+                # 포지션 있으면 10초, 없으면 30초 대기 (더 빠른 모니터링)
+                wait_time = 10 if self.positions else 30
+                await asyncio.sleep(wait_time)
+        finally:
+            print(f"[{datetime.now()}] 🛑 AI 단타 종료")
     
     async def _analyze_and_trade(self):
         """AI 분석 및 거래 (개선: BTC 추세 체크)"""
         # 0. 비트코인 추세 확인 (개선: 시장 상황 체크)
-        btc_trend = self._check_btc_trend()
+        btc_trend = await asyncio.to_thread(self._check_btc_trend)
         
         self.add_activity("scan", f"시장 스캔 시작 (BTC: {btc_trend:+.2f}%)", {"btc_trend": btc_trend})
         
@@ -655,7 +682,8 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
             self.add_activity("warning", f"⚠️ BTC 급락 중 ({btc_trend:+.2f}%) - 리스크 관리로 매수 중단", {"btc_trend": btc_trend})
             print(f"[{datetime.now()}] ⚠️ BTC 급락 중 ({btc_trend:+.2f}%) - 매수 중단")
             # 청산 체크만 진행
-            await self._check_exit_positions()
+            with request_priority(PRIORITY_EXIT):
+                await self._check_exit_positions()
             return
         
         # 1. 전체 코인 스캔하여 후보 선정
@@ -684,7 +712,8 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
         print(f"[{datetime.now()}] 📊 스캔 완료: {len(candidates)}개 후보 (BTC: {btc_trend:+.2f}%)")
         
         # 2. 기존 포지션 청산 체크
-        await self._check_exit_positions()
+        with request_priority(PRIORITY_EXIT):
+            await self._check_exit_positions()
         
         # 3. 새 진입 (최대 포지션 미만일 때, BTC가 보합 이상일 때만)
         # ===== 개선: BTC가 보합(>= 0%) 이상이면 매수 시도 =====
@@ -718,7 +747,8 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
                         "confidence": decision.confidence,
                         "reason": decision.reason
                     })
-                    await self._execute_buy(ticker, decision)
+                    with request_priority(PRIORITY_ORDER):
+                        await self._execute_buy(ticker, decision)
                     print(f"[{datetime.now()}] 🎯 AI 매수 결정: {ticker} (신뢰도 {decision.confidence}%)")
                     
                 # 점수 기반 폴백 매수: AI가 hold 결정하거나 실패해도 점수 100 이상이면 매수
@@ -734,275 +764,400 @@ RSI(상대강도지수) 기반 평균회귀 전략으로 매매합니다.
                         stop_loss=data.get('price', 0) * 0.97,
                         timestamp=datetime.now().isoformat()
                     )
-                    await self._execute_buy(ticker, fallback_decision)
+                    with request_priority(PRIORITY_ORDER):
+                        await self._execute_buy(ticker, fallback_decision)
                     print(f"[{datetime.now()}] 🎯 규칙 기반 매수: {ticker} (점수 {data.get('score', 0):.0f})")
                     
                 if len(self.positions) >= self.max_positions:
                     break
     
     async def _scan_candidates(self) -> List[tuple]:
-        """전체 KRW 마켓 코인 스캔 - 선택한 전략에 맞는 코인 탐색"""
+        """전체 KRW 마켓 코인 스캔 - 선택한 전략에 맞는 코인 탐색
+        
+        스캔은 공유 스캔 서비스가 모든 봇의 전략 합집합으로 한 번만 실행하고,
+        여기서는 선택한 전략의 점수만 조합 (결과가 check_interval보다 오래됐으면 갱신)
+        """
+        subscription = self._get_scan_subscription()
+        subscription.update(self.selected_strategies, self.MIN_BUY_SCORE, order=tuple(self.selected_strategies))
+        candidates = await asyncio.to_thread(subscription.get, self.check_interval)
+        
+        for ticker, data in candidates:
+            self.add_activity("signal", f"후보 발견: {data['coin_name']} ({data['score']:.0f}점)", {
+                "ticker": ticker,
+                "score": data['score'],
+                "reason": data['reason']
+            })
+        print(f"[{datetime.now()}] 📊 후보 {len(candidates)}개 (스캔 v{subscription.last_version})")
+        return candidates
+    
+    def _get_scan_subscription(self):
+        """공유 스캔 구독 (없으면 생성)"""
+        if self._scan_subscription is None or not self._scan_subscription.active:
+            self._scan_subscription = scan_service.subscribe(
+                "ai_scalper", "ai", self.selected_strategies, self.MIN_BUY_SCORE,
+                order=tuple(self.selected_strategies)
+            )
+        return self._scan_subscription
+    
+    def view_scan(self, entries: Mapping[str, tuple], subscription) -> List[tuple]:
+        """스캔 서비스 뷰 - 구독 전략 조합 점수가 최소 점수 이상인 후보 (점수순)"""
+        strategies = list(subscription.options.get("order") or subscription.strategies or self.STRATEGY_PROMPTS)
         candidates = []
+        for ticker, entry in entries.items():
+            candidate = self._compose_candidate(ticker, entry, strategies, subscription.min_score)
+            if candidate is not None:
+                candidates.append(candidate)
+        candidates.sort(key=lambda x: x[1]['score'], reverse=True)
+        return candidates
+    
+    def produce_scan(self, strategies=None, subscriptions=None) -> Mapping[str, tuple]:
+        """스캔 서비스 생성기 - 요청된 전략 합집합의 종목별 점수 (전략 순서는 STRATEGY_PROMPTS 기준)"""
+        selected = [s for s in self.STRATEGY_PROMPTS if strategies is None or s in strategies]
+        return MappingProxyType(scan_service.run(self._scan_strategy_scores(selected)))
+    
+    async def _scan_strategy_scores(self, strategies: List[str]) -> Dict[str, tuple]:
+        """전체 KRW 마켓 코인의 전략별 점수 계산
+        
+        종목별 조회/점수 계산을 scan_concurrency개씩 병렬로 실행하고 점수가 나온 종목은 발견 즉시 출력.
+        scan_deadline(초)을 넘기면 남은 종목은 건너뛰고 그때까지 계산한 종목만 반환.
+        incremental_scan이면 지난 스캔 이후 시세/캔들이 바뀐 종목만 다시 계산하고 나머지는 이전 결과 사용
+        """
+        fresh: Dict[str, Optional[tuple]] = {}
         scanned_count = 0
         
         # 전체 KRW 마켓 코인 가져오기
         try:
-            all_tickers = pyupbit.get_tickers(fiat="KRW")
-            strategy_names = [STRATEGIES[StrategyType(s)].name_kr for s in self.selected_strategies]
-            print(f"[{datetime.now()}] 🔍 전체 {len(all_tickers)}개 코인 스캔 시작 (복합 전략: {', '.join(strategy_names)})")
+            all_tickers = await asyncio.to_thread(self.client.get_tickers, fiat="KRW")
         except Exception as e:
             print(f"[{datetime.now()}] ❌ 마켓 목록 조회 실패: {e}")
-            return []
+            return {}
+        
+        # 유동성 사전 필터 - 거래대금이 적은 종목은 캔들을 받지 않음
+        tickers = all_tickers
+        snapshot = None
+        try:
+            snapshot = await asyncio.to_thread(self.client.get_market_snapshot)
+            if self.liquidity_threshold > 0:
+                tickers = snapshot.prefilter_liquid(self.liquidity_threshold, all_tickers)
+        except Exception as e:
+            print(f"[{datetime.now()}] ⚠️ 시세 스냅샷 조회 실패 - 사전 필터 생략: {e}")
         
-        # 거래대금 기준 필터링 (최소 1억원 이상)
-        MIN_TRADE_VALUE = 100_000_000  # 1억원
+        # ProfitMaximizer는 50일 데이터가 필요 - 한 번에 받아서 같이 사용
+        history_count = 50 if "max_profit" in strategies else 25
         
-        for ticker in all_tickers:
-            try:
-                # OHLCV 데이터 조회
-                df = self.client.get_ohlcv(ticker, interval="day", count=25)
-                if df is None or len(df) < 21:
+        # 증분 스캔 - 전략 구성이 바뀌면 이전 결과 전체 무효화
+        targets = tickers
+        if self.incremental_scan:
+            config_key = (tuple(strategies), history_count)
+            targets = self.scan_state.plan(tickers, snapshot, config_key)
+        
+        strategy_names = [STRATEGIES[StrategyType(s)].name_kr for s in strategies]
+        print(f"[{datetime.now()}] 🔍 전체 {len(all_tickers)}개 중 {len(tickers)}개 코인 스캔 시작 (재계산 {len(targets)}개, 복합 전략: {', '.join(strategy_names)}, 동시 {self.scan_concurrency}개)")
+        
+        started = time.monotonic()
+        deadline = started + self.scan_deadline if self.scan_deadline else None
+        semaphore = asyncio.Semaphore(self.scan_concurrency)
+        
+        async def scan_one(ticker: str):
+            async with semaphore:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return ticker, False, None
+                scanned, entry = await asyncio.to_thread(self._scan_ticker, ticker, history_count, strategies)
+                return ticker, scanned, entry
+        
+        tasks = [asyncio.create_task(scan_one(ticker)) for ticker in targets]
+        timed_out = False
+        try:
+            timeout = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+            for future in asyncio.as_completed(tasks, timeout=timeout):
+                ticker, scanned, entry = await future
+                if not scanned:
                     continue
-                
                 scanned_count += 1
+                fresh[ticker] = entry
+                if entry is not None:
+                    # 발견 즉시 출력 (스캔 종료를 기다리지 않음)
+                    print(f"  ✅ {ticker.replace('KRW-', '')}: " + " | ".join(r for _, r in entry[1].values()))
+        except asyncio.TimeoutError:
+            timed_out = True
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        # 이번에 계산한 종목 저장 후 이전 결과와 병합 (시간 초과로 못 한 종목은 다음에 재계산)
+        if self.incremental_scan:
+            self.scan_state.commit(fresh)
+            self.scan_state.record(len(tickers), len(targets))
+            entries = self.scan_state.results_for(tickers)
+        else:
+            entries = {t: fresh[t] for t in tickers if fresh.get(t) is not None}
+        
+        elapsed = time.monotonic() - started
+        self.last_scan_stats = {
+            "tickers": len(all_tickers),
+            "liquid": len(tickers),
+            "rescanned": len(targets),
+            "scanned": scanned_count,
+            "scored": len(entries),
+            "elapsed_sec": round(elapsed, 2),
+            "timed_out": timed_out,
+            "concurrency": self.scan_concurrency
+        }
+        if timed_out:
+            print(f"[{datetime.now()}] ⏱️ 스캔 시간 초과 ({self.scan_deadline}초) - {scanned_count}/{len(targets)}개까지의 결과 사용")
+        print(f"[{datetime.now()}] 📊 스캔 완료: {scanned_count}개 분석, {len(entries)}개 종목 점수 ({elapsed:.1f}초)")
+        
+        return entries
+    
+    def _scan_ticker(self, ticker: str, history_count: int = 25,
+                     strategies: Optional[List[str]] = None) -> Tuple[bool, Optional[tuple]]:
+        """단일 종목 조회 + 전략별 점수 계산 (작업 스레드에서 실행)
+        
+        (분석 여부, (기본 데이터, {전략: (점수, 사유)})) 반환 - 점수가 있는 전략이 없으면 None
+        """
+        try:
+            # OHLCV 데이터 조회
+            history = self.client.get_ohlcv(ticker, interval="day", count=history_count)
+            if history is None or len(history) < 21:
+                return False, None
+            df = history.tail(25)
+            
+            # 기본 데이터 수집
+            current_price = float(df['close'].iloc[-1])
+            prev_close = float(df['close'].iloc[-2])
+            volume = float(df['volume'].iloc[-1])
+            avg_volume = float(df['volume'].iloc[:-1].mean())
+            trade_value = current_price * volume  # 당일 거래대금
+            
+            # 거래대금 필터링
+            if trade_value < self.MIN_TRADE_VALUE:
+                return True, None
+            
+            # RSI 계산
+            rsi_values = ta.rsi(df['close'], 14)
+            rsi = float(rsi_values[-1])
+            prev_rsi = float(rsi_values[-2]) if len(rsi_values) > 1 else rsi
+            
+            # 볼린저 밴드
+            ma20 = float(ta.sma(df['close'], 20)[-1])
+            std20 = float(ta.rolling_std(df['close'], 20)[-1])
+            bb_lower = ma20 - 2 * std20
+            bb_upper = ma20 + 2 * std20
+            bb_percent = (current_price - bb_lower) / (bb_upper - bb_lower) * 100 if bb_upper != bb_lower else 50
+            
+            # 변동성 돌파 목표가
+            yesterday = df.iloc[-2]
+            today_open = float(df['open'].iloc[-1])
+            volatility_range = float(yesterday['high']) - float(yesterday['low'])
+            volatility_target = today_open + volatility_range * 0.5
+            
+            # 20일 고가
+            high_20d = float(df['high'].iloc[:-1].tail(20).max())
+            
+            # 변화율
+            price_change = (current_price - prev_close) / prev_close * 100
+            volume_ratio = volume / avg_volume if avg_volume > 0 else 1
+            
+            # 전략별 점수 계산 (조합은 _compose_candidate에서)
+            strategy_scores: Dict[str, tuple] = {}
+            
+            # Williams %R 미리 계산 (여러 전략에서 사용)
+            period = 14
+            rolling_high = ta.rolling_max(df['high'], period)
+            rolling_low = ta.rolling_min(df['low'], period)
+            highest_high = float(rolling_high[-1])
+            lowest_low = float(rolling_low[-1])
+            williams_r = ((highest_high - current_price) / (highest_high - lowest_low)) * -100 if highest_high != lowest_low else -50
+            prev_highest = float(rolling_high[-2])
+            prev_lowest = float(rolling_low[-2])
+            prev_wr = ((prev_highest - prev_close) / (prev_highest - prev_lowest)) * -100 if prev_highest != prev_lowest else -50
+            
+            for strategy in (strategies or self.selected_strategies):
+                strategy_score = 0
+                strategy_reason = ""
                 
-                # 기본 데이터 수집
-                current_price = float(df['close'].iloc[-1])
-                prev_close = float(df['close'].iloc[-2])
-                volume = float(df['volume'].iloc[-1])
-                avg_volume = float(df['volume'].iloc[:-1].mean())
-                trade_value = current_price * volume  # 당일 거래대금
-                
-                # 거래대금 필터링
-                if trade_value < MIN_TRADE_VALUE:
-                    continue
-                
-                # RSI 계산
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = float((100 - (100 / (1 + rs))).iloc[-1])
-                prev_rsi = float((100 - (100 / (1 + rs))).iloc[-2]) if len(rs) > 1 else rsi
-                
-                # 볼린저 밴드
-                ma20 = float(df['close'].rolling(20).mean().iloc[-1])
-                std20 = float(df['close'].rolling(20).std().iloc[-1])
-                bb_lower = ma20 - 2 * std20
-                bb_upper = ma20 + 2 * std20
-                bb_percent = (current_price - bb_lower) / (bb_upper - bb_lower) * 100 if bb_upper != bb_lower else 50
-                
-                # 변동성 돌파 목표가
-                yesterday = df.iloc[-2]
-                today_open = float(df['open'].iloc[-1])
-                volatility_range = float(yesterday['high']) - float(yesterday['low'])
-                volatility_target = today_open + volatility_range * 0.5
-                
-                # 20일 고가
-                high_20d = float(df['high'].iloc[:-1].tail(20).max())
-                
-                # 변화율
-                price_change = (current_price - prev_close) / prev_close * 100
-                volume_ratio = volume / avg_volume if avg_volume > 0 else 1
-                
-                # 복수 전략 점수 계산 (모든 선택된 전략 평가)
-                scores = []
-                reasons = []
-                
-                # Williams %R 미리 계산 (여러 전략에서 사용)
-                period = 14
-                highest_high = float(df['high'].rolling(window=period).max().iloc[-1])
-                lowest_low = float(df['low'].rolling(window=period).min().iloc[-1])
-                williams_r = ((highest_high - current_price) / (highest_high - lowest_low)) * -100 if highest_high != lowest_low else -50
-                prev_highest = float(df['high'].rolling(window=period).max().iloc[-2])
-                prev_lowest = float(df['low'].rolling(window=period).min().iloc[-2])
-                prev_wr = ((prev_highest - prev_close) / (prev_highest - prev_lowest)) * -100 if prev_highest != prev_lowest else -50
-                
-                for strategy in self.selected_strategies:
-                    strategy_score = 0
-                    strategy_reason = ""
-                    
-                    if strategy == "volatility_breakout":
-                        # 변동성 돌파: 목표가 돌파 + 거래량 증가
-                        if current_price > volatility_target and volume_ratio > 1.2:
-                            breakout_percent = (current_price - volatility_target) / volatility_target * 100
-                            strategy_score = 65 + min(35, breakout_percent * 10 + volume_ratio * 5)
-                            strategy_reason = f"⚡변동성돌파 {breakout_percent:.1f}%"
-                            
-                    elif strategy == "rsi_reversal":
-                        # RSI 반등: RSI 35 이하에서 상승 전환
-                        if rsi < 38 and rsi > prev_rsi and price_change > 0:
-                            strategy_score = 85 - rsi + (prev_rsi - rsi) * 2
-                            strategy_reason = f"📊RSI {rsi:.1f} 반등"
-                            
-                    elif strategy == "bollinger_bounce":
-                        # 볼린저 반등: 하단 터치 후 반등
-                        if bb_percent < 15 and price_change > 0:
-                            strategy_score = 75 + (15 - bb_percent) * 2
-                            strategy_reason = f"📈BB하단 {bb_percent:.0f}%"
-                        elif bb_percent < 5:
-                            strategy_score = 80 + (5 - bb_percent) * 3
-                            strategy_reason = f"📈BB이탈 {bb_percent:.0f}%"
-                            
-                    elif strategy == "volume_surge":
-                        # 거래량 돌파: 백테스트 1위 전략 (+9.11%)
-                        # 조건: 거래량 2배 이상 + 가격 상승 + 거래대금 1억 이상
-                        if volume_ratio >= 2.0 and price_change > 0:
-                            # 기본 점수 80점 + 거래량/가격상승 가산점
-                            base_score = 80
-                            volume_bonus = min(15, (volume_ratio - 2) * 10)  # 최대 15점
-                            price_bonus = min(10, price_change * 3)  # 최대 10점
-                            # 대형 알트코인 보너스 (DOT, LINK, SOL, AVAX)
-                            premium_coins = ["KRW-DOT", "KRW-LINK", "KRW-SOL", "KRW-AVAX", "KRW-ETH"]
-                            coin_bonus = 10 if ticker in premium_coins else 0
-                            strategy_score = base_score + volume_bonus + price_bonus + coin_bonus
-                            strategy_reason = f"🔥거래량돌파 {volume_ratio:.1f}배 +{price_change:.1f}%"
-                            
-                    elif strategy == "momentum_breakout":
-                        # 모멘텀 돌파: 20일 신고가 + 거래량 증가
-                        if current_price > high_20d and volume_ratio > 1.3:
-                            breakout_percent = (current_price - high_20d) / high_20d * 100
-                            strategy_score = 68 + min(32, breakout_percent * 8 + volume_ratio * 4)
-                            strategy_reason = f"🚀신고가 +{breakout_percent:.1f}%"
-                            
-                    elif strategy == "scalping_5min":
-                        # 5분봉 스캘핑
-                        if rsi < 40 and volume_ratio > 1.5 and price_change > 0:
-                            strategy_score = 60 + (40 - rsi) + volume_ratio * 5
-                            strategy_reason = f"⏱️RSI {rsi:.1f}"
-                    
-                    # ========== 래리 윌리엄스 전략들 ==========
-                    elif strategy == "larry_williams_r":
-                        if williams_r <= -80 and williams_r > prev_wr:
-                            strategy_score = 70 + abs(williams_r + 80) + (williams_r - prev_wr) * 2
-                            strategy_reason = f"📉%R {williams_r:.1f}"
-                            
-                    elif strategy == "larry_oops":
-                        yesterday_data = df.iloc[-2]
-                        today_open_val = float(df['open'].iloc[-1])
-                        yesterday_low = float(yesterday_data['low'])
+                if strategy == "volatility_breakout":
+                    # 변동성 돌파: 목표가 돌파 + 거래량 증가
+                    if current_price > volatility_target and volume_ratio > 1.2:
+                        breakout_percent = (current_price - volatility_target) / volatility_target * 100
+                        strategy_score = 65 + min(35, breakout_percent * 10 + volume_ratio * 5)
+                        strategy_reason = f"⚡변동성돌파 {breakout_percent:.1f}%"
                         
-                        gap_down = today_open_val < yesterday_low
-                        breakout_oops = current_price > yesterday_low
-                        is_bullish_oops = current_price > today_open_val
+                elif strategy == "rsi_reversal":
+                    # RSI 반등: RSI 35 이하에서 상승 전환
+                    if rsi < 38 and rsi > prev_rsi and price_change > 0:
+                        strategy_score = 85 - rsi + (prev_rsi - rsi) * 2
+                        strategy_reason = f"📊RSI {rsi:.1f} 반등"
                         
-                        if gap_down and breakout_oops and is_bullish_oops:
-                            gap_size = (yesterday_low - today_open_val) / yesterday_low * 100
-                            recovery = (current_price - today_open_val) / today_open_val * 100
-                            strategy_score = 65 + gap_size * 5 + recovery * 3
-                            strategy_reason = f"😱OOPS! +{recovery:.1f}%"
-                            
-                    elif strategy == "larry_smash_day":
-                        yesterday_data = df.iloc[-2]
-                        day_before = df.iloc[-3]
+                elif strategy == "bollinger_bounce":
+                    # 볼린저 반등: 하단 터치 후 반등
+                    if bb_percent < 15 and price_change > 0:
+                        strategy_score = 75 + (15 - bb_percent) * 2
+                        strategy_reason = f"📈BB하단 {bb_percent:.0f}%"
+                    elif bb_percent < 5:
+                        strategy_score = 80 + (5 - bb_percent) * 3
+                        strategy_reason = f"📈BB이탈 {bb_percent:.0f}%"
                         
-                        yesterday_open_val = float(yesterday_data['open'])
-                        yesterday_close_val = float(yesterday_data['close'])
-                        day_before_close = float(day_before['close'])
-                        today_open_val = float(df['open'].iloc[-1])
+                elif strategy == "volume_surge":
+                    # 거래량 돌파: 백테스트 1위 전략 (+9.11%)
+                    # 조건: 거래량 2배 이상 + 가격 상승 + 거래대금 1억 이상
+                    if volume_ratio >= 2.0 and price_change > 0:
+                        # 기본 점수 80점 + 거래량/가격상승 가산점
+                        base_score = 80
+                        volume_bonus = min(15, (volume_ratio - 2) * 10)  # 최대 15점
+                        price_bonus = min(10, price_change * 3)  # 최대 10점
+                        # 대형 알트코인 보너스 (DOT, LINK, SOL, AVAX)
+                        premium_coins = ["KRW-DOT", "KRW-LINK", "KRW-SOL", "KRW-AVAX", "KRW-ETH"]
+                        coin_bonus = 10 if ticker in premium_coins else 0
+                        strategy_score = base_score + volume_bonus + price_bonus + coin_bonus
+                        strategy_reason = f"🔥거래량돌파 {volume_ratio:.1f}배 +{price_change:.1f}%"
                         
-                        daily_drop = (yesterday_close_val - yesterday_open_val) / yesterday_open_val * 100
-                        vs_prev_drop = (yesterday_close_val - day_before_close) / day_before_close * 100
+                elif strategy == "momentum_breakout":
+                    # 모멘텀 돌파: 20일 신고가 + 거래량 증가
+                    if current_price > high_20d and volume_ratio > 1.3:
+                        breakout_percent = (current_price - high_20d) / high_20d * 100
+                        strategy_score = 68 + min(32, breakout_percent * 8 + volume_ratio * 4)
+                        strategy_reason = f"🚀신고가 +{breakout_percent:.1f}%"
                         
-                        is_smash_day = daily_drop < -3 or vs_prev_drop < -5
-                        is_recovering = current_price > today_open_val
-                        above_smash = current_price > yesterday_close_val
+                elif strategy == "scalping_5min":
+                    # 5분봉 스캘핑
+                    if rsi < 40 and volume_ratio > 1.5 and price_change > 0:
+                        strategy_score = 60 + (40 - rsi) + volume_ratio * 5
+                        strategy_reason = f"⏱️RSI {rsi:.1f}"
+                
+                # ========== 래리 윌리엄스 전략들 ==========
+                elif strategy == "larry_williams_r":
+                    if williams_r <= -80 and williams_r > prev_wr:
+                        strategy_score = 70 + abs(williams_r + 80) + (williams_r - prev_wr) * 2
+                        strategy_reason = f"📉%R {williams_r:.1f}"
                         
-                        if is_smash_day and is_recovering and above_smash:
-                            recovery_pct = (current_price - yesterday_close_val) / yesterday_close_val * 100
-                            strategy_score = 60 + abs(daily_drop) * 3 + recovery_pct * 5
-                            strategy_reason = f"💥Smash +{recovery_pct:.1f}%"
-                            
-                    elif strategy == "larry_combo":
-                        volatility_check = current_price > volatility_target
-                        wr_signal = -80 <= williams_r <= -50 and williams_r > prev_wr
-                        volume_check = volume_ratio > 1.5
-                        is_bullish_lc = current_price > float(df['open'].iloc[-1])
+                elif strategy == "larry_oops":
+                    yesterday_data = df.iloc[-2]
+                    today_open_val = float(df['open'].iloc[-1])
+                    yesterday_low = float(yesterday_data['low'])
+                    
+                    gap_down = today_open_val < yesterday_low
+                    breakout_oops = current_price > yesterday_low
+                    is_bullish_oops = current_price > today_open_val
+                    
+                    if gap_down and breakout_oops and is_bullish_oops:
+                        gap_size = (yesterday_low - today_open_val) / yesterday_low * 100
+                        recovery = (current_price - today_open_val) / today_open_val * 100
+                        strategy_score = 65 + gap_size * 5 + recovery * 3
+                        strategy_reason = f"😱OOPS! +{recovery:.1f}%"
                         
-                        conditions_met = sum([volatility_check, wr_signal, volume_check, is_bullish_lc])
+                elif strategy == "larry_smash_day":
+                    yesterday_data = df.iloc[-2]
+                    day_before = df.iloc[-3]
+                    
+                    yesterday_open_val = float(yesterday_data['open'])
+                    yesterday_close_val = float(yesterday_data['close'])
+                    day_before_close = float(day_before['close'])
+                    today_open_val = float(df['open'].iloc[-1])
+                    
+                    daily_drop = (yesterday_close_val - yesterday_open_val) / yesterday_open_val * 100
+                    vs_prev_drop = (yesterday_close_val - day_before_close) / day_before_close * 100
+                    
+                    is_smash_day = daily_drop < -3 or vs_prev_drop < -5
+                    is_recovering = current_price > today_open_val
+                    above_smash = current_price > yesterday_close_val
+                    
+                    if is_smash_day and is_recovering and above_smash:
+                        recovery_pct = (current_price - yesterday_close_val) / yesterday_close_val * 100
+                        strategy_score = 60 + abs(daily_drop) * 3 + recovery_pct * 5
+                        strategy_reason = f"💥Smash +{recovery_pct:.1f}%"
                         
-                        if conditions_met >= 3:
-                            strategy_score = 50 + conditions_met * 12
-                            if volatility_check:
-                                strategy_score += 5
-                            if wr_signal:
-                                strategy_score += abs(williams_r + 65)
-                            if volume_check:
-                                strategy_score += min(20, (volume_ratio - 1) * 10)
-                            
-                            strategy_reason = f"🏆래리종합 {conditions_met}조건"
+                elif strategy == "larry_combo":
+                    volatility_check = current_price > volatility_target
+                    wr_signal = -80 <= williams_r <= -50 and williams_r > prev_wr
+                    volume_check = volume_ratio > 1.5
+                    is_bullish_lc = current_price > float(df['open'].iloc[-1])
                     
-                    # ========== 수익률 최대화 전략 (ProfitMaximizer 사용) ==========
-                    elif strategy == "max_profit":
-                        try:
-                            # ProfitMaximizer 전략 사용
-                            profit_maximizer = ProfitMaximizer(ticker)
-                            should_buy, buy_reason = profit_maximizer.should_buy()
-                            
-                            if should_buy:
-                                # 분석 결과 가져오기
-                                analysis_summary = profit_maximizer.get_analysis_summary()
-                                if analysis_summary:
-                                    strategy_score = analysis_summary['buy_score'] + 30  # 기본 점수 + 30
-                                    
-                                    indicators = []
-                                    ind = analysis_summary['indicators']
-                                    indicators.append(f"RSI{ind['RSI']:.0f}")
-                                    indicators.append(f"BB{ind['BB위치']:.0f}%")
-                                    indicators.append(f"Vol{ind['거래량배율']:.1f}x")
-                                    if ind['MACD히스토'] > 0:
-                                        indicators.append("MACD↑")
-                                    
-                                    strategy_reason = f"💎수익률최대화 [점수:{analysis_summary['buy_score']}] ({','.join(indicators[:4])})"
-                                else:
-                                    strategy_score = 85
-                                    strategy_reason = f"💎수익률최대화 매수신호"
-                        except Exception as e:
-                            print(f"[ProfitMaximizer] {ticker} 분석 오류: {e}")
+                    conditions_met = sum([volatility_check, wr_signal, volume_check, is_bullish_lc])
                     
-                    # 점수가 있으면 추가
-                    if strategy_score > 0:
-                        scores.append(strategy_score)
-                        reasons.append(strategy_reason)
+                    if conditions_met >= 3:
+                        strategy_score = 50 + conditions_met * 12
+                        if volatility_check:
+                            strategy_score += 5
+                        if wr_signal:
+                            strategy_score += abs(williams_r + 65)
+                        if volume_check:
+                            strategy_score += min(20, (volume_ratio - 1) * 10)
+                        
+                        strategy_reason = f"🏆래리종합 {conditions_met}조건"
                 
-                # 복수 전략 점수 합산 (가장 높은 점수 + 중복 가산점)
-                if scores:
-                    score = max(scores) + len(scores) * 5  # 여러 전략 일치 시 가산점
-                    reason = " | ".join(reasons)
-                else:
-                    score = 0
-                    reason = ""
+                # ========== 수익률 최대화 전략 (ProfitMaximizer 사용) ==========
+                elif strategy == "max_profit":
+                    try:
+                        # ProfitMaximizer 전략 사용
+                        profit_maximizer = ProfitMaximizer(ticker)
+                        should_buy, buy_reason = profit_maximizer.should_buy(df=history)
+                        
+                        if should_buy:
+                            # 분석 결과 가져오기
+                            analysis_summary = profit_maximizer.get_analysis_summary(df=history)
+                            if analysis_summary:
+                                strategy_score = analysis_summary['buy_score'] + 30  # 기본 점수 + 30
+                                
+                                indicators = []
+                                ind = analysis_summary['indicators']
+                                indicators.append(f"RSI{ind['RSI']:.0f}")
+                                indicators.append(f"BB{ind['BB위치']:.0f}%")
+                                indicators.append(f"Vol{ind['거래량배율']:.1f}x")
+                                if ind['MACD히스토'] > 0:
+                                    indicators.append("MACD↑")
+                                
+                                strategy_reason = f"💎수익률최대화 [점수:{analysis_summary['buy_score']}] ({','.join(indicators[:4])})"
+                            else:
+                                strategy_score = 85
+                                strategy_reason = f"💎수익률최대화 매수신호"
+                    except Exception as e:
+                        print(f"[ProfitMaximizer] {ticker} 분석 오류: {e}")
                 
-                # 점수 90 이상인 코인만 후보로 (개선: 더 엄격한 기준)
-                if score >= self.MIN_BUY_SCORE:
-                    coin_name = ticker.replace("KRW-", "")
-                    candidates.append((ticker, {
-                        'coin_name': coin_name,
-                        'score': round(score, 1),
-                        'reason': reason,
-                        'price': current_price,
-                        'price_change': round(price_change, 2),
-                        'rsi': round(rsi, 1),
-                        'volume_ratio': round(volume_ratio, 2),
-                        'trade_value': trade_value,
-                        'bb_lower': bb_lower,
-                        'bb_upper': bb_upper,
-                        'bb_percent': round(bb_percent, 1),
-                        'ma20': ma20,
-                        'volatility_target': volatility_target,
-                        'high_20d': high_20d
-                    }))
-                    print(f"  ✅ {coin_name}: {score:.0f}점 - {reason}")
-                    
-            except Exception as e:
-                continue
-        
-        # 점수 기준 정렬
-        candidates.sort(key=lambda x: x[1]['score'], reverse=True)
+                # 점수가 있으면 추가
+                if strategy_score > 0:
+                    strategy_scores[strategy] = (strategy_score, strategy_reason)
+            
+            if not strategy_scores:
+                return True, None
+            return True, ({
+                'price': current_price,
+                'price_change': round(price_change, 2),
+                'rsi': round(rsi, 1),
+                'volume_ratio': round(volume_ratio, 2),
+                'trade_value': trade_value,
+                'bb_lower': bb_lower,
+                'bb_upper': bb_upper,
+                'bb_percent': round(bb_percent, 1),
+                'ma20': ma20,
+                'volatility_target': volatility_target,
+                'high_20d': high_20d
+            }, strategy_scores)
+        except Exception as e:
+            return False, None
+    
+    @staticmethod
+    def _compose_candidate(ticker: str, entry: tuple, strategies: List[str],
+                           min_score: float) -> Optional[tuple]:
+        """선택한 전략들의 점수 조합 - 기준 미달이면 None"""
+        base, strategy_scores = entry
+        matched = [strategy_scores[s] for s in strategies if s in strategy_scores]
+        if not matched:
+            return None
         
-        print(f"[{datetime.now()}] 📊 스캔 완료: {scanned_count}개 분석, {len(candidates)}개 후보 발견")
+        # 복수 전략 점수 합산 (가장 높은 점수 + 중복 가산점)
+        score = max(m[0] for m in matched) + len(matched) * 5  # 여러 전략 일치 시 가산점
+        reason = " | ".join(m[1] for m in matched)
         
-        return candidates
+        # 점수 90 이상인 코인만 후보로 (개선: 더 엄격한 기준)
+        if score < min_score:
+            return None
+        return ticker, {
+            'coin_name': ticker.replace("KRW-", ""),
+            'score': round(score, 1),
+            'reason': reason,
+            **base
+        }
     
     async def _ai_analyze(self, ticker: str, data: Dict, context: str) -> Optional[AITradeDecision]:
         """AI 분석"""
@@ -1063,57 +1218,56 @@ RSI(14): {data['rsi']:.1f}
         try:
             # SSL 컨텍스트 설정 (인증서 검증 비활성화 - 개발환경)
             ssl_context = ssl.create_default_context(cafile=certifi.where())
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
             
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.post(
-                    f"{OPENROUTER_BASE_URL}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.ai_model_id,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.3,
-                        "max_tokens": 500
-                    },
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as response:
-                    if response.status != 200:
-                        print(f"[{datetime.now()}] ❌ AI API 오류: {response.status}")
-                        return None
-                    
-                    result = await response.json()
-                    content = result['choices'][0]['message']['content'].strip()
-                    
-                    # JSON 파싱
-                    if content.startswith("```"):
-                        content = content.split("```")[1]
-                        if content.startswith("json"):
-                            content = content[4:]
-                    
-                    ai_response = json.loads(content)
-                    
-                    decision = AITradeDecision(
-                        ticker=ticker,
-                        action=ai_response.get('action', 'hold'),
-                        confidence=ai_response.get('confidence', 50),
-                        amount_percent=ai_response.get('amount_percent', 50),
-                        reason=ai_response.get('reason', ''),
-                        target_price=ai_response.get('target_price'),
-                        stop_loss=ai_response.get('stop_loss'),
-                        timestamp=datetime.now().isoformat()
-                    )
-                    
-                    self.ai_decisions.append(decision)
-                    
-                    emoji = "🟢" if decision.action == "buy" else "🔴" if decision.action == "sell" else "⚪"
-                    print(f"[{datetime.now()}] {emoji} AI 결정 ({coin_name}): {decision.action.upper()} "
-                          f"(신뢰도: {decision.confidence}%) - {decision.reason[:50]}...")
-                    
-                    return decision
-                    
+            session = await bot_runtime.http_session("ai_scalper", ssl=ssl_context)
+            async with session.post(
+                f"{OPENROUTER_BASE_URL}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.ai_model_id,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.3,
+                    "max_tokens": 500
+                },
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status != 200:
+                    print(f"[{datetime.now()}] ❌ AI API 오류: {response.status}")
+                    return None
+                
+                result = await response.json()
+                content = result['choices'][0]['message']['content'].strip()
+                
+                # JSON 파싱
+                if content.startswith("```"):
+                    content = content.split("```")[1]
+                    if content.startswith("json"):
+                        content = content[4:]
+                
+                ai_response = json.loads(content)
+                
+                decision = AITradeDecision(
+                    ticker=ticker,
+                    action=ai_response.get('action', 'hold'),
+                    confidence=ai_response.get('confidence', 50),
+                    amount_percent=ai_response.get('amount_percent', 50),
+                    reason=ai_response.get('reason', ''),
+                    target_price=ai_response.get('target_price'),
+                    stop_loss=ai_response.get('stop_loss'),
+                    timestamp=datetime.now().isoformat()
+                )
+                
+                self.ai_decisions.append(decision)
+                
+                emoji = "🟢" if decision.action == "buy" else "🔴" if decision.action == "sell" else "⚪"
+                print(f"[{datetime.now()}] {emoji} AI 결정 ({coin_name}): {decision.action.upper()} "
+                      f"(신뢰도: {decision.confidence}%) - {decision.reason[:50]}...")
+                
+                return decision
+                
         except json.JSONDecodeError as e:
             print(f"[{datetime.now()}] ❌ AI 응답 파싱 오류: {e}")
             return None
@@ -1131,7 +1285,7 @@ RSI(14): {data['rsi']:.1f}
         for ticker, pos in list(self.positions.items()):
             try:
                 # 현재가 조회
-                current_price = self.client.get_current_price(ticker)
+                current_price = await asyncio.to_thread(self.client.get_current_price, ticker)
                 if not current_price:
                     continue
                 
@@ -1144,16 +1298,12 @@ RSI(14): {data['rsi']:.1f}
                     continue
 
                 # 최근 1분봉 데이터로 시장 상황 분석
-                df = self.client.get_ohlcv(ticker, interval="minute1", count=30)
+                df = await asyncio.to_thread(self.client.get_ohlcv, ticker, interval="minute1", count=30)
                 if df is None or len(df) < 20:
                     continue
                 
                 # RSI 계산
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = float((100 - (100 / (1 + rs))).iloc[-1])
+                rsi = float(ta.rsi(df['close'], 14)[-1])
                 
                 # 최근 가격 추세 (5분간)
                 price_5min_ago = float(df['close'].iloc[-6]) if len(df) >= 6 else current_price
@@ -1183,8 +1333,12 @@ RSI(14): {data['rsi']:.1f}
                 decision = await self._ai_analyze_sell_timing_logic(analysis_data)
                 
                 if decision and decision.action == "sell" and decision.confidence >= 70:
+                    # 분석 중 청산 엔진이 먼저 매도했으면 건너뜀
+                    if not exit_engine.unregister(self.EXIT_OWNER, ticker):
+                        continue
                     print(f"[{datetime.now()}] 🤖 AI 매도 결정: {pos['coin_name']} (신뢰도 {decision.confidence}%)")
-                    await self._execute_sell(ticker, f"🤖 AI 최적 타이밍: {decision.reason}", profit_rate, current_price)
+                    with request_priority(PRIORITY_ORDER):
+                        await self._execute_sell(ticker, f"🤖 AI 최적 타이밍: {decision.reason}", profit_rate, current_price)
                 elif decision and decision.action == "hold":
                     # 최고 수익 갱신
                     if profit_rate > pos.get('max_profit', 0):
@@ -1192,7 +1346,7 @@ RSI(14): {data['rsi']:.1f}
                         # 트레일링 스탑 조정
                         if profit_rate >= 2.0:
                             new_stop = current_price * 0.985 # 현재가 대비 -1.5% 하락 시 매도
-                            pos['trailing_stop'] = max(pos.get('trailing_stop', 0), new_stop)
+                            pos['trailing_stop'] = exit_engine.raise_trailing_stop(self.EXIT_OWNER, ticker, new_stop) or new_stop
                         
             except Exception as e:
                 print(f"[{datetime.now()}] ⚠️ AI 모니터링 오류 ({ticker}): {e}")
@@ -1238,60 +1392,66 @@ RSI(14): {data['rsi']:.1f}
         try:
             ssl_context = ssl.create_default_context(cafile=certifi.where())
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{OPENROUTER_BASE_URL}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.ai_model_id,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.2,
-                        "max_tokens": 300
-                    },
-                    ssl=ssl_context
-                ) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    result = await response.json()
-                    content = result['choices'][0]['message']['content']
-                    
-                    import re
-                    json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                    if not json_match:
-                        return None
-                        
-                    decision_data = json.loads(json_match.group().strip())
-                    
-                    return AITradeDecision(
-                        ticker=data['ticker'],
-                        action=decision_data.get('action', 'hold'),
-                        confidence=int(decision_data.get('confidence', 50)),
-                        reason=decision_data.get('reason', ''),
-                        target_price=decision_data.get('target_price'),
-                        stop_loss=decision_data.get('stop_loss'),
-                        amount_percent=100,
-                        timestamp=datetime.now().isoformat()
-                    )
+            session = await bot_runtime.http_session("ai_scalper", ssl=ssl_context)
+            async with session.post(
+                f"{OPENROUTER_BASE_URL}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.ai_model_id,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.2,
+                    "max_tokens": 300
+                },
+                ssl=ssl_context
+            ) as response:
+                if response.status != 200:
+                    return None
+                
+                result = await response.json()
+                content = result['choices'][0]['message']['content']
+                
+                import re
+                json_match = re.search(r'\{.*\}', content, re.DOTALL)
+                if not json_match:
+                    return None
                     
+                decision_data = json.loads(json_match.group().strip())
+                
+                return AITradeDecision(
+                    ticker=data['ticker'],
+                    action=decision_data.get('action', 'hold'),
+                    confidence=int(decision_data.get('confidence', 50)),
+                    reason=decision_data.get('reason', ''),
+                    target_price=decision_data.get('target_price'),
+                    stop_loss=decision_data.get('stop_loss'),
+                    amount_percent=100,
+                    timestamp=datetime.now().isoformat()
+                )
+                
         except Exception as e:
             print(f"[{datetime.now()}] ⚠️ AI 매도 타이밍 분석 실패: {e}")
             return None
     
     async def _check_exit_positions(self):
-        """포지션 청산 체크 - 5% 이상 수익 시 AI 매도 타이밍 분석"""
+        """포지션 청산 체크 - 5% 이상 수익 시 AI 매도 타이밍 분석
+
+        손절/익절/트레일링 스탑은 청산 엔진이 체결가마다 처리하고, 여기서는 조회한 현재가를
+        엔진에 넣어(스트림이 끊겼을 때 대비) AI 매도 판단과 상태 기록만 담당
+        """
         positions_to_close = []
         
         # ===== 새로운 매도 전략 설정 =====
         MIN_PROFIT_FOR_AI_ANALYSIS = 5.0  # AI 분석 시작 기준: 5% 이상
-        MIN_PROFIT_FOR_TRAILING = 5.0     # 트레일링 스탑 활성화: 5% 이상
-        STOP_LOSS_PCT = -3.0              # 손절: -3%
-        TARGET_PROFIT = 10.0              # 목표 수익률: 10%
         MIN_HOLDING_SECONDS = 300         # 최소 5분 보유
         
+        # 청산된 종목의 스트리밍 지표 정리
+        for ticker in list(self._exit_indicators):
+            if ticker not in self.positions:
+                del self._exit_indicators[ticker]
+        
         # 매도 스크리닝 시작 로그
         if self.positions:
             self.add_activity("exit_scan", f"📤 매도 스크리닝: {len(self.positions)}개 포지션 체크 (5% 이상 시 AI 분석)", {"positions": list(self.positions.keys())})
@@ -1307,124 +1467,72 @@ RSI(14): {data['rsi']:.1f}
             ai_decided = False
             
             try:
-                current_price = self.client.get_current_price(ticker)
+                current_price = await asyncio.to_thread(self.client.get_current_price, ticker)
                 if not current_price or current_price <= 0:
                     continue
                 
+                # 진행 중 5분봉에 현재가 반영 (O(1))
+                if ticker in self._exit_indicators:
+                    self._exit_indicators[ticker].on_price(current_price)
+                
+                # 손절/익절/트레일링 판단 (발동 시 엔진이 매도 실행)
+                exit_engine.on_price(ticker, current_price)
+                rule = exit_engine.get_rule(self.EXIT_OWNER, ticker)
+                if rule is None:
+                    # 발동돼 매도 진행 중
+                    continue
+                
                 entry_price = pos['entry_price']
                 profit_rate = (current_price - entry_price) / entry_price * 100
+                max_profit = rule.max_profit if rule.max_profit is not None else profit_rate
+                trailing_stop = rule.trailing_stop
                 
                 # 보유 시간 계산
                 entry_time = datetime.fromisoformat(pos.get('entry_time', datetime.now().isoformat()))
                 holding_seconds = (datetime.now() - entry_time).total_seconds()
                 holding_minutes = holding_seconds / 60
                 
-                # 최고 수익률 기록 (None 처리)
-                max_profit = pos.get('max_profit') or profit_rate
-                if max_profit is None:
-                    max_profit = profit_rate
-                if profit_rate > max_profit:
-                    pos['max_profit'] = profit_rate
-                    max_profit = profit_rate
-                    # 신고점 도달 로그
-                    if max_profit >= 5.0:
-                        self.add_activity("new_high", f"🚀 {pos['coin_name']} 신고점: +{max_profit:.1f}%", {
-                            "ticker": ticker, "max_profit": max_profit
-                        })
-                
-                # ===== 1. 손절 조건 (항상 적용) =====
-                if profit_rate <= STOP_LOSS_PCT:
-                    should_exit = True
-                    exit_reason = f"⛔ 손절 ({profit_rate:+.2f}%)"
-                
-                # ===== 2. 목표 수익률 10% 도달 시 즉시 익절 =====
-                elif profit_rate >= TARGET_PROFIT:
-                    should_exit = True
-                    exit_reason = f"🎯 목표 수익 달성 ({profit_rate:+.2f}%)"
-                
-                # ===== 3. 5% 이상 수익 시 AI 분석 및 트레일링 스탑 =====
-                elif profit_rate >= MIN_PROFIT_FOR_AI_ANALYSIS:
-                    
-                    # 3-1. 트레일링 스탑 활성화/조정
-                    if 'trailing_stop' not in pos:
-                        # 5% 수익의 80% = 4% 보장으로 시작
-                        pos['trailing_stop'] = entry_price * (1 + profit_rate * 0.8 / 100)
-                        print(f"[{datetime.now()}] 📊 {pos['coin_name']}: 트레일링 스탑 활성화 @ +{profit_rate * 0.8:.1f}% (현재 +{profit_rate:.1f}%)")
-                        self.add_activity("trailing_active", f"📊 {pos['coin_name']} 트레일링 스탑 활성화 (현재 +{profit_rate:.1f}%)", {
-                            "ticker": ticker, "profit_rate": profit_rate, "trailing_stop": pos['trailing_stop']
-                        })
+                # ===== 5% 이상 수익 & 5분 이상 보유 시 AI 매도 타이밍 분석 =====
+                if profit_rate >= MIN_PROFIT_FOR_AI_ANALYSIS and holding_seconds >= MIN_HOLDING_SECONDS:
+                    # 기술적 지표 수집
+                    rsi_m5 = await asyncio.to_thread(self._live_rsi_m5, ticker, current_price)
+
+                    analysis_data = {
+                        'ticker': ticker,
+                        'coin_name': pos['coin_name'],
+                        'entry_price': entry_price,
+                        'current_price': current_price,
+                        'profit_rate': profit_rate,
+                        'holding_minutes': holding_minutes,
+                        'rsi': rsi_m5,
+                        'recent_trend': 0, # Placeholder
+                        'volume_trend': 1, # Placeholder
+                        'max_profit': max_profit,
+                        'entry_reason': pos.get('ai_reason', ''),
+                    }
                     
-                    # 트레일링 스탑 동적 조정 (수익률에 따라 보존율 증가)
-                    if max_profit >= MIN_PROFIT_FOR_TRAILING:
-                        if max_profit >= 10:
-                            protect_ratio = 0.85  # 10% 이상: 85% 보존 (8.5% 확보)
-                        elif max_profit >= 8:
-                            protect_ratio = 0.82  # 8% 이상: 82% 보존 (6.6% 확보)
-                        elif max_profit >= 6:
-                            protect_ratio = 0.80  # 6% 이상: 80% 보존 (4.8% 확보)
-                        else:
-                            protect_ratio = 0.78  # 5% 이상: 78% 보존 (3.9% 확보)
-                        
-                        new_stop = entry_price * (1 + (max_profit * protect_ratio) / 100)
-                        if new_stop > pos.get('trailing_stop', 0):
-                            pos['trailing_stop'] = new_stop
-                            db.update_position(ticker, {"max_profit": max_profit, "trailing_stop": new_stop})
+                    ai_sell_decision = await self._ai_analyze_sell_timing_logic(analysis_data)
                     
-                    # 3-2. 트레일링 스탑 발동 체크
-                    if pos.get('trailing_stop') and current_price <= pos['trailing_stop']:
+                    if ai_sell_decision and ai_sell_decision.action == "sell" and ai_sell_decision.confidence >= 70:
                         should_exit = True
-                        exit_reason = f"📉 트레일링 스탑 발동 ({profit_rate:+.2f}%, 최고 {max_profit:.1f}%)"
-                    
-                    # 3-3. AI 매도 타이밍 분석 (5% 이상 & 5분 이상 보유)
-                    elif holding_seconds >= MIN_HOLDING_SECONDS:
-                        # 기술적 지표 수집
-                        df_m5 = self.client.get_ohlcv(ticker, interval="minute5", count=30)
-                        rsi_m5 = 50
-                        if df_m5 is not None and len(df_m5) >= 14:
-                            delta = df_m5['close'].diff()
-                            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                            rs = gain / loss
-                            rsi_m5 = float((100 - (100 / (1 + rs))).iloc[-1])
-
-                        analysis_data = {
-                            'ticker': ticker,
-                            'coin_name': pos['coin_name'],
-                            'entry_price': entry_price,
-                            'current_price': current_price,
-                            'profit_rate': profit_rate,
-                            'holding_minutes': holding_minutes,
-                            'rsi': rsi_m5,
-                            'recent_trend': 0, # Placeholder
-                            'volume_trend': 1, # Placeholder
-                            'max_profit': max_profit,
-                            'entry_reason': pos.get('ai_reason', ''),
-                        }
-                        
-                        ai_sell_decision = await self._ai_analyze_sell_timing_logic(analysis_data)
-                        
-                        if ai_sell_decision and ai_sell_decision.action == "sell" and ai_sell_decision.confidence >= 70:
-                            should_exit = True
-                            exit_reason = f"🤖 AI 매도 결정 ({profit_rate:+.2f}%): {ai_sell_decision.reason}"
-                            ai_decided = True
-                        else:
-                            # AI가 홀딩 결정
-                            hold_reason = ai_sell_decision.reason if ai_sell_decision else '분석 대기'
-                            self.add_activity("ai_hold", f"🤖 {pos['coin_name']} AI 홀딩 (+{profit_rate:.1f}%): {hold_reason}", {
-                                "ticker": ticker, "profit_rate": profit_rate, "reason": hold_reason
-                            })
-                
-                # ===== 4. 5% 미만: 손절만 적용, 나머지는 홀딩 =====
-                # (위에서 이미 손절 조건 체크함)
+                        exit_reason = f"🤖 AI 매도 결정 ({profit_rate:+.2f}%): {ai_sell_decision.reason}"
+                        ai_decided = True
+                    else:
+                        # AI가 홀딩 결정
+                        hold_reason = ai_sell_decision.reason if ai_sell_decision else '분석 대기'
+                        self.add_activity("ai_hold", f"🤖 {pos['coin_name']} AI 홀딩 (+{profit_rate:.1f}%): {hold_reason}", {
+                            "ticker": ticker, "profit_rate": profit_rate, "reason": hold_reason
+                        })
                 
-                if should_exit:
+                # AI 분석 중 엔진이 먼저 청산했으면 건너뜀 (규칙을 먼저 제거한 쪽만 매도)
+                if should_exit and exit_engine.unregister(self.EXIT_OWNER, ticker):
                     positions_to_close.append((ticker, exit_reason, profit_rate, current_price))
                     self.add_activity("exit_decision", f"🔔 {pos['coin_name']} 매도 결정: {exit_reason}", {
                         "ticker": ticker, "profit_rate": round(profit_rate, 2),
                         "reason": exit_reason, "ai_decided": ai_decided,
                         "holding_min": round(holding_minutes, 1)
                     })
-                else:
+                elif not should_exit:
                     # 현재 상태 로그
                     status = "🟢 수익" if profit_rate >= 0 else "🔴 손실"
                     waiting_for = "AI 분석 대기" if profit_rate >= 5 else f"{5-profit_rate:.1f}% 더 필요"
@@ -1432,17 +1540,17 @@ RSI(14): {data['rsi']:.1f}
                     status_msg = f"{status} {pos['coin_name']}: {profit_rate:+.2f}% (보유 {holding_minutes:.0f}분)"
                     if max_profit >= 5:
                         status_msg += f" [최고 {max_profit:.1f}%]"
-                    if pos.get('trailing_stop'):
-                        trailing_pct = (pos['trailing_stop'] - entry_price) / entry_price * 100
+                    if trailing_stop:
+                        trailing_pct = (trailing_stop - entry_price) / entry_price * 100
                         status_msg += f" [트레일링 +{trailing_pct:.1f}%]"
                     
                     self.add_activity("position_status", status_msg, {
                         "ticker": ticker, "profit_rate": round(profit_rate, 2),
                         "holding_min": round(holding_minutes, 1),
                         "max_profit": round(max_profit, 2) if max_profit else 0,
-                        "trailing_stop": pos.get('trailing_stop'),
-                        "target_profit": TARGET_PROFIT,
-                        "stop_loss": STOP_LOSS_PCT,
+                        "trailing_stop": trailing_stop,
+                        "target_profit": self.EXIT_TARGET_PROFIT,
+                        "stop_loss": self.EXIT_STOP_LOSS_PCT,
                         "waiting_for": waiting_for
                     })
                     
@@ -1453,7 +1561,94 @@ RSI(14): {data['rsi']:.1f}
         
         # 청산 실행
         for ticker, reason, profit_rate, price in positions_to_close:
-            await self._execute_sell(ticker, reason, profit_rate, price)
+            with request_priority(PRIORITY_ORDER):
+                await self._execute_sell(ticker, reason, profit_rate, price)
+    
+    # ========== 청산 엔진 연동 ==========
+    
+    def _register_exit(self, ticker: str) -> bool:
+        """포지션 손절/익절/트레일링 스탑을 청산 엔진에 등록 (체결가마다 평가) - 다른 봇 소유면 False"""
+        pos = self.positions[ticker]
+        entry_price = pos['entry_price']
+        # 재시작 후 복원한 포지션도 이 봇 소유로 등록 (다른 봇의 매수/매도 차단)
+        amount = pos.get('amount') or 0
+        if not execution_router.claim(self.EXIT_OWNER, ticker, amount, entry_price * amount):
+            owner = execution_router.owner_of(ticker)
+            print(f"[{datetime.now()}] ⚠️ {pos['coin_name']} {owner} 보유 종목 - 포지션 관리 안 함")
+            del self.positions[ticker]
+            return False
+        exit_engine.register(
+            self.EXIT_OWNER, ticker, entry_price,
+            stop_loss=entry_price * (1 + self.EXIT_STOP_LOSS_PCT / 100),
+            take_profit=entry_price * (1 + self.EXIT_TARGET_PROFIT / 100),
+            trailing=self.EXIT_TRAILING,
+            on_exit=self._on_exit_triggered,
+            on_update=self._on_exit_updated,
+            trailing_stop=pos.get('trailing_stop'),
+            max_profit=pos.get('max_profit'),
+        )
+        return True
+    
+    async def _rearm_exit(self, ticker: str):
+        """매도 실패 후 잠시 뒤 청산 조건 재등록 (이미 넘어선 기준가라 바로 재등록하면 체결가마다 재발동)"""
+        await asyncio.sleep(self.EXIT_RETRY_DELAY)
+        if self.is_running and ticker in self.positions:
+            self._register_exit(ticker)
+    
+    async def _on_exit_triggered(self, event: ExitEvent):
+        """청산 엔진 발동 → 즉시 매도"""
+        pos = self.positions.get(event.ticker)
+        if pos is None:
+            return
+        if event.reason == EXIT_STOP_LOSS:
+            reason = f"⛔ 손절 ({event.profit_rate:+.2f}%)"
+        elif event.reason == EXIT_TAKE_PROFIT:
+            reason = f"🎯 목표 수익 달성 ({event.profit_rate:+.2f}%)"
+        else:
+            reason = f"📉 트레일링 스탑 발동 ({event.profit_rate:+.2f}%, 최고 {event.max_profit or 0:.1f}%)"
+        
+        entry_time = datetime.fromisoformat(pos.get('entry_time', datetime.now().isoformat()))
+        holding_minutes = (datetime.now() - entry_time).total_seconds() / 60
+        self.add_activity("exit_decision", f"🔔 {pos['coin_name']} 매도 결정: {reason}", {
+            "ticker": event.ticker, "profit_rate": round(event.profit_rate, 2),
+            "reason": reason, "ai_decided": False,
+            "holding_min": round(holding_minutes, 1)
+        })
+        with request_priority(PRIORITY_ORDER):
+            await self._execute_sell(event.ticker, reason, event.profit_rate, event.price)
+    
+    def _on_exit_updated(self, rule: ExitRule):
+        """트레일링 스탑 변경 → 포지션/DB 반영"""
+        pos = self.positions.get(rule.ticker)
+        if pos is None or rule.trailing_stop is None:
+            return
+        if not pos.get('trailing_stop'):
+            profit_rate = rule.max_profit or 0
+            print(f"[{datetime.now()}] 📊 {pos['coin_name']}: 트레일링 스탑 활성화 @ ₩{rule.trailing_stop:,.0f} (최고 +{profit_rate:.1f}%)")
+            self.add_activity("trailing_active", f"📊 {pos['coin_name']} 트레일링 스탑 활성화 (현재 +{profit_rate:.1f}%)", {
+                "ticker": rule.ticker, "profit_rate": profit_rate, "trailing_stop": rule.trailing_stop
+            })
+        elif (rule.max_profit or 0) > (pos.get('max_profit') or 0):
+            # 신고점 도달 로그
+            self.add_activity("new_high", f"🚀 {pos['coin_name']} 신고점: +{rule.max_profit:.1f}%", {
+                "ticker": rule.ticker, "max_profit": rule.max_profit
+            })
+        pos['max_profit'] = rule.max_profit
+        pos['trailing_stop'] = rule.trailing_stop
+        db.update_position(rule.ticker, {"max_profit": rule.max_profit, "trailing_stop": rule.trailing_stop})
+    
+    def _live_rsi_m5(self, ticker: str, current_price: float) -> float:
+        """5분봉 RSI - 스트리밍 상태에 현재가를 잠정 반영 (처음/캔들 마감 시 캔들 캐시로 재시드)"""
+        state = self._exit_indicators.get(ticker)
+        if state is None or state.stale:
+            df_m5 = self.client.get_ohlcv(ticker, interval="minute5", count=30)
+            if df_m5 is None or len(df_m5) < 14:
+                return 50
+            state = state or CandleIndicators("minute5")
+            state.seed(df_m5)
+            self._exit_indicators[ticker] = state
+        rsi = state.on_price(current_price).get("rsi")
+        return 50 if rsi is None else float(rsi)
     
     def _get_take_profit_target(self) -> float:
         """전략별 익절 목표 (새 전략: 5% 이상에서 AI 분석, 10% 목표)"""
@@ -1599,30 +1794,20 @@ RSI(14): {data['rsi']:.1f}
         
         # 기술적 지표 수집
         try:
-            df = self.client.get_ohlcv(ticker, interval="minute5", count=50)
+            df = await asyncio.to_thread(self.client.get_ohlcv, ticker, interval="minute5", count=50)
             if df is None or len(df) < 30:
                 return None
             
             # RSI 계산
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = float((100 - (100 / (1 + rs))).iloc[-1])
+            rsi = float(ta.rsi(df['close'], 14)[-1])
             
             # 볼린저 밴드
-            middle = df['close'].rolling(window=20).mean()
-            std = df['close'].rolling(window=20).std()
-            upper = middle + (std * 2)
-            lower = middle - (std * 2)
-            bb_percent = ((current_price - float(lower.iloc[-1])) / (float(upper.iloc[-1]) - float(lower.iloc[-1])) * 100) if std.iloc[-1] > 0 else 50
+            upper, middle, lower = ta.bollinger(df['close'], 20)
+            bb_percent = ((current_price - float(lower[-1])) / (float(upper[-1]) - float(lower[-1])) * 100) if upper[-1] > lower[-1] else 50
             
             # MACD
-            exp12 = df['close'].ewm(span=12, adjust=False).mean()
-            exp26 = df['close'].ewm(span=26, adjust=False).mean()
-            macd = exp12 - exp26
-            signal = macd.ewm(span=9, adjust=False).mean()
-            macd_histogram = float((macd - signal).iloc[-1])
+            _, _, histogram = ta.macd(df['close'])
+            macd_histogram = float(histogram[-1])
             
             # 최근 5개 봉 추세
             recent_trend = "상승" if df['close'].iloc[-1] > df['close'].iloc[-5] else "하락"
@@ -1678,50 +1863,49 @@ MACD 히스토그램: {macd_histogram:.4f} (양수: 상승세, 음수: 하락세
         
         try:
             ssl_context = ssl.create_default_context(cafile=certifi.where())
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
             
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.post(
-                    f"{OPENROUTER_BASE_URL}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.ai_model_id,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.2,
-                        "max_tokens": 300
-                    },
-                    timeout=aiohttp.ClientTimeout(total=15)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result['choices'][0]['message']['content']
+            session = await bot_runtime.http_session("ai_scalper", ssl=ssl_context)
+            async with session.post(
+                f"{OPENROUTER_BASE_URL}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.ai_model_id,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.2,
+                    "max_tokens": 300
+                },
+                timeout=aiohttp.ClientTimeout(total=15)
+            ) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    content = result['choices'][0]['message']['content']
+                    
+                    # JSON 파싱
+                    json_match = re.search(r'\{.*\}', content, re.DOTALL)
+                    if json_match:
+                        decision = json.loads(json_match.group())
                         
-                        # JSON 파싱
-                        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                        if json_match:
-                            decision = json.loads(json_match.group())
-                            
-                            # 결정 로그
-                            action = "매도" if decision.get('should_sell') else "홀딩"
-                            self.add_activity("ai_sell_analysis", 
-                                f"🤖 {coin_name} AI 분석: {action} (신뢰도 {decision.get('confidence', 0)}%)", {
-                                "ticker": ticker,
-                                "should_sell": decision.get('should_sell'),
-                                "confidence": decision.get('confidence'),
-                                "reason": decision.get('reason'),
-                                "profit_rate": profit_rate,
-                                "rsi": rsi,
-                                "expected_move": decision.get('expected_move')
-                            })
-                            
-                            return decision
-                    else:
-                        print(f"[{datetime.now()}] ⚠️ AI 매도 분석 API 오류: {response.status}")
-                        return None
+                        # 결정 로그
+                        action = "매도" if decision.get('should_sell') else "홀딩"
+                        self.add_activity("ai_sell_analysis", 
+                            f"🤖 {coin_name} AI 분석: {action} (신뢰도 {decision.get('confidence', 0)}%)", {
+                            "ticker": ticker,
+                            "should_sell": decision.get('should_sell'),
+                            "confidence": decision.get('confidence'),
+                            "reason": decision.get('reason'),
+                            "profit_rate": profit_rate,
+                            "rsi": rsi,
+                            "expected_move": decision.get('expected_move')
+                        })
                         
+                        return decision
+                else:
+                    print(f"[{datetime.now()}] ⚠️ AI 매도 분석 API 오류: {response.status}")
+                    return None
+                    
         except Exception as e:
             print(f"[{datetime.now()}] ⚠️ AI 매도 타이밍 분석 실패: {e}")
             return None
@@ -1783,55 +1967,54 @@ RSI(14): {data['rsi']:.1f}
         
         try:
             ssl_context = ssl.create_default_context(cafile=certifi.where())
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
             
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.post(
-                    f"{OPENROUTER_BASE_URL}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.ai_model_id,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.2,
-                        "max_tokens": 400
-                    },
-                    timeout=aiohttp.ClientTimeout(total=25)
-                ) as response:
-                    if response.status != 200:
-                        return None
-                    
-                    result = await response.json()
-                    content = result['choices'][0]['message']['content'].strip()
-                    
-                    if content.startswith("```"):
-                        content = content.split("```")[1]
-                        if content.startswith("json"):
-                            content = content[4:]
-                    
-                    ai_response = json.loads(content)
-                    
-                    decision = AITradeDecision(
-                        ticker=ticker,
-                        action=ai_response.get('action', 'hold'),
-                        confidence=ai_response.get('confidence', 50),
-                        amount_percent=100,
-                        reason=ai_response.get('reason', ''),
-                        target_price=ai_response.get('target_price'),
-                        stop_loss=ai_response.get('stop_loss'),
-                        timestamp=datetime.now().isoformat()
-                    )
-                    
-                    self.ai_decisions.append(decision)
-                    
-                    emoji = "🔴" if decision.action == "sell" else "🟡"
-                    print(f"[{datetime.now()}] {emoji} AI 청산 분석 ({coin_name}): {decision.action.upper()} "
-                          f"(신뢰도: {decision.confidence}%) - {decision.reason[:50]}...")
-                    
-                    return decision
-                    
+            session = await bot_runtime.http_session("ai_scalper", ssl=ssl_context)
+            async with session.post(
+                f"{OPENROUTER_BASE_URL}/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.ai_model_id,
+                    "messages": [{"role": "user", "content": prompt}],
+                    "temperature": 0.2,
+                    "max_tokens": 400
+                },
+                timeout=aiohttp.ClientTimeout(total=25)
+            ) as response:
+                if response.status != 200:
+                    return None
+                
+                result = await response.json()
+                content = result['choices'][0]['message']['content'].strip()
+                
+                if content.startswith("```"):
+                    content = content.split("```")[1]
+                    if content.startswith("json"):
+                        content = content[4:]
+                
+                ai_response = json.loads(content)
+                
+                decision = AITradeDecision(
+                    ticker=ticker,
+                    action=ai_response.get('action', 'hold'),
+                    confidence=ai_response.get('confidence', 50),
+                    amount_percent=100,
+                    reason=ai_response.get('reason', ''),
+                    target_price=ai_response.get('target_price'),
+                    stop_loss=ai_response.get('stop_loss'),
+                    timestamp=datetime.now().isoformat()
+                )
+                
+                self.ai_decisions.append(decision)
+                
+                emoji = "🔴" if decision.action == "sell" else "🟡"
+                print(f"[{datetime.now()}] {emoji} AI 청산 분석 ({coin_name}): {decision.action.upper()} "
+                      f"(신뢰도: {decision.confidence}%) - {decision.reason[:50]}...")
+                
+                return decision
+                
         except Exception as e:
             print(f"[{datetime.now()}] ⚠️ AI 청산 분석 오류: {e}")
             return None
@@ -1842,7 +2025,7 @@ RSI(14): {data['rsi']:.1f}
             coin_name = ticker.replace("KRW-", "")
             
             # 투자금 계산
-            krw_balance = self.client.get_balance("KRW") or 0
+            krw_balance = (await asyncio.to_thread(self.client.get_balance, "KRW")) or 0
             invest_amount = min(
                 self.trade_amount * (decision.amount_percent / 100),
                 krw_balance * 0.95
@@ -1852,16 +2035,16 @@ RSI(14): {data['rsi']:.1f}
                 print(f"[{datetime.now()}] ⚠️ 투자금 부족: ₩{invest_amount:,.0f}")
                 return
             
-            # 시장가 매수
-            current_price = self.client.get_current_price(ticker) or decision.target_price or 0
-            result = self.client.buy_market_order(ticker, invest_amount)
+            # 시장가 매수 → 실행 라우터 (종목 잠금/한도) → 체결 확인 (평균 체결가/체결 수량 기준으로 포지션 기록)
+            fill = await execution_router.buy(self.EXIT_OWNER, ticker, invest_amount)
             
-            if result:
+            if fill.filled:
+                current_price = fill.avg_price
                 self.positions[ticker] = {
                     'ticker': ticker,
                     'coin_name': coin_name,
                     'entry_price': current_price,
-                    'amount': invest_amount / current_price if current_price > 0 else 0,
+                    'amount': fill.executed_volume,
                     'target_price': decision.target_price,
                     'stop_loss': decision.stop_loss,
                     'strategy': self.selected_strategy,
@@ -1876,8 +2059,8 @@ RSI(14): {data['rsi']:.1f}
                     action="buy",
                     strategy=self.selected_strategy,
                     price=current_price,
-                    amount=invest_amount / current_price if current_price > 0 else 0,
-                    total_krw=invest_amount,
+                    amount=fill.executed_volume,
+                    total_krw=fill.net_krw,
                     ai_reason=decision.reason,
                     ai_confidence=decision.confidence,
                     timestamp=datetime.now().isoformat()
@@ -1887,6 +2070,7 @@ RSI(14): {data['rsi']:.1f}
                 # DB 저장
                 db.save_trade(asdict(trade_log))
                 db.save_position(self.positions[ticker])
+                self._register_exit(ticker)
                 
                 print(f"[{datetime.now()}] 📝 거래 기록 저장 완료: {coin_name} 매수")
                 
@@ -1895,7 +2079,7 @@ RSI(14): {data['rsi']:.1f}
                     "ticker": ticker,
                     "coin_name": coin_name,
                     "price": current_price,
-                    "amount": invest_amount,
+                    "amount": fill.net_krw,
                     "confidence": decision.confidence,
                     "reason": decision.reason
                 })
@@ -1911,10 +2095,11 @@ RSI(14): {data['rsi']:.1f}
                         pass
                 
                 print(f"[{datetime.now()}] ✅ 매수 완료: {coin_name} @ ₩{current_price:,.0f} "
-                      f"(₩{invest_amount:,.0f}, 신뢰도: {decision.confidence}%)")
+                      f"(₩{fill.net_krw:,.0f}, 신뢰도: {decision.confidence}%, 체결 확인 {fill.latency_ms:.0f}ms)")
             else:
-                self.add_activity("error", f"{coin_name} 매수 실패", {"ticker": ticker})
-                print(f"[{datetime.now()}] ❌ 매수 실패: {coin_name}")
+                error_msg = fill.error or f"미체결 ({fill.state})"
+                self.add_activity("error", f"{coin_name} 매수 실패: {error_msg}", {"ticker": ticker})
+                print(f"[{datetime.now()}] ❌ 매수 실패: {coin_name} - {error_msg}")
                 
         except Exception as e:
             print(f"[{datetime.now()}] ❌ 매수 오류: {e}")
@@ -1924,6 +2109,8 @@ RSI(14): {data['rsi']:.1f}
         try:
             if ticker not in self.positions:
                 return
+            # 다른 경로로 매도하는 경우에도 청산 엔진 규칙 해제 (중복 매도 방지)
+            exit_engine.unregister(self.EXIT_OWNER, ticker)
             
             pos = self.positions[ticker]
             coin_name = pos['coin_name']
@@ -1931,10 +2118,11 @@ RSI(14): {data['rsi']:.1f}
             entry_price = pos['entry_price']
             
             # 매도 전 보유량 확인
-            balance = self.client.get_balance(currency) or 0
+            balance = (await asyncio.to_thread(self.client.get_balance, currency)) or 0
             if balance <= 0:
                 print(f"[{datetime.now()}] ⚠️ {coin_name} 잔고 없음, 포지션 강제 삭제")
                 if ticker in self.positions: del self.positions[ticker]
+                execution_router.release(self.EXIT_OWNER, ticker)
                 return
             
             # 최소 주문 금액(5000원) 확인
@@ -1944,33 +2132,20 @@ RSI(14): {data['rsi']:.1f}
                 print(f"[{datetime.now()}] ❌ {coin_name} 매도 실패: 5000원 미만 (약 ₩{estimated_value:,.0f})")
                 # 금액이 너무 작으면 그냥 포지션에서 제거 (관리가 무의미함)
                 if ticker in self.positions: del self.positions[ticker]
+                execution_router.release(self.EXIT_OWNER, ticker)
                 return
 
-            # 매도 전 KRW 잔고
-            krw_before = self.client.get_balance("KRW") or 0
+            # 시장가 매도 → 체결 확인 (잔고 차이 대신 실제 체결 내역으로 정산)
+            fill = await execution_router.sell(self.EXIT_OWNER, ticker, balance)
             
-            # 시장가 매도
-            result = self.client.sell_market_order(ticker, balance)
-            
-            if result and 'error' not in result:
-                # 잠시 대기 후 실제 체결 금액 확인
-                await asyncio.sleep(1.5)
-                
-                # 매도 후 KRW 잔고
-                krw_after = self.client.get_balance("KRW") or 0
-                
-                # 실제 체결 금액 = 매도 후 KRW - 매도 전 KRW
-                actual_sell_amount = krw_after - krw_before
-                
-                # 실제 체결 금액이 0 이하면 예상 금액 사용
-                if actual_sell_amount <= 0:
-                    actual_sell_amount = price * balance
-                
-                # 실제 체결 가격
-                actual_price = actual_sell_amount / balance if balance > 0 else price
+            if fill.filled:
+                sold_volume = fill.executed_volume
+                actual_price = fill.avg_price
+                # 실제 수령액 = 체결 금액 - 수수료
+                actual_sell_amount = fill.net_krw
                 
                 # 실제 수익 계산
-                buy_total = entry_price * balance
+                buy_total = entry_price * sold_volume
                 actual_profit = actual_sell_amount - buy_total
                 actual_profit_rate = (actual_profit / buy_total * 100) if buy_total > 0 else 0
                 
@@ -1981,7 +2156,7 @@ RSI(14): {data['rsi']:.1f}
                     action="sell",
                     strategy=pos.get('strategy', 'unknown'),
                     price=actual_price,
-                    amount=balance,
+                    amount=sold_volume,
                     total_krw=actual_sell_amount,
                     ai_reason=reason,
                     ai_confidence=0,
@@ -1993,9 +2168,8 @@ RSI(14): {data['rsi']:.1f}
                 )
                 self.trade_logs.append(trade_log)
                 
-                # DB 저장 및 포지션 청산
+                # DB 저장 (포지션 청산은 잔여 수량 확인 후)
                 db.save_trade(asdict(trade_log))
-                db.close_position(ticker)
                 db.update_daily_stats()
                 
                 print(f"[{datetime.now()}] 📝 거래 기록 저장 완료: {coin_name} 매도 ({actual_profit_rate:+.2f}%)")
@@ -2006,11 +2180,32 @@ RSI(14): {data['rsi']:.1f}
                 })
                 
                 print(f"[{datetime.now()}] {emoji} 매도 완료: {coin_name} ({actual_profit_rate:+.2f}%)")
+                
+                # 부분 체결 (체결 확인 시간 초과 등) - 남은 수량이 최소 주문 금액 이상이면 포지션 유지 후 재매도
+                remaining = max(balance - sold_volume, 0.0)
+                if remaining * actual_price >= MIN_ORDER_KRW and ticker in self.positions:
+                    pos['amount'] = remaining
+                    db.update_position(ticker, {"amount": remaining})
+                    print(f"[{datetime.now()}] ⚠️ {coin_name} 부분 체결 ({fill.state}) - 잔여 {remaining:.8f}개, "
+                          f"{self.EXIT_RETRY_DELAY:.0f}초 후 청산 조건 재등록")
+                    bot_runtime.submit(self._rearm_exit(ticker))
+                else:
+                    db.close_position(ticker)
+                    if ticker in self.positions: del self.positions[ticker]
+            elif fill.reject_reason == "owned":
+                # 다른 봇 소유 종목 - 이 봇이 매도할 포지션이 아님
+                self.add_activity("error", f"{coin_name} 매도 거부: {fill.error} - 포지션 관리 중단", {"ticker": ticker})
+                print(f"[{datetime.now()}] 🚫 매도 거부: {coin_name} - {fill.error} (포지션 관리 중단)")
                 if ticker in self.positions: del self.positions[ticker]
+                db.close_position(ticker)
             else:
-                error_msg = result.get('error', '알 수 없는 오류') if result else '주문 실패'
+                error_msg = fill.error or f"미체결 ({fill.state})"
                 self.add_activity("error", f"{coin_name} 매도 실패: {error_msg}", {"ticker": ticker})
-                print(f"[{datetime.now()}] ❌ 매도 실패: {coin_name} - {error_msg}")
+                print(f"[{datetime.now()}] ❌ 매도 실패: {coin_name} - {error_msg} "
+                      f"({self.EXIT_RETRY_DELAY:.0f}초 후 청산 조건 재등록)")
+                # 포지션이 남아 있으므로 잠시 뒤 청산 조건 재등록
+                if ticker in self.positions:
+                    bot_runtime.submit(self._rearm_exit(ticker))
                 
         except Exception as e:
             print(f"[{datetime.now()}] ❌ 매도 오류: {e}")
@@ -2027,3 +2222,6 @@ RSI(14): {data['rsi']:.1f}
 # 싱글톤 인스턴스
 ai_scalper = AIScalper()
 
+# 공유 스캔 서비스에 전략별 점수 섹션 등록
+scan_service.register("ai", ai_scalper.produce_scan, ai_scalper.view_scan)
+
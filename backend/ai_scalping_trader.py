@@ -8,10 +8,12 @@ import json
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from dataclasses import dataclass, asdict
-from threading import Thread, Event
 import time
 
 from upbit_client import upbit_client
+from scan_service import scan_service, Subscription
+from bot_runtime import bot_runtime
+from execution_router import execution_router
 from scalping_strategies import (
     scalping_scanner, 
     StrategyType, 
@@ -20,8 +22,8 @@ from scalping_strategies import (
 )
 
 # OpenRouter API 설정
-from config import OPENROUTER_API_KEY
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
+from config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL
+OPENROUTER_CHAT_URL = f"{OPENROUTER_BASE_URL}/chat/completions"
 
 # AI 모델
 AI_MODEL = "anthropic/claude-sonnet-4"
@@ -75,6 +77,8 @@ class TradeRecord:
 class AIScalpingTrader:
     """AI 기반 단타 자동매매 트레이더"""
     
+    ORDER_OWNER = "ai_scalping_trader"  # 실행 라우터 종목 소유자
+    
     def __init__(self):
         self.client = upbit_client
         self.scanner = scalping_scanner
@@ -86,6 +90,7 @@ class AIScalpingTrader:
         self.trade_amount: float = 10000
         self.max_positions: int = 3
         self.scan_interval: int = 60
+        self._scan_subscription: Optional[Subscription] = None  # 공유 스캔 서비스 구독
         
         # 기록
         self.positions: Dict[str, Position] = {}
@@ -94,10 +99,6 @@ class AIScalpingTrader:
         self.last_scan_time: Optional[str] = None
         self.last_ai_analysis: Optional[Dict] = None
         
-        # 스레드 관리
-        self._stop_event = Event()
-        self._thread: Optional[Thread] = None
-        
     def get_status(self) -> Dict[str, Any]:
         """현재 상태 조회"""
         strategy_info = None
@@ -151,9 +152,7 @@ class AIScalpingTrader:
             raise ValueError("전략을 먼저 선택하세요")
         
         self.is_running = True
-        self._stop_event.clear()
-        self._thread = Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        bot_runtime.start_bot("ai_scalping_trader", self._run)
         
         strategy_info = STRATEGIES[self.selected_strategy]
         return {
@@ -168,38 +167,43 @@ class AIScalpingTrader:
             return {"status": "not_running"}
         
         self.is_running = False
-        self._stop_event.set()
+        bot_runtime.stop_bot("ai_scalping_trader")
         
-        if self._thread:
-            self._thread.join(timeout=5)
+        # 공유 스캔 구독 해제
+        if self._scan_subscription is not None:
+            self._scan_subscription.close()
+            self._scan_subscription = None
         
         return {
             "status": "stopped",
             "message": "자동매매 중지됨"
         }
     
-    def _run_loop(self):
-        """자동매매 루프"""
+    async def _run(self):
+        """자동매매 루프 (봇 런타임 태스크 - 중지 시 취소됨)"""
         strategy_info = STRATEGIES[self.selected_strategy]
         print(f"[{datetime.now()}] 🤖 AI 단타 트레이더 시작 - 전략: {strategy_info.name_kr}")
         
-        while not self._stop_event.is_set():
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
+        try:
+            while self.is_running:
                 try:
                     # AI 분석 및 매매 실행
-                    loop.run_until_complete(self._ai_analyze_and_trade())
-                finally:
-                    loop.close()
+                    await self._ai_analyze_and_trade()
+                except Exception as e:
+                    print(f"[{datetime.now()}] ❌ AI 트레이딩 오류: {e}")
                 
-            except Exception as e:
-                print(f"[{datetime.now()}] ❌ AI 트레이딩 오류: {e}")
-            
-            self._stop_event.wait(self.scan_interval)
-        
-        print(f"[{datetime.now()}] 🛑 AI 단타 트레이더 종료")
+                await asyncio.sleep(self.scan_interval)
+        finally:
+            print(f"[{datetime.now()}] 🛑 AI 단타 트레이더 종료")
+    
+    async def _get_shared_scan(self) -> Dict[str, List[TradeSignal]]:
+        """공유 스캔 서비스에서 선택 전략의 시그널 조회 (오래됐으면 갱신, 작업 스레드에서 대기)"""
+        if self._scan_subscription is None or not self._scan_subscription.active:
+            self._scan_subscription = scan_service.subscribe(
+                "ai_scalping_trader", "signals", strategies=[self.selected_strategy.value]
+            )
+        self._scan_subscription.update([self.selected_strategy.value])
+        return await asyncio.to_thread(self._scan_subscription.get, self.scan_interval)
     
     async def _ai_analyze_and_trade(self):
         """AI 분석 및 매매 실행"""
@@ -207,7 +211,7 @@ class AIScalpingTrader:
         
         # 1. 전체 코인 스캔
         print(f"[{datetime.now()}] 📊 전체 코인 스캔 중...")
-        scan_results = await self.scanner.scan_all_strategies(self.selected_strategy)
+        scan_results = await self._get_shared_scan()
         self.last_scan_time = datetime.now().isoformat()
         
         # 선택된 전략의 시그널
@@ -216,8 +220,8 @@ class AIScalpingTrader:
         
         # 2. 현재 보유 포지션 정보
         current_positions_info = []
-        for ticker, pos in self.positions.items():
-            current_price = self.client.get_current_price(ticker) or pos.entry_price
+        for ticker, pos in list(self.positions.items()):
+            current_price = (await asyncio.to_thread(self.client.get_current_price, ticker)) or pos.entry_price
             profit_rate = (current_price - pos.entry_price) / pos.entry_price * 100
             current_positions_info.append({
                 "ticker": ticker,
@@ -230,7 +234,7 @@ class AIScalpingTrader:
             })
         
         # 3. 잔고 정보
-        krw_balance = self.client.get_balance("KRW") or 0
+        krw_balance = (await asyncio.to_thread(self.client.get_balance, "KRW")) or 0
         
         # 4. AI에게 분석 요청
         ai_decisions = await self._call_ai_for_decisions(
@@ -345,68 +349,67 @@ class AIScalpingTrader:
             ssl_context.check_hostname = False
             ssl_context.verify_mode = ssl.CERT_NONE
             
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                    "HTTP-Referer": "https://coinhero.app",
-                    "X-Title": "CoinHero AI Scalping Trader"
-                }
-                
-                payload = {
-                    "model": AI_MODEL,
-                    "messages": [
-                        {"role": "system", "content": "You are an expert cryptocurrency scalping trader AI. Always respond in valid JSON format."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "temperature": 0.3,
-                    "max_tokens": 2000
-                }
-                
-                async with session.post(
-                    OPENROUTER_BASE_URL,
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        content = data['choices'][0]['message']['content']
+            session = await bot_runtime.http_session("ai_scalping_trader", ssl=ssl_context)
+            headers = {
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+                "HTTP-Referer": "https://coinhero.app",
+                "X-Title": "CoinHero AI Scalping Trader"
+            }
+            
+            payload = {
+                "model": AI_MODEL,
+                "messages": [
+                    {"role": "system", "content": "You are an expert cryptocurrency scalping trader AI. Always respond in valid JSON format."},
+                    {"role": "user", "content": prompt}
+                ],
+                "temperature": 0.3,
+                "max_tokens": 2000
+            }
+            
+            async with session.post(
+                OPENROUTER_CHAT_URL,
+                headers=headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    content = data['choices'][0]['message']['content']
+                    
+                    # JSON 파싱
+                    try:
+                        # JSON 블록 추출
+                        if "```json" in content:
+                            json_str = content.split("```json")[1].split("```")[0]
+                        elif "```" in content:
+                            json_str = content.split("```")[1].split("```")[0]
+                        else:
+                            json_str = content
                         
-                        # JSON 파싱
-                        try:
-                            # JSON 블록 추출
-                            if "```json" in content:
-                                json_str = content.split("```json")[1].split("```")[0]
-                            elif "```" in content:
-                                json_str = content.split("```")[1].split("```")[0]
-                            else:
-                                json_str = content
-                            
-                            result = json.loads(json_str.strip())
-                            
-                            # AI 로그 저장
-                            self.ai_logs.append({
-                                "timestamp": datetime.now().isoformat(),
-                                "strategy": strategy_info.name_kr,
-                                "market_summary": result.get("market_summary", ""),
-                                "strategy_note": result.get("strategy_note", ""),
-                                "decisions": result.get("decisions", [])
-                            })
-                            
-                            print(f"[{datetime.now()}] 🧠 AI 분석 완료: {result.get('market_summary', '')[:50]}...")
-                            
-                            return result.get("decisions", [])
-                            
-                        except json.JSONDecodeError as e:
-                            print(f"[{datetime.now()}] ⚠️ AI 응답 파싱 실패: {e}")
-                            return []
-                    else:
-                        error = await response.text()
-                        print(f"[{datetime.now()}] ❌ AI API 오류: {response.status} - {error[:100]}")
-                        return []
+                        result = json.loads(json_str.strip())
+                        
+                        # AI 로그 저장
+                        self.ai_logs.append({
+                            "timestamp": datetime.now().isoformat(),
+                            "strategy": strategy_info.name_kr,
+                            "market_summary": result.get("market_summary", ""),
+                            "strategy_note": result.get("strategy_note", ""),
+                            "decisions": result.get("decisions", [])
+                        })
                         
+                        print(f"[{datetime.now()}] 🧠 AI 분석 완료: {result.get('market_summary', '')[:50]}...")
+                        
+                        return result.get("decisions", [])
+                        
+                    except json.JSONDecodeError as e:
+                        print(f"[{datetime.now()}] ⚠️ AI 응답 파싱 실패: {e}")
+                        return []
+                else:
+                    error = await response.text()
+                    print(f"[{datetime.now()}] ❌ AI API 오류: {response.status} - {error[:100]}")
+                    return []
+                    
         except Exception as e:
             print(f"[{datetime.now()}] ❌ AI 호출 실패: {e}")
             return []
@@ -460,22 +463,25 @@ class AIScalpingTrader:
     ):
         """매수 실행"""
         try:
-            krw_balance = self.client.get_balance("KRW") or 0
+            krw_balance = (await asyncio.to_thread(self.client.get_balance, "KRW")) or 0
             trade_amount = min(self.trade_amount * position_size, krw_balance * 0.95)
             
             if trade_amount < 5000:
                 print(f"[{datetime.now()}] ⚠️ 잔고 부족: {krw_balance:,.0f}원")
                 return
             
-            current_price = self.client.get_current_price(ticker)
+            current_price = await asyncio.to_thread(self.client.get_current_price, ticker)
             if not current_price:
                 print(f"[{datetime.now()}] ⚠️ 현재가 조회 실패: {ticker}")
                 return
             
-            # 시장가 매수
-            result = self.client.buy_market(ticker, trade_amount)
+            # 시장가 매수 (실행 라우터 경유 → 체결가 기준으로 포지션 기록)
+            fill = await execution_router.buy(self.ORDER_OWNER, ticker, trade_amount)
             
-            if result:
+            if fill.filled:
+                current_price = fill.avg_price
+                trade_amount = fill.net_krw
+                
                 # 기본 목표가/손절가 설정
                 if not target_price:
                     target_price = current_price * 1.03
@@ -488,7 +494,7 @@ class AIScalpingTrader:
                     coin_name=coin_name,
                     strategy=self.selected_strategy.value,
                     entry_price=current_price,
-                    amount=trade_amount / current_price,
+                    amount=fill.executed_volume,
                     target_price=target_price,
                     stop_loss=stop_loss,
                     entry_time=datetime.now().isoformat(),
@@ -503,7 +509,7 @@ class AIScalpingTrader:
                     action="buy",
                     strategy=self.selected_strategy.value,
                     price=current_price,
-                    amount=trade_amount / current_price,
+                    amount=fill.executed_volume,
                     total=trade_amount,
                     reason=f"AI 매수 신호",
                     ai_analysis=reason,
@@ -513,7 +519,7 @@ class AIScalpingTrader:
                 print(f"[{datetime.now()}] ✅ AI 매수 완료: {coin_name} @ ₩{current_price:,.0f}")
                 print(f"   📝 이유: {reason[:50]}...")
             else:
-                print(f"[{datetime.now()}] ❌ 매수 실패: {coin_name}")
+                print(f"[{datetime.now()}] ❌ 매수 실패: {coin_name} - {fill.error or fill.state}")
                 
         except Exception as e:
             print(f"[{datetime.now()}] ❌ 매수 오류: {e}")
@@ -527,19 +533,21 @@ class AIScalpingTrader:
             pos = self.positions[ticker]
             coin = ticker.replace("KRW-", "")
             
-            balance = self.client.get_balance(coin) or 0
+            balance = (await asyncio.to_thread(self.client.get_balance, coin)) or 0
             if balance <= 0:
                 del self.positions[ticker]
                 return
             
-            current_price = self.client.get_current_price(ticker)
+            current_price = await asyncio.to_thread(self.client.get_current_price, ticker)
             if not current_price:
                 return
             
             # 시장가 매도
-            result = self.client.sell_market(ticker, balance)
+            fill = await execution_router.sell(self.ORDER_OWNER, ticker, balance)
             
-            if result:
+            if fill.filled:
+                current_price = fill.avg_price
+                balance = fill.executed_volume
                 profit_rate = (current_price - pos.entry_price) / pos.entry_price * 100
                 profit = (current_price - pos.entry_price) * balance
                 
@@ -566,7 +574,7 @@ class AIScalpingTrader:
                 
                 del self.positions[ticker]
             else:
-                print(f"[{datetime.now()}] ❌ 매도 실패: {pos.coin_name}")
+                print(f"[{datetime.now()}] ❌ 매도 실패: {pos.coin_name} - {fill.error or fill.state}")
                 
         except Exception as e:
             print(f"[{datetime.now()}] ❌ 매도 오류: {e}")
@@ -586,14 +594,14 @@ class AIScalpingTrader:
         
         strategy_info = STRATEGIES[self.selected_strategy]
         
-        # 스캔
-        scan_results = await self.scanner.scan_all_strategies(self.selected_strategy)
+        # 스캔 (공유 스캔 결과)
+        scan_results = await self._get_shared_scan()
         signals = scan_results.get(self.selected_strategy.value, [])[:10]
         
         # 포지션 정보
         positions = []
-        for ticker, pos in self.positions.items():
-            current_price = self.client.get_current_price(ticker) or pos.entry_price
+        for ticker, pos in list(self.positions.items()):
+            current_price = (await asyncio.to_thread(self.client.get_current_price, ticker)) or pos.entry_price
             profit_rate = (current_price - pos.entry_price) / pos.entry_price * 100
             positions.append({
                 "ticker": ticker,
@@ -605,7 +613,7 @@ class AIScalpingTrader:
                 "stop_loss": pos.stop_loss
             })
         
-        krw_balance = self.client.get_balance("KRW") or 0
+        krw_balance = (await asyncio.to_thread(self.client.get_balance, "KRW")) or 0
         
         # AI 분석
         decisions = await self._call_ai_for_decisions(
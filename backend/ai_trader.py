@@ -8,17 +8,19 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from enum import Enum
-import threading
 import time
 
+import indicators as ta
 from upbit_client import upbit_client
+from bot_runtime import bot_runtime
+from execution_router import execution_router
 from strategies import calculate_bollinger_bands, calculate_macd, calculate_stochastic
 from market_analyzer import market_analyzer, MarketAnalysis, RecommendedStrategy
 
 
 # OpenRouter API 설정
-from config import OPENROUTER_API_KEY
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1/chat/completions"
+from config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL
+OPENROUTER_CHAT_URL = f"{OPENROUTER_BASE_URL}/chat/completions"
 
 # AI 모델 설정 (최신 버전)
 AI_MODELS = {
@@ -56,6 +58,8 @@ class AILog:
 class AITrader:
     """AI 기반 자동매매 트레이더"""
     
+    ORDER_OWNER = "ai_trader"  # 실행 라우터 종목 소유자
+    
     def __init__(self):
         self.client = upbit_client
         self.api_key = OPENROUTER_API_KEY
@@ -65,8 +69,6 @@ class AITrader:
         self.target_coins = ["KRW-BTC", "KRW-ETH", "KRW-XRP"]
         self.trade_amount = 10000
         self.check_interval = 300  # 5분마다 분석
-        self._thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
         self.log_id_counter = 0
         
         # 자동 전략 선택 모드
@@ -113,21 +115,20 @@ class AITrader:
             ssl_context.check_hostname = False
             ssl_context.verify_mode = ssl.CERT_NONE
             
-            connector = aiohttp.TCPConnector(ssl=ssl_context)
-            async with aiohttp.ClientSession(connector=connector) as session:
-                async with session.post(
-                    OPENROUTER_BASE_URL,
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data["choices"][0]["message"]["content"]
-                    else:
-                        error = await response.text()
-                        print(f"AI API 오류: {response.status} - {error}")
-                        return None
+            session = await bot_runtime.http_session("ai_trader", ssl=ssl_context)
+            async with session.post(
+                OPENROUTER_CHAT_URL,
+                headers=headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data["choices"][0]["message"]["content"]
+                else:
+                    error = await response.text()
+                    print(f"AI API 오류: {response.status} - {error}")
+                    return None
         except Exception as e:
             print(f"AI 호출 실패: {e}")
             return None
@@ -148,15 +149,11 @@ class AITrader:
         stoch = calculate_stochastic(df)
         
         # RSI 계산
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+        rsi = ta.rsi(df['close'], 14)
         
         # 이동평균
-        ma5 = df['close'].rolling(5).mean().iloc[-1]
-        ma20 = df['close'].rolling(20).mean().iloc[-1]
+        ma5 = ta.sma(df['close'], 5)[-1]
+        ma20 = ta.sma(df['close'], 20)[-1]
         
         # 최근 가격 변동
         price_change_24h = ((df['close'].iloc[-1] - df['close'].iloc[-2]) / df['close'].iloc[-2]) * 100
@@ -171,7 +168,7 @@ class AITrader:
             "high_24h": df['high'].iloc[-1],
             "low_24h": df['low'].iloc[-1],
             "indicators": {
-                "rsi": round(rsi.iloc[-1], 2) if not rsi.empty else None,
+                "rsi": round(float(rsi[-1]), 2) if len(rsi) else None,
                 "macd": round(macd['macd'].iloc[-1], 2),
                 "macd_signal": round(macd['signal'].iloc[-1], 2),
                 "macd_histogram": round(macd['histogram'].iloc[-1], 2),
@@ -188,21 +185,21 @@ class AITrader:
     
     async def analyze_and_decide(self, ticker: str) -> Optional[AILog]:
         """AI가 시장을 분석하고 거래 결정"""
-        market_data = self.get_market_data(ticker)
+        market_data = await asyncio.to_thread(self.get_market_data, ticker)
         if not market_data:
             return None
             
         # 보유량 확인 (API 키 만료 시 0으로 처리)
         coin = ticker.replace("KRW-", "")
-        balance = self.client.get_balance(coin) or 0
-        krw_balance = self.client.get_balance("KRW") or 0
+        balance = (await asyncio.to_thread(self.client.get_balance, coin)) or 0
+        krw_balance = (await asyncio.to_thread(self.client.get_balance, "KRW")) or 0
         has_position = balance > 0
         
         # 🆕 시장 상태 분석 (자동 전략 선택 모드)
         market_analysis_result = None
         strategy_recommendation = ""
         if self.auto_strategy_mode:
-            market_analysis_result = market_analyzer.analyze_ticker(ticker)
+            market_analysis_result = await asyncio.to_thread(market_analyzer.analyze_ticker, ticker)
             self.current_recommended_strategy = market_analysis_result.recommended_strategy.value
             self.last_strategy_analysis = datetime.now().isoformat()
             
@@ -325,34 +322,33 @@ class AITrader:
         coin = ticker.replace("KRW-", "")
         
         if log.decision == AIDecision.BUY:
-            krw_balance = self.client.get_balance("KRW") or 0
+            krw_balance = (await asyncio.to_thread(self.client.get_balance, "KRW")) or 0
             if krw_balance < self.trade_amount:
                 log.result = f"KRW 잔고 부족 (₩{krw_balance:,.0f})"
                 return False
                 
-            result = self.client.buy_market_order(ticker, self.trade_amount)
-            if 'error' not in result:
+            fill = await execution_router.buy(self.ORDER_OWNER, ticker, self.trade_amount)
+            if fill.filled:
                 log.executed = True
-                log.result = f"매수 성공: ₩{self.trade_amount:,}"
+                log.result = f"매수 성공: ₩{fill.net_krw:,.0f} @ ₩{fill.avg_price:,.0f}"
                 return True
             else:
-                log.result = f"매수 실패: {result.get('error')}"
+                log.result = f"매수 실패: {fill.error or fill.state}"
                 return False
                 
         elif log.decision == AIDecision.SELL:
-            balance = self.client.get_balance(coin) or 0
+            balance = (await asyncio.to_thread(self.client.get_balance, coin)) or 0
             if balance <= 0:
                 log.result = "보유량 없음"
                 return False
                 
-            result = self.client.sell_market_order(ticker, balance)
-            if 'error' not in result:
+            fill = await execution_router.sell(self.ORDER_OWNER, ticker, balance)
+            if fill.filled:
                 log.executed = True
-                current_price = self.client.get_current_price(ticker)
-                log.result = f"매도 성공: {balance} {coin} (≈₩{balance * current_price:,.0f})"
+                log.result = f"매도 성공: {fill.executed_volume} {coin} (₩{fill.net_krw:,.0f})"
                 return True
             else:
-                log.result = f"매도 실패: {result.get('error')}"
+                log.result = f"매도 실패: {fill.error or fill.state}"
                 return False
                 
         else:  # HOLD
@@ -365,9 +361,7 @@ class AITrader:
             return {"status": "already_running"}
             
         self.is_running = True
-        self._stop_event.clear()
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        bot_runtime.start_bot("ai_trader", self._run)
         
         return {"status": "started", "model": self.get_model_name()}
     
@@ -377,47 +371,34 @@ class AITrader:
             return {"status": "not_running"}
             
         self.is_running = False
-        self._stop_event.set()
-        
-        if self._thread:
-            self._thread.join(timeout=5)
-            self._thread = None
+        bot_runtime.stop_bot("ai_trader")
             
         return {"status": "stopped"}
     
-    def _run_loop(self):
-        """메인 분석 루프"""
+    async def _run(self):
+        """메인 분석 루프 (봇 런타임 태스크 - 중지 시 취소됨)"""
         print(f"[{datetime.now()}] AI 트레이딩 시작 - 모델: {self.get_model_name()}")
         
-        while not self._stop_event.is_set():
-            try:
-                # 각 코인에 대해 분석
-                for ticker in self.target_coins:
-                    if self._stop_event.is_set():
-                        break
-                        
-                    # 비동기 함수 실행
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    
-                    try:
-                        log = loop.run_until_complete(self.analyze_and_decide(ticker))
+        try:
+            while self.is_running:
+                try:
+                    # 각 코인에 대해 분석
+                    for ticker in self.target_coins:
+                        log = await self.analyze_and_decide(ticker)
                         if log:
                             # 결정 실행
-                            loop.run_until_complete(self.execute_decision(log))
+                            await self.execute_decision(log)
                             self.logs.append(log)
                             print(f"[{datetime.now()}] AI 분석 완료: {ticker} - {log.decision} ({log.confidence}%)")
-                    finally:
-                        loop.close()
+                            
+                        await asyncio.sleep(2)  # API 호출 간격
                         
-                    time.sleep(2)  # API 호출 간격
+                except Exception as e:
+                    print(f"[{datetime.now()}] AI 분석 오류: {e}")
                     
-            except Exception as e:
-                print(f"[{datetime.now()}] AI 분석 오류: {e}")
-                
-            self._stop_event.wait(self.check_interval)
-            
-        print(f"[{datetime.now()}] AI 트레이딩 종료")
+                await asyncio.sleep(self.check_interval)
+        finally:
+            print(f"[{datetime.now()}] AI 트레이딩 종료")
     
     def get_logs(self, limit: int = 50) -> List[Dict[str, Any]]:
         """AI 로그 조회"""
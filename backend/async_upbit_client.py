@@ -0,0 +1,379 @@
+"""
+비동기 업비트 API 클라이언트 모듈
+- 단일 aiohttp 세션(keep-alive 커넥션 풀) 위에서 시세/계좌/주문 API 제공
+- JWT 인증 (private API) 및 동시 요청 수 제한
+- 요청 스케줄러 지정 시 그룹별 요청 속도 제한 및 Remaining-Req 반영
+- 이벤트 루프를 막지 않도록 async 경로(스캐너, FastAPI 핸들러)에서 사용
+"""
+import asyncio
+import hashlib
+import uuid
+from typing import Optional, List, Dict, Any
+from urllib.parse import urlencode
+
+import aiohttp
+import jwt
+import pandas as pd
+
+from config import UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY, UPBIT_API_URL, UPBIT_MAX_CONCURRENCY
+from market_data import market_data_hub
+
+
+# 캔들 간격별 API 경로
+CANDLE_PATHS = {
+    "day": "/v1/candles/days",
+    "days": "/v1/candles/days",
+    "week": "/v1/candles/weeks",
+    "weeks": "/v1/candles/weeks",
+    "month": "/v1/candles/months",
+    "months": "/v1/candles/months",
+}
+for _unit in (1, 3, 5, 10, 15, 30, 60, 240):
+    CANDLE_PATHS[f"minute{_unit}"] = f"/v1/candles/minutes/{_unit}"
+    CANDLE_PATHS[f"minutes{_unit}"] = f"/v1/candles/minutes/{_unit}"
+
+# 캔들 API 1회 최대 조회 수
+CANDLE_PAGE_SIZE = 200
+
+
+def request_group(method: str, path: str) -> str:
+    """요청 경로로 업비트 요청 수 제한 그룹 판별 (quotation / exchange / order)"""
+    if path.startswith("/v1/order") and method.upper() in ("POST", "DELETE"):
+        return "order"
+    if path.startswith(("/v1/market", "/v1/ticker", "/v1/candles", "/v1/orderbook", "/v1/trades")):
+        return "quotation"
+    return "exchange"
+
+
+def request_key(method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                private: bool = False, access_key: str = "") -> tuple:
+    """요청 병합 키 (파라미터 순서 무관, 인증 요청은 API 키별로 구분)"""
+    items = tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+    return (method.upper(), path, items, access_key if private else "")
+
+
+def create_auth_headers(access_key: str, secret_key: str,
+                        query: Optional[Dict[str, Any]] = None) -> Dict[str, str]:
+    """업비트 private API 인증 헤더 생성 (JWT, HS256)"""
+    payload = {
+        "access_key": access_key,
+        "nonce": str(uuid.uuid4()),
+    }
+    if query:
+        query_string = urlencode(query, doseq=True).replace("%5B%5D=", "[]=")
+        payload["query_hash"] = hashlib.sha512(query_string.encode()).hexdigest()
+        payload["query_hash_alg"] = "SHA512"
+    token = jwt.encode(payload, secret_key, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+def candles_to_dataframe(candles: List[Dict[str, Any]]) -> pd.DataFrame:
+    """캔들 API 응답을 pyupbit 과 동일한 형식의 DataFrame 으로 변환"""
+    if not candles:
+        return pd.DataFrame()
+    df = pd.DataFrame(candles)
+    df = df.drop_duplicates(subset="candle_date_time_kst")
+    df.index = pd.to_datetime(df["candle_date_time_kst"])
+    df.index.name = None
+    df = df[["opening_price", "high_price", "low_price", "trade_price",
+             "candle_acc_trade_volume", "candle_acc_trade_price"]]
+    df.columns = ["open", "high", "low", "close", "volume", "value"]
+    return df.sort_index()
+
+
+class UpbitAPIError(Exception):
+    """업비트 API 오류 응답"""
+
+    def __init__(self, status: int, body: Any):
+        self.status = status
+        self.body = body
+        message = body
+        if isinstance(body, dict) and isinstance(body.get("error"), dict):
+            message = body["error"].get("message") or body["error"].get("name")
+        super().__init__(f"HTTP {status}: {message}")
+
+
+class AsyncUpbitClient:
+    """비동기 업비트 API 클라이언트"""
+
+    def __init__(self, access_key: str = UPBIT_ACCESS_KEY, secret_key: str = UPBIT_SECRET_KEY,
+                 base_url: str = UPBIT_API_URL, max_concurrency: int = UPBIT_MAX_CONCURRENCY,
+                 timeout: float = 10, scheduler=None, single_flight=None):
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.single_flight = single_flight
+
+        # 세션/세마포어는 생성된 이벤트 루프에 묶이므로 루프별로 보관
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # 통계
+        self.request_count = 0
+        self.error_count = 0
+        self.in_flight = 0
+
+    def set_keys(self, access_key: str, secret_key: str):
+        """API 키 변경"""
+        self._access_key = access_key
+        self._secret_key = secret_key
+
+    # ========== 세션 관리 ==========
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """현재 이벤트 루프의 공유 세션 반환 (없으면 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency * 2,
+                keepalive_timeout=60,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._session
+
+    async def close(self):
+        """세션 종료"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                       data: Optional[Dict[str, Any]] = None, private: bool = False,
+                       priority: Optional[int] = None, max_retries: int = 2) -> Any:
+        """공통 요청 처리 (오류 응답 시 UpbitAPIError, 429 시 백오프 후 재시도)"""
+        if self.single_flight is not None and method.upper() == "GET":
+            # 같은 자원에 대한 동시 조회는 하나의 요청으로 병합
+            key = request_key(method, path, params, private, self._access_key)
+            return await self.single_flight.do_async(
+                key, lambda: self._send(method, path, params, data, private, priority, max_retries)
+            )
+        return await self._send(method, path, params, data, private, priority, max_retries)
+
+    async def _send(self, method: str, path: str, params: Optional[Dict[str, Any]],
+                    data: Optional[Dict[str, Any]], private: bool, priority: Optional[int],
+                    max_retries: int) -> Any:
+        """실제 요청 전송"""
+        session = await self._get_session()
+        group = request_group(method, path)
+
+        for attempt in range(max_retries + 1):
+            if self.scheduler is not None:
+                await self.scheduler.acquire_async(group, priority)
+            headers = {"Accept": "application/json"}
+            if private:
+                headers.update(create_auth_headers(self._access_key, self._secret_key, data or params))
+
+            async with self._semaphore:
+                self.in_flight += 1
+                self.request_count += 1
+                try:
+                    async with session.request(method, f"{self.base_url}{path}",
+                                               params=params, json=data, headers=headers) as response:
+                        body = await response.json(content_type=None)
+                        status = response.status
+                        remaining_req = response.headers.get("Remaining-Req")
+                finally:
+                    self.in_flight -= 1
+
+            if self.scheduler is not None:
+                self.scheduler.record_response(group, status, remaining_req)
+            if status == 429 and attempt < max_retries:
+                continue
+            if status >= 400:
+                self.error_count += 1
+                raise UpbitAPIError(status, body)
+            return body
+
+    def get_stats(self) -> Dict[str, Any]:
+        """요청 통계"""
+        return {
+            "request_count": self.request_count,
+            "error_count": self.error_count,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+        }
+
+    # ========== 시세 조회 ==========
+
+    async def get_tickers(self, fiat: str = "KRW") -> List[str]:
+        """마켓 코드 목록 조회"""
+        try:
+            markets = await self._request("GET", "/v1/market/all", params={"isDetails": "false"})
+            return [m["market"] for m in markets if m["market"].startswith(f"{fiat}-")]
+        except Exception as e:
+            print(f"마켓 목록 조회 실패: {e}")
+            return []
+
+    async def get_ticker_data(self, tickers: List[str]) -> List[Dict[str, Any]]:
+        """현재가 원본 데이터 조회 (100개 단위로 나누어 동시 요청)"""
+        chunks = [tickers[i:i + 100] for i in range(0, len(tickers), 100)]
+        responses = await asyncio.gather(
+            *(self._request("GET", "/v1/ticker", params={"markets": ",".join(chunk)}) for chunk in chunks),
+            return_exceptions=True
+        )
+        result = []
+        for response in responses:
+            if isinstance(response, list):
+                result.extend(response)
+        return result
+
+    async def get_current_price(self, ticker: str) -> Optional[float]:
+        """현재가 조회 (실시간 시세 우선)"""
+        price = market_data_hub.get_price(ticker)
+        if price:
+            return price
+        try:
+            data = await self._request("GET", "/v1/ticker", params={"markets": ticker})
+            if data:
+                return float(data[0].get("trade_price", 0)) or None
+        except Exception as e:
+            print(f"현재가 조회 실패: {e}")
+        return None
+
+    async def get_current_prices(self, tickers: List[str]) -> Dict[str, float]:
+        """여러 코인 현재가 조회 (실시간 시세 우선, 없는 종목만 REST 조회)"""
+        prices = market_data_hub.get_prices(tickers)
+        missing = [t for t in tickers if t not in prices]
+        if missing:
+            try:
+                for item in await self.get_ticker_data(missing):
+                    prices[item["market"]] = float(item["trade_price"])
+            except Exception as e:
+                print(f"현재가 조회 실패: {e}")
+        return prices
+
+    async def get_ohlcv(self, ticker: str, interval: str = "day", count: int = 200,
+                        to: Optional[str] = None) -> pd.DataFrame:
+        """OHLCV 데이터 조회 (200개 초과 시 페이지 단위 조회)"""
+        path = CANDLE_PATHS.get(interval)
+        if path is None:
+            print(f"OHLCV 조회 실패: 지원하지 않는 간격 {interval}")
+            return pd.DataFrame()
+
+        candles: List[Dict[str, Any]] = []
+        try:
+            remaining = count
+            cursor = to
+            while remaining > 0:
+                params = {"market": ticker, "count": min(remaining, CANDLE_PAGE_SIZE)}
+                if cursor:
+                    params["to"] = cursor
+                page = await self._request("GET", path, params=params)
+                if not page:
+                    break
+                candles.extend(page)
+                remaining -= len(page)
+                if len(page) < params["count"]:
+                    break
+                # 다음 페이지: 가장 오래된 캔들 시각 이전 (UTC)
+                cursor = page[-1]["candle_date_time_utc"].replace("T", " ")
+        except Exception as e:
+            print(f"OHLCV 조회 실패: {e}")
+            if not candles:
+                return pd.DataFrame()
+        return candles_to_dataframe(candles)
+
+    async def get_orderbook(self, ticker: str) -> Dict[str, Any]:
+        """호가 정보 조회"""
+        try:
+            data = await self._request("GET", "/v1/orderbook", params={"markets": ticker})
+            return data[0] if data else {}
+        except Exception as e:
+            print(f"호가 조회 실패: {e}")
+            return {}
+
+    # ========== 잔고 조회 ==========
+
+    async def get_accounts(self) -> List[Dict[str, Any]]:
+        """계좌 원본 조회"""
+        try:
+            accounts = await self._request("GET", "/v1/accounts", private=True)
+            return accounts if isinstance(accounts, list) else []
+        except Exception as e:
+            print(f"잔고 조회 실패: {e}")
+            return []
+
+    async def get_balance(self, ticker: str = "KRW") -> float:
+        """잔고 조회"""
+        currency = ticker.split("-")[-1]
+        for account in await self.get_accounts():
+            if account.get("currency") == currency:
+                return float(account.get("balance", 0))
+        return 0.0
+
+    async def get_avg_buy_price(self, ticker: str) -> float:
+        """평균 매수가 조회"""
+        currency = ticker.split("-")[-1]
+        for account in await self.get_accounts():
+            if account.get("currency") == currency:
+                return float(account.get("avg_buy_price", 0))
+        return 0.0
+
+    # ========== 주문 ==========
+
+    async def _order(self, data: Dict[str, Any], label: str) -> Dict[str, Any]:
+        """주문 요청 공통 처리"""
+        try:
+            result = await self._request("POST", "/v1/orders", data=data, private=True, max_retries=0)
+            return result if result else {'error': '주문 실패'}
+        except Exception as e:
+            print(f"{label} 실패: {e}")
+            return {'error': str(e)}
+
+    async def buy_market_order(self, ticker: str, amount: float) -> Dict[str, Any]:
+        """시장가 매수 (amount: 매수 금액 KRW)"""
+        return await self._order(
+            {"market": ticker, "side": "bid", "price": str(amount), "ord_type": "price"},
+            "시장가 매수"
+        )
+
+    async def sell_market_order(self, ticker: str, volume: float) -> Dict[str, Any]:
+        """시장가 매도 (volume: 매도 수량)"""
+        return await self._order(
+            {"market": ticker, "side": "ask", "volume": str(volume), "ord_type": "market"},
+            "시장가 매도"
+        )
+
+    async def buy_limit_order(self, ticker: str, price: float, volume: float) -> Dict[str, Any]:
+        """지정가 매수"""
+        return await self._order(
+            {"market": ticker, "side": "bid", "volume": str(volume), "price": str(price), "ord_type": "limit"},
+            "지정가 매수"
+        )
+
+    async def sell_limit_order(self, ticker: str, price: float, volume: float) -> Dict[str, Any]:
+        """지정가 매도"""
+        return await self._order(
+            {"market": ticker, "side": "ask", "volume": str(volume), "price": str(price), "ord_type": "limit"},
+            "지정가 매도"
+        )
+
+    async def cancel_order(self, uuid: str) -> Dict[str, Any]:
+        """주문 취소"""
+        try:
+            result = await self._request("DELETE", "/v1/order", params={"uuid": uuid}, private=True, max_retries=0)
+            return result if result else {'error': '취소 실패'}
+        except Exception as e:
+            print(f"주문 취소 실패: {e}")
+            return {'error': str(e)}
+
+    async def get_order(self, uuid: str) -> Dict[str, Any]:
+        """주문 조회"""
+        try:
+            return await self._request("GET", "/v1/order", params={"uuid": uuid}, private=True) or {}
+        except Exception as e:
+            print(f"주문 조회 실패: {e}")
+            return {}
+
@@ -1,13 +1,16 @@
 """
 백테스트 모듈 - 다양한 매매 전략 테스트 (확장 버전)
 """
-import pyupbit
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Tuple
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+import indicators as ta
+from candle_store import candle_store, CandleDownloader
+from candle_panel import CandlePanel, build_panel
 
 class BacktestEngine:
     """백테스트 엔진"""
@@ -16,7 +19,17 @@ class BacktestEngine:
         self.initial_capital = initial_capital
         self.log_file = log_file
         self.results = {}
-        
+        self._downloader = None
+        # 전략마다 같은 데이터를 다시 읽지 않도록 (ticker, interval, days) 단위 보관
+        self._data_cache: Dict[Tuple[str, str, int], pd.DataFrame] = {}
+        
+    @property
+    def downloader(self) -> CandleDownloader:
+        """캔들 다운로더 (필요할 때 생성 - 프로세스 풀 작업자는 네트워크 클라이언트 불필요)"""
+        if self._downloader is None:
+            self._downloader = CandleDownloader(candle_store)
+        return self._downloader
+    
     def log(self, message: str):
         """로그 기록"""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -25,101 +38,73 @@ class BacktestEngine:
         with open(self.log_file, "a", encoding="utf-8") as f:
             f.write(log_line + "\n")
     
-    def get_historical_data(self, ticker: str, days: int = 7) -> pd.DataFrame:
-        """과거 데이터 조회 (분봉)"""
+    def get_historical_data(self, ticker: str, days: int = 7, interval: str = "minute60") -> pd.DataFrame:
+        """과거 데이터 조회 (로컬 캔들 저장소, 부족한 구간만 다운로드)"""
+        key = (ticker, interval, days)
+        if key in self._data_cache:
+            return self._data_cache[key]
+        
+        start = datetime.now() - timedelta(days=days)
         try:
-            df = pyupbit.get_ohlcv(ticker, interval="minute60", count=24 * days)
-            if df is None or len(df) < 10:
-                return None
-            return df
+            self.downloader.download(ticker, interval, start=start)
         except Exception as e:
-            self.log(f"데이터 조회 실패 ({ticker}): {e}")
-            return None
+            self.log(f"데이터 다운로드 실패 ({ticker}): {e} - 저장된 데이터 사용")
+        
+        df = candle_store.read(ticker, interval, start=start)
+        if df is None or len(df) < 10:
+            df = None
+        self._data_cache[key] = df
+        return df
     
     def calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """기술적 지표 계산"""
+        high, low, close, volume = df['high'], df['low'], df['close'], df['volume']
+        
         # RSI
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
+        df['rsi'] = ta.rsi(close, 14)
         
         # 볼린저 밴드
-        df['bb_middle'] = df['close'].rolling(window=20).mean()
-        df['bb_std'] = df['close'].rolling(window=20).std()
-        df['bb_upper'] = df['bb_middle'] + (df['bb_std'] * 2)
-        df['bb_lower'] = df['bb_middle'] - (df['bb_std'] * 2)
+        df['bb_upper'], df['bb_middle'], df['bb_lower'] = ta.bollinger(close, 20, 2)
+        df['bb_std'] = ta.rolling_std(close, 20)
         
         # 이동평균
-        df['ma5'] = df['close'].rolling(window=5).mean()
-        df['ma10'] = df['close'].rolling(window=10).mean()
-        df['ma20'] = df['close'].rolling(window=20).mean()
-        df['ma60'] = df['close'].rolling(window=60).mean()
+        df['ma5'] = ta.sma(close, 5)
+        df['ma10'] = ta.sma(close, 10)
+        df['ma20'] = ta.sma(close, 20)
+        df['ma60'] = ta.sma(close, 60)
         
         # MACD
-        exp1 = df['close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['close'].ewm(span=26, adjust=False).mean()
-        df['macd'] = exp1 - exp2
-        df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-        df['macd_hist'] = df['macd'] - df['macd_signal']
+        df['macd'], df['macd_signal'], df['macd_hist'] = ta.macd(close, 12, 26, 9)
         
         # ATR
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        df['atr'] = tr.rolling(window=14).mean()
+        df['atr'] = ta.atr(high, low, close, 14)
         
         # 거래량 이동평균
-        df['volume_ma'] = df['volume'].rolling(window=20).mean()
+        df['volume_ma'] = ta.sma(volume, 20)
         
         # 스토캐스틱
-        low_14 = df['low'].rolling(window=14).min()
-        high_14 = df['high'].rolling(window=14).max()
-        df['stoch_k'] = ((df['close'] - low_14) / (high_14 - low_14)) * 100
-        df['stoch_d'] = df['stoch_k'].rolling(window=3).mean()
+        df['stoch_k'], df['stoch_d'] = ta.stochastic(high, low, close, 14, 3)
         
         # Williams %R
-        df['williams_r'] = ((high_14 - df['close']) / (high_14 - low_14)) * -100
+        df['williams_r'] = ta.williams_r(high, low, close, 14)
         
         # CCI
-        tp = (df['high'] + df['low'] + df['close']) / 3
-        df['cci'] = (tp - tp.rolling(window=20).mean()) / (0.015 * tp.rolling(window=20).std())
+        df['cci'] = ta.cci(high, low, close, 20)
         
         # ADX
-        plus_dm = df['high'].diff()
-        minus_dm = df['low'].diff()
-        plus_dm[plus_dm < 0] = 0
-        minus_dm[minus_dm > 0] = 0
-        
-        tr14 = tr.rolling(window=14).sum()
-        plus_di = 100 * (plus_dm.rolling(window=14).sum() / tr14)
-        minus_di = 100 * (abs(minus_dm).rolling(window=14).sum() / tr14)
-        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-        df['adx'] = dx.rolling(window=14).mean()
-        df['plus_di'] = plus_di
-        df['minus_di'] = minus_di
+        df['adx'], df['plus_di'], df['minus_di'] = ta.adx(high, low, close, 14)
         
         # OBV
-        obv = [0]
-        for i in range(1, len(df)):
-            if df['close'].iloc[i] > df['close'].iloc[i-1]:
-                obv.append(obv[-1] + df['volume'].iloc[i])
-            elif df['close'].iloc[i] < df['close'].iloc[i-1]:
-                obv.append(obv[-1] - df['volume'].iloc[i])
-            else:
-                obv.append(obv[-1])
-        df['obv'] = obv
-        df['obv_ma'] = pd.Series(obv).rolling(window=20).mean().values
+        df['obv'] = ta.obv(close, volume)
+        df['obv_ma'] = ta.sma(df['obv'], 20)
         
         # 일목균형표
-        df['tenkan'] = (df['high'].rolling(window=9).max() + df['low'].rolling(window=9).min()) / 2
-        df['kijun'] = (df['high'].rolling(window=26).max() + df['low'].rolling(window=26).min()) / 2
+        df['tenkan'] = (ta.rolling_max(high, 9) + ta.rolling_min(low, 9)) / 2
+        df['kijun'] = (ta.rolling_max(high, 26) + ta.rolling_min(low, 26)) / 2
         
         # 피보나치
-        recent_high = df['high'].rolling(window=50).max()
-        recent_low = df['low'].rolling(window=50).min()
+        recent_high = ta.rolling_max(high, 50)
+        recent_low = ta.rolling_min(low, 50)
         diff = recent_high - recent_low
         df['fib_382'] = recent_high - diff * 0.382
         df['fib_618'] = recent_high - diff * 0.618
@@ -536,8 +521,8 @@ class BacktestEngine:
         close = df['close'].iloc[row_idx]
         # 간단한 VWAP 계산
         typical_price = (df['high'] + df['low'] + df['close']) / 3
-        vwap = (typical_price * df['volume']).rolling(20).sum() / df['volume'].rolling(20).sum()
-        current_vwap = vwap.iloc[row_idx]
+        vwap = ta.rolling_sum(typical_price * df['volume'], 20) / ta.rolling_sum(df['volume'], 20)
+        current_vwap = vwap[row_idx]
         rsi = df['rsi'].iloc[row_idx]
         
         if pd.isna(current_vwap): return "hold", ""
@@ -575,16 +560,18 @@ class BacktestEngine:
             if close < lower_band: return "sell", f"슈퍼트렌드 하향이탈"
         return "hold", ""
     
-    def run_backtest(self, ticker: str, strategy_func, strategy_name: str) -> Dict[str, Any]:
-        """단일 전략 백테스트 실행"""
+    def run_backtest(self, ticker: str, strategy_func, strategy_name: str,
+                     df: pd.DataFrame = None) -> Dict[str, Any]:
+        """단일 전략 백테스트 실행 (df 미지정 시 최근 7일 시간봉)"""
         self.log(f"\n{'='*60}")
         self.log(f"📊 [{strategy_name}] 백테스트 시작 - {ticker}")
         self.log(f"{'='*60}")
         
-        df = self.get_historical_data(ticker, days=7)
+        if df is None:
+            df = self.get_historical_data(ticker, days=7)
         if df is None: return None
         
-        df = self.calculate_indicators(df)
+        df = self.calculate_indicators(df.copy())
         
         capital = self.initial_capital
         position = {'holding': False, 'entry_price': 0, 'quantity': 0, 'entry_time': None}
@@ -651,12 +638,9 @@ class BacktestEngine:
         
         return result
     
-    def run_all_strategies(self, tickers: List[str] = None):
-        """모든 전략 백테스트 실행"""
-        if tickers is None:
-            tickers = ["KRW-BTC", "KRW-ETH", "KRW-XRP", "KRW-SOL", "KRW-DOGE"]
-        
-        strategies = [
+    def get_strategies(self) -> List[Tuple[Any, str]]:
+        """테스트 대상 전략 목록 (함수, 이름)"""
+        return [
             # 기본 전략
             (self.strategy_rsi_reversal, "RSI 반전"),
             (self.strategy_bollinger_bounce, "볼린저 반등"),
@@ -684,6 +668,13 @@ class BacktestEngine:
             (self.strategy_vwap, "VWAP"),
             (self.strategy_supertrend, "슈퍼트렌드"),
         ]
+    
+    def run_all_strategies(self, tickers: List[str] = None):
+        """모든 전략 백테스트 실행"""
+        if tickers is None:
+            tickers = ["KRW-BTC", "KRW-ETH", "KRW-XRP", "KRW-SOL", "KRW-DOGE"]
+        
+        strategies = self.get_strategies()
         
         # 로그 파일 초기화
         with open(self.log_file, "w", encoding="utf-8") as f:
@@ -708,6 +699,29 @@ class BacktestEngine:
                 if result:
                     all_results.append(result)
         
+        return self.report_results(all_results)
+    
+    def run_parallel(self, tickers: List[str], days: int = 7, interval: str = "minute60",
+                     workers: int = None) -> List[Dict[str, Any]]:
+        """종목별로 프로세스를 나누어 모든 전략 실행 (캔들 패널을 memmap 으로 공유)"""
+        start = datetime.now() - timedelta(days=days)
+        for ticker in tickers:
+            try:
+                self.downloader.download(ticker, interval, start=start)
+            except Exception as e:
+                self.log(f"데이터 다운로드 실패 ({ticker}): {e} - 저장된 데이터 사용")
+        
+        panel = CandlePanel(build_panel(tickers, interval, start=start))
+        all_results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            jobs = [(panel, ticker, self.initial_capital, self.log_file) for ticker in panel.tickers]
+            for results in executor.map(_run_ticker_strategies, jobs):
+                all_results.extend(results)
+        
+        return self.report_results(all_results)
+    
+    def report_results(self, all_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """결과 순위/전략별 평균 출력 및 JSON 저장"""
         # 결과 정렬
         all_results.sort(key=lambda x: x['total_return'], reverse=True)
         
@@ -765,6 +779,22 @@ class BacktestEngine:
         return all_results
 
 
+
+def _run_ticker_strategies(job: Tuple[Any, str, float, str]) -> List[Dict[str, Any]]:
+    """프로세스 풀 작업: 패널에서 한 종목만 꺼내 모든 전략 실행"""
+    panel, ticker, initial_capital, log_file = job
+    engine = BacktestEngine(initial_capital=initial_capital, log_file=log_file)
+    df = panel.to_frame(ticker)
+    if len(df) < 10:
+        return []
+    results = []
+    for strategy_func, strategy_name in engine.get_strategies():
+        result = engine.run_backtest(ticker, strategy_func, strategy_name, df=df)
+        if result:
+            results.append(result)
+    return results
+
+
 if __name__ == "__main__":
     engine = BacktestEngine(initial_capital=1_000_000)
     
@@ -0,0 +1,229 @@
+"""
+봇 런타임 모듈
+- 모든 자동매매 봇을 하나의 이벤트 루프에서 장기 실행 태스크로 실행 (봇 수만큼 스레드/루프를 만들지 않음)
+- 루프는 전용 스레드 하나(dedicated, 기본) 또는 FastAPI 서버 루프(app)
+- 시작/중지/취소: 중지는 태스크 취소 → 대기 중인 sleep/요청이 즉시 CancelledError로 끝남
+- 봇별 aiohttp 세션(keep-alive)을 루프 단위로 보관해 주기 사이에도 연결 재사용
+- 동기 코드는 asyncio.to_thread(기본 실행기, 스레드 수 상한 있음)로 실행
+"""
+import asyncio
+import concurrent.futures
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Callable, Awaitable, Tuple
+
+import aiohttp
+
+from config import BOT_RUNTIME_MODE
+
+
+class BotRuntime:
+    """봇 공용 이벤트 루프 + 봇 태스크 관리"""
+
+    def __init__(self, mode: str = BOT_RUNTIME_MODE):
+        self.mode = mode                    # dedicated | app
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._owned = False                 # 전용 루프를 직접 만들었는지
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._started_at: Dict[str, float] = {}
+        self._sessions: Dict[Tuple[int, str], Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+        self._cleanups: List[Callable[[], Awaitable[None]]] = []
+        self._lock = threading.Lock()
+
+        # 통계
+        self.starts = 0
+        self.stops = 0
+        self.crashes = 0
+
+    # ========== 루프 ==========
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """FastAPI 서버 루프에서 봇 실행 (mode == 'app'일 때 시작 시 호출)"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = loop
+                self._owned = False
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """봇 루프 (없으면 전용 스레드에 생성)"""
+        with self._lock:
+            if self._loop is not None and not self._loop.is_closed():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_forever, args=(loop,), daemon=True, name="BotRuntime")
+            self._loop = loop
+            self._owned = True
+            self._thread.start()
+            print(f"[{datetime.now()}] 🧵 봇 런타임 시작 (전용 이벤트 루프)")
+            return loop
+
+    @staticmethod
+    def _run_forever(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def _in_loop(self) -> bool:
+        """현재 스레드가 봇 루프를 실행 중인지"""
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def _call(self, fn: Callable[[], Any], timeout: float = 10) -> Any:
+        """봇 루프 스레드에서 fn 실행 후 결과 반환"""
+        if self._in_loop():
+            return fn()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def run():
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+
+        self._loop.call_soon_threadsafe(run)
+        return future.result(timeout=timeout)
+
+    # ========== 봇 태스크 ==========
+
+    def start_bot(self, name: str, factory: Callable[[], Awaitable[None]]) -> bool:
+        """봇 실행 태스크 시작 (이미 실행 중이면 False)"""
+        self._ensure_loop()
+
+        def spawn() -> bool:
+            task = self._tasks.get(name)
+            if task is not None and not task.done():
+                return False
+            self._tasks[name] = asyncio.get_running_loop().create_task(self._supervise(name, factory), name=f"bot:{name}")
+            self._started_at[name] = time.time()
+            self.starts += 1
+            return True
+
+        return self._call(spawn)
+
+    async def _supervise(self, name: str, factory: Callable[[], Awaitable[None]]):
+        """봇 코루틴 실행 - 예외로 끝나면 기록 (다른 봇에 영향 없음)"""
+        try:
+            await factory()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.crashes += 1
+            print(f"[BotRuntime] {name} 비정상 종료: {e}")
+
+    def stop_bot(self, name: str, timeout: float = 5) -> bool:
+        """봇 태스크 취소 - 다른 스레드에서 호출하면 종료까지 최대 timeout초 대기"""
+        if self._loop is None or self._loop.is_closed():
+            return False
+
+        def cancel() -> Optional[asyncio.Task]:
+            task = self._tasks.pop(name, None)
+            self._started_at.pop(name, None)
+            if task is None or task.done():
+                return None
+            task.cancel()
+            self.stops += 1
+            return task
+
+        task = self._call(cancel)
+        if task is None:
+            return False
+        if not self._in_loop():
+            try:
+                asyncio.run_coroutine_threadsafe(asyncio.wait({task}, timeout=timeout), self._loop).result(timeout + 1)
+            except Exception as e:
+                print(f"[BotRuntime] {name} 종료 대기 실패: {e}")
+        return True
+
+    def submit(self, coro: Awaitable[Any]):
+        """코루틴을 봇 루프에서 실행 (어느 스레드에서나 호출 가능) - Task 또는 Future 반환"""
+        loop = self._ensure_loop()
+        if self._in_loop():
+            return loop.create_task(coro)
+        return asyncio.run_coroutine_threadsafe(coro, loop)
+
+    def is_running(self, name: str) -> bool:
+        task = self._tasks.get(name)
+        return task is not None and not task.done()
+
+    # ========== HTTP 세션 ==========
+
+    async def http_session(self, name: str, ssl: Any = None) -> aiohttp.ClientSession:
+        """현재 루프의 이름별 공유 세션 (keep-alive 유지, 없으면 생성 - ssl은 생성 시에만 사용)"""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), name)
+        cached = self._sessions.get(key)
+        if cached is not None and cached[0] is loop and not cached[1].closed:
+            return cached[1]
+        connector = aiohttp.TCPConnector(keepalive_timeout=60, **({"ssl": ssl} if ssl is not None else {}))
+        session = aiohttp.ClientSession(connector=connector)
+        self._sessions[key] = (loop, session)
+        return session
+
+    def add_cleanup(self, fn: Callable[[], Awaitable[None]]):
+        """종료 시 봇 루프에서 실행할 정리 코루틴 등록 (봇 루프에 묶인 클라이언트 세션 등)"""
+        self._cleanups.append(fn)
+
+    async def close_sessions(self):
+        """현재 루프의 세션 종료 (봇 루프면 등록된 정리 작업도 실행)"""
+        loop = asyncio.get_running_loop()
+        if loop is self._loop:
+            for fn in self._cleanups:
+                try:
+                    await fn()
+                except Exception as e:
+                    print(f"[BotRuntime] 정리 작업 실패: {e}")
+        for key, (owner, session) in list(self._sessions.items()):
+            if owner is loop:
+                self._sessions.pop(key, None)
+                if not session.closed:
+                    await session.close()
+
+    # ========== 종료 / 상태 ==========
+
+    async def shutdown(self):
+        """모든 봇 취소, 세션 종료, 전용 루프 정지 (서버 종료 시)"""
+        for name in list(self._tasks.keys()):
+            if self._in_loop():
+                self.stop_bot(name)
+            else:
+                await asyncio.to_thread(self.stop_bot, name)
+        loop = self._loop
+        if self._owned and loop is not None and not loop.is_closed():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self.close_sessions(), loop))
+            loop.call_soon_threadsafe(loop.stop)
+            if self._thread:
+                await asyncio.to_thread(self._thread.join, 5)
+            self._loop = None
+            self._thread = None
+        await self.close_sessions()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """런타임 상태"""
+        now = time.time()
+        return {
+            "mode": self.mode,
+            "loop_running": self._loop is not None and self._loop.is_running(),
+            "dedicated_thread": self._owned,
+            "bots": {
+                name: {
+                    "running": not task.done(),
+                    "uptime_sec": round(now - self._started_at.get(name, now), 1),
+                }
+                for name, task in list(self._tasks.items())
+            },
+            "sessions": len(self._sessions),
+            "starts": self.starts,
+            "stops": self.stops,
+            "crashes": self.crashes,
+            "threads": threading.active_count(),
+        }
+
+
+# 싱글톤 인스턴스
+bot_runtime = BotRuntime()
@@ -0,0 +1,200 @@
+"""
+OHLCV 캔들 캐시 모듈
+- (ticker, interval) 별로 가장 긴 요청 구간을 보관하고 count 만큼 잘라서 제공
+- 갱신 시 마지막 캔들(진행 중일 수 있음) 이후 구간만 다시 조회해 병합
+- 로컬 캔들 저장소가 있으면 최초 조회 시 저장된 구간으로 시작하고 이후 구간만 조회
+- 적중/미스 통계 제공
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Callable, Tuple
+
+import pandas as pd
+
+from config import CANDLE_CACHE_TTL
+
+
+KST = timezone(timedelta(hours=9))
+
+# 캔들 간격별 길이 (초) - month 는 길이가 일정하지 않아 항상 전체 재조회
+INTERVAL_SECONDS = {
+    "minute1": 60,
+    "minute3": 180,
+    "minute5": 300,
+    "minute10": 600,
+    "minute15": 900,
+    "minute30": 1800,
+    "minute60": 3600,
+    "minute240": 14400,
+    "day": 86400,
+    "week": 604800,
+}
+
+# 한 번의 증분 조회로 가져올 최대 캔들 수 (업비트 캔들 API 1회 최대 200개)
+MAX_INCREMENTAL_COUNT = 200
+
+
+@dataclass
+class CandleEntry:
+    """캐시된 캔들 구간"""
+    df: pd.DataFrame
+    fetched_at: float          # 마지막 조회 시각 (time.monotonic)
+    complete: bool = False     # 상장 이후 전체 이력 보유 여부 (요청보다 짧게 응답된 경우)
+
+
+class CandleCache:
+    """(ticker, interval) 단위 증분 캔들 캐시"""
+
+    def __init__(self, fetcher: Callable[[str, str, int], Optional[pd.DataFrame]],
+                 ttl: float = CANDLE_CACHE_TTL, max_entries: int = 2000, store=None):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.store = store  # CandleStore (선택)
+
+        self._entries: "OrderedDict[Tuple[str, str], CandleEntry]" = OrderedDict()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.full_refreshes = 0
+        self.failures = 0
+        self.fetch_count = 0
+        self.rows_fetched = 0
+        self.warm_starts = 0
+
+    def get(self, ticker: str, interval: str = "day", count: int = 200) -> Optional[pd.DataFrame]:
+        """캔들 조회 (캐시 적중 시 네트워크 요청 없음)"""
+        key = (ticker, interval)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+
+            if entry is None or (len(entry.df) < count and not entry.complete):
+                self.misses += 1
+                window = max(count, len(entry.df) if entry else 0)
+                entry = self._load(ticker, interval, window)
+            elif now - entry.fetched_at > self.ttl:
+                entry = self._refresh(ticker, interval, entry)
+            else:
+                self.hits += 1
+
+            if entry is None:
+                self.failures += 1
+                return None
+
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._key_locks.pop(evicted, None)
+
+            return entry.df.iloc[-count:].copy()
+
+    def cached_length(self, ticker: str, interval: str) -> int:
+        """캐시에 보유 중인 캔들 수 (조회하지 않음)"""
+        entry = self._entries.get((ticker, interval))
+        return len(entry.df) if entry is not None else 0
+
+    def invalidate(self, ticker: Optional[str] = None, interval: Optional[str] = None):
+        """캐시 무효화 (인자 미지정 시 전체)"""
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if (ticker is None or key[0] == ticker) and (interval is None or key[1] == interval):
+                    del self._entries[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계"""
+        lookups = self.hits + self.misses + self.refreshes + self.full_refreshes
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "full_refreshes": self.full_refreshes,
+            "failures": self.failures,
+            "fetch_count": self.fetch_count,
+            "rows_fetched": self.rows_fetched,
+            "warm_starts": self.warm_starts,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0.0,
+            "ttl": self.ttl,
+        }
+
+    # ========== 내부 처리 ==========
+
+    def _fetch(self, ticker: str, interval: str, count: int) -> Optional[pd.DataFrame]:
+        """원본 조회"""
+        self.fetch_count += 1
+        try:
+            df = self.fetcher(ticker, interval, count)
+        except Exception as e:
+            print(f"[CandleCache] {ticker} {interval} 조회 실패: {e}")
+            return None
+        if df is None or len(df) == 0:
+            return None
+        self.rows_fetched += len(df)
+        return df
+
+    def _load(self, ticker: str, interval: str, window: int, use_store: bool = True) -> Optional[CandleEntry]:
+        """전체 구간 조회 (저장소에 충분한 구간이 있으면 저장소 + 증분 조회)"""
+        if use_store and self.store is not None and interval in INTERVAL_SECONDS:
+            entry = self._load_from_store(ticker, interval, window)
+            if entry is not None:
+                return entry
+        df = self._fetch(ticker, interval, window)
+        if df is None:
+            return None
+        return CandleEntry(df=df, fetched_at=time.monotonic(), complete=len(df) < window)
+
+    def _refresh(self, ticker: str, interval: str, entry: CandleEntry) -> Optional[CandleEntry]:
+        """증분 갱신: 마지막 캔들부터 현재까지만 조회해 병합"""
+        window = len(entry.df)
+        seconds = INTERVAL_SECONDS.get(interval)
+        last_ts = entry.df.index[-1]
+
+        if seconds is not None:
+            now_kst = datetime.now(KST).replace(tzinfo=None)
+            elapsed = max((now_kst - last_ts.to_pydatetime()).total_seconds(), 0)
+            # 마지막 캔들(진행 중일 수 있음) + 그 이후 새로 생긴 캔들
+            needed = int(elapsed // seconds) + 1
+            if needed < min(window, MAX_INCREMENTAL_COUNT):
+                fresh = self._fetch(ticker, interval, needed + 1)
+                if fresh is None:
+                    return None
+                # 거래가 없던 구간 등으로 마지막 캔들까지 닿지 못하면 전체 재조회
+                if fresh.index[0] <= last_ts:
+                    self.refreshes += 1
+                    merged = pd.concat([entry.df[entry.df.index < fresh.index[0]], fresh])
+                    if not entry.complete:
+                        merged = merged.iloc[-window:]
+                    return CandleEntry(df=merged, fetched_at=time.monotonic(), complete=entry.complete)
+
+        self.full_refreshes += 1
+        return self._load(ticker, interval, window, use_store=False)
+
+    def _load_from_store(self, ticker: str, interval: str, window: int) -> Optional[CandleEntry]:
+        """저장소의 최근 구간으로 시작해 이후 구간만 증분 조회"""
+        try:
+            meta = self.store.get_meta(ticker, interval)
+            if meta is None:
+                return None
+            complete = bool(meta.get("backfill_complete"))
+            df = self.store.tail(ticker, interval, window)
+        except Exception as e:
+            print(f"[CandleCache] {ticker} {interval} 저장소 조회 실패: {e}")
+            return None
+        if df is None or (len(df) < window and not complete):
+            return None
+        self.warm_starts += 1
+        # 저장 시점 이후 구간은 증분 갱신으로 채움 (공백이 길면 전체 재조회)
+        return self._refresh(ticker, interval, CandleEntry(df=df, fetched_at=0.0, complete=complete))
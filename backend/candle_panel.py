@@ -0,0 +1,188 @@
+"""
+캔들 패널 모듈
+- 로컬 캔들 저장소의 여러 종목을 공통 시간축에 정렬한 2차원 배열 (종목 × 시간) 파일로 생성
+- 읽기는 np.memmap(읽기 전용)으로 복사 없이 매핑 - 여러 프로세스가 같은 페이지 캐시를 공유
+- pickle 시 경로만 전달되므로 프로세스 풀 작업자에게 그대로 넘길 수 있음
+- 캔들이 없는 칸은 NaN
+- stack_frames: 메모리의 최근 캔들들을 오른쪽 정렬 블록으로 묶음 (전체 종목 스캔용)
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from candle_cache import INTERVAL_SECONDS
+from candle_store import CandleStore, candle_store, PRICE_COLUMNS, index_to_ts, ts_to_index
+
+
+PANEL_DTYPE = "<f8"
+
+
+def build_panel(tickers: List[str], interval: str, start: Optional[datetime] = None,
+                end: Optional[datetime] = None, path: Optional[str] = None,
+                store: CandleStore = candle_store) -> str:
+    """저장소 데이터로 정렬된 패널 파일 생성 - 패널 디렉터리 경로 반환"""
+    step = INTERVAL_SECONDS.get(interval)
+    if step is None:
+        raise ValueError(f"패널을 만들 수 없는 간격: {interval}")
+
+    series: Dict[str, Dict[str, np.ndarray]] = {}
+    for ticker in tickers:
+        arrays = store.load_arrays(ticker, interval, start, end)
+        if arrays is not None and len(arrays["ts"]) > 0:
+            series[ticker] = arrays
+    if not series:
+        raise ValueError("저장소에 해당 구간 캔들이 없습니다")
+
+    # 공통 시간축: 전체 종목의 처음~마지막 캔들을 간격 단위로 채움
+    first = min(int(a["ts"][0]) for a in series.values())
+    last = max(int(a["ts"][-1]) for a in series.values())
+    ts = np.arange(first, last + step, step, dtype=np.int64)
+    ordered = [t for t in tickers if t in series]
+
+    if path is None:
+        path = os.path.join(store.root, "panels", interval, f"{len(ordered)}_{first}_{last}")
+    tmp = path + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    np.save(os.path.join(tmp, "ts.npy"), ts)
+    for name in PRICE_COLUMNS:
+        panel = np.lib.format.open_memmap(os.path.join(tmp, f"{name}.npy"), mode="w+",
+                                          dtype=PANEL_DTYPE, shape=(len(ordered), len(ts)))
+        panel[:] = np.nan
+        for row, ticker in enumerate(ordered):
+            arrays = series[ticker]
+            # 간격 경계에 맞지 않는 캔들(상장 직후 등)은 속한 칸으로 내림
+            cols = (arrays["ts"] - first) // step
+            panel[row, cols] = arrays[name]
+        panel.flush()
+        del panel
+
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "tickers": ordered,
+            "interval": interval,
+            "step": step,
+            "rows": len(ordered),
+            "length": len(ts),
+            "columns": PRICE_COLUMNS,
+            "created_at": datetime.now().isoformat(),
+        }, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    print(f"[CandlePanel] 패널 생성: {len(ordered)}종목 × {len(ts):,}개 ({interval}) -> {path}")
+    return path
+
+
+def stack_frames(frames: Dict[str, pd.DataFrame], length: Optional[int] = None,
+                 columns: List[str] = PRICE_COLUMNS) -> Tuple[List[str], Dict[str, np.ndarray]]:
+    """종목별 최근 캔들 DataFrame -> 오른쪽 정렬 2차원 블록 (종목 × 시간)
+
+    마지막 열이 각 종목의 최신 캔들, 길이가 모자란 종목은 앞쪽을 NaN으로 채움
+    """
+    tickers = [t for t, df in frames.items() if df is not None and len(df) > 0]
+    if length is None:
+        length = max((len(frames[t]) for t in tickers), default=0)
+    block = {name: np.full((len(tickers), length), np.nan) for name in columns}
+    for row, ticker in enumerate(tickers):
+        df = frames[ticker]
+        n = min(len(df), length)
+        if n == 0:
+            continue
+        for name in columns:
+            block[name][row, length - n:] = df[name].to_numpy(dtype=np.float64)[-n:]
+    return tickers, block
+
+
+class CandlePanel:
+    """읽기 전용 memmap 캔들 패널 (종목 × 시간)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.tickers: List[str] = meta["tickers"]
+        self.interval: str = meta["interval"]
+        self.step: int = meta["step"]
+        self._row = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.ts = np.load(os.path.join(path, "ts.npy"), mmap_mode="r")
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in meta["columns"]
+        }
+
+    # 프로세스 간 전달 시 배열 대신 경로만 직렬화
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.tickers), len(self.ts)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """시간축 (KST)"""
+        return ts_to_index(self.ts)
+
+    def row(self, ticker: str) -> int:
+        return self._row[ticker]
+
+    def bounds(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[int, int]:
+        """시간 구간 -> 열 범위 [lo, hi)"""
+        lo = 0 if start is None else int(np.searchsorted(self.ts, index_to_ts([pd.Timestamp(start)])[0], "left"))
+        hi = len(self.ts) if end is None else int(np.searchsorted(self.ts, index_to_ts([pd.Timestamp(end)])[0], "right"))
+        return lo, hi
+
+    def column(self, name: str, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> np.ndarray:
+        """2차원 컬럼 뷰 (종목 × 시간, 복사 없음)"""
+        lo, hi = self.bounds(start, end)
+        return self._columns[name][:, lo:hi]
+
+    def series(self, ticker: str, name: str, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> np.ndarray:
+        """단일 종목 1차원 뷰 (복사 없음)"""
+        lo, hi = self.bounds(start, end)
+        return self._columns[name][self._row[ticker], lo:hi]
+
+    def window(self, start: Optional[datetime] = None,
+               end: Optional[datetime] = None) -> Dict[str, np.ndarray]:
+        """시간 구간의 전체 컬럼 뷰"""
+        lo, hi = self.bounds(start, end)
+        views = {name: array[:, lo:hi] for name, array in self._columns.items()}
+        views["ts"] = self.ts[lo:hi]
+        return views
+
+    def to_frame(self, ticker: str, start: Optional[datetime] = None,
+                 end: Optional[datetime] = None, dropna: bool = True) -> pd.DataFrame:
+        """단일 종목 DataFrame (pyupbit 형식, 이 종목 구간만 복사)"""
+        lo, hi = self.bounds(start, end)
+        row = self._row[ticker]
+        df = pd.DataFrame(
+            {name: np.array(self._columns[name][row, lo:hi]) for name in PRICE_COLUMNS},
+            index=ts_to_index(self.ts[lo:hi]),
+        )
+        return df.dropna(subset=["close"]) if dropna else df
+
+    def get_info(self) -> Dict[str, Any]:
+        """패널 요약"""
+        return {
+            "path": self.path,
+            "interval": self.interval,
+            "tickers": len(self.tickers),
+            "length": len(self.ts),
+            "first": str(ts_to_index(self.ts[:1])[0]) if len(self.ts) else None,
+            "last": str(ts_to_index(self.ts[-1:])[0]) if len(self.ts) else None,
+            "bytes": sum(array.nbytes for array in self._columns.values()),
+        }
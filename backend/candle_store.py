@@ -0,0 +1,412 @@
+"""
+과거 캔들 로컬 저장소 모듈
+- (ticker, interval) 별 디렉터리에 컬럼마다 고정 dtype 바이너리 파일 + meta.json 으로 저장
+- 시각 순으로 뒤에 이어 붙이기(append) 가능, 읽기는 np.memmap 으로 복사 없이 매핑
+- 업비트 캔들 API 의 to 파라미터로 과거 방향 페이지 조회 (중단 후 이어받기 지원)
+
+사용 예:
+    python candle_store.py download KRW-BTC KRW-ETH --interval minute1 --days 90
+    python candle_store.py info
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import CANDLE_STORE_DIR
+from candle_cache import INTERVAL_SECONDS, KST
+
+
+# 저장 컬럼과 dtype (ts: KST 기준 캔들 시작 시각, epoch 초)
+COLUMNS: Dict[str, str] = {
+    "ts": "<i8",
+    "open": "<f8",
+    "high": "<f8",
+    "low": "<f8",
+    "close": "<f8",
+    "volume": "<f8",
+    "value": "<f8",
+}
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume", "value"]
+
+# 저장 대상 간격 (업비트 캔들 API 기준)
+STORE_INTERVALS = ("minute1", "minute3", "minute5", "minute10", "minute15", "minute30",
+                   "minute60", "minute240", "day", "week")
+
+
+def index_to_ts(index: pd.Index) -> np.ndarray:
+    """KST DatetimeIndex -> epoch 초 (int64)"""
+    return pd.DatetimeIndex(index).values.astype("datetime64[s]").astype(np.int64)
+
+
+def ts_to_index(ts: np.ndarray) -> pd.DatetimeIndex:
+    """epoch 초 (int64) -> KST DatetimeIndex (pyupbit 와 동일하게 tz 없음)"""
+    return pd.DatetimeIndex(np.asarray(ts, dtype=np.int64).astype("datetime64[s]").astype("datetime64[ns]"))
+
+
+class CandleStore:
+    """컬럼 단위 캔들 저장소"""
+
+    META_FILE = "meta.json"
+
+    def __init__(self, root: str = CANDLE_STORE_DIR):
+        self.root = root
+        self._locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    # ========== 경로/메타 ==========
+
+    def _dir(self, ticker: str, interval: str) -> str:
+        return os.path.join(self.root, interval, ticker)
+
+    def _lock(self, ticker: str, interval: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault((ticker, interval), threading.Lock())
+
+    def get_meta(self, ticker: str, interval: str) -> Optional[Dict[str, Any]]:
+        """저장 메타 정보 (rows, first_ts, last_ts, backfill_complete 등)"""
+        path = os.path.join(self._dir(ticker, interval), self.META_FILE)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, directory: str, meta: Dict[str, Any]):
+        """메타 파일 교체 (임시 파일 작성 후 rename 으로 원자적 반영)"""
+        path = os.path.join(directory, self.META_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    def list_series(self) -> List[Tuple[str, str]]:
+        """저장된 (ticker, interval) 목록"""
+        result = []
+        if not os.path.isdir(self.root):
+            return result
+        for interval in sorted(os.listdir(self.root)):
+            interval_dir = os.path.join(self.root, interval)
+            if not os.path.isdir(interval_dir):
+                continue
+            for ticker in sorted(os.listdir(interval_dir)):
+                if os.path.exists(os.path.join(interval_dir, ticker, self.META_FILE)):
+                    result.append((ticker, interval))
+        return result
+
+    # ========== 쓰기 ==========
+
+    def write(self, ticker: str, interval: str, df: pd.DataFrame,
+              backfill_complete: Optional[bool] = None) -> int:
+        """캔들 저장 (마지막 시각 이후 구간은 append, 그 외에는 병합 후 재작성) - 저장 후 행 수 반환"""
+        if df is None or len(df) == 0:
+            meta = self.get_meta(ticker, interval)
+            if meta is not None and backfill_complete is not None:
+                meta["backfill_complete"] = backfill_complete
+                self._write_meta(self._dir(ticker, interval), meta)
+            return meta["rows"] if meta else 0
+
+        new = self._to_columns(df)
+        directory = self._dir(ticker, interval)
+        with self._lock(ticker, interval):
+            os.makedirs(directory, exist_ok=True)
+            meta = self.get_meta(ticker, interval)
+            self._repair(directory, meta)
+
+            rows = self._file_rows(directory)
+            if meta is None or rows == 0:
+                self._rewrite(directory, new)
+            else:
+                old_ts = np.memmap(os.path.join(directory, "ts.bin"), dtype=COLUMNS["ts"], mode="r", shape=(rows,))
+                last_ts = int(old_ts[-1])
+                cut = int(np.searchsorted(old_ts, new["ts"][0], side="left"))
+                del old_ts
+                if new["ts"][0] > last_ts:
+                    self._append(directory, new)
+                elif new["ts"][-1] >= last_ts:
+                    # 최근 구간 갱신: 겹치는 꼬리만 잘라내고 이어 붙임 (전체 재작성 없음)
+                    self._truncate(directory, cut)
+                    self._append(directory, new)
+                else:
+                    old = self._read_columns(directory, rows, mmap=False)
+                    self._rewrite(directory, self._merge(old, new))
+
+            rows = self._file_rows(directory)
+            ts = np.memmap(os.path.join(directory, "ts.bin"), dtype=COLUMNS["ts"], mode="r", shape=(rows,))
+            updated = {
+                "ticker": ticker,
+                "interval": interval,
+                "rows": rows,
+                "first_ts": int(ts[0]),
+                "last_ts": int(ts[-1]),
+                "backfill_complete": bool(meta.get("backfill_complete", False)) if meta else False,
+                "columns": COLUMNS,
+                "updated_at": datetime.now().isoformat(),
+            }
+            del ts
+            if backfill_complete is not None:
+                updated["backfill_complete"] = backfill_complete
+            self._write_meta(directory, updated)
+            return rows
+
+    def _to_columns(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """DataFrame -> 정렬/중복 제거된 컬럼 배열"""
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        columns = {"ts": index_to_ts(df.index)}
+        for name in PRICE_COLUMNS:
+            columns[name] = df[name].to_numpy(dtype=COLUMNS[name])
+        return columns
+
+    @staticmethod
+    def _merge(old: Dict[str, np.ndarray], new: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """같은 시각은 새 값 우선으로 병합"""
+        ts = np.concatenate([new["ts"], old["ts"]])
+        # 새 데이터를 앞에 두어 np.unique 의 첫 등장 위치가 새 값이 되도록 함
+        _, first = np.unique(ts, return_index=True)
+        return {name: np.concatenate([new[name], old[name]])[first] for name in COLUMNS}
+
+    def _append(self, directory: str, columns: Dict[str, np.ndarray]):
+        for name, dtype in COLUMNS.items():
+            with open(os.path.join(directory, f"{name}.bin"), "ab") as f:
+                f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+
+    def _rewrite(self, directory: str, columns: Dict[str, np.ndarray]):
+        for name, dtype in COLUMNS.items():
+            path = os.path.join(directory, f"{name}.bin")
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(np.ascontiguousarray(columns[name], dtype=dtype).tobytes())
+            os.replace(tmp, path)
+
+    def _truncate(self, directory: str, rows: int):
+        """모든 컬럼 파일을 rows 행 이하로 자름"""
+        for name, dtype in COLUMNS.items():
+            path = os.path.join(directory, f"{name}.bin")
+            expected = rows * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > expected:
+                with open(path, "r+b") as f:
+                    f.truncate(expected)
+
+    def _repair(self, directory: str, meta: Optional[Dict[str, Any]]):
+        """쓰기 도중 중단되어 길이가 어긋난 컬럼 파일을 모든 컬럼이 가진 행 수로 맞춤"""
+        rows = min(meta["rows"], self._file_rows(directory)) if meta else 0
+        self._truncate(directory, rows)
+
+    def _file_rows(self, directory: str) -> int:
+        """모든 컬럼 파일에 온전히 기록된 행 수"""
+        rows = []
+        for name, dtype in COLUMNS.items():
+            path = os.path.join(directory, f"{name}.bin")
+            rows.append(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0)
+        return min(rows)
+
+    # ========== 읽기 ==========
+
+    def _read_columns(self, directory: str, rows: int, mmap: bool = True) -> Dict[str, np.ndarray]:
+        rows = min(rows, self._file_rows(directory))
+        columns = {}
+        for name, dtype in COLUMNS.items():
+            path = os.path.join(directory, f"{name}.bin")
+            if rows == 0:
+                columns[name] = np.empty(0, dtype=dtype)
+            elif mmap:
+                columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+            else:
+                columns[name] = np.fromfile(path, dtype=dtype, count=rows)
+        return columns
+
+    def load_arrays(self, ticker: str, interval: str, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> Optional[Dict[str, np.ndarray]]:
+        """컬럼 배열 조회 (memmap 슬라이스, 복사 없음) - start/end 는 KST 기준 포함 구간"""
+        meta = self.get_meta(ticker, interval)
+        if meta is None or meta["rows"] == 0:
+            return None
+        columns = self._read_columns(self._dir(ticker, interval), meta["rows"])
+        lo, hi = 0, len(columns["ts"])
+        if start is not None:
+            lo = int(np.searchsorted(columns["ts"], index_to_ts([pd.Timestamp(start)])[0], side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(columns["ts"], index_to_ts([pd.Timestamp(end)])[0], side="right"))
+        return {name: array[lo:hi] for name, array in columns.items()}
+
+    def read(self, ticker: str, interval: str, start: Optional[datetime] = None,
+             end: Optional[datetime] = None) -> Optional[pd.DataFrame]:
+        """캔들 DataFrame 조회 (pyupbit.get_ohlcv 와 같은 컬럼/인덱스 형식)"""
+        columns = self.load_arrays(ticker, interval, start, end)
+        if columns is None or len(columns["ts"]) == 0:
+            return None
+        return pd.DataFrame(
+            {name: np.array(columns[name]) for name in PRICE_COLUMNS},
+            index=ts_to_index(columns["ts"]),
+        )
+
+    def tail(self, ticker: str, interval: str, count: int) -> Optional[pd.DataFrame]:
+        """최근 count 개 캔들 조회"""
+        meta = self.get_meta(ticker, interval)
+        if meta is None or meta["rows"] == 0:
+            return None
+        columns = self._read_columns(self._dir(ticker, interval), meta["rows"])
+        lo = max(len(columns["ts"]) - count, 0)
+        return pd.DataFrame(
+            {name: np.array(columns[name][lo:]) for name in PRICE_COLUMNS},
+            index=ts_to_index(columns["ts"][lo:]),
+        )
+
+    def get_info(self) -> List[Dict[str, Any]]:
+        """저장된 전체 시계열 요약"""
+        info = []
+        for ticker, interval in self.list_series():
+            meta = self.get_meta(ticker, interval)
+            if not meta:
+                continue
+            info.append({
+                "ticker": ticker,
+                "interval": interval,
+                "rows": meta["rows"],
+                "first": str(ts_to_index([meta["first_ts"]])[0]),
+                "last": str(ts_to_index([meta["last_ts"]])[0]),
+                "backfill_complete": meta.get("backfill_complete", False),
+            })
+        return info
+
+
+class CandleDownloader:
+    """과거 캔들 페이지 조회 후 저장소에 기록 (이어받기 지원)"""
+
+    def __init__(self, store: CandleStore,
+                 fetcher: Optional[Callable[..., Optional[pd.DataFrame]]] = None,
+                 chunk_size: int = 2000):
+        if fetcher is None:
+            from upbit_client import upbit_client
+            fetcher = upbit_client._fetch_ohlcv
+        self.store = store
+        self.fetcher = fetcher          # fetcher(ticker, interval, count, to=None) -> DataFrame (KST 인덱스)
+        self.chunk_size = chunk_size    # 한 번에 받아 저장하는 캔들 수 (중단 시 손실 범위)
+
+    @staticmethod
+    def _cursor(ts: int) -> str:
+        """저장된 KST 시각 -> to 파라미터 (UTC, 해당 캔들 미포함)"""
+        utc = datetime(1970, 1, 1) + timedelta(seconds=ts) - timedelta(hours=9)
+        return utc.strftime("%Y-%m-%d %H:%M:%S")
+
+    def download(self, ticker: str, interval: str, days: Optional[float] = None,
+                 start: Optional[datetime] = None) -> Dict[str, Any]:
+        """start(또는 최근 days 일)부터 현재까지 저장 - 이미 받은 구간은 건너뜀"""
+        if start is None and days is not None:
+            start = datetime.now(KST).replace(tzinfo=None) - timedelta(days=days)  # 저장 시각이 KST 기준
+        target_ts = int(index_to_ts([pd.Timestamp(start)])[0]) if start is not None else None
+        started = time.monotonic()
+        fetched = 0
+
+        meta = self.store.get_meta(ticker, interval)
+        if meta is not None and meta["rows"] > 0:
+            fetched += self._fetch_forward(ticker, interval, meta["last_ts"])
+        else:
+            # 처음 받는 경우 최신 구간 한 묶음으로 시작
+            df = self.fetcher(ticker, interval, self.chunk_size)
+            if df is None or len(df) == 0:
+                return {"ticker": ticker, "interval": interval, "fetched": 0, "rows": 0}
+            fetched += len(df)
+            self.store.write(ticker, interval, df, backfill_complete=len(df) < self.chunk_size)
+
+        fetched += self._fetch_backward(ticker, interval, target_ts)
+
+        meta = self.store.get_meta(ticker, interval) or {"rows": 0}
+        elapsed = time.monotonic() - started
+        print(f"[CandleDownloader] {ticker} {interval}: +{fetched}개, 총 {meta['rows']}개 ({elapsed:.1f}초)")
+        return {"ticker": ticker, "interval": interval, "fetched": fetched,
+                "rows": meta["rows"], "elapsed": round(elapsed, 2)}
+
+    def _fetch_forward(self, ticker: str, interval: str, last_ts: int) -> int:
+        """마지막 저장 캔들(진행 중이었을 수 있음) 이후 구간 조회"""
+        fetched = 0
+        frames = []
+        cursor = None
+        count = self.chunk_size
+        seconds = INTERVAL_SECONDS.get(interval)
+        if seconds is not None:
+            now_ts = int(index_to_ts([pd.Timestamp(datetime.now(KST).replace(tzinfo=None))])[0])
+            # 마지막 캔들 + 그 이후 생긴 캔들만큼만 요청
+            count = min(max((now_ts - last_ts) // seconds + 2, 2), self.chunk_size)
+        while True:
+            df = self.fetcher(ticker, interval, count, to=cursor)
+            if df is None or len(df) == 0:
+                break
+            frames.append(df)
+            fetched += len(df)
+            first_ts = int(index_to_ts(df.index[:1])[0])
+            if first_ts <= last_ts or len(df) < count:
+                break
+            cursor = self._cursor(first_ts)
+            count = self.chunk_size
+        if frames:
+            self.store.write(ticker, interval, pd.concat(frames))
+        return fetched
+
+    def _fetch_backward(self, ticker: str, interval: str, target_ts: Optional[int]) -> int:
+        """저장된 첫 캔들 이전 구간을 목표 시각(없으면 상장일)까지 조회"""
+        fetched = 0
+        while True:
+            meta = self.store.get_meta(ticker, interval)
+            if meta is None or meta.get("backfill_complete"):
+                break
+            if target_ts is not None and meta["first_ts"] <= target_ts:
+                break
+            df = self.fetcher(ticker, interval, self.chunk_size, to=self._cursor(meta["first_ts"]))
+            reached_listing = df is None or len(df) < self.chunk_size
+            fetched += len(df) if df is not None else 0
+            # 묶음마다 저장하므로 중단되어도 다음 실행 시 저장된 첫 캔들부터 이어받음
+            self.store.write(ticker, interval, df, backfill_complete=True if reached_listing else None)
+            if reached_listing:
+                break
+        return fetched
+
+
+# 싱글톤 인스턴스
+candle_store = CandleStore()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="업비트 과거 캔들 다운로드")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    download = sub.add_parser("download", help="과거 캔들 다운로드 (이어받기)")
+    download.add_argument("tickers", nargs="*", help="대상 마켓 (미지정 시 KRW 전체)")
+    download.add_argument("--interval", action="append", choices=STORE_INTERVALS,
+                          help="캔들 간격 (여러 번 지정 가능, 기본 minute60)")
+    download.add_argument("--days", type=float, default=30, help="최근 N일 (기본 30)")
+    download.add_argument("--all", action="store_true", help="상장일부터 전체")
+
+    sub.add_parser("info", help="저장 현황")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        for item in candle_store.get_info():
+            print(f"{item['interval']:>10} {item['ticker']:<12} {item['rows']:>9,}개  "
+                  f"{item['first']} ~ {item['last']}{'  (전체)' if item['backfill_complete'] else ''}")
+        return
+
+    tickers = args.tickers
+    if not tickers:
+        from upbit_client import upbit_client
+        tickers = upbit_client.get_tickers(fiat="KRW")
+    downloader = CandleDownloader(candle_store)
+    for interval in args.interval or ["minute60"]:
+        for ticker in tickers:
+            try:
+                downloader.download(ticker, interval, days=None if args.all else args.days)
+            except KeyboardInterrupt:
+                print("\n중단됨 - 다시 실행하면 이어서 받습니다")
+                return
+            except Exception as e:
+                print(f"[CandleDownloader] {ticker} {interval} 실패: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
 """
 전체 코인 스캐너 모듈
 업비트의 모든 KRW 마켓 코인을 스캔하여 조건에 맞는 코인을 찾습니다.
+- 패널 모드(기본): 전체 종목 일봉을 (종목 × 시간) 블록으로 묶어 지표/시그널/점수를 한 번에 계산,
+  상위 종목만 CoinScore로 변환
+- 종목별 모드: 종목마다 analyze_coin 실행 (기존 방식)
+- 두 모드 모두 캔들 조회 전에 시세 스냅샷의 24시간 거래대금으로 비유동 종목을 먼저 제외
+- 증분 스캔: 지난 스캔 이후 시세/캔들이 바뀐 종목만 다시 계산하고 나머지는 이전 점수 재사용
 """
 import pyupbit
 import pandas as pd
@@ -11,7 +16,12 @@ from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 
-from upbit_client import upbit_client
+import indicators as ta
+from upbit_client import upbit_client, request_priority, PRIORITY_SCAN
+from candle_panel import stack_frames
+from market_snapshot import MarketSnapshot
+from scan_state import IncrementalScanState
+from scan_service import scan_service
 from config import VOLATILITY_K, RSI_OVERSOLD, RSI_OVERBOUGHT
 
 
@@ -39,11 +49,16 @@ class CoinScanner:
         self.scan_results: List[CoinScore] = []
         self.last_scan: Optional[str] = None
         self.excluded_coins = ['KRW-USDT', 'KRW-USDC']  # 스테이블코인 제외
+        self.scan_stats: Dict[str, Any] = {}
+        # 사전 필터 기준 24시간 거래대금 (None이면 스캔의 min_volume 사용, 0이면 사전 필터 끔)
+        self.liquidity_threshold: Optional[float] = None
+        # 모드별 증분 스캔 상태 (종목별 이전 점수)
+        self.scan_states: Dict[str, IncrementalScanState] = {}
         
     def get_all_krw_tickers(self) -> List[str]:
         """모든 KRW 마켓 코인 목록 조회"""
         try:
-            tickers = pyupbit.get_tickers(fiat="KRW")
+            tickers = self.client.get_tickers(fiat="KRW")
             # 스테이블코인 제외
             return [t for t in tickers if t not in self.excluded_coins]
         except Exception as e:
@@ -53,35 +68,23 @@ class CoinScanner:
     def calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> float:
         """RSI 계산"""
         try:
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            return rsi.iloc[-1] if not pd.isna(rsi.iloc[-1]) else 50
+            return ta.last(ta.rsi(df['close'], period), 50)
         except:
             return 50
     
     def calculate_macd(self, df: pd.DataFrame) -> Tuple[float, float, float]:
         """MACD 계산"""
         try:
-            exp12 = df['close'].ewm(span=12, adjust=False).mean()
-            exp26 = df['close'].ewm(span=26, adjust=False).mean()
-            macd = exp12 - exp26
-            signal = macd.ewm(span=9, adjust=False).mean()
-            histogram = macd - signal
-            return macd.iloc[-1], signal.iloc[-1], histogram.iloc[-1]
+            macd, signal, histogram = ta.macd(df['close'])
+            return float(macd[-1]), float(signal[-1]), float(histogram[-1])
         except:
             return 0, 0, 0
     
     def calculate_bollinger_bands(self, df: pd.DataFrame, period: int = 20) -> Tuple[float, float, float]:
         """볼린저 밴드 계산"""
         try:
-            middle = df['close'].rolling(window=period).mean()
-            std = df['close'].rolling(window=period).std()
-            upper = middle + (std * 2)
-            lower = middle - (std * 2)
-            return upper.iloc[-1], middle.iloc[-1], lower.iloc[-1]
+            upper, middle, lower = ta.bollinger(df['close'], period)
+            return float(upper[-1]), float(middle[-1]), float(lower[-1])
         except:
             return 0, 0, 0
     
@@ -100,19 +103,92 @@ class CoinScanner:
     def calculate_moving_averages(self, df: pd.DataFrame) -> Dict[str, float]:
         """이동평균 계산"""
         try:
-            ma5 = df['close'].rolling(5).mean().iloc[-1]
-            ma10 = df['close'].rolling(10).mean().iloc[-1]
-            ma20 = df['close'].rolling(20).mean().iloc[-1]
-            ma60 = df['close'].rolling(60).mean().iloc[-1] if len(df) >= 60 else ma20
+            close = df['close']
+            ma5 = float(ta.sma(close, 5)[-1])
+            ma10 = float(ta.sma(close, 10)[-1])
+            ma20 = float(ta.sma(close, 20)[-1])
+            ma60 = float(ta.sma(close, 60)[-1]) if len(df) >= 60 else ma20
             return {'ma5': ma5, 'ma10': ma10, 'ma20': ma20, 'ma60': ma60}
         except:
             return {'ma5': 0, 'ma10': 0, 'ma20': 0, 'ma60': 0}
     
+    def _score_signals(self, signals: Dict[str, bool], rsi: float, volatility: float) -> Tuple[float, List[str]]:
+        """시그널 -> 점수 (0-100), 사유"""
+        # 점수 계산 (0-100)
+        score = 50  # 기본 점수
+        reasons = []
+        
+        # 변동성 돌파
+        if signals['volatility_breakout']:
+            score += 15
+            reasons.append("🔥 변동성 돌파 시그널")
+        
+        # RSI
+        if signals['rsi_oversold']:
+            score += 15
+            reasons.append(f"📉 RSI 과매도 ({rsi:.1f})")
+        elif signals['rsi_overbought']:
+            score -= 15
+            reasons.append(f"📈 RSI 과매수 ({rsi:.1f})")
+        elif 40 <= rsi <= 60:
+            score += 5
+            reasons.append(f"✅ RSI 중립 ({rsi:.1f})")
+        
+        # MACD
+        if signals['macd_bullish']:
+            score += 10
+            reasons.append("📊 MACD 상승 신호")
+        elif signals['macd_bearish']:
+            score -= 10
+        
+        # 이동평균
+        if signals['golden_cross']:
+            score += 15
+            reasons.append("⭐ 골든크로스 발생")
+        if signals['above_ma20']:
+            score += 5
+        
+        # 볼린저 밴드
+        if signals['bollinger_lower']:
+            score += 10
+            reasons.append("💎 볼린저 하단 터치")
+        elif signals['bollinger_upper']:
+            score -= 10
+        
+        # 거래량
+        if signals['volume_surge']:
+            score += 5
+            reasons.append("📈 거래량 급증")
+        
+        # 변동성 보너스/페널티
+        if 2 <= volatility <= 8:
+            score += 5
+            reasons.append(f"⚡ 적정 변동성 ({volatility:.1f}%)")
+        elif volatility > 15:
+            score -= 5
+        
+        # 점수 범위 제한
+        score = max(0, min(100, score))
+        return score, reasons
+    
+    @staticmethod
+    def _recommend(score: float) -> str:
+        """점수 -> 추천 등급"""
+        if score >= 75:
+            return 'strong_buy'
+        elif score >= 60:
+            return 'buy'
+        elif score >= 40:
+            return 'hold'
+        elif score >= 25:
+            return 'sell'
+        return 'strong_sell'
+    
     def analyze_coin(self, ticker: str) -> Optional[CoinScore]:
         """개별 코인 분석"""
         try:
             # OHLCV 데이터 조회
-            df = pyupbit.get_ohlcv(ticker, interval="day", count=100)
+            df = self.client.get_ohlcv(ticker, interval="day", count=100)
             if df is None or len(df) < 20:
                 return None
             
@@ -139,80 +215,15 @@ class CoinScanner:
                 'rsi_overbought': rsi > RSI_OVERBOUGHT,
                 'macd_bullish': macd_hist > 0 and macd > macd_signal,
                 'macd_bearish': macd_hist < 0 and macd < macd_signal,
-                'golden_cross': mas['ma5'] > mas['ma20'] and df['close'].iloc[-2] <= df['close'].rolling(20).mean().iloc[-2],
+                'golden_cross': mas['ma5'] > mas['ma20'] and df['close'].iloc[-2] <= ta.sma(df['close'], 20)[-2],
                 'above_ma20': current_price > mas['ma20'],
                 'bollinger_lower': current_price < bb_lower,
                 'bollinger_upper': current_price > bb_upper,
-                'volume_surge': df['volume'].iloc[-1] > df['volume'].rolling(20).mean().iloc[-1] * 1.5,
+                'volume_surge': df['volume'].iloc[-1] > ta.sma(df['volume'], 20)[-1] * 1.5,
             }
             
-            # 점수 계산 (0-100)
-            score = 50  # 기본 점수
-            reasons = []
-            
-            # 변동성 돌파
-            if signals['volatility_breakout']:
-                score += 15
-                reasons.append("🔥 변동성 돌파 시그널")
-            
-            # RSI
-            if signals['rsi_oversold']:
-                score += 15
-                reasons.append(f"📉 RSI 과매도 ({rsi:.1f})")
-            elif signals['rsi_overbought']:
-                score -= 15
-                reasons.append(f"📈 RSI 과매수 ({rsi:.1f})")
-            elif 40 <= rsi <= 60:
-                score += 5
-                reasons.append(f"✅ RSI 중립 ({rsi:.1f})")
-            
-            # MACD
-            if signals['macd_bullish']:
-                score += 10
-                reasons.append("📊 MACD 상승 신호")
-            elif signals['macd_bearish']:
-                score -= 10
-            
-            # 이동평균
-            if signals['golden_cross']:
-                score += 15
-                reasons.append("⭐ 골든크로스 발생")
-            if signals['above_ma20']:
-                score += 5
-            
-            # 볼린저 밴드
-            if signals['bollinger_lower']:
-                score += 10
-                reasons.append("💎 볼린저 하단 터치")
-            elif signals['bollinger_upper']:
-                score -= 10
-            
-            # 거래량
-            if signals['volume_surge']:
-                score += 5
-                reasons.append("📈 거래량 급증")
-            
-            # 변동성 보너스/페널티
-            if 2 <= volatility <= 8:
-                score += 5
-                reasons.append(f"⚡ 적정 변동성 ({volatility:.1f}%)")
-            elif volatility > 15:
-                score -= 5
-            
-            # 점수 범위 제한
-            score = max(0, min(100, score))
-            
-            # 추천 결정
-            if score >= 75:
-                recommendation = 'strong_buy'
-            elif score >= 60:
-                recommendation = 'buy'
-            elif score >= 40:
-                recommendation = 'hold'
-            elif score >= 25:
-                recommendation = 'sell'
-            else:
-                recommendation = 'strong_sell'
+            score, reasons = self._score_signals(signals, rsi, volatility)
+            recommendation = self._recommend(score)
             
             # 지표 저장
             indicators = {
@@ -245,40 +256,243 @@ class CoinScanner:
             print(f"{ticker} 분석 실패: {e}")
             return None
     
-    def scan_all_coins(self, min_volume: float = 1_000_000_000, max_workers: int = 10) -> List[CoinScore]:
+    def _analyze_for_scan(self, ticker: str) -> Optional[CoinScore]:
+        """스캔용 분석 (대량 스캔 우선순위로 요청)"""
+        with request_priority(PRIORITY_SCAN):
+            return self.analyze_coin(ticker)
+    
+    # ========== 패널 스캔 ==========
+    
+    def load_panel(self, tickers: List[str], count: int = 100,
+                   max_workers: int = 10) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """전체 종목 일봉을 오른쪽 정렬 (종목 × 시간) 블록으로 로드"""
+        def fetch(ticker: str):
+            try:
+                with request_priority(PRIORITY_SCAN):
+                    return ticker, self.client.get_ohlcv(ticker, interval="day", count=count)
+            except Exception as e:
+                print(f"{ticker} 캔들 조회 실패: {e}")
+                return ticker, None
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = dict(executor.map(fetch, tickers))
+        return stack_frames(frames, count)
+    
+    def score_panel(self, tickers: List[str], block: Dict[str, np.ndarray],
+                    min_volume: float = 0, top_k: Optional[int] = None) -> List[CoinScore]:
+        """블록 전체의 지표/시그널/점수를 벡터 연산으로 계산 - 상위 top_k개만 CoinScore 생성
+        
+        analyze_coin과 같은 지표, 시그널, 점수 규칙 (일봉 20개 미만 종목 제외)
+        """
+        close, high, low = block['close'], block['high'], block['low']
+        open_, volume = block['open'], block['volume']
+        if close.shape[1] < 2 or len(tickers) == 0:
+            return []
+        length = np.count_nonzero(~np.isnan(close), axis=1)
+        
+        with np.errstate(divide="ignore", invalid="ignore"):
+            current, prev = close[:, -1], close[:, -2]
+            volume_24h = volume[:, -1] * current
+            change_rate = (current - prev) / prev * 100
+            volatility = (high[:, -1] - low[:, -1]) / prev * 100
+            
+            # 지표 (각 종목의 마지막 값) - 이동 창 지표는 필요한 최근 구간만 계산, EMA는 전체 이력
+            recent = close[:, -61:]
+            rsi = ta.last(ta.rsi(close[:, -16:], 14), 50)
+            macd, macd_signal, macd_hist = (v[:, -1] for v in ta.macd(close))
+            bb_upper, bb_middle, bb_lower = (v[:, -1] for v in ta.bollinger(recent, 20))
+            target_price = open_[:, -1] + (high[:, -2] - low[:, -2]) * VOLATILITY_K
+            ma20_series = ta.sma(recent, 20)
+            ma20 = ma20_series[:, -1]
+            mas = {
+                'ma5': ta.sma(recent, 5)[:, -1],
+                'ma10': ta.sma(recent, 10)[:, -1],
+                'ma20': ma20,
+                'ma60': np.where(length >= 60, ta.sma(recent, 60)[:, -1], ma20),
+            }
+            
+            # 시그널 (불리언 마스크)
+            signals = {
+                'volatility_breakout': (target_price > 0) & (current > target_price),
+                'rsi_oversold': rsi < RSI_OVERSOLD,
+                'rsi_overbought': rsi > RSI_OVERBOUGHT,
+                'macd_bullish': (macd_hist > 0) & (macd > macd_signal),
+                'macd_bearish': (macd_hist < 0) & (macd < macd_signal),
+                'golden_cross': (mas['ma5'] > ma20) & (close[:, -2] <= ma20_series[:, -2]),
+                'above_ma20': current > ma20,
+                'bollinger_lower': current < bb_lower,
+                'bollinger_upper': current > bb_upper,
+                'volume_surge': volume[:, -1] > ta.sma(volume[:, -20:], 20)[:, -1] * 1.5,
+            }
+            
+            # 점수 (_score_signals와 같은 규칙)
+            score = 50 + 15 * signals['volatility_breakout']
+            score = score + np.select(
+                [signals['rsi_oversold'], signals['rsi_overbought'], (rsi >= 40) & (rsi <= 60)], [15, -15, 5], 0)
+            score = score + np.select([signals['macd_bullish'], signals['macd_bearish']], [10, -10], 0)
+            score = score + 15 * signals['golden_cross'] + 5 * signals['above_ma20']
+            score = score + np.select([signals['bollinger_lower'], signals['bollinger_upper']], [10, -10], 0)
+            score = score + 5 * signals['volume_surge']
+            score = score + np.select([(volatility >= 2) & (volatility <= 8), volatility > 15], [5, -5], 0)
+            score = np.clip(score, 0, 100)
+        
+        # 대상 종목 중 점수순 상위만 선택
+        eligible = np.flatnonzero((length >= 20) & (volume_24h >= min_volume))
+        if top_k is not None and top_k < len(eligible):
+            eligible = eligible[np.argpartition(-score[eligible], top_k)[:top_k]]
+        order = eligible[np.argsort(-score[eligible], kind="stable")]
+        
+        results = []
+        for i in order:
+            row_signals = {name: bool(mask[i]) for name, mask in signals.items()}
+            row_rsi, row_volatility = float(rsi[i]), float(volatility[i])
+            _, reasons = self._score_signals(row_signals, row_rsi, row_volatility)
+            row_score = float(score[i])
+            results.append(CoinScore(
+                ticker=tickers[i],
+                name=tickers[i].replace('KRW-', ''),
+                price=float(current[i]),
+                score=round(row_score, 1),
+                signals=row_signals,
+                indicators={
+                    'rsi': round(row_rsi, 2),
+                    'macd': round(float(macd[i]), 2),
+                    'macd_signal': round(float(macd_signal[i]), 2),
+                    'macd_hist': round(float(macd_hist[i]), 2),
+                    'bb_upper': round(float(bb_upper[i]), 0),
+                    'bb_middle': round(float(bb_middle[i]), 0),
+                    'bb_lower': round(float(bb_lower[i]), 0),
+                    'target_price': round(float(target_price[i]), 0),
+                    **{k: round(float(v[i]), 0) for k, v in mas.items()}
+                },
+                volume_24h=float(volume_24h[i]),
+                change_rate=round(float(change_rate[i]), 2),
+                volatility=round(row_volatility, 2),
+                recommendation=self._recommend(row_score),
+                reasons=reasons
+            ))
+        return results
+    
+    def scan_all_coins(self, min_volume: float = 1_000_000_000, max_workers: int = 10,
+                       top_k: Optional[int] = None, mode: str = "panel",
+                       incremental: bool = True) -> List[CoinScore]:
         """
         전체 코인 스캔
         
         Args:
             min_volume: 최소 거래대금 (기본 10억원)
             max_workers: 병렬 처리 스레드 수
+            top_k: 점수 상위 N개만 결과로 생성 (None이면 전체)
+            mode: "panel" (블록 일괄 계산) 또는 "per_ticker" (종목별 analyze_coin)
+            incremental: 지난 스캔 이후 시세/캔들이 바뀐 종목만 다시 조회·계산하고 나머지는 이전 점수 사용
         """
         print(f"[{datetime.now()}] 전체 코인 스캔 시작...")
         
-        tickers = self.get_all_krw_tickers()
-        print(f"총 {len(tickers)}개 코인 분석 중...")
+        all_tickers = self.get_all_krw_tickers()
+        snapshot = self._get_snapshot()
+        tickers = self.filter_liquid(all_tickers, min_volume, snapshot)
         
-        results = []
+        if incremental:
+            state = self.scan_states.setdefault(mode, IncrementalScanState("day"))
+            targets = state.plan(tickers, snapshot)
+        else:
+            targets = tickers
+        print(f"총 {len(all_tickers)}개 중 {len(tickers)}개 코인 분석 중... (재계산 {len(targets)}개)")
         
-        # 병렬 처리
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(self.analyze_coin, ticker): ticker for ticker in tickers}
+        started = time.perf_counter()
+        if mode == "panel":
+            loaded_tickers, block = self.load_panel(targets, max_workers=max_workers)
+            loaded = time.perf_counter()
+            if incremental:
+                # 재계산 종목은 거래대금/상위 N 조건 없이 전부 저장 - 조회 실패 종목은 다음에 재시도
+                fresh = {c.ticker: c for c in self.score_panel(loaded_tickers, block)}
+                state.commit({t: fresh.get(t) for t in loaded_tickers})
+            else:
+                results = self.score_panel(loaded_tickers, block, min_volume, top_k)
+        else:
+            fresh = {}
             
-            for future in as_completed(futures):
-                result = future.result()
-                if result and result.volume_24h >= min_volume:
-                    results.append(result)
+            # 병렬 처리
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {executor.submit(self._analyze_for_scan, ticker): ticker for ticker in targets}
+                
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result:
+                        fresh[result.ticker] = result
+            loaded = time.perf_counter()
+            
+            if incremental:
+                state.commit(fresh)
+            else:
+                results = list(fresh.values())
         
-        # 점수순 정렬
-        results.sort(key=lambda x: x.score, reverse=True)
+        if incremental:
+            # 저장된 점수 병합 (종목 순서 기준 안정 정렬 - 전체 스캔과 같은 순서)
+            results = list(state.results_for(tickers).values())
+            state.record(len(tickers), len(targets))
+        if incremental or mode != "panel":
+            results = [c for c in results if c.volume_24h >= min_volume]
+            # 점수순 정렬
+            results.sort(key=lambda x: x.score, reverse=True)
+            if top_k is not None:
+                results = results[:top_k]
+        finished = time.perf_counter()
+        
+        self.scan_stats = {
+            "mode": mode,
+            "tickers": len(all_tickers),
+            "liquid": len(tickers),
+            "rescanned": len(targets),
+            "results": len(results),
+            "load_ms": round((loaded - started) * 1000, 1),
+            "compute_ms": round((finished - loaded) * 1000, 1),
+        }
+        if incremental:
+            self.scan_stats["incremental"] = state.get_stats()
         
         self.scan_results = results
         self.last_scan = datetime.now().isoformat()
         
-        print(f"[{datetime.now()}] 스캔 완료: {len(results)}개 코인 (거래대금 {min_volume/1e8:.0f}억 이상)")
+        print(f"[{datetime.now()}] 스캔 완료: {len(results)}개 코인 (거래대금 {min_volume/1e8:.0f}억 이상, "
+              f"{mode} 조회 {self.scan_stats['load_ms']}ms / 계산 {self.scan_stats['compute_ms']}ms)")
         
         return results
     
+    def _get_snapshot(self) -> Optional[MarketSnapshot]:
+        """전체 마켓 시세 스냅샷 (실패 시 None - 사전 필터/증분 판단 생략)"""
+        try:
+            return self.client.get_market_snapshot()
+        except Exception as e:
+            print(f"시세 스냅샷 조회 실패 - 사전 필터 생략: {e}")
+            return None
+    
+    def filter_liquid(self, tickers: List[str], min_volume: float = 0,
+                      snapshot: Optional[MarketSnapshot] = None) -> List[str]:
+        """24시간 거래대금 사전 필터 (스냅샷 조회 실패 시 전체 유지)"""
+        threshold = min_volume if self.liquidity_threshold is None else self.liquidity_threshold
+        if threshold <= 0:
+            return tickers
+        if snapshot is None:
+            snapshot = self._get_snapshot()
+        if snapshot is None:
+            return tickers
+        return snapshot.prefilter_liquid(threshold, tickers)
+    
+    # ========== 공유 스캔 서비스 ==========
+    
+    def produce_scan(self, strategies=None, subscriptions=None) -> Tuple[CoinScore, ...]:
+        """스캔 서비스 생성기 - 구독 중 가장 낮은 거래대금 기준으로 한 번 스캔 (점수순)"""
+        min_volume = min((s.options.get("min_volume", 1_000_000_000) for s in subscriptions or []),
+                         default=1_000_000_000)
+        return tuple(self.scan_all_coins(min_volume=min_volume))
+    
+    @staticmethod
+    def view_scan(coins: Tuple[CoinScore, ...], subscription) -> List[CoinScore]:
+        """스캔 서비스 뷰 - 구독의 거래대금/최소 점수 기준 (점수순)"""
+        min_volume = subscription.options.get("min_volume", 0)
+        return [c for c in coins if c.volume_24h >= min_volume and c.score >= subscription.min_score]
+    
     def get_top_coins(self, n: int = 10) -> List[CoinScore]:
         """상위 N개 코인 반환"""
         return self.scan_results[:n]
@@ -327,3 +541,6 @@ class CoinScanner:
 # 싱글톤 인스턴스
 coin_scanner = CoinScanner()
 
+# 공유 스캔 서비스에 전체 코인 점수 섹션 등록
+scan_service.register("coins", coin_scanner.produce_scan, coin_scanner.view_scan)
+
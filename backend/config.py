@@ -10,6 +10,11 @@ load_dotenv()
 UPBIT_ACCESS_KEY = os.getenv("UPBIT_ACCESS_KEY") or "juh1vWFSlwJz8zlCQWCFM5NQ15THFn2vDdDWs7Pi"
 UPBIT_SECRET_KEY = os.getenv("UPBIT_SECRET_KEY") or "7JFe4CifeOzrL9g6aJMHMoGO8A4Ik33FhDcQ0kkx"
 
+# Upbit Endpoints (로컬 리플레이/모의 거래소로 교체 가능)
+UPBIT_API_URL = os.getenv("UPBIT_API_URL") or "https://api.upbit.com"
+UPBIT_WS_URL = os.getenv("UPBIT_WS_URL") or "wss://api.upbit.com/websocket/v1"
+UPBIT_MAX_CONCURRENCY = int(os.getenv("UPBIT_MAX_CONCURRENCY", 10))  # 비동기 클라이언트 동시 요청 수
+
 # Server Settings
 BACKEND_PORT = int(os.getenv("BACKEND_PORT", 8000))
 FRONTEND_PORT = int(os.getenv("FRONTEND_PORT", 8080))
@@ -23,9 +28,43 @@ VOLATILITY_K = 0.5  # 변동성 돌파 K값
 RSI_OVERSOLD = 30   # RSI 과매도 기준
 RSI_OVERBOUGHT = 70 # RSI 과매수 기준
 
+# Market Data Settings (실시간 시세 스트림)
+MARKET_DATA_ENABLED = os.getenv("MARKET_DATA_ENABLED", "true").lower() == "true"
+MARKET_DATA_MAX_AGE = float(os.getenv("MARKET_DATA_MAX_AGE", 5))  # 스트림 시세 유효 시간 (초)
+CANDLE_CACHE_TTL = float(os.getenv("CANDLE_CACHE_TTL", 5))  # 캔들 캐시 재조회 간격 (초)
+CANDLE_RESAMPLE_ENABLED = os.getenv("CANDLE_RESAMPLE_ENABLED", "true").lower() == "true"  # 상위 간격 캔들을 1분봉에서 생성
+CANDLE_RESAMPLE_MAX_MINUTES = int(os.getenv("CANDLE_RESAMPLE_MAX_MINUTES", 1600))  # 리샘플링에 사용할 1분봉 최대 개수 (이미 유지 중인 1분봉 안에서)
+MARKET_SNAPSHOT_INTERVAL = float(os.getenv("MARKET_SNAPSHOT_INTERVAL", 5))  # 전체 마켓 스냅샷 갱신 주기 (초)
+MARKET_SNAPSHOT_BATCH_SIZE = int(os.getenv("MARKET_SNAPSHOT_BATCH_SIZE", 200))  # 현재가 요청 1회당 마켓 수
+ACCOUNT_CACHE_TTL = float(os.getenv("ACCOUNT_CACHE_TTL", 2))  # 계좌 조회 결과 캐시 시간 (초)
+
+# Incremental Scan Settings (변경된 종목만 재스캔)
+SCAN_FULL_RESCAN_INTERVAL = float(os.getenv("SCAN_FULL_RESCAN_INTERVAL", 600))  # 전체 재스캔 주기 (초)
+SCAN_PRICE_THRESHOLD = float(os.getenv("SCAN_PRICE_THRESHOLD", 0))  # 재스캔 가격 변화율 기준 (0이면 모든 변화)
+SCAN_VALUE_THRESHOLD = float(os.getenv("SCAN_VALUE_THRESHOLD", 0))  # 재스캔 거래대금 변화율 기준 (0이면 모든 변화)
+SCAN_SERVICE_INTERVAL = float(os.getenv("SCAN_SERVICE_INTERVAL", 60))  # 공유 스캔 서비스 갱신 주기 (초)
+SCAN_SERVICE_WORKERS = int(os.getenv("SCAN_SERVICE_WORKERS", 32))  # 스캔 루프 작업 스레드 상한 (시간 초과 후 남은 조회도 이 안에서만 실행)
+
+# Bot Runtime (모든 봇을 하나의 이벤트 루프에서 실행)
+BOT_RUNTIME_MODE = os.getenv("BOT_RUNTIME_MODE", "dedicated")  # dedicated: 전용 스레드 루프, app: FastAPI 서버 루프
+
+# Order Pipeline (주문 → 체결 확인)
+ORDER_POLL_INITIAL = float(os.getenv("ORDER_POLL_INITIAL", 0.05))  # 첫 체결 조회 간격 (초, 이후 2배씩)
+ORDER_POLL_MAX = float(os.getenv("ORDER_POLL_MAX", 1.0))  # 체결 조회 최대 간격 (초)
+ORDER_FILL_TIMEOUT = float(os.getenv("ORDER_FILL_TIMEOUT", 15))  # 체결 확인 제한 시간 (초)
+
+# Execution Router (모든 봇/수동 주문 공용 관문)
+ROUTER_DEDUPE_WINDOW = float(os.getenv("ROUTER_DEDUPE_WINDOW", 3))  # 같은 주문 의도 중복 차단 시간 (초)
+ROUTER_MAX_POSITIONS = int(os.getenv("ROUTER_MAX_POSITIONS", 0))  # 전체 봇 합산 최대 보유 종목 수 (0이면 무제한)
+ROUTER_MAX_EXPOSURE = float(os.getenv("ROUTER_MAX_EXPOSURE", 0))  # 전체 봇 합산 최대 매수 금액 (KRW, 0이면 무제한)
+ROUTER_RECONCILE_INTERVAL = float(os.getenv("ROUTER_RECONCILE_INTERVAL", 30))  # 보유 종목을 실제 계좌와 대조하는 주기 (초, 0이면 끔)
+
+# Historical Candle Store (과거 캔들 로컬 저장소)
+CANDLE_STORE_DIR = os.getenv("CANDLE_STORE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "candles")
+
 # OpenRouter API (AI 분석용 - 직접 연결)
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY") or "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"
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL") or "https://openrouter.ai/api/v1"
 
 # Supabase (DB) - 빈 문자열인 경우에도 기본값 사용
 SUPABASE_URL = os.getenv("SUPABASE_URL") or "https://lbnvztnbsbqisemvkvwe.supabase.co"
@@ -0,0 +1,383 @@
+"""
+주문 실행 라우터 모듈
+- 모든 봇/수동 API 주문이 거치는 단일 관문 (실제 주문/체결 확인은 order_pipeline)
+- 마켓별 잠금: 같은 종목 주문은 한 번에 하나씩, 다른 종목 주문은 동시에 진행 (요청 속도는 스케줄러가 제한)
+- 종목 소유권: 봇이 매수한 종목은 그 봇 소유 → 다른 봇의 추가 매수/매도 거부 (수동 주문은 force)
+- 같은 주문 의도(소유자, 종목, 방향, 금액/수량 또는 호출자 지정 ID) 중복 차단: 진행 중이면 결과 공유, 체결 직후 일정 시간 거부
+  (반대 방향 체결이 있으면 이전 의도는 끝난 것으로 보고 차단 해제 - 매도 직후 재매수 허용)
+- 거부 결과는 OrderFill.reject_reason 으로 분류 (owned 이면 다른 소유자 종목, 그 외는 잠시 뒤 재시도 가능)
+- 전체 보유 종목 수 / 매수 금액 한도를 마켓 잠금 안에서 예약 → 동시 매수도 한도를 넘지 않음
+- 보유 현황을 주기적으로 실제 계좌와 대조 (업비트 앱에서 매도했거나 봇이 포지션을 버린 종목의 소유권 해제)
+- 대기열/지연 통계
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Awaitable, Union
+
+from config import ROUTER_DEDUPE_WINDOW, ROUTER_MAX_POSITIONS, ROUTER_MAX_EXPOSURE, ROUTER_RECONCILE_INTERVAL
+from bot_runtime import bot_runtime
+from order_pipeline import order_pipeline, OrderFill
+
+
+MIN_ORDER_KRW = 5000    # 업비트 최소 주문 금액
+OWNER_MANUAL = "manual"
+
+IntentKey = Tuple[str, str, str, Union[str, float, None]]
+
+
+@dataclass
+class OrderIntent:
+    """주문 의도 (매수는 amount=KRW, 매도는 volume=수량)"""
+    owner: str
+    ticker: str
+    side: str                       # bid | ask
+    amount: Optional[float] = None
+    volume: Optional[float] = None
+    force: bool = False             # 다른 소유자 종목도 허용 (사용자 수동 주문)
+    intent_id: Optional[str] = None # 호출자 지정 의도 ID (없으면 금액/수량이 같은 주문을 같은 의도로 봄)
+
+    @property
+    def key(self) -> IntentKey:
+        if self.intent_id is not None:
+            return self.owner, self.ticker, self.side, self.intent_id
+        return self.owner, self.ticker, self.side, self.amount if self.side == "bid" else self.volume
+
+
+@dataclass
+class Holding:
+    """라우터를 거쳐 보유 중인 종목"""
+    owner: str
+    volume: float = 0.0
+    cost: float = 0.0               # 매수 금액 (수수료 포함)
+    updated_at: float = 0.0
+
+
+def rejected(intent: OrderIntent, reason: str, message: str) -> OrderFill:
+    """라우터에서 거부된 주문 결과 (reason: 거부 분류, message: 사유)"""
+    return OrderFill(ticker=intent.ticker, side=intent.side,
+                     ord_type="price" if intent.side == "bid" else "market",
+                     state="rejected", error=message, reject_reason=reason)
+
+
+def to_order_result(fill: OrderFill) -> Dict[str, Any]:
+    """업비트 주문 응답 형식 (기존 {'uuid': ...} / {'error': ...} 검사 코드 호환)"""
+    if fill.filled:
+        return {**fill.raw, "uuid": fill.uuid, "avg_price": fill.avg_price,
+                "executed_volume": fill.executed_volume, "net_krw": fill.net_krw}
+    return {"error": fill.error or f"미체결 ({fill.state})"}
+
+
+class ExecutionRouter:
+    """마켓별 직렬화 + 소유권 + 한도 관리 (봇 런타임 루프에서 실행)"""
+
+    def __init__(self, pipeline=order_pipeline, dedupe_window: float = ROUTER_DEDUPE_WINDOW,
+                 max_positions: int = ROUTER_MAX_POSITIONS, max_exposure: float = ROUTER_MAX_EXPOSURE,
+                 reconcile_interval: float = ROUTER_RECONCILE_INTERVAL):
+        self.pipeline = pipeline
+        self.dedupe_window = dedupe_window
+        self.max_positions = max_positions
+        self.max_exposure = max_exposure
+        self.reconcile_interval = reconcile_interval
+
+        # 아래 상태는 봇 루프에서만 변경 (await 없이 검사+예약 → 원자적)
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._holdings: Dict[str, Holding] = {}
+        self._reserved: Dict[str, float] = {}               # 진행 중인 매수 금액 (종목별)
+        self._inflight: Dict[IntentKey, asyncio.Future] = {}
+        self._recent: Dict[IntentKey, float] = {}           # 체결 완료 시각
+
+        # 통계
+        self.submitted = 0
+        self.executed = 0
+        self.deduped = 0
+        self.rejections: Dict[str, int] = {}
+        self.waiting = 0
+        self.max_waiting = 0
+        self._queue_total = 0.0
+        self.max_queue_ms = 0.0
+        self._queued = 0
+        self._latency_total = 0.0
+        self.max_latency_ms = 0.0
+        self.reconciled = 0
+        self.reconcile_dropped = 0
+        self.last_reconcile: Optional[str] = None
+
+    # ========== 주문 ==========
+
+    async def buy(self, owner: str, ticker: str, amount: float, force: bool = False,
+                  intent_id: Optional[str] = None) -> OrderFill:
+        """시장가 매수 (amount: KRW)"""
+        return await self.submit(OrderIntent(owner, ticker, "bid", amount=amount, force=force, intent_id=intent_id))
+
+    async def sell(self, owner: str, ticker: str, volume: float, force: bool = False,
+                   intent_id: Optional[str] = None) -> OrderFill:
+        """시장가 매도 (volume: 수량)"""
+        return await self.submit(OrderIntent(owner, ticker, "ask", volume=volume, force=force, intent_id=intent_id))
+
+    async def submit(self, intent: OrderIntent) -> OrderFill:
+        """주문 의도 제출 (다른 루프/스레드에서 호출하면 봇 런타임 루프에서 실행)"""
+        if bot_runtime._in_loop():
+            return await self._submit(intent)
+        return await asyncio.wrap_future(bot_runtime.submit(self._submit(intent)))
+
+    async def submit_many(self, intents: List[OrderIntent]) -> List[OrderFill]:
+        """서로 독립적인 주문을 동시에 제출 (같은 종목은 마켓 잠금으로 순서대로)"""
+        return list(await asyncio.gather(*(self.submit(intent) for intent in intents)))
+
+    def run(self, coro: Awaitable[OrderFill]) -> OrderFill:
+        """동기 코드(작업 스레드)에서 주문 - 예: execution_router.run(execution_router.buy(owner, t, 10000))"""
+        return self.pipeline.run(coro)
+
+    async def _submit(self, intent: OrderIntent) -> OrderFill:
+        self.submitted += 1
+        self._ensure_reconciling()
+        key = intent.key
+        running = self._inflight.get(key)
+        if running is not None:
+            # 같은 의도가 진행 중 → 같은 결과 공유 (주문 1회)
+            self.deduped += 1
+            return await asyncio.shield(running)
+        now = time.monotonic()
+        if len(self._recent) > 1000:
+            self._recent = {k: t for k, t in self._recent.items() if now - t < self.dedupe_window}
+        done_at = self._recent.get(key)
+        if done_at is not None and now - done_at < self.dedupe_window:
+            self.deduped += 1
+            return self._reject(intent, "duplicate", f"중복 주문 ({self.dedupe_window:.0f}초 이내 체결됨)")
+
+        task = asyncio.ensure_future(self._execute(intent))
+        self._inflight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._inflight.pop(key, None)
+            else:
+                # 호출자만 취소된 경우 주문은 끝까지 진행
+                task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    async def _execute(self, intent: OrderIntent) -> OrderFill:
+        queued = time.monotonic()
+        lock = self._locks.get(intent.ticker)
+        if lock is None:
+            lock = self._locks[intent.ticker] = asyncio.Lock()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await lock.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            wait_ms = (time.monotonic() - queued) * 1000
+            self._queued += 1
+            self._queue_total += wait_ms
+            self.max_queue_ms = max(self.max_queue_ms, wait_ms)
+
+            error = self._check(intent)
+            if error is not None:
+                return self._reject(intent, *error)
+            if intent.side == "bid":
+                # 검사와 예약 사이에 await 없음 → 동시 매수도 한도를 넘지 않음
+                self._reserved[intent.ticker] = self._reserved.get(intent.ticker, 0.0) + intent.amount
+                try:
+                    fill = await self.pipeline.buy_market(intent.ticker, intent.amount)
+                finally:
+                    self._unreserve(intent.ticker, intent.amount)
+            else:
+                fill = await self.pipeline.sell_market(intent.ticker, intent.volume)
+            self._settle(intent, fill)
+        finally:
+            lock.release()
+
+        self.executed += 1
+        latency = (time.monotonic() - queued) * 1000
+        self._latency_total += latency
+        self.max_latency_ms = max(self.max_latency_ms, latency)
+        if fill.filled:
+            # 반대 방향이 체결됐으면 그 전 의도(예: 직전 매수)는 끝난 것 - 같은 금액으로 다시 주문 가능
+            self._recent = {k: t for k, t in self._recent.items()
+                            if k[:2] != (intent.owner, intent.ticker) or k[2] == intent.side}
+            self._recent[intent.key] = time.monotonic()
+        return fill
+
+    # ========== 소유권 / 한도 ==========
+
+    def _check(self, intent: OrderIntent) -> Optional[Tuple[str, str]]:
+        """주문 가능 여부 (마켓 잠금 안에서 호출) - 거부 시 (분류, 사유)"""
+        holding = self._holdings.get(intent.ticker)
+        if holding is not None and holding.owner != intent.owner and not intent.force:
+            return "owned", f"{holding.owner} 보유 종목"
+        if intent.side == "ask":
+            if not intent.volume or intent.volume <= 0:
+                return "invalid", "매도 수량 없음"
+            return None
+
+        if not intent.amount or intent.amount < MIN_ORDER_KRW:
+            return "invalid", f"최소 주문 금액 미달 (₩{intent.amount or 0:,.0f})"
+        new_market = holding is None and intent.ticker not in self._reserved
+        if new_market and self.max_positions > 0:
+            markets = len(set(self._holdings) | set(self._reserved))
+            if markets >= self.max_positions:
+                return "max_positions", f"최대 보유 종목 수 도달 ({markets}/{self.max_positions})"
+        if self.max_exposure > 0:
+            exposure = self.exposure()
+            if exposure + intent.amount > self.max_exposure:
+                return "max_exposure", (f"매수 한도 초과 (₩{exposure:,.0f} + ₩{intent.amount:,.0f} "
+                                        f"> ₩{self.max_exposure:,.0f})")
+        return None
+
+    def _settle(self, intent: OrderIntent, fill: OrderFill):
+        """체결 결과를 보유 현황에 반영"""
+        if not fill.filled:
+            return
+        holding = self._holdings.get(intent.ticker)
+        if intent.side == "bid":
+            if holding is None:
+                holding = self._holdings[intent.ticker] = Holding(owner=intent.owner)
+            holding.volume += fill.executed_volume
+            holding.cost += fill.net_krw
+            holding.updated_at = time.time()
+        elif holding is not None:
+            if holding.volume > 0:
+                remaining = max(holding.volume - fill.executed_volume, 0.0)
+                holding.cost *= remaining / holding.volume
+                holding.volume = remaining
+            if holding.volume <= 0 or holding.volume * fill.avg_price < MIN_ORDER_KRW:
+                del self._holdings[intent.ticker]
+            else:
+                holding.updated_at = time.time()
+
+    def _unreserve(self, ticker: str, amount: float):
+        left = self._reserved.get(ticker, 0.0) - amount
+        if left > 1e-9:
+            self._reserved[ticker] = left
+        else:
+            self._reserved.pop(ticker, None)
+
+    def _reject(self, intent: OrderIntent, reason: str, message: str) -> OrderFill:
+        self.rejections[reason] = self.rejections.get(reason, 0) + 1
+        print(f"[{datetime.now()}] 🚫 주문 거부 {intent.ticker} {intent.side} ({intent.owner}): {message}")
+        return rejected(intent, reason, message)
+
+    def claim(self, owner: str, ticker: str, volume: float = 0.0, cost: float = 0.0) -> bool:
+        """재시작 후 복원한 포지션 소유권 등록 (다른 소유자가 있으면 False)"""
+        def apply() -> bool:
+            holding = self._holdings.get(ticker)
+            if holding is not None:
+                return holding.owner == owner
+            self._holdings[ticker] = Holding(owner, volume, cost, time.time())
+            self._ensure_reconciling()
+            return True
+        bot_runtime._ensure_loop()
+        return bot_runtime._call(apply)
+
+    def release(self, owner: str, ticker: str) -> bool:
+        """포지션 정리 (매도 없이 포지션을 버린 경우 등) - 소유자가 다르면 False"""
+        def apply() -> bool:
+            holding = self._holdings.get(ticker)
+            if holding is None or holding.owner != owner:
+                return False
+            del self._holdings[ticker]
+            return True
+        bot_runtime._ensure_loop()
+        return bot_runtime._call(apply)
+
+    # ========== 계좌 대조 ==========
+
+    def _ensure_reconciling(self):
+        """계좌 대조 태스크 시작 (라우터를 처음 사용할 때)"""
+        if self.reconcile_interval > 0 and not bot_runtime.is_running("router_reconcile"):
+            bot_runtime.start_bot("router_reconcile", self._run_reconcile)
+
+    async def _run_reconcile(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            if not self._holdings:
+                continue
+            try:
+                await self.reconcile()
+            except Exception as e:
+                print(f"[ExecutionRouter] 계좌 대조 실패: {e}")
+
+    async def reconcile(self) -> int:
+        """실제 계좌와 대조 - 잔고가 없거나 최소 주문 금액 미만인 종목은 소유권 해제 (해제 수 반환)"""
+        client = self.pipeline.client
+        self.pipeline.aio.set_keys(client._access_key, client._secret_key)
+        accounts = await self.pipeline.aio.get_accounts()
+        if not accounts:
+            # 조회 실패와 빈 계좌를 구분할 수 없으므로 아무것도 지우지 않음
+            return 0
+        balances: Dict[str, Tuple[float, float]] = {}
+        for account in accounts:
+            if account.get("currency") == "KRW":
+                continue
+            ticker = f"{account.get('unit_currency') or 'KRW'}-{account.get('currency')}"
+            volume = float(account.get("balance") or 0) + float(account.get("locked") or 0)
+            balances[ticker] = (volume, float(account.get("avg_buy_price") or 0))
+
+        # 조회 이후 await 없이 반영 - 주문 진행 중인 종목은 체결 반영 전일 수 있어 건너뜀
+        dropped = []
+        for ticker, holding in list(self._holdings.items()):
+            lock = self._locks.get(ticker)
+            if (lock is not None and lock.locked()) or ticker in self._reserved:
+                continue
+            volume, avg_price = balances.get(ticker, (0.0, 0.0))
+            if not avg_price and holding.volume > 0:
+                avg_price = holding.cost / holding.volume
+            if volume <= 0 or (avg_price > 0 and volume * avg_price < MIN_ORDER_KRW):
+                del self._holdings[ticker]
+                dropped.append(f"{ticker}({holding.owner})")
+            elif holding.volume > 0 and abs(volume - holding.volume) > 1e-12:
+                # 라우터 밖에서 일부 매도/추가 매수한 경우 수량 기준으로 보정
+                holding.cost *= volume / holding.volume
+                holding.volume = volume
+        self.reconciled += 1
+        self.reconcile_dropped += len(dropped)
+        self.last_reconcile = datetime.now().isoformat()
+        if dropped:
+            print(f"[{datetime.now()}] 🔄 계좌 대조 - 보유하지 않은 종목 소유권 해제: {', '.join(dropped)}")
+        return len(dropped)
+
+    def owner_of(self, ticker: str) -> Optional[str]:
+        holding = self._holdings.get(ticker)
+        return holding.owner if holding else None
+
+    def exposure(self) -> float:
+        """보유 + 진행 중 매수 금액 합계 (KRW)"""
+        return sum(h.cost for h in self._holdings.values()) + sum(self._reserved.values())
+
+    # ========== 상태 ==========
+
+    def get_stats(self) -> Dict[str, Any]:
+        """라우터 통계 (대기열, 지연, 거부 사유, 소유자별 보유)"""
+        owners: Dict[str, int] = {}
+        for holding in list(self._holdings.values()):
+            owners[holding.owner] = owners.get(holding.owner, 0) + 1
+        return {
+            "submitted": self.submitted,
+            "executed": self.executed,
+            "deduped": self.deduped,
+            "rejections": dict(self.rejections),
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "in_flight": len(self._inflight),
+            "avg_queue_ms": round(self._queue_total / self._queued, 2) if self._queued else 0.0,
+            "max_queue_ms": round(self.max_queue_ms, 2),
+            "avg_latency_ms": round(self._latency_total / self.executed, 2) if self.executed else 0.0,
+            "max_latency_ms": round(self.max_latency_ms, 2),
+            "positions": len(self._holdings),
+            "owners": owners,
+            "exposure": round(self.exposure(), 0),
+            "max_positions": self.max_positions,
+            "max_exposure": self.max_exposure,
+            "reconciled": self.reconciled,
+            "reconcile_dropped": self.reconcile_dropped,
+            "last_reconcile": self.last_reconcile,
+            "pipeline": self.pipeline.get_stats(),
+        }
+
+
+# 싱글톤 인스턴스
+execution_router = ExecutionRouter()
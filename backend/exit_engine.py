@@ -0,0 +1,492 @@
+"""
+틱 기반 청산 엔진 모듈
+- 포지션별 손절/익절/트레일링 스탑을 실시간 시세 허브의 체결가 변경마다 평가 (폴링 주기와 무관)
+- 모든 기준가를 마켓별 정렬 트리거 인덱스에 등록 → 틱 하나당 O(log n + k), 포지션 수와 무관
+- 트레일링 스탑은 최고가 트리거가 넘어설 때만 보존율 표에 따라 올리고 인덱스에서 재정렬 (내려가지 않음)
+- 사용자 가격 알림도 같은 인덱스에서 처리
+- 조건 충족 시 규칙을 즉시 제거하고(한 번만 발동) 봇 런타임 루프에서 매도 콜백 실행
+- 보유 시간 초과 청산은 타이머 휠(1초 해상도)로 처리 - 포지션 수와 무관하게 만료된 것만 꺼냄
+- 스트림이 없을 때는 봇의 폴링 루프가 조회한 현재가를 on_price로 넣어 같은 규칙으로 평가
+"""
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Hashable, Tuple
+
+from bot_runtime import bot_runtime
+from market_data import market_data_hub
+from upbit_client import upbit_client
+from trigger_index import TriggerIndex, Trigger, ABOVE, BELOW
+
+
+# 청산 사유
+EXIT_STOP_LOSS = "stop_loss"
+EXIT_TAKE_PROFIT = "take_profit"
+EXIT_TRAILING_STOP = "trailing_stop"
+EXIT_TIME = "time"
+
+# 인덱스 트리거 종류 (청산 사유 외)
+PEAK = "peak"           # 최고가 갱신 감지 (트레일링 스탑 재계산)
+ALERT = "alert"         # 사용자 가격 알림
+
+
+@dataclass(frozen=True)
+class TrailingRule:
+    """트레일링 스탑 규칙 - 수익률(%) 기준
+
+    최고 수익률이 activation 이상이 되면 (현재 수익률 × initial_ratio) 위치에서 시작하고,
+    이후 (최고 수익률 × 보존율) 위치로만 올림. 보존율은 ratios에서 최고 수익률 이하인 첫 구간
+    """
+    activation: float = 5.0
+    initial_ratio: float = 0.8
+    ratios: Tuple[Tuple[float, float], ...] = ((10.0, 0.85), (8.0, 0.82), (6.0, 0.80), (5.0, 0.78))
+
+    def protect_ratio(self, max_profit: float) -> float:
+        for threshold, ratio in self.ratios:
+            if max_profit >= threshold:
+                return ratio
+        return self.ratios[-1][1]
+
+
+@dataclass(frozen=True)
+class ExitEvent:
+    """청산 발동 1건"""
+    owner: str
+    ticker: str
+    reason: str                     # stop_loss | take_profit | trailing_stop | time
+    price: float
+    entry_price: float
+    profit_rate: float              # %
+    max_profit: Optional[float]
+    trailing_stop: Optional[float]
+    detected_at: float              # time.monotonic
+
+
+@dataclass
+class ExitRule:
+    """포지션 하나의 청산 조건 (가격 기준)"""
+    owner: str
+    ticker: str
+    entry_price: float
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+    trailing: Optional[TrailingRule] = None
+    trailing_stop: Optional[float] = None
+    max_profit: Optional[float] = None          # 최고 수익률 (%)
+    deadline: Optional[float] = None            # 보유 만료 시각 (time.time)
+    on_exit: Optional[Callable[[ExitEvent], Any]] = None
+    on_update: Optional[Callable[["ExitRule"], Any]] = None
+    notified_at: float = 0.0
+    triggers: Dict[str, Trigger] = field(default_factory=dict, repr=False)  # 종류 -> 인덱스 트리거
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.owner, self.ticker
+
+    def profit_rate(self, price: float) -> float:
+        return (price - self.entry_price) / self.entry_price * 100
+
+
+@dataclass
+class PriceAlert:
+    """사용자 가격 알림 (한 번 발동)"""
+    id: int
+    ticker: str
+    direction: str                              # above | below
+    price: float
+    note: str = ""
+    user_id: Optional[str] = None
+    created_at: str = ""
+    triggered_at: Optional[str] = None
+    triggered_price: Optional[float] = None
+
+
+class TimerWheel:
+    """해시 타이머 휠 - schedule/cancel O(1), advance는 지난 칸만 확인"""
+
+    def __init__(self, resolution: float = 1.0, slots: int = 3600, now: Optional[float] = None):
+        self.resolution = resolution
+        self._slots: List[Dict[Hashable, int]] = [{} for _ in range(slots)]
+        self._where: Dict[Hashable, int] = {}
+        self._current = self._tick(time.time() if now is None else now)
+
+    def _tick(self, at: float) -> int:
+        return int(at // self.resolution)
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def schedule(self, key: Hashable, deadline: float):
+        """deadline(time.time)에 만료 - 같은 키는 교체"""
+        self.cancel(key)
+        tick = max(math.ceil(deadline / self.resolution), self._current + 1)
+        self._slots[tick % len(self._slots)][key] = tick
+        self._where[key] = tick
+
+    def cancel(self, key: Hashable) -> bool:
+        tick = self._where.pop(key, None)
+        if tick is None:
+            return False
+        self._slots[tick % len(self._slots)].pop(key, None)
+        return True
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """now까지 만료된 키 (꺼낸 키는 제거됨)"""
+        target = self._tick(time.time() if now is None else now)
+        if target <= self._current:
+            return []
+        # 한 바퀴 이상 밀렸으면 모든 칸을 한 번씩만 확인
+        steps = min(target - self._current, len(self._slots))
+        due: List[Hashable] = []
+        for tick in range(target - steps + 1, target + 1):
+            slot = self._slots[tick % len(self._slots)]
+            if not slot:
+                continue
+            for key, expires in list(slot.items()):
+                if expires <= target:
+                    del slot[key]
+                    del self._where[key]
+                    due.append(key)
+        self._current = target
+        return due
+
+
+class ExitEngine:
+    """틱 단위 청산 판단 + 매도 콜백 실행 (손절/익절/트레일링/알림은 정렬 트리거 인덱스로 조회)"""
+
+    UPDATE_INTERVAL = 2.0   # 트레일링 변경 알림(on_update) 최소 간격 (초)
+
+    def __init__(self, hub=market_data_hub, timer_resolution: float = 1.0):
+        self.hub = hub
+        self.index = TriggerIndex()
+        self._rules: Dict[Tuple[str, str], ExitRule] = {}         # (owner, ticker) -> rule
+        self._alerts: Dict[int, PriceAlert] = {}
+        self._triggered_alerts: deque = deque(maxlen=200)
+        self._alert_callback: Optional[Callable[[Dict[str, Any]], Any]] = None
+        self._last_prices: Dict[str, float] = {}
+        self._dirty: Dict[Tuple[str, str], ExitRule] = {}          # on_update 보류 중인 규칙
+        self._wheel = TimerWheel(resolution=timer_resolution)
+        self._lock = threading.Lock()
+        self._listening = False
+
+        # 통계
+        self.ticks = 0
+        self.fired: Dict[str, int] = {}
+        self.callback_errors = 0
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._latency_total = 0.0
+        self._dispatched = 0
+
+    # ========== 등록 ==========
+
+    def register(self, owner: str, ticker: str, entry_price: float,
+                 stop_loss: Optional[float] = None, take_profit: Optional[float] = None,
+                 trailing: Optional[TrailingRule] = None, max_hold: Optional[float] = None,
+                 on_exit: Optional[Callable[[ExitEvent], Any]] = None,
+                 on_update: Optional[Callable[[ExitRule], Any]] = None,
+                 trailing_stop: Optional[float] = None, max_profit: Optional[float] = None,
+                 opened_at: Optional[float] = None) -> ExitRule:
+        """포지션 청산 조건 등록 (같은 owner/ticker는 교체)
+
+        stop_loss/take_profit/trailing_stop은 가격, max_hold는 opened_at(기본 지금)부터의 초
+        on_exit(event)는 발동 시 봇 루프에서 한 번 실행 (코루틴 함수면 await, 아니면 스레드에서 실행)
+        """
+        if entry_price <= 0:
+            raise ValueError(f"잘못된 진입가: {ticker} {entry_price}")
+        rule = ExitRule(
+            owner=owner, ticker=ticker, entry_price=entry_price,
+            stop_loss=stop_loss, take_profit=take_profit, trailing=trailing,
+            trailing_stop=trailing_stop, max_profit=max_profit,
+            deadline=(opened_at or time.time()) + max_hold if max_hold else None,
+            on_exit=on_exit, on_update=on_update,
+        )
+        with self._lock:
+            self._remove(owner, ticker)
+            self._rules[rule.key] = rule
+            if stop_loss is not None:
+                self._set_trigger(rule, EXIT_STOP_LOSS, BELOW, stop_loss)
+            if take_profit is not None:
+                self._set_trigger(rule, EXIT_TAKE_PROFIT, ABOVE, take_profit)
+            if trailing_stop is not None:
+                self._set_trigger(rule, EXIT_TRAILING_STOP, BELOW, trailing_stop)
+            if trailing is not None:
+                # 최고가 갱신 시에만 트레일링 스탑 재계산 (최고 수익률이 없으면 첫 틱에서 기록)
+                peak = entry_price * (1 + max_profit / 100) if max_profit is not None else 0.0
+                self._set_trigger(rule, PEAK, ABOVE, math.nextafter(peak, math.inf))
+            if rule.deadline is not None:
+                self._wheel.schedule(rule.key, rule.deadline)
+        self._ensure_running()
+        return rule
+
+    def unregister(self, owner: str, ticker: str) -> bool:
+        """규칙 제거 - 이미 발동했거나 없으면 False
+
+        직접 매도하기 전에 호출해 True일 때만 매도하면 엔진과 중복 매도하지 않음
+        """
+        with self._lock:
+            return self._remove(owner, ticker) is not None
+
+    def unregister_owner(self, owner: str) -> int:
+        """봇의 모든 규칙 제거 (봇 중지 시)"""
+        with self._lock:
+            keys = [key for key in self._rules if key[0] == owner]
+            for _, ticker in keys:
+                self._remove(owner, ticker)
+        return len(keys)
+
+    def raise_trailing_stop(self, owner: str, ticker: str, price: float) -> Optional[float]:
+        """트레일링 스탑을 price까지 올림 (낮추지 않음) - 적용된 트레일링 스탑, 규칙이 없으면 None"""
+        with self._lock:
+            rule = self._rules.get((owner, ticker))
+            if rule is None:
+                return None
+            if rule.trailing_stop is None or price > rule.trailing_stop:
+                rule.trailing_stop = price
+                self._set_trigger(rule, EXIT_TRAILING_STOP, BELOW, price)
+            return rule.trailing_stop
+
+    def get_rule(self, owner: str, ticker: str) -> Optional[ExitRule]:
+        return self._rules.get((owner, ticker))
+
+    def _set_trigger(self, rule: ExitRule, kind: str, side: str, threshold: float):
+        """규칙의 트리거 등록 또는 기준가 변경 (있으면 인덱스에서 제자리 재정렬)"""
+        trigger = rule.triggers.get(kind)
+        if trigger is not None and self.index.move(trigger, threshold):
+            return
+        rule.triggers[kind] = self.index.add(rule.ticker, side, threshold, kind, rule)
+
+    def _remove(self, owner: str, ticker: str) -> Optional[ExitRule]:
+        rule = self._rules.pop((owner, ticker), None)
+        if rule is None:
+            return None
+        for trigger in rule.triggers.values():
+            self.index.remove(trigger)
+        rule.triggers.clear()
+        self._dirty.pop(rule.key, None)
+        self._wheel.cancel(rule.key)
+        return rule
+
+    def _ensure_running(self):
+        """시세 허브 구독 + 타이머 태스크 시작 (최초 등록 시)"""
+        if not self._listening:
+            self._listening = True
+            self.hub.add_listener(self.on_price)
+        if not bot_runtime.is_running("exit_timer"):
+            bot_runtime.start_bot("exit_timer", self._run_timers)
+
+    # ========== 가격 알림 ==========
+
+    def add_alert(self, ticker: str, price: float, direction: str, note: str = "",
+                  user_id: Optional[str] = None) -> PriceAlert:
+        """가격 알림 등록 - direction: above(이상) | below(이하)"""
+        with self._lock:
+            trigger = self.index.add(ticker, direction, price, ALERT)
+            alert = PriceAlert(id=trigger.id, ticker=ticker, direction=direction, price=price,
+                               note=note, user_id=user_id, created_at=datetime.now().isoformat())
+            trigger.owner = alert
+            self._alerts[alert.id] = alert
+        self._ensure_running()
+        return alert
+
+    def remove_alert(self, alert_id: int, user_id: Optional[str] = None) -> bool:
+        """알림 삭제 (등록한 사용자만, 미로그인 알림은 user_id None)"""
+        with self._lock:
+            alert = self._alerts.get(alert_id)
+            if alert is None or alert.user_id != user_id:
+                return False
+            del self._alerts[alert_id]
+            trigger = self.index.get(alert_id)
+            if trigger is not None:
+                self.index.remove(trigger)
+        return True
+
+    def get_alerts(self, user_id: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """사용자의 활성/발동된 알림 (미로그인 알림은 user_id None)"""
+        def mine(alert: PriceAlert) -> bool:
+            return alert.user_id == user_id
+        return {
+            "active": [asdict(a) for a in list(self._alerts.values()) if mine(a)],
+            "triggered": [asdict(a) for a in reversed(self._triggered_alerts) if mine(a)],
+        }
+
+    def set_alert_callback(self, callback: Callable[[Dict[str, Any]], Any]):
+        """알림 발동 콜백 (시세 수신 스레드에서 호출되므로 짧게 처리)"""
+        self._alert_callback = callback
+
+    # ========== 틱 처리 ==========
+
+    def on_price(self, ticker: str, price: float):
+        """체결가 1건 반영 (시세 허브 수신 스레드 또는 폴링 루프에서 호출) - O(log n + k)"""
+        if ticker not in self.index or price <= 0:
+            return
+        now = time.monotonic()
+        fired: List[Tuple[ExitRule, ExitEvent]] = []
+        alerts: List[PriceAlert] = []
+        updated: List[ExitRule] = []
+        with self._lock:
+            self._last_prices[ticker] = price
+            self.ticks += 1
+            crossed = self.index.crossed(ticker, price)
+            if not crossed:
+                return
+            peaks: List[ExitRule] = []
+            for trigger in crossed:
+                if trigger.kind == ALERT:
+                    alert = self._alerts.pop(trigger.id, None)
+                    if alert is not None:
+                        alerts.append(alert)
+                elif trigger.kind == PEAK:
+                    peaks.append(trigger.owner)
+                else:
+                    rule = trigger.owner
+                    # 같은 틱에 여러 조건을 넘어도 규칙당 한 번만 발동
+                    if self._rules.get(rule.key) is rule:
+                        self._remove(rule.owner, rule.ticker)
+                        fired.append((rule, self._event(rule, trigger.kind, price, now)))
+            for rule in peaks:
+                if self._rules.get(rule.key) is rule:
+                    rule.triggers.pop(PEAK, None)
+                    if self._on_new_high(rule, price, now):
+                        updated.append(rule)
+
+        for rule, event in fired:
+            self._dispatch(rule, event)
+        for rule in updated:
+            bot_runtime.submit(self._call(rule.on_update, rule))
+        for alert in alerts:
+            self._fire_alert(alert, price)
+
+    def _on_new_high(self, rule: ExitRule, price: float, now: float) -> bool:
+        """최고가 갱신 - 최고 수익률/트레일링 스탑을 올리고 다음 최고가 트리거 등록
+
+        on_update를 바로 호출해야 하면 True (아니면 간격이 지난 뒤 타이머 태스크가 전달)
+        """
+        profit_rate = rule.profit_rate(price)
+        rule.max_profit = profit_rate
+        rule.triggers[PEAK] = self.index.add(rule.ticker, ABOVE, math.nextafter(price, math.inf), PEAK, rule)
+
+        trailing = rule.trailing
+        if trailing is None or profit_rate < trailing.activation:
+            return False
+        if rule.trailing_stop is None:
+            rule.trailing_stop = rule.entry_price * (1 + profit_rate * trailing.initial_ratio / 100)
+            rule.notified_at = 0.0      # 활성화는 바로 알림
+        new_stop = rule.entry_price * (1 + profit_rate * trailing.protect_ratio(profit_rate) / 100)
+        if new_stop > rule.trailing_stop:
+            rule.trailing_stop = new_stop
+        self._set_trigger(rule, EXIT_TRAILING_STOP, BELOW, rule.trailing_stop)
+
+        if rule.on_update is None:
+            return False
+        if now - rule.notified_at >= self.UPDATE_INTERVAL:
+            rule.notified_at = now
+            self._dirty.pop(rule.key, None)
+            return True
+        self._dirty[rule.key] = rule
+        return False
+
+    def _event(self, rule: ExitRule, reason: str, price: float, detected_at: float) -> ExitEvent:
+        return ExitEvent(
+            owner=rule.owner, ticker=rule.ticker, reason=reason, price=price,
+            entry_price=rule.entry_price, profit_rate=rule.profit_rate(price),
+            max_profit=rule.max_profit, trailing_stop=rule.trailing_stop, detected_at=detected_at,
+        )
+
+    # ========== 실행 ==========
+
+    def _dispatch(self, rule: ExitRule, event: ExitEvent):
+        self.fired[event.reason] = self.fired.get(event.reason, 0) + 1
+        print(f"[{datetime.now()}] ⚡ 청산 발동 {event.ticker} ({event.owner}): {event.reason} "
+              f"@ {event.price:,.0f} ({event.profit_rate:+.2f}%)")
+        if rule.on_exit is not None:
+            bot_runtime.submit(self._run_exit(rule, event))
+
+    def _fire_alert(self, alert: PriceAlert, price: float):
+        alert.triggered_at = datetime.now().isoformat()
+        alert.triggered_price = price
+        self._triggered_alerts.append(alert)
+        self.fired[ALERT] = self.fired.get(ALERT, 0) + 1
+        print(f"[{datetime.now()}] 🔔 가격 알림 {alert.ticker} {alert.direction} {alert.price:,} (현재 {price:,})")
+        if self._alert_callback is not None:
+            try:
+                self._alert_callback(asdict(alert))
+            except Exception as e:
+                self.callback_errors += 1
+                print(f"[ExitEngine] 알림 콜백 오류 ({alert.ticker}): {e}")
+
+    async def _run_exit(self, rule: ExitRule, event: ExitEvent):
+        latency = (time.monotonic() - event.detected_at) * 1000
+        self.last_latency_ms = latency
+        self.max_latency_ms = max(self.max_latency_ms, latency)
+        self._latency_total += latency
+        self._dispatched += 1
+        await self._call(rule.on_exit, event)
+
+    async def _call(self, callback: Callable, arg: Any):
+        try:
+            if asyncio.iscoroutinefunction(callback):
+                await callback(arg)
+            else:
+                await asyncio.to_thread(callback, arg)
+        except Exception as e:
+            self.callback_errors += 1
+            print(f"[ExitEngine] 콜백 오류 ({getattr(arg, 'ticker', '')}): {e}")
+
+    async def _run_timers(self):
+        """보유 시간 만료 + 보류된 트레일링 변경 알림 처리 (봇 런타임 태스크)"""
+        while True:
+            await asyncio.sleep(self._wheel.resolution)
+            now = time.monotonic()
+            with self._lock:
+                expired = [self._remove(owner, ticker) for owner, ticker in self._wheel.advance()]
+                updated = [r for r in self._dirty.values() if now - r.notified_at >= self.UPDATE_INTERVAL]
+                for rule in updated:
+                    rule.notified_at = now
+                    del self._dirty[rule.key]
+            for rule in updated:
+                await self._call(rule.on_update, rule)
+            for rule in expired:
+                if rule is None:
+                    continue
+                price = self._last_prices.get(rule.ticker) or self.hub.get_price(rule.ticker)
+                if not price:
+                    price = await asyncio.to_thread(upbit_client.get_current_price, rule.ticker) or rule.entry_price
+                self._dispatch(rule, self._event(rule, EXIT_TIME, price, time.monotonic()))
+
+    # ========== 상태 ==========
+
+    def get_stats(self) -> Dict[str, Any]:
+        """엔진 통계"""
+        with self._lock:
+            rules = list(self._rules.values())
+            timers = len(self._wheel)
+            index = self.index.get_stats()
+        return {
+            "rules": len(rules),
+            "alerts": len(self._alerts),
+            "timers": timers,
+            "index": index,
+            "listening": self._listening,
+            "ticks": self.ticks,
+            "fired": dict(self.fired),
+            "callback_errors": self.callback_errors,
+            "last_latency_ms": round(self.last_latency_ms, 2),
+            "avg_latency_ms": round(self._latency_total / self._dispatched, 2) if self._dispatched else 0.0,
+            "max_latency_ms": round(self.max_latency_ms, 2),
+            "positions": [
+                {"owner": r.owner, "ticker": r.ticker, "entry_price": r.entry_price,
+                 "stop_loss": r.stop_loss, "take_profit": r.take_profit,
+                 "trailing_stop": r.trailing_stop, "max_profit": r.max_profit,
+                 "last_price": self._last_prices.get(r.ticker), "deadline": r.deadline}
+                for r in rules
+            ],
+        }
+
+
+# 싱글톤 인스턴스
+exit_engine = ExitEngine()
@@ -0,0 +1,379 @@
+"""
+기술적 지표 모듈 (NumPy 벡터화)
+- RSI, 볼린저 밴드, MACD, 스토캐스틱, Williams %R, 이동평균, ATR, CCI, ADX, OBV
+- 입력은 1차원 (시간) 또는 2차원 (종목 × 시간) float 배열 - 마지막 축이 시간
+- 2차원 배열을 넘기면 전체 종목을 한 번의 호출로 계산 (종목별 pandas 호출 오버헤드 제거)
+- 결과는 기존 pandas 구현과 같은 의미:
+  rolling(window).mean()/std()/min()/max()/sum() - 창 안에 NaN이 있으면 NaN (min_periods=window)
+  ewm(span, adjust=False).mean() - 첫 유효값부터 시작
+- 종목별 길이가 달라 앞쪽이 NaN으로 채워진 행은 첫 유효값부터 계산한 것과 동일
+- 벤치마크: python indicators.py [종목 수] [길이]
+"""
+import sys
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# EMA 블록 폐형식 계산 시 한 블록의 최대 길이 (가중치 overflow 방지)
+EMA_BLOCK = 256
+
+
+def _as_float(values) -> np.ndarray:
+    """Series/list/ndarray -> float64 ndarray"""
+    if hasattr(values, "to_numpy"):
+        values = values.to_numpy()
+    return np.asarray(values, dtype=np.float64)
+
+
+def _windowed(values: np.ndarray, window: int, reducer) -> np.ndarray:
+    """슬라이딩 창 집계 - 결과는 입력과 같은 모양, 앞쪽 window-1개는 NaN"""
+    out = np.full(values.shape, np.nan)
+    if window < 1 or values.shape[-1] < window:
+        return out
+    view = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1)
+    out[..., window - 1:] = reducer(view)
+    return out
+
+
+def _first_valid(values: np.ndarray) -> np.ndarray:
+    """행별 첫 유효값 위치 (유효값이 없으면 길이)"""
+    valid = ~np.isnan(values)
+    first = np.argmax(valid, axis=-1)
+    return np.where(valid.any(axis=-1), first, values.shape[-1])
+
+
+def _since_first(values: np.ndarray) -> np.ndarray:
+    """각 위치가 행의 첫 유효값에서 몇 번째인지 (앞쪽 NaN 구간은 음수)"""
+    first = _first_valid(values)
+    return np.arange(values.shape[-1]) - np.asarray(first)[..., None]
+
+
+def _diff(values: np.ndarray) -> np.ndarray:
+    """Series.diff() - 첫 칸은 NaN"""
+    out = np.full(values.shape, np.nan)
+    out[..., 1:] = values[..., 1:] - values[..., :-1]
+    return out
+
+
+def _shift(values: np.ndarray) -> np.ndarray:
+    """Series.shift(1)"""
+    out = np.full(values.shape, np.nan)
+    out[..., 1:] = values[..., :-1]
+    return out
+
+
+def _ffill(values: np.ndarray) -> np.ndarray:
+    """마지막 유효값으로 중간 NaN 채우기 (앞쪽 NaN은 유지)"""
+    valid = ~np.isnan(values)
+    if valid.all():
+        return values
+    idx = np.where(valid, np.arange(values.shape[-1]), 0)
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    return np.take_along_axis(values, idx, axis=-1)
+
+
+# ========== 기본 집계 ==========
+
+def _window_diff(cum: np.ndarray, window: int) -> np.ndarray:
+    """누적합 -> 창 합계 (길이 n-window+1)"""
+    out = cum[..., window - 1:].copy()
+    out[..., 1:] -= cum[..., :-window]
+    return out
+
+
+def rolling_sum(values, window: int) -> np.ndarray:
+    """이동 합계"""
+    x = _as_float(values)
+    out = np.full(x.shape, np.nan)
+    if window < 1 or x.shape[-1] < window:
+        return out
+    nan = np.isnan(x)
+    if not nan.any():
+        out[..., window - 1:] = _window_diff(np.cumsum(x, axis=-1), window)
+        return out
+    total = _window_diff(np.cumsum(np.where(nan, 0.0, x), axis=-1), window)
+    missing = _window_diff(np.cumsum(nan, axis=-1), window)
+    out[..., window - 1:] = np.where(missing > 0, np.nan, total)
+    return out
+
+
+def sma(values, window: int) -> np.ndarray:
+    """단순 이동평균"""
+    return rolling_sum(values, window) / window
+
+
+def rolling_std(values, window: int, ddof: int = 1) -> np.ndarray:
+    """이동 표준편차 (pandas 기본값과 같은 표본 표준편차)"""
+    x = _as_float(values)
+    if window <= ddof:
+        return np.full(x.shape, np.nan)
+    # 행 평균을 빼서 제곱합 누적의 자릿수 손실을 줄임
+    with np.errstate(invalid="ignore"):
+        center = np.nanmean(x, axis=-1, keepdims=True) if x.size else 0.0
+    centered = x - np.nan_to_num(center)
+    total = rolling_sum(centered, window)
+    squares = rolling_sum(centered * centered, window)
+    var = (squares - total * total / window) / (window - ddof)
+    # 가격이 변하지 않은 창은 누적 오차 없이 정확히 0
+    flat = rolling_sum((_diff(x) != 0).astype(np.float64), window - 1) == 0
+    var[flat & ~np.isnan(var)] = 0.0
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+def rolling_max(values, window: int) -> np.ndarray:
+    """이동 최고값"""
+    return _windowed(_as_float(values), window, lambda v: v.max(axis=-1))
+
+
+def rolling_min(values, window: int) -> np.ndarray:
+    """이동 최저값"""
+    return _windowed(_as_float(values), window, lambda v: v.min(axis=-1))
+
+
+def ema(values, span: float) -> np.ndarray:
+    """지수 이동평균 (ewm(span, adjust=False).mean())
+
+    중간 NaN은 직전 값으로 채운 뒤 계산 (거래 없는 캔들 = 가격 변화 없음)
+    """
+    x = _as_float(values)
+    out = np.full(x.shape, np.nan)
+    n = x.shape[-1]
+    if n == 0:
+        return out
+    alpha = 2.0 / (span + 1.0)
+    beta = 1.0 - alpha
+
+    lead = _since_first(x) < 0
+    filled = _ffill(x)
+    first = np.take_along_axis(filled, np.minimum(_first_valid(x), n - 1)[..., None], axis=-1)
+    filled = np.where(lead, first, filled)
+    if beta <= 0:
+        out[:] = filled
+        out[lead] = np.nan
+        return out
+
+    # y[s+j] = beta^(j+1) * (y[s-1] + alpha * sum_k beta^-(k+1) * x[s+k]) 를 블록 단위로 계산
+    block = int(min(EMA_BLOCK, max(1, 300 / -np.log(beta))))
+    steps = np.arange(1, block + 1)
+    decay = beta ** steps
+    weight = beta ** -steps
+    prev = first[..., 0]
+    for start in range(0, n, block):
+        chunk = filled[..., start:start + block]
+        m = chunk.shape[-1]
+        acc = np.cumsum(chunk * weight[:m], axis=-1)
+        result = decay[:m] * (prev[..., None] + alpha * acc)
+        out[..., start:start + m] = result
+        prev = result[..., -1]
+    out[lead] = np.nan
+    return out
+
+
+# ========== 지표 ==========
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    """RSI (상승/하락폭 단순 이동평균 방식)"""
+    x = _as_float(close)
+    delta = _diff(x)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = sma(gain, period) / sma(loss, period)
+        out = 100 - (100 / (1 + rs))
+    # 앞쪽이 NaN으로 채워진 행도 첫 유효값부터 period개가 모여야 유효
+    out[_since_first(x) < period - 1] = np.nan
+    return out
+
+
+def bollinger(close, period: int = 20, num_std: float = 2) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """볼린저 밴드 (상단, 중간, 하단)"""
+    middle = sma(close, period)
+    std = rolling_std(close, period)
+    return middle + std * num_std, middle, middle - std * num_std
+
+
+def macd(close, fast: int = 12, slow: int = 26,
+         signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD (MACD선, 시그널선, 히스토그램)"""
+    x = _as_float(close)
+    line = ema(x, fast) - ema(x, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def stochastic(high, low, close, k_period: int = 14,
+               d_period: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+    """스토캐스틱 (%K, %D)"""
+    low_min = rolling_min(low, k_period)
+    high_max = rolling_max(high, k_period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = (_as_float(close) - low_min) / (high_max - low_min) * 100
+    return k, sma(k, d_period)
+
+
+def williams_r(high, low, close, period: int = 14) -> np.ndarray:
+    """Williams %R (-100 ~ 0)"""
+    high_max = rolling_max(high, period)
+    low_min = rolling_min(low, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (high_max - _as_float(close)) / (high_max - low_min) * -100
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True Range - 첫 칸은 고가-저가"""
+    h, l = _as_float(high), _as_float(low)
+    prev = _shift(_as_float(close))
+    return np.fmax(np.fmax(h - l, np.abs(h - prev)), np.abs(l - prev))
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """ATR (True Range 단순 이동평균)"""
+    return sma(true_range(high, low, close), period)
+
+
+def cci(high, low, close, period: int = 20) -> np.ndarray:
+    """CCI (전형가격 기준, 표준편차 정규화)"""
+    tp = (_as_float(high) + _as_float(low) + _as_float(close)) / 3
+    std = rolling_std(tp, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 변동 없는 창은 0/0 -> NaN (이동평균 누적 오차로 inf가 되지 않도록)
+        return np.where(std > 0, (tp - sma(tp, period)) / (0.015 * std), np.nan)
+
+
+def adx(high, low, close, period: int = 14) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ADX (ADX, +DI, -DI)"""
+    plus_dm = _diff(_as_float(high))
+    minus_dm = _diff(_as_float(low))
+    plus_dm[plus_dm < 0] = 0
+    minus_dm[minus_dm > 0] = 0
+    tr_sum = rolling_sum(true_range(high, low, close), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = 100 * (rolling_sum(plus_dm, period) / tr_sum)
+        minus_di = 100 * (rolling_sum(np.abs(minus_dm), period) / tr_sum)
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+    return sma(dx, period), plus_di, minus_di
+
+
+def obv(close, volume) -> np.ndarray:
+    """OBV (On Balance Volume) - 첫 칸은 0"""
+    x = _as_float(close)
+    direction = np.nan_to_num(np.sign(_diff(x)))
+    out = np.cumsum(direction * np.nan_to_num(_as_float(volume)), axis=-1)
+    out[_since_first(x) < 0] = np.nan
+    return out
+
+
+def last(values, default: Optional[float] = None, offset: int = 1):
+    """마지막 값 (offset=2면 직전 값) - NaN/범위 밖이면 default
+
+    1차원이면 float, 2차원이면 종목별 배열 (NaN은 default로 치환)
+    """
+    x = _as_float(values)
+    if x.shape[-1] < offset:
+        return default if x.ndim == 1 else np.full(x.shape[:-1], np.nan if default is None else default)
+    value = x[..., -offset]
+    if x.ndim == 1:
+        return default if np.isnan(value) else float(value)
+    return value if default is None else np.where(np.isnan(value), default, value)
+
+
+# ========== 벤치마크 ==========
+
+def _pandas_reference(df) -> dict:
+    """기존 종목별 pandas 구현 (벤치마크/검증 기준)"""
+    import pandas as pd
+
+    close = df['close']
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    middle = close.rolling(window=20).mean()
+    std = close.rolling(window=20).std()
+    exp12 = close.ewm(span=12, adjust=False).mean()
+    exp26 = close.ewm(span=26, adjust=False).mean()
+    line = exp12 - exp26
+    low_14 = df['low'].rolling(window=14).min()
+    high_14 = df['high'].rolling(window=14).max()
+    stoch_k = ((close - low_14) / (high_14 - low_14)) * 100
+    tr = pd.concat([df['high'] - df['low'], np.abs(df['high'] - close.shift()),
+                    np.abs(df['low'] - close.shift())], axis=1).max(axis=1)
+    return {
+        "rsi": 100 - (100 / (1 + gain / loss)),
+        "bb_upper": middle + std * 2,
+        "macd_signal": line.ewm(span=9, adjust=False).mean(),
+        "stoch_d": stoch_k.rolling(window=3).mean(),
+        "williams_r": ((high_14 - close) / (high_14 - low_14)) * -100,
+        "ma60": close.rolling(window=60).mean(),
+        "atr": tr.rolling(window=14).mean(),
+    }
+
+
+def _numpy_all(high, low, close) -> dict:
+    upper, _, _ = bollinger(close)
+    _, signal_line, _ = macd(close)
+    _, stoch_d = stochastic(high, low, close)
+    return {
+        "rsi": rsi(close),
+        "bb_upper": upper,
+        "macd_signal": signal_line,
+        "stoch_d": stoch_d,
+        "williams_r": williams_r(high, low, close),
+        "ma60": sma(close, 60),
+        "atr": atr(high, low, close),
+    }
+
+
+def benchmark(tickers: int = 200, length: int = 200, repeat: int = 3) -> dict:
+    """종목별 pandas 계산 vs 2차원 NumPy 한 번 계산 - 소요 시간과 최대 오차"""
+    import pandas as pd
+
+    rng = np.random.default_rng(0)
+    close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.01, (tickers, length)), axis=1))
+    high = close * (1 + rng.uniform(0, 0.01, close.shape))
+    low = close * (1 - rng.uniform(0, 0.01, close.shape))
+    frames = [pd.DataFrame({"high": high[i], "low": low[i], "close": close[i]}) for i in range(tickers)]
+
+    def timed(fn):
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - started)
+        return best, result
+
+    pandas_time, reference = timed(lambda: [_pandas_reference(df) for df in frames])
+    numpy_time, panel = timed(lambda: _numpy_all(high, low, close))
+    row_time, _ = timed(lambda: [_numpy_all(high[i], low[i], close[i]) for i in range(tickers)])
+
+    max_error = 0.0
+    for i, expected in enumerate(reference):
+        for name, series in expected.items():
+            a, b = series.to_numpy(), panel[name][i]
+            if not np.array_equal(np.isnan(a), np.isnan(b)):
+                raise AssertionError(f"NaN 위치 불일치: {name} (행 {i})")
+            mask = ~np.isnan(a)
+            if mask.any():
+                scale = np.maximum(np.abs(a[mask]), 1.0)
+                max_error = max(max_error, float(np.max(np.abs(a[mask] - b[mask]) / scale)))
+
+    return {
+        "tickers": tickers,
+        "length": length,
+        "pandas_ms": round(pandas_time * 1000, 2),
+        "numpy_rows_ms": round(row_time * 1000, 2),
+        "numpy_panel_ms": round(numpy_time * 1000, 2),
+        "speedup": round(pandas_time / numpy_time, 1) if numpy_time > 0 else None,
+        "max_rel_error": max_error,
+    }
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    result = benchmark(*args)
+    print(f"종목 {result['tickers']}개 × 캔들 {result['length']}개")
+    print(f"  pandas (종목별):    {result['pandas_ms']:>10.2f} ms")
+    print(f"  NumPy (종목별):     {result['numpy_rows_ms']:>10.2f} ms")
+    print(f"  NumPy (2차원 1회):  {result['numpy_panel_ms']:>10.2f} ms  ({result['speedup']}배)")
+    print(f"  최대 상대 오차:     {result['max_rel_error']:.2e}")
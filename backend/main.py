@@ -14,8 +14,10 @@ import pandas as pd
 
 logger = logging.getLogger(__name__)
 
-from config import BACKEND_PORT
+from config import BACKEND_PORT, MARKET_DATA_ENABLED, BOT_RUNTIME_MODE
+import indicators as ta
 from upbit_client import upbit_client
+from market_data import market_data_hub
 from trading_engine import trading_engine
 from ai_trader import ai_trader, AI_MODELS
 from coin_scanner import coin_scanner
@@ -24,6 +26,11 @@ from ai_debate import ai_debate, EXPERTS
 from scalping_strategies import STRATEGIES, StrategyType
 from scalping_trader import scalping_trader
 from ai_scalper import ai_scalper
+from scan_service import scan_service
+from bot_runtime import bot_runtime
+from exit_engine import exit_engine
+from order_pipeline import order_pipeline
+from execution_router import execution_router, OrderIntent, to_order_result
 from database import db
 from dataclasses import asdict
 from user_manager import user_manager
@@ -71,6 +78,13 @@ class UserTradeRequest(BaseModel):
     volume: Optional[float] = None
 
 
+class PriceAlertRequest(BaseModel):
+    ticker: str
+    price: float
+    direction: str  # above(이상) | below(이하)
+    note: Optional[str] = ""
+
+
 # ========== 인증 Dependency ==========
 
 async def get_current_user(authorization: Optional[str] = Header(None)) -> Optional[Dict[str, Any]]:
@@ -124,6 +138,36 @@ manager = ConnectionManager()
 ai_scalper.set_broadcast_callback(manager.broadcast)
 
 
+# ========== 서버 수명 주기 ==========
+
+@app.on_event("startup")
+async def on_startup():
+    """실시간 시세 허브, 시세 스냅샷 서비스, 공유 스캔 서비스 시작"""
+    if MARKET_DATA_ENABLED:
+        market_data_hub.start()
+    upbit_client.snapshots.start()
+    scan_service.start()
+    if BOT_RUNTIME_MODE == "app":
+        # 봇을 서버 이벤트 루프에서 실행 (전용 스레드 없음)
+        bot_runtime.attach(asyncio.get_running_loop())
+    
+    # 가격 알림 발동 → WebSocket 브로드캐스트 (시세 수신 스레드에서 서버 루프로 전달)
+    loop = asyncio.get_running_loop()
+    exit_engine.set_alert_callback(lambda alert: asyncio.run_coroutine_threadsafe(
+        manager.broadcast(json.dumps({"type": "price_alert", "data": alert})), loop
+    ))
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    """봇 런타임, 실시간 시세 허브/스냅샷/스캔 서비스 중지 및 HTTP 세션 정리"""
+    await bot_runtime.shutdown()
+    scan_service.stop()
+    market_data_hub.stop()
+    upbit_client.snapshots.stop()
+    await upbit_client.aio.close()
+
+
 # ========== API 엔드포인트 ==========
 
 @app.get("/")
@@ -140,7 +184,7 @@ async def root():
 @app.get("/api/price/{ticker}")
 async def get_price(ticker: str):
     """현재가 조회"""
-    price = upbit_client.get_current_price(ticker)
+    price = await upbit_client.aio.get_current_price(ticker)
     if price is None:
         raise HTTPException(status_code=404, detail="가격 조회 실패")
     return {"ticker": ticker, "price": price}
@@ -150,10 +194,113 @@ async def get_price(ticker: str):
 async def get_prices(tickers: str = "KRW-BTC,KRW-ETH"):
     """여러 코인 현재가 조회"""
     ticker_list = tickers.split(",")
-    prices = upbit_client.get_current_prices(ticker_list)
+    prices = await upbit_client.aio.get_current_prices(ticker_list)
     return {"prices": prices}
 
 
+@app.get("/api/runtime/bots")
+async def get_bot_runtime_stats():
+    """봇 런타임 상태 (이벤트 루프, 봇 태스크, 공유 세션)"""
+    return bot_runtime.get_stats()
+
+
+@app.get("/api/runtime/exit-engine")
+async def get_exit_engine_stats():
+    """청산 엔진 상태 (등록 포지션, 발동 횟수, 발동→매도 호출 지연)"""
+    return exit_engine.get_stats()
+
+
+@app.get("/api/runtime/orders")
+async def get_order_pipeline_stats():
+    """주문 파이프라인 상태 (접수/체결/시간 초과, 주문→체결 확인 지연)"""
+    return order_pipeline.get_stats()
+
+
+@app.get("/api/runtime/router")
+async def get_execution_router_stats():
+    """실행 라우터 상태 (대기열, 대기/실행 지연, 중복/거부, 봇별 보유 종목)"""
+    return execution_router.get_stats()
+
+
+# ========== 가격 알림 ==========
+
+@app.get("/api/alerts")
+async def get_price_alerts(user: Optional[Dict] = Depends(get_current_user)):
+    """가격 알림 목록 (활성 + 최근 발동)"""
+    return exit_engine.get_alerts(user["id"] if user else None)
+
+
+@app.post("/api/alerts")
+async def create_price_alert(request: PriceAlertRequest, user: Optional[Dict] = Depends(get_current_user)):
+    """가격 알림 등록 - 체결가가 기준가 이상(above)/이하(below)가 되면 한 번 알림"""
+    if request.direction not in ("above", "below"):
+        raise HTTPException(status_code=400, detail="direction은 above 또는 below")
+    if request.price <= 0:
+        raise HTTPException(status_code=400, detail="잘못된 가격")
+    alert = exit_engine.add_alert(request.ticker, request.price, request.direction,
+                                  request.note or "", user["id"] if user else None)
+    return {"success": True, "alert": asdict(alert)}
+
+
+@app.delete("/api/alerts/{alert_id}")
+async def delete_price_alert(alert_id: int, user: Optional[Dict] = Depends(get_current_user)):
+    """가격 알림 삭제"""
+    if not exit_engine.remove_alert(alert_id, user["id"] if user else None):
+        raise HTTPException(status_code=404, detail="알림을 찾을 수 없습니다")
+    return {"success": True}
+
+
+@app.get("/api/market-data/status")
+async def get_market_data_status():
+    """실시간 시세 허브 상태"""
+    return market_data_hub.get_status()
+
+
+@app.get("/api/market-data/quote/{ticker}")
+async def get_market_data_quote(ticker: str):
+    """실시간 시세 (최우선 호가/24시간 통계 포함)"""
+    quote = market_data_hub.quote_to_dict(ticker)
+    if quote is None:
+        raise HTTPException(status_code=404, detail="실시간 시세 없음")
+    return quote
+
+
+@app.get("/api/market-data/snapshot")
+async def get_market_snapshot_status():
+    """전체 마켓 시세 스냅샷 상태"""
+    return upbit_client.snapshots.get_stats()
+
+
+@app.get("/api/market-data/scan-service")
+async def get_scan_service_stats():
+    """공유 스캔 서비스 상태 (버전, 섹션별 계산 전략, 구독 목록)"""
+    return scan_service.get_stats()
+
+
+@app.get("/api/market-data/candle-cache")
+async def get_candle_cache_stats():
+    """캔들 캐시 통계"""
+    return upbit_client.candles.get_stats()
+
+
+@app.get("/api/market-data/resampler")
+async def get_resampler_stats():
+    """1분봉 리샘플링 통계 (로컬 생성/과거 캔들 연결/API 대체 횟수)"""
+    return upbit_client.resampler.get_stats()
+
+
+@app.get("/api/market-data/scheduler")
+async def get_scheduler_stats():
+    """업비트 요청 스케줄러 통계 (그룹별 대기열/대기 시간)"""
+    return upbit_client.get_scheduler_stats()
+
+
+@app.get("/api/market-data/single-flight")
+async def get_single_flight_stats():
+    """동일 요청 병합 통계 (병합된 호출 수)"""
+    return upbit_client.get_single_flight_stats()
+
+
 @app.get("/api/ohlcv/{ticker}")
 async def get_ohlcv(ticker: str, interval: str = "day", count: int = 100):
     """OHLCV 데이터 조회"""
@@ -166,7 +313,7 @@ async def get_ohlcv(ticker: str, interval: str = "day", count: int = 100):
 @app.get("/api/orderbook/{ticker}")
 async def get_orderbook(ticker: str):
     """호가 정보 조회"""
-    orderbook = upbit_client.get_orderbook(ticker)
+    orderbook = await upbit_client.aio.get_orderbook(ticker)
     if not orderbook:
         raise HTTPException(status_code=404, detail="호가 조회 실패")
     return orderbook
@@ -263,7 +410,7 @@ async def get_upbit_status():
         }
     
     try:
-        balances = upbit_client.upbit.get_balances()
+        balances = upbit_client.get_accounts()
         
         if balances is None or (isinstance(balances, dict) and 'error' in balances):
             error_msg = ""
@@ -299,6 +446,13 @@ async def get_upbit_status():
                     elif timestamp < coin_buy_dates[currency]:
                         coin_buy_dates[currency] = timestamp
         
+        # 보유 코인 현재가 일괄 조회
+        held_markets = [
+            f"KRW-{b.get('currency')}" for b in balances
+            if b.get('currency') != 'KRW' and float(b.get('balance', 0) or 0) + float(b.get('locked', 0) or 0) > 0
+        ]
+        prices = upbit_client.get_current_prices(held_markets) if held_markets else {}
+        
         for b in balances:
             currency = b.get('currency', '')
             balance = float(b.get('balance', 0) or 0)
@@ -311,7 +465,7 @@ async def get_upbit_status():
                 total_eval += total_balance
             elif total_balance > 0:
                 ticker = f"KRW-{currency}"
-                current_price = upbit_client.get_current_price(ticker) or avg_buy_price
+                current_price = prices.get(ticker) or avg_buy_price
                 eval_amount = total_balance * current_price
                 buy_total = total_balance * avg_buy_price  # 매수 총액
                 profit_amount = eval_amount - buy_total  # 손익 금액
@@ -362,7 +516,7 @@ async def check_auth_status():
     
     try:
         # 잔고 조회로 API 키 유효성 확인
-        balances = upbit_client.upbit.get_balances()
+        balances = upbit_client.get_accounts()
         if balances is None:
             return {
                 "authenticated": False,
@@ -562,7 +716,7 @@ async def stop_bot():
 @app.post("/api/trade/buy")
 async def manual_buy(request: TradeRequest):
     """수동 매수"""
-    result = trading_engine.manual_buy(request.ticker, request.amount)
+    result = await trading_engine.manual_buy(request.ticker, request.amount)
     await manager.broadcast(json.dumps({"type": "trade", "data": result}))
     return result
 
@@ -570,7 +724,7 @@ async def manual_buy(request: TradeRequest):
 @app.post("/api/trade/sell")
 async def manual_sell(request: TradeRequest):
     """수동 매도"""
-    result = trading_engine.manual_sell(request.ticker, request.amount)
+    result = await trading_engine.manual_sell(request.ticker, request.amount)
     await manager.broadcast(json.dumps({"type": "trade", "data": result}))
     return result
 
@@ -949,7 +1103,7 @@ async def scan_and_buy(amount: int = 10000, top_n: int = 10):
             # 3. 매수 결정
             if debate_result.consensus in ["buy", "strong_buy"] and debate_result.consensus_confidence >= 70:
                 # 자동 매수 실행
-                buy_result = upbit_client.buy_market_order(ticker, amount)
+                buy_result = to_order_result(await execution_router.buy("ai_debate", ticker, amount))
                 
                 if buy_result and "uuid" in buy_result:
                     results["bought"].append({
@@ -1023,7 +1177,7 @@ async def quick_pick_and_buy(amount: int = 10000):
     
     if best_pick and best_confidence >= 65:
         # 최고 추천 종목 매수
-        buy_result = upbit_client.buy_market_order(best_pick.ticker, amount)
+        buy_result = to_order_result(await execution_router.buy("ai_debate", best_pick.ticker, amount))
         
         return {
             "success": True,
@@ -1102,7 +1256,7 @@ async def ai_max_profit_scan(amount: int = 10000, scan_all: bool = True):
     
     try:
         # 1. BTC 추세 확인
-        btc_df = pyupbit.get_ohlcv("KRW-BTC", interval="minute60", count=2)
+        btc_df = upbit_client.get_ohlcv("KRW-BTC", interval="minute60", count=2)
         if btc_df is not None and len(btc_df) >= 2:
             btc_change = float((btc_df['close'].iloc[-1] - btc_df['close'].iloc[-2]) / btc_df['close'].iloc[-2] * 100)
             btc_price = float(btc_df['close'].iloc[-1])
@@ -1166,15 +1320,15 @@ async def ai_max_profit_scan(amount: int = 10000, scan_all: bool = True):
         results["scanned_coins"].sort(key=lambda x: x["score"], reverse=True)
         results["candidates"].sort(key=lambda x: x["score"], reverse=True)
         
-        # 5. 상위 후보 매수 실행
-        for candidate in results["candidates"][:3]:  # 최대 3개까지 매수
+        # 5. 상위 후보 매수 실행 (최대 3개 - 서로 다른 종목이라 동시에 주문)
+        top_candidates = results["candidates"][:3]
+        fills = await execution_router.submit_many([
+            OrderIntent("ai_max_profit", candidate["ticker"], "bid", amount=amount)
+            for candidate in top_candidates
+        ])
+        for candidate, fill in zip(top_candidates, fills):
             try:
-                buy_result = upbit_client.buy_market_order(candidate["ticker"], amount)
-                
-                if buy_result and not isinstance(buy_result, dict):
-                    buy_result = {"uuid": str(buy_result)}
-                elif buy_result is None:
-                    buy_result = {"error": "매수 실패"}
+                buy_result = to_order_result(fill)
                 
                 results["bought"].append({
                     **candidate,
@@ -1411,7 +1565,7 @@ async def ai_max_profit_sell_scan():
                 # 3. 매도 실행
                 if coin_analysis["sell_recommendation"]:
                     try:
-                        sell_result = upbit_client.sell_market_order(ticker, holding["amount"])
+                        sell_result = to_order_result(await execution_router.sell("ai_max_profit", ticker, holding["amount"]))
                         
                         results["sold"].append({
                             **coin_analysis,
@@ -1509,12 +1663,12 @@ async def ai_quick_analysis(
     try:
         if type == "buy":
             # 🔥 업비트 상장 전체 코인 대상 매수 분석
-            all_tickers = pyupbit.get_tickers(fiat="KRW")
+            all_tickers = upbit_client.get_tickers(fiat="KRW")
             total_coins = len(all_tickers)
             
             # 빠른 분석을 위해 일괄 현재가 조회
             try:
-                all_prices = pyupbit.get_current_price(all_tickers)
+                all_prices = upbit_client.get_current_prices(all_tickers)
             except:
                 all_prices = {}
             
@@ -1529,17 +1683,12 @@ async def ai_quick_analysis(
                     coin_name = ticker.replace("KRW-", "")
                     
                     # 일봉 데이터로 RSI 계산 (최소한의 API 호출)
-                    df = pyupbit.get_ohlcv(ticker, interval="day", count=15)
+                    df = upbit_client.get_ohlcv(ticker, interval="day", count=15)
                     if df is None or len(df) < 14:
                         continue
                     
                     # RSI 계산
-                    delta = df['close'].diff()
-                    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                    rs = gain / loss
-                    rsi = 100 - (100 / (1 + rs))
-                    current_rsi = to_python(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else 50
+                    current_rsi = to_python(ta.last(ta.rsi(df['close'], 14), 50))
                     
                     # 거래량 변동 계산
                     vol_avg = df['volume'].iloc[:-1].mean()
@@ -1547,13 +1696,10 @@ async def ai_quick_analysis(
                     volume_ratio = to_python(vol_today / vol_avg) if vol_avg > 0 else 1
                     
                     # 볼린저밴드 % 계산
-                    sma20 = df['close'].rolling(window=20).mean()
-                    std20 = df['close'].rolling(window=20).std()
-                    upper = sma20 + (std20 * 2)
-                    lower = sma20 - (std20 * 2)
+                    upper, _, lower = ta.bollinger(df['close'], 20)
                     current_price = df['close'].iloc[-1]
-                    bb_range = upper.iloc[-1] - lower.iloc[-1]
-                    bb_percent = to_python(((current_price - lower.iloc[-1]) / bb_range * 100) if bb_range > 0 else 50)
+                    bb_range = upper[-1] - lower[-1]
+                    bb_percent = to_python(((current_price - lower[-1]) / bb_range * 100) if bb_range > 0 else 50)
                     
                     # 매수 시그널 감지
                     signal_found = False
@@ -1632,7 +1778,7 @@ async def ai_quick_analysis(
                 ticker = f"KRW-{currency}"
                 
                 try:
-                    current_price = pyupbit.get_current_price(ticker)
+                    current_price = upbit_client.get_current_price(ticker)
                     if not current_price:
                         continue
                     
@@ -1717,7 +1863,7 @@ async def ai_max_profit_ai_sell(
     import pyupbit
     import numpy as np
     import requests
-    from config import OPENROUTER_API_KEY
+    from config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL
     
     def to_python(val):
         if isinstance(val, (np.integer, np.floating)):
@@ -1755,7 +1901,7 @@ async def ai_max_profit_ai_sell(
     
     try:
         # 1. 시장 전체 상황 분석
-        btc_df = pyupbit.get_ohlcv("KRW-BTC", interval="minute60", count=24)
+        btc_df = upbit_client.get_ohlcv("KRW-BTC", interval="minute60", count=24)
         market_sentiment = "neutral"
         btc_change_24h = 0
         
@@ -1791,13 +1937,13 @@ async def ai_max_profit_ai_sell(
             current_price = balance.get("current_price", avg_buy_price)
             
             if not current_price or current_price <= 0:
-                current_price = pyupbit.get_current_price(ticker) or avg_buy_price
+                current_price = upbit_client.get_current_price(ticker) or avg_buy_price
             
             profit_rate = ((current_price - avg_buy_price) / avg_buy_price) * 100
             value = current_price * amount
             
             # 최고점 대비 하락률 계산 (24시간 기준)
-            df = pyupbit.get_ohlcv(ticker, interval="minute60", count=24)
+            df = upbit_client.get_ohlcv(ticker, interval="minute60", count=24)
             highest_24h = current_price
             if df is not None and len(df) > 0:
                 highest_24h = to_python(df['high'].max())
@@ -1873,7 +2019,7 @@ async def ai_max_profit_ai_sell(
         for ai in ai_models:
             try:
                 response = requests.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
+                    f"{OPENROUTER_BASE_URL}/chat/completions",
                     headers={
                         "Authorization": f"Bearer {OPENROUTER_API_KEY}",
                         "Content-Type": "application/json"
@@ -2008,7 +2154,7 @@ async def ai_max_profit_ai_sell(
             # 6. 자동 매도 실행
             if should_sell and auto_execute:
                 try:
-                    sell_result = upbit_client.sell_market_order(ticker, holding["amount"])
+                    sell_result = to_order_result(await execution_router.sell("ai_max_profit", ticker, holding["amount"]))
                     
                     if sell_result and not sell_result.get("error"):
                         results["sold"].append({
@@ -2089,7 +2235,7 @@ async def ai_max_profit_ai_scan(
     import pyupbit
     import numpy as np
     import requests
-    from config import OPENROUTER_API_KEY
+    from config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL
     
     def to_python(val):
         if isinstance(val, (np.integer, np.floating)):
@@ -2130,8 +2276,8 @@ async def ai_max_profit_ai_scan(
     
     try:
         # 1. 시장 전체 개요 수집
-        btc_df = pyupbit.get_ohlcv("KRW-BTC", interval="minute60", count=24)
-        eth_df = pyupbit.get_ohlcv("KRW-ETH", interval="minute60", count=24)
+        btc_df = upbit_client.get_ohlcv("KRW-BTC", interval="minute60", count=24)
+        eth_df = upbit_client.get_ohlcv("KRW-ETH", interval="minute60", count=24)
         
         if btc_df is not None and len(btc_df) >= 2:
             btc_change_1h = to_python((btc_df['close'].iloc[-1] - btc_df['close'].iloc[-2]) / btc_df['close'].iloc[-2] * 100)
@@ -2151,8 +2297,8 @@ async def ai_max_profit_ai_scan(
         coin_data_list = []
         for ticker in all_tickers[:30]:  # 거래량 상위 30개 상세 분석
             try:
-                df_day = pyupbit.get_ohlcv(ticker, interval="day", count=14)
-                df_hour = pyupbit.get_ohlcv(ticker, interval="minute60", count=24)
+                df_day = upbit_client.get_ohlcv(ticker, interval="day", count=14)
+                df_hour = upbit_client.get_ohlcv(ticker, interval="minute60", count=24)
                 
                 if df_day is None or df_hour is None or len(df_day) < 7:
                     continue
@@ -2164,14 +2310,12 @@ async def ai_max_profit_ai_scan(
                 change_7d = to_python((df_day['close'].iloc[-1] - df_day['close'].iloc[-7]) / df_day['close'].iloc[-7] * 100) if len(df_day) >= 7 else 0
                 
                 # RSI 계산
-                delta = df_day['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = to_python(100 - (100 / (1 + rs.iloc[-1]))) if loss.iloc[-1] != 0 else 50
+                # 하락폭이 0이면(RSI 100) 중립값 50
+                day_rsi = ta.rsi(df_day['close'], 14)[-1]
+                rsi = to_python(day_rsi) if day_rsi < 100 else 50
                 
                 # 거래량 비율
-                vol_avg = df_day['volume'].rolling(window=7).mean().iloc[-1]
+                vol_avg = ta.sma(df_day['volume'], 7)[-1]
                 vol_ratio = to_python(df_day['volume'].iloc[-1] / vol_avg) if vol_avg > 0 else 1
                 
                 # 변동성
@@ -2254,7 +2398,7 @@ async def ai_max_profit_ai_scan(
             print(f"[AI-SCAN] {name} 분석 중...")
             try:
                 response = requests.post(
-                    "https://openrouter.ai/api/v1/chat/completions",
+                    f"{OPENROUTER_BASE_URL}/chat/completions",
                     headers=headers,
                     json={
                         "model": model,
@@ -2377,7 +2521,7 @@ async def ai_max_profit_ai_scan(
                 print(f"[AI-SCAN] {ticker} 매수 실행 (동의: {pick['votes']}/3, 신뢰도: {pick['avg_confidence']}%, 금액: {buy_amount:,}원)")
                 
                 try:
-                    buy_result = upbit_client.buy_market_order(ticker, buy_amount)
+                    buy_result = to_order_result(await execution_router.buy("ai_max_profit", ticker, buy_amount))
                     if buy_result and not buy_result.get("error"):
                         # 각 AI의 판단 정보 수집
                         ai_judgments = []
@@ -2595,6 +2739,8 @@ class ScalpingConfigRequest(BaseModel):
     trade_amount: Optional[float] = 10000
     max_positions: Optional[int] = 3
     scan_interval: Optional[int] = 60
+    scan_concurrency: Optional[int] = None  # AI 단타 후보 스캔 동시 조회 수
+    scan_deadline: Optional[float] = None  # AI 단타 1회 스캔 제한 시간(초)
 
 
 @app.get("/api/scalping/strategies")
@@ -2692,24 +2838,28 @@ async def get_ai_scalping_status():
 @app.get("/api/ai-scalping/positions")
 async def get_ai_positions_detail():
     """보유 포지션 상세 정보 및 매도 전략 조회 (모든 보유 종목 포함)"""
-    ai_positions = ai_scalper.positions  # AI가 관리하는 포지션
+    ai_positions = dict(ai_scalper.positions)  # AI가 관리하는 포지션
     detailed_positions = []
     processed_tickers = set()
     
     # 매도 전략 설정값
     sell_strategy_config = {
         "min_profit_for_ai_analysis": 5.0,
-        "min_profit_for_trailing": 5.0,
-        "stop_loss_pct": -3.0,
-        "target_profit": 10.0,
+        "min_profit_for_trailing": ai_scalper.EXIT_TRAILING.activation,
+        "stop_loss_pct": ai_scalper.EXIT_STOP_LOSS_PCT,
+        "target_profit": ai_scalper.EXIT_TARGET_PROFIT,
         "min_holding_seconds": 300
     }
     
-    # 1. 먼저 AI 포지션 처리
+    # 1. 먼저 AI 포지션 수집 (현재가는 아래에서 한 번에 조회)
+    holdings = []
     for ticker, pos in ai_positions.items():
         processed_tickers.add(ticker)
-        position_info = _get_position_detail(ticker, pos, sell_strategy_config, is_ai_managed=True)
-        detailed_positions.append(position_info)
+        rule = exit_engine.get_rule(ai_scalper.EXIT_OWNER, ticker)
+        if rule is not None:
+            # 청산 엔진의 최신 최고 수익률/트레일링 스탑 (포지션 반영은 주기적)
+            pos = {**pos, 'max_profit': rule.max_profit, 'trailing_stop': rule.trailing_stop}
+        holdings.append((ticker, pos, True))
     
     # 2. 업비트 잔고에서 모든 보유 종목 가져오기 (AI 포지션이 아닌 것도 포함)
     try:
@@ -2743,12 +2893,18 @@ async def get_ai_positions_detail():
                     'volume': balance
                 }
                 
-                position_info = _get_position_detail(ticker, manual_pos, sell_strategy_config, is_ai_managed=False)
-                detailed_positions.append(position_info)
+                holdings.append((ticker, manual_pos, False))
                 processed_tickers.add(ticker)
     except Exception as e:
         logger.error(f"잔고 조회 오류: {e}")
     
+    # 현재가 일괄 조회 후 상세 정보 구성
+    prices = upbit_client.get_current_prices([ticker for ticker, _, _ in holdings]) if holdings else {}
+    for ticker, pos, is_ai_managed in holdings:
+        detailed_positions.append(_get_position_detail(
+            ticker, pos, sell_strategy_config, is_ai_managed=is_ai_managed, current_price=prices.get(ticker)
+        ))
+    
     # 수익률 순으로 정렬 (높은 것이 먼저)
     detailed_positions.sort(key=lambda x: x['profit_rate'], reverse=True)
     
@@ -2767,9 +2923,11 @@ async def get_ai_positions_detail():
     }
 
 
-def _get_position_detail(ticker: str, pos: dict, sell_strategy_config: dict, is_ai_managed: bool = True) -> dict:
-    """포지션 상세 정보 생성"""
-    current_price = upbit_client.get_current_price(ticker)
+def _get_position_detail(ticker: str, pos: dict, sell_strategy_config: dict, is_ai_managed: bool = True,
+                         current_price: Optional[float] = None) -> dict:
+    """포지션 상세 정보 생성 (current_price 미지정 시 조회)"""
+    if current_price is None:
+        current_price = upbit_client.get_current_price(ticker)
     entry_price = pos.get('entry_price', 0)
     
     if current_price and entry_price:
@@ -2858,7 +3016,9 @@ async def configure_ai_scalping(config: ScalpingConfigRequest):
             strategies=config.strategies,  # 복수 전략
             trade_amount=config.trade_amount or 10000,
             max_positions=config.max_positions or 3,
-            check_interval=config.scan_interval or 60
+            check_interval=config.scan_interval or 60,
+            scan_concurrency=config.scan_concurrency,
+            scan_deadline=config.scan_deadline
         )
         return result
     except ValueError as e:
@@ -3072,6 +3232,13 @@ async def get_user_balance(user: Dict = Depends(require_auth)):
     formatted_balances = []
     total_krw = 0
     
+    # 보유 코인 현재가 일괄 조회
+    held_markets = [
+        f"KRW-{b.get('currency')}" for b in balances
+        if b.get('currency') != 'KRW' and float(b.get('balance', 0) or 0) > 0
+    ]
+    prices = upbit_client.get_current_prices(held_markets) if held_markets else {}
+    
     for b in balances:
         currency = b.get("currency", "")
         balance = float(b.get("balance", 0) or 0)
@@ -3087,7 +3254,7 @@ async def get_user_balance(user: Dict = Depends(require_auth)):
                 "profit_rate": 0
             })
         elif balance > 0:
-            current_price = upbit_client.get_current_price(f"KRW-{currency}") or avg_buy_price
+            current_price = prices.get(f"KRW-{currency}") or avg_buy_price
             eval_amount = balance * current_price
             profit_rate = ((current_price - avg_buy_price) / avg_buy_price * 100) if avg_buy_price > 0 else 0
             
@@ -10,6 +10,9 @@ from datetime import datetime
 from dataclasses import dataclass
 from enum import Enum
 
+import indicators as ta
+from upbit_client import upbit_client
+
 
 class MarketCondition(Enum):
     """시장 상태"""
@@ -71,36 +74,22 @@ class MarketAnalyzer:
     """시장 분석기"""
     
     def __init__(self):
+        self.client = upbit_client
         self.cache: Dict[str, MarketAnalysis] = {}
         self.last_analysis: Optional[str] = None
     
     def calculate_rsi(self, df: pd.DataFrame, period: int = 14) -> float:
         """RSI 계산"""
         try:
-            delta = df['close'].diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            return float(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else 50
+            return ta.last(ta.rsi(df['close'], period), 50)
         except:
             return 50
     
     def calculate_atr(self, df: pd.DataFrame, period: int = 14) -> float:
         """ATR (Average True Range) 계산 - 변동성 지표"""
         try:
-            high = df['high']
-            low = df['low']
-            close = df['close'].shift(1)
-            
-            tr1 = high - low
-            tr2 = abs(high - close)
-            tr3 = abs(low - close)
-            
-            tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-            atr = tr.rolling(window=period).mean()
-            
-            return float(atr.iloc[-1]) if not pd.isna(atr.iloc[-1]) else 0
+            atr = ta.atr(df['high'], df['low'], df['close'], period)
+            return ta.last(atr, 0)
         except:
             return 0
     
@@ -111,12 +100,12 @@ class MarketAnalyzer:
         """
         try:
             # 이동평균 기울기
-            ma20 = df['close'].rolling(20).mean()
-            ma_slope = (ma20.iloc[-1] - ma20.iloc[-5]) / ma20.iloc[-5] * 100
+            ma20 = ta.sma(df['close'], 20)
+            ma_slope = (ma20[-1] - ma20[-5]) / ma20[-5] * 100
             
             # 단기 vs 장기 이동평균
-            ma5 = df['close'].rolling(5).mean()
-            ma_diff = (ma5.iloc[-1] - ma20.iloc[-1]) / ma20.iloc[-1] * 100
+            ma5 = ta.sma(df['close'], 5)
+            ma_diff = (ma5[-1] - ma20[-1]) / ma20[-1] * 100
             
             # 최근 가격 변화
             price_change = (df['close'].iloc[-1] - df['close'].iloc[-10]) / df['close'].iloc[-10] * 100
@@ -147,7 +136,7 @@ class MarketAnalyzer:
         """개별 코인 시장 분석"""
         try:
             # OHLCV 데이터 조회
-            df = pyupbit.get_ohlcv(ticker, interval="day", count=60)
+            df = self.client.get_ohlcv(ticker, interval="day", count=60)
             if df is None or len(df) < 30:
                 return self._default_analysis(ticker)
             
@@ -161,7 +150,7 @@ class MarketAnalyzer:
             support, resistance = self.find_support_resistance(df)
             
             # 거래량 분석
-            avg_volume = df['volume'].rolling(20).mean().iloc[-1]
+            avg_volume = ta.sma(df['volume'], 20)[-1]
             current_volume = df['volume'].iloc[-1]
             volume_ratio = float(current_volume / avg_volume) if avg_volume > 0 else 1
             
@@ -0,0 +1,366 @@
+"""
+실시간 시세 허브 모듈
+- 업비트 WebSocket(ticker/trade/orderbook) 스트림을 구독해 메모리 시세판 유지
+- 현재가/최우선 호가/24시간 통계를 REST 호출 없이 조회
+- 전송 계층은 교체 가능 (로컬 리플레이 서버 등)
+- 체결가 변경 시 등록된 리스너 호출 (청산 엔진 등 틱 단위 처리)
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Callable, Tuple, Union
+
+import requests
+import websockets
+
+from config import UPBIT_API_URL, UPBIT_WS_URL, MARKET_DATA_MAX_AGE
+
+
+@dataclass
+class Quote:
+    """종목별 실시간 시세"""
+    ticker: str
+    trade_price: float = 0.0
+    best_bid: float = 0.0
+    best_ask: float = 0.0
+    best_bid_size: float = 0.0
+    best_ask_size: float = 0.0
+    opening_price: float = 0.0
+    high_price: float = 0.0
+    low_price: float = 0.0
+    prev_closing_price: float = 0.0
+    signed_change_rate: float = 0.0
+    acc_trade_price_24h: float = 0.0
+    acc_trade_volume_24h: float = 0.0
+    acc_trade_price: float = 0.0   # 당일(09:00 KST 기준) 누적 거래대금
+    trade_timestamp: int = 0      # 거래소 기준 최종 체결 시각 (ms)
+    received_at: float = 0.0      # 로컬 수신 시각 (time.monotonic)
+
+    def age(self) -> float:
+        """마지막 수신 이후 경과 시간 (초)"""
+        return time.monotonic() - self.received_at if self.received_at else float('inf')
+
+
+class MarketDataTransport:
+    """시세 스트림 전송 계층 인터페이스"""
+
+    async def connect(self):
+        raise NotImplementedError
+
+    async def send(self, message: str):
+        raise NotImplementedError
+
+    async def recv(self) -> Union[str, bytes]:
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+
+class WebSocketTransport(MarketDataTransport):
+    """WebSocket 전송 계층 (기본: 업비트 공개 WebSocket)"""
+
+    def __init__(self, url: str = UPBIT_WS_URL, ping_interval: float = 20):
+        self.url = url
+        self.ping_interval = ping_interval
+        self._ws = None
+
+    async def connect(self):
+        self._ws = await websockets.connect(
+            self.url, ping_interval=self.ping_interval, max_size=None
+        )
+
+    async def send(self, message: str):
+        await self._ws.send(message)
+
+    async def recv(self) -> Union[str, bytes]:
+        return await self._ws.recv()
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+
+
+class MarketDataHub:
+    """실시간 시세 허브 (백그라운드 스레드에서 스트림 구독)"""
+
+    STREAM_TYPES = ("ticker", "trade", "orderbook")
+
+    def __init__(self, transport_factory: Optional[Callable[[], MarketDataTransport]] = None,
+                 max_age: float = MARKET_DATA_MAX_AGE):
+        self.transport_factory = transport_factory or WebSocketTransport
+        self.max_age = max_age
+        self.is_running = False
+        self.connected = False
+
+        self._quotes: Dict[str, Quote] = {}
+        self._tickers: List[str] = []
+        self._listeners: List[Callable[[str, float], None]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._transport: Optional[MarketDataTransport] = None
+        self._stop_event = threading.Event()
+
+        # 통계
+        self.message_count = 0
+        self.reconnect_count = 0
+        self.error_count = 0
+        self.last_message_at: Optional[float] = None
+        self.connected_since: Optional[datetime] = None
+
+    # ========== 수명 주기 ==========
+
+    def start(self, tickers: Optional[List[str]] = None) -> bool:
+        """시세 구독 시작 (tickers 미지정 시 KRW 전체 마켓)"""
+        if self.is_running:
+            return False
+
+        self._tickers = list(tickers) if tickers else []
+        self._stop_event.clear()
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run_thread, daemon=True, name="MarketDataHub")
+        self._thread.start()
+        print(f"[{datetime.now()}] 📡 실시간 시세 허브 시작")
+        return True
+
+    def stop(self) -> bool:
+        """시세 구독 중지"""
+        if not self.is_running:
+            return False
+
+        self.is_running = False
+        self._stop_event.set()
+        loop, transport = self._loop, self._transport
+        if loop is not None and transport is not None and loop.is_running():
+            try:
+                asyncio.run_coroutine_threadsafe(transport.close(), loop)
+            except Exception:
+                pass
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.connected = False
+        print(f"[{datetime.now()}] 📡 실시간 시세 허브 중지")
+        return True
+
+    def add_listener(self, listener: Callable[[str, float], None]):
+        """체결가 리스너 등록 - listener(ticker, price), 수신 스레드에서 호출되므로 짧게 처리"""
+        if listener not in self._listeners:
+            self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: Callable[[str, float], None]):
+        self._listeners = [l for l in self._listeners if l != listener]
+
+    def set_transport(self, transport_factory: Callable[[], MarketDataTransport]):
+        """전송 계층 교체 (다음 연결부터 적용)"""
+        self.transport_factory = transport_factory
+
+    # ========== 시세 조회 ==========
+
+    def get_quote(self, ticker: str, max_age: Optional[float] = None) -> Optional[Quote]:
+        """최신 시세 조회 (유효 시간 초과 시 None)"""
+        quote = self._quotes.get(ticker)
+        if quote is None or quote.trade_price <= 0:
+            return None
+        limit = self.max_age if max_age is None else max_age
+        if quote.age() > limit:
+            return None
+        return quote
+
+    def get_price(self, ticker: str, max_age: Optional[float] = None) -> Optional[float]:
+        """현재가 조회"""
+        quote = self.get_quote(ticker, max_age)
+        return quote.trade_price if quote else None
+
+    def get_prices(self, tickers: List[str], max_age: Optional[float] = None) -> Dict[str, float]:
+        """여러 종목 현재가 조회 (유효한 시세만 반환)"""
+        prices = {}
+        for ticker in tickers:
+            price = self.get_price(ticker, max_age)
+            if price:
+                prices[ticker] = price
+        return prices
+
+    def get_best_bid_ask(self, ticker: str, max_age: Optional[float] = None) -> Optional[Tuple[float, float]]:
+        """최우선 매수/매도 호가 조회"""
+        quote = self.get_quote(ticker, max_age)
+        if quote is None or quote.best_bid <= 0 or quote.best_ask <= 0:
+            return None
+        return quote.best_bid, quote.best_ask
+
+    def get_all_quotes(self, max_age: Optional[float] = None) -> Dict[str, Quote]:
+        """유효한 전체 시세 조회"""
+        limit = self.max_age if max_age is None else max_age
+        return {
+            ticker: quote for ticker, quote in list(self._quotes.items())
+            if quote.trade_price > 0 and quote.age() <= limit
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        """허브 상태 조회"""
+        return {
+            "is_running": self.is_running,
+            "connected": self.connected,
+            "connected_since": self.connected_since.isoformat() if self.connected_since else None,
+            "subscribed": len(self._tickers),
+            "quotes": len(self._quotes),
+            "fresh_quotes": len(self.get_all_quotes()),
+            "message_count": self.message_count,
+            "reconnect_count": self.reconnect_count,
+            "error_count": self.error_count,
+            "last_message_age": round(time.monotonic() - self.last_message_at, 3) if self.last_message_at else None,
+        }
+
+    # ========== 스트림 처리 ==========
+
+    def _run_thread(self):
+        """전용 이벤트 루프에서 스트림 구독"""
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _run(self):
+        """연결/재연결 루프"""
+        backoff = 1.0
+        while not self._stop_event.is_set():
+            try:
+                if not self._tickers:
+                    self._tickers = self._fetch_krw_markets()
+                    if not self._tickers:
+                        raise ConnectionError("마켓 목록 조회 실패")
+
+                self._transport = self.transport_factory()
+                await self._transport.connect()
+                await self._transport.send(self._subscribe_message(self._tickers))
+                self.connected = True
+                self.connected_since = datetime.now()
+                backoff = 1.0
+                print(f"[{datetime.now()}] 📡 시세 스트림 연결: {len(self._tickers)}개 마켓")
+
+                while not self._stop_event.is_set():
+                    raw = await self._transport.recv()
+                    self.handle_message(raw)
+
+            except Exception as e:
+                if self._stop_event.is_set():
+                    break
+                self.error_count += 1
+                self.reconnect_count += 1
+                print(f"[{datetime.now()}] ⚠️ 시세 스트림 끊김: {e} ({backoff:.0f}초 후 재연결)")
+            finally:
+                self.connected = False
+                if self._transport is not None:
+                    try:
+                        await self._transport.close()
+                    except Exception:
+                        pass
+                    self._transport = None
+
+            # 중지 요청에 즉시 반응하도록 짧게 나누어 대기
+            waited = 0.0
+            while waited < backoff and not self._stop_event.is_set():
+                await asyncio.sleep(0.2)
+                waited += 0.2
+            backoff = min(backoff * 2, 30.0)
+
+    def _subscribe_message(self, tickers: List[str]) -> str:
+        """구독 요청 메시지 생성"""
+        message: List[Dict[str, Any]] = [{"ticket": str(uuid.uuid4())}]
+        for stream_type in self.STREAM_TYPES:
+            message.append({"type": stream_type, "codes": tickers})
+        message.append({"format": "DEFAULT"})
+        return json.dumps(message)
+
+    @staticmethod
+    def _fetch_krw_markets() -> List[str]:
+        """KRW 마켓 목록 조회"""
+        try:
+            response = requests.get(f"{UPBIT_API_URL}/v1/market/all", timeout=5)
+            if response.status_code == 200:
+                return [m['market'] for m in response.json() if m['market'].startswith("KRW-")]
+        except Exception as e:
+            print(f"[MarketDataHub] 마켓 목록 조회 실패: {e}")
+        return []
+
+    def handle_message(self, raw: Union[str, bytes]):
+        """스트림 메시지 반영"""
+        try:
+            data = json.loads(raw)
+        except (ValueError, TypeError):
+            return
+
+        ticker = data.get("code")
+        stream_type = data.get("type")
+        if not ticker or not stream_type:
+            return
+
+        quote = self._quotes.get(ticker)
+        if quote is None:
+            quote = Quote(ticker=ticker)
+            self._quotes[ticker] = quote
+        last_price = quote.trade_price
+
+        if stream_type == "ticker":
+            trade_timestamp = int(data.get("trade_timestamp") or 0)
+            # 체결 메시지보다 늦게 도착한 이전 시세는 현재가에 반영하지 않음 (통계만 갱신)
+            if trade_timestamp >= quote.trade_timestamp:
+                quote.trade_price = float(data.get("trade_price") or quote.trade_price)
+                quote.trade_timestamp = trade_timestamp
+            quote.opening_price = float(data.get("opening_price") or 0)
+            quote.high_price = float(data.get("high_price") or 0)
+            quote.low_price = float(data.get("low_price") or 0)
+            quote.prev_closing_price = float(data.get("prev_closing_price") or 0)
+            quote.signed_change_rate = float(data.get("signed_change_rate") or 0)
+            quote.acc_trade_price_24h = float(data.get("acc_trade_price_24h") or 0)
+            quote.acc_trade_volume_24h = float(data.get("acc_trade_volume_24h") or 0)
+            quote.acc_trade_price = float(data.get("acc_trade_price") or 0)
+        elif stream_type == "trade":
+            trade_timestamp = int(data.get("trade_timestamp") or 0)
+            # 순서가 뒤바뀐 체결은 무시
+            if trade_timestamp >= quote.trade_timestamp:
+                quote.trade_price = float(data.get("trade_price") or quote.trade_price)
+                quote.trade_timestamp = trade_timestamp
+        elif stream_type == "orderbook":
+            units = data.get("orderbook_units") or []
+            if units:
+                top = units[0]
+                quote.best_bid = float(top.get("bid_price") or 0)
+                quote.best_ask = float(top.get("ask_price") or 0)
+                quote.best_bid_size = float(top.get("bid_size") or 0)
+                quote.best_ask_size = float(top.get("ask_size") or 0)
+        else:
+            return
+
+        now = time.monotonic()
+        quote.received_at = now
+        self.last_message_at = now
+        self.message_count += 1
+
+        if quote.trade_price != last_price and quote.trade_price > 0:
+            for listener in self._listeners:
+                try:
+                    listener(ticker, quote.trade_price)
+                except Exception as e:
+                    self.error_count += 1
+                    print(f"[MarketDataHub] 리스너 오류 ({ticker}): {e}")
+
+    def quote_to_dict(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """시세를 dict로 변환 (API 응답용)"""
+        quote = self._quotes.get(ticker)
+        if quote is None:
+            return None
+        data = asdict(quote)
+        data["age"] = round(quote.age(), 3)
+        return data
+
+
+# 싱글톤 인스턴스
+market_data_hub = MarketDataHub()
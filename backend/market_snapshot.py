@@ -0,0 +1,248 @@
+"""
+전체 마켓 시세 스냅샷 모듈
+- KRW 전체 마켓 현재가/거래대금/등락률을 묶음 요청으로 동시에 조회
+- 불변 스냅샷 객체 하나를 일정 주기로 갱신해 모든 호출자가 공유
+- 실시간 시세 허브가 전체 마켓을 보유 중이면 REST 요청 없이 구성
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, Mapping
+
+from config import MARKET_SNAPSHOT_INTERVAL, MARKET_SNAPSHOT_BATCH_SIZE
+from market_data import market_data_hub
+
+
+@dataclass(frozen=True)
+class TickerSnapshot:
+    """종목별 시세 스냅샷"""
+    ticker: str
+    price: float
+    acc_trade_price_24h: float      # 최근 24시간 누적 거래대금
+    acc_trade_price: float          # 당일(09:00 KST 기준) 누적 거래대금 = 일봉 value
+    acc_trade_volume_24h: float
+    signed_change_rate: float       # 전일 대비 등락률 (소수, 0.05 = +5%)
+    timestamp: int                  # 거래소 기준 시각 (ms)
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """전체 마켓 시세 스냅샷 (불변)"""
+    tickers: Mapping[str, TickerSnapshot] = field(default_factory=lambda: MappingProxyType({}))
+    taken_at: float = 0.0           # 생성 시각 (time.time)
+    source: str = "rest"            # rest | stream
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.tickers
+
+    def get(self, ticker: str) -> Optional[TickerSnapshot]:
+        return self.tickers.get(ticker)
+
+    def age(self) -> float:
+        """생성 이후 경과 시간 (초)"""
+        return time.time() - self.taken_at if self.taken_at else float('inf')
+
+    def prices(self) -> Dict[str, float]:
+        return {t: s.price for t, s in self.tickers.items()}
+
+    def sorted_by_volume(self, min_trade_price_24h: float = 0) -> List[str]:
+        """24시간 거래대금 내림차순 마켓 목록"""
+        items = [s for s in self.tickers.values() if s.acc_trade_price_24h >= min_trade_price_24h]
+        items.sort(key=lambda s: s.acc_trade_price_24h, reverse=True)
+        return [s.ticker for s in items]
+
+    def filter_by_trade_value(self, min_value: float, tickers: Optional[List[str]] = None) -> List[str]:
+        """당일 거래대금(일봉 value) 기준 필터 (순서 유지)"""
+        source = tickers if tickers is not None else list(self.tickers.keys())
+        return [t for t in source if t in self.tickers and self.tickers[t].acc_trade_price >= min_value]
+
+    def prefilter_liquid(self, min_value: float, tickers: Optional[List[str]] = None) -> List[str]:
+        """캔들 조회 전 유동성 사전 필터 - 24시간 거래대금 기준 (순서 유지)
+
+        24시간 거래대금은 당일 거래대금 이상이므로 같은 기준의 당일 거래대금 필터를 통과할 종목은 모두 남음.
+        스냅샷이 비어 있으면(조회 실패) 걸러내지 않고 그대로 반환
+        """
+        source = tickers if tickers is not None else list(self.tickers.keys())
+        if len(self.tickers) == 0 or min_value <= 0:
+            return list(source)
+        return [t for t in source if t in self.tickers and self.tickers[t].acc_trade_price_24h >= min_value]
+
+
+class MarketSnapshotService:
+    """전체 마켓 스냅샷 서비스 (주기 갱신 + 요청 시 갱신)"""
+
+    MARKET_LIST_TTL = 600  # 마켓 목록 재조회 주기 (초)
+
+    def __init__(self, client, interval: float = MARKET_SNAPSHOT_INTERVAL,
+                 batch_size: int = MARKET_SNAPSHOT_BATCH_SIZE, max_workers: int = 4):
+        self.client = client
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.is_running = False
+
+        self._snapshot = MarketSnapshot()
+        self._markets: List[str] = []
+        self._markets_loaded_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # 통계
+        self.refresh_count = 0
+        self.stream_builds = 0
+        self.failures = 0
+        self.last_duration = 0.0
+
+    # ========== 수명 주기 ==========
+
+    def start(self) -> bool:
+        """주기 갱신 시작"""
+        if self.is_running:
+            return False
+        self.is_running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name="MarketSnapshot")
+        self._thread.start()
+        print(f"[{datetime.now()}] 🗂️ 시세 스냅샷 서비스 시작 ({self.interval:.0f}초 주기)")
+        return True
+
+    def stop(self) -> bool:
+        """주기 갱신 중지"""
+        if not self.is_running:
+            return False
+        self.is_running = False
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        return True
+
+    def _run_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[MarketSnapshot] 갱신 오류: {e}")
+            self._stop_event.wait(self.interval)
+
+    # ========== 조회 ==========
+
+    def latest(self) -> MarketSnapshot:
+        """마지막 스냅샷 (갱신하지 않음)"""
+        return self._snapshot
+
+    def get_snapshot(self, max_age: Optional[float] = None) -> MarketSnapshot:
+        """공유 스냅샷 조회 (max_age 초과 시 즉시 갱신)"""
+        limit = self.interval * 2 if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot.age() <= limit and len(snapshot) > 0:
+            return snapshot
+        return self.refresh(max_age=limit)
+
+    def refresh(self, max_age: float = 0) -> MarketSnapshot:
+        """스냅샷 갱신 (동시 호출 시 한 번만 조회)"""
+        with self._refresh_lock:
+            # 대기하는 동안 다른 호출자가 이미 갱신했으면 재사용
+            if max_age > 0 and self._snapshot.age() <= max_age and len(self._snapshot) > 0:
+                return self._snapshot
+
+            started = time.monotonic()
+            markets = self._get_markets()
+            if not markets:
+                self.failures += 1
+                return self._snapshot
+
+            snapshot = self._build_from_stream(markets) or self._build_from_rest(markets)
+            if snapshot is None:
+                self.failures += 1
+                return self._snapshot
+
+            self._snapshot = snapshot
+            self.refresh_count += 1
+            self.last_duration = time.monotonic() - started
+            return snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        """서비스 통계"""
+        snapshot = self._snapshot
+        return {
+            "is_running": self.is_running,
+            "markets": len(self._markets),
+            "snapshot_size": len(snapshot),
+            "snapshot_age": round(snapshot.age(), 3) if snapshot.taken_at else None,
+            "source": snapshot.source,
+            "refresh_count": self.refresh_count,
+            "stream_builds": self.stream_builds,
+            "failures": self.failures,
+            "last_duration_ms": round(self.last_duration * 1000, 2),
+            "interval": self.interval,
+            "batch_size": self.batch_size,
+        }
+
+    # ========== 내부 처리 ==========
+
+    def _get_markets(self) -> List[str]:
+        """KRW 마켓 목록 (주기적으로 재조회)"""
+        if not self._markets or time.monotonic() - self._markets_loaded_at > self.MARKET_LIST_TTL:
+            markets = self.client.get_tickers(fiat="KRW")
+            if markets:
+                self._markets = markets
+                self._markets_loaded_at = time.monotonic()
+        return self._markets
+
+    def _build_from_stream(self, markets: List[str]) -> Optional[MarketSnapshot]:
+        """실시간 시세 허브가 전체 마켓을 보유 중이면 허브에서 구성"""
+        if not market_data_hub.connected:
+            return None
+        # 연결 중에는 체결이 없는 종목의 마지막 시세도 유효
+        quotes = market_data_hub.get_all_quotes(max_age=float('inf'))
+        if not quotes or any(m not in quotes or quotes[m].acc_trade_price_24h <= 0 for m in markets):
+            return None
+        items = {
+            m: TickerSnapshot(
+                ticker=m,
+                price=quotes[m].trade_price,
+                acc_trade_price_24h=quotes[m].acc_trade_price_24h,
+                acc_trade_price=quotes[m].acc_trade_price,
+                acc_trade_volume_24h=quotes[m].acc_trade_volume_24h,
+                signed_change_rate=quotes[m].signed_change_rate,
+                timestamp=quotes[m].trade_timestamp,
+            )
+            for m in markets
+        }
+        self.stream_builds += 1
+        return MarketSnapshot(tickers=MappingProxyType(items), taken_at=time.time(), source="stream")
+
+    def _build_from_rest(self, markets: List[str]) -> Optional[MarketSnapshot]:
+        """최대 묶음 단위로 나누어 동시 조회"""
+        chunks = [markets[i:i + self.batch_size] for i in range(0, len(markets), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as executor:
+            responses = list(executor.map(
+                lambda chunk: self.client._fetch_ticker_data(chunk, batch_size=len(chunk)), chunks
+            ))
+
+        items: Dict[str, TickerSnapshot] = {}
+        for response in responses:
+            for item in response:
+                try:
+                    items[item['market']] = TickerSnapshot(
+                        ticker=item['market'],
+                        price=float(item.get('trade_price') or 0),
+                        acc_trade_price_24h=float(item.get('acc_trade_price_24h') or 0),
+                        acc_trade_price=float(item.get('acc_trade_price') or 0),
+                        acc_trade_volume_24h=float(item.get('acc_trade_volume_24h') or 0),
+                        signed_change_rate=float(item.get('signed_change_rate') or 0),
+                        timestamp=int(item.get('timestamp') or 0),
+                    )
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+        if not items:
+            return None
+        return MarketSnapshot(tickers=MappingProxyType(items), taken_at=time.time(), source="rest")
@@ -0,0 +1,981 @@
+"""
+로컬 모의 업비트 거래소 모듈
+- 업비트 호환 REST(시세/계좌/주문) + WebSocket(ticker/trade/orderbook) 서버
+- 마켓별 메모리 호가창, 가격-시간 우선 체결, 수수료 정산, 계좌별 잔고/잠금
+- 시장조성 호가로 유동성 공급, 기준가 랜덤워크로 시세 변동
+- 응답 지연과 요청 수 제한(Remaining-Req / 429) 설정 가능
+- 부하 테스트: 주문 → 체결 확인까지의 지연 측정
+
+사용 예:
+    python mock_exchange.py serve --port 8900 --latency-ms 20
+    python mock_exchange.py loadtest --port 8900 --orders 3000 --concurrency 50
+    (클라이언트: UPBIT_API_URL=http://127.0.0.1:8900 UPBIT_WS_URL=ws://127.0.0.1:8900/websocket/v1)
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import random
+import time
+import uuid
+from collections import deque, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Tuple
+
+import jwt
+from aiohttp import web
+
+from async_upbit_client import request_group
+
+
+KST = timezone(timedelta(hours=9))
+MM_ACCOUNT = "__market_maker__"
+
+DEFAULT_MARKETS = {
+    "KRW-BTC": 95_000_000,
+    "KRW-ETH": 4_500_000,
+    "KRW-XRP": 800,
+    "KRW-SOL": 200_000,
+    "KRW-DOGE": 150,
+}
+
+
+def tick_size(price: float) -> float:
+    """업비트 KRW 마켓 호가 단위"""
+    if price >= 2_000_000: return 1000
+    if price >= 1_000_000: return 500
+    if price >= 500_000: return 100
+    if price >= 100_000: return 50
+    if price >= 10_000: return 10
+    if price >= 1_000: return 1
+    if price >= 100: return 0.1
+    if price >= 10: return 0.01
+    if price >= 1: return 0.001
+    return 0.0001
+
+
+def round_tick(price: float) -> float:
+    tick = tick_size(price)
+    return round(round(price / tick) * tick, 8)
+
+
+@dataclass
+class MockExchangeConfig:
+    """모의 거래소 설정"""
+    markets: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MARKETS))
+    initial_krw: float = 100_000_000
+    fee_rate: float = 0.0005
+    latency_ms: float = 0.0             # 응답 지연
+    jitter_ms: float = 0.0              # 응답 지연 편차 (균등 분포)
+    rate_limits: Optional[Dict[str, int]] = None  # 그룹별 초당 허용 수 (None 이면 제한 없음)
+    volatility: float = 0.0005          # 기준가 변동 틱당 표준편차 (비율)
+    tick_interval: float = 1.0          # 기준가 변동/시세 방송 주기 (초)
+    book_levels: int = 15               # 시장조성 호가 단계 수 (양쪽)
+    level_value: float = 50_000_000     # 단계별 호가 금액 (KRW)
+    history_minutes: int = 3000         # 기동 시 생성하는 과거 1분봉 수
+    seed: int = 42
+
+
+@dataclass
+class MockOrder:
+    """모의 주문"""
+    uuid: str
+    account: str
+    market: str
+    side: str                       # bid | ask
+    ord_type: str                   # limit | price | market
+    price: Optional[float]          # 지정가 / 시장가 매수 총액
+    volume: Optional[float]
+    remaining_volume: float
+    remaining_funds: float = 0.0    # 시장가 매수 잔여 금액
+    executed_volume: float = 0.0
+    executed_funds: float = 0.0
+    locked: float = 0.0             # 잠금 잔량 (매수: KRW, 매도: 코인)
+    paid_fee: float = 0.0
+    state: str = "wait"             # wait | done | cancel
+    created_at: str = ""
+    seq: int = 0
+    trades: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self, with_trades: bool = False) -> Dict[str, Any]:
+        data = {
+            "uuid": self.uuid,
+            "side": self.side,
+            "ord_type": self.ord_type,
+            "price": _num(self.price),
+            "state": self.state,
+            "market": self.market,
+            "created_at": self.created_at,
+            "volume": _num(self.volume),
+            "remaining_volume": _num(self.remaining_volume if self.ord_type != "price" else None),
+            "reserved_fee": _num(self.locked if self.side == "bid" else 0),
+            "remaining_fee": "0",
+            "paid_fee": _num(self.paid_fee),
+            "locked": _num(self.locked),
+            "executed_volume": _num(self.executed_volume),
+            "trades_count": len(self.trades),
+        }
+        if with_trades:
+            data["trades"] = self.trades
+        return data
+
+
+def _num(value: Optional[float]) -> Optional[str]:
+    """업비트 응답처럼 숫자를 문자열로"""
+    if value is None:
+        return None
+    return format(value, ".8f").rstrip("0").rstrip(".") or "0"
+
+
+class OrderBookSide:
+    """호가 한쪽 (가격별 FIFO 대기열)"""
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self.prices: List[float] = []          # 오름차순
+        self.levels: Dict[float, deque] = {}
+
+    def best(self) -> Optional[float]:
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.descending else self.prices[0]
+
+    def add(self, order: MockOrder):
+        level = self.levels.get(order.price)
+        if level is None:
+            level = deque()
+            self.levels[order.price] = level
+            bisect.insort(self.prices, order.price)
+        level.append(order)
+
+    def remove(self, order: MockOrder):
+        level = self.levels.get(order.price)
+        if level is None:
+            return
+        try:
+            level.remove(order)
+        except ValueError:
+            return
+        if not level:
+            self._drop_level(order.price)
+
+    def _drop_level(self, price: float):
+        del self.levels[price]
+        index = bisect.bisect_left(self.prices, price)
+        if index < len(self.prices) and self.prices[index] == price:
+            self.prices.pop(index)
+
+    def pop_front(self, price: float):
+        level = self.levels[price]
+        level.popleft()
+        if not level:
+            self._drop_level(price)
+
+    def iter_prices(self):
+        return reversed(self.prices) if self.descending else iter(self.prices)
+
+    def depth(self, levels: int) -> List[Tuple[float, float]]:
+        result = []
+        for price in self.iter_prices():
+            result.append((price, sum(o.remaining_volume for o in self.levels[price])))
+            if len(result) >= levels:
+                break
+        return result
+
+
+@dataclass
+class MarketState:
+    """마켓별 시세 상태"""
+    market: str
+    ref_price: float
+    last_price: float
+    opening_price: float
+    high_price: float
+    low_price: float
+    prev_closing_price: float
+    acc_trade_price: float = 0.0
+    acc_trade_volume: float = 0.0
+    trade_timestamp: int = 0
+    bids: OrderBookSide = field(default_factory=lambda: OrderBookSide(descending=True))
+    asks: OrderBookSide = field(default_factory=lambda: OrderBookSide(descending=False))
+    candles: List[List[float]] = field(default_factory=list)   # [minute_ts, o, h, l, c, vol, value]
+
+
+class MatchingEngine:
+    """가격-시간 우선 체결 엔진 + 계좌 정산"""
+
+    def __init__(self, config: MockExchangeConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.markets: Dict[str, MarketState] = {}
+        self.orders: Dict[str, MockOrder] = {}
+        self.accounts: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._seq = 0
+        self.listeners: List[Any] = []      # listener(kind, market, payload)
+
+        # 통계
+        self.order_count = 0
+        self.trade_count = 0
+        self.reject_count = 0
+        self.match_time = 0.0
+
+        for market, price in config.markets.items():
+            self._init_market(market, price)
+
+    # ========== 초기화 ==========
+
+    def _init_market(self, market: str, price: float):
+        # 과거 1분봉: 현재가에서 거꾸로 랜덤워크
+        closes = [price]
+        for _ in range(self.config.history_minutes - 1):
+            closes.append(closes[-1] / (1 + self.random.gauss(0, self.config.volatility * 3)))
+        closes.reverse()
+        now_minute = int(time.time()) // 60 * 60
+        candles = []
+        for i, close in enumerate(closes):
+            ts = now_minute - (len(closes) - 1 - i) * 60
+            open_ = closes[i - 1] if i else close
+            high = max(open_, close) * (1 + abs(self.random.gauss(0, self.config.volatility)))
+            low = min(open_, close) * (1 - abs(self.random.gauss(0, self.config.volatility)))
+            volume = self.config.level_value / price * self.random.uniform(0.05, 0.5)
+            candles.append([ts, round_tick(open_), round_tick(high), round_tick(low), round_tick(close),
+                            volume, volume * close])
+
+        state = MarketState(
+            market=market,
+            ref_price=price,
+            last_price=round_tick(price),
+            opening_price=candles[max(len(candles) - 1440, 0)][1],
+            high_price=max(c[2] for c in candles[-1440:]),
+            low_price=min(c[3] for c in candles[-1440:]),
+            prev_closing_price=candles[max(len(candles) - 1441, 0)][4],
+            acc_trade_price=sum(c[6] for c in candles[-1440:]),
+            acc_trade_volume=sum(c[5] for c in candles[-1440:]),
+            trade_timestamp=int(time.time() * 1000),
+            candles=candles,
+        )
+        self.markets[market] = state
+        self.requote(market)
+
+    def account(self, key: str) -> Dict[str, Dict[str, float]]:
+        """계좌 (없으면 초기 KRW 로 생성)"""
+        account = self.accounts.get(key)
+        if account is None:
+            account = {"KRW": {"balance": self.config.initial_krw, "locked": 0.0, "avg_buy_price": 0.0}}
+            self.accounts[key] = account
+        return account
+
+    @staticmethod
+    def _wallet(account: Dict[str, Dict[str, float]], currency: str) -> Dict[str, float]:
+        return account.setdefault(currency, {"balance": 0.0, "locked": 0.0, "avg_buy_price": 0.0})
+
+    # ========== 시장조성 ==========
+
+    def requote(self, market: str):
+        """시장조성 호가 재배치 (기준가 주변 단계별 호가)"""
+        state = self.markets[market]
+        for side in (state.bids, state.asks):
+            for price in list(side.prices):
+                for order in [o for o in side.levels[price] if o.account == MM_ACCOUNT]:
+                    side.remove(order)
+                    self.orders.pop(order.uuid, None)
+
+        tick = tick_size(state.ref_price)
+        mid = round_tick(state.ref_price)
+        volume = self.config.level_value / mid
+        for level in range(1, self.config.book_levels + 1):
+            # 시장조성 호가도 일반 지정가 주문처럼 처리해 교차한 사용자 주문과 체결
+            self._submit(MM_ACCOUNT, market, "ask", "limit", round_tick(mid + tick * level), volume)
+            self._submit(MM_ACCOUNT, market, "bid", "limit", round_tick(mid - tick * level), volume)
+
+    def random_walk(self):
+        """기준가 랜덤워크 후 호가 재배치"""
+        for market, state in self.markets.items():
+            state.ref_price *= 1 + self.random.gauss(0, self.config.volatility)
+            self.requote(market)
+            self._emit("orderbook", market)
+
+    # ========== 주문 ==========
+
+    def place_order(self, account_key: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """주문 접수 (업비트 /v1/orders 와 같은 검증/응답)"""
+        market = params.get("market")
+        side = params.get("side")
+        ord_type = params.get("ord_type")
+        if market not in self.markets:
+            return self._reject("invalid_market", "존재하지 않는 마켓입니다.")
+        if side not in ("bid", "ask") or ord_type not in ("limit", "price", "market"):
+            return self._reject("invalid_parameter", "잘못된 주문 파라미터입니다.")
+        try:
+            price = float(params["price"]) if params.get("price") not in (None, "") else None
+            volume = float(params["volume"]) if params.get("volume") not in (None, "") else None
+        except (TypeError, ValueError):
+            return self._reject("invalid_parameter", "잘못된 숫자 형식입니다.")
+
+        if ord_type == "limit" and (not price or not volume or price <= 0 or volume <= 0):
+            return self._reject("invalid_parameter", "지정가 주문은 price, volume 이 필요합니다.")
+        if ord_type == "price" and (side != "bid" or not price or price <= 0):
+            return self._reject("invalid_parameter", "시장가 매수는 side=bid, price 가 필요합니다.")
+        if ord_type == "market" and (side != "ask" or not volume or volume <= 0):
+            return self._reject("invalid_parameter", "시장가 매도는 side=ask, volume 이 필요합니다.")
+        if ord_type in ("limit", "price") and (price if ord_type == "price" else price * volume) < 5000:
+            return self._reject("under_min_total_bid" if side == "bid" else "under_min_total_ask",
+                                "최소주문금액 이상으로 주문해주세요")
+
+        account = self.account(account_key)
+        if side == "bid":
+            need = (price if ord_type == "price" else price * volume) * (1 + self.config.fee_rate)
+            krw = self._wallet(account, "KRW")
+            if round(krw["balance"], 8) < round(need, 8):
+                return self._reject("insufficient_funds_bid", "주문가능한 금액(KRW)이 부족합니다.")
+        else:
+            coin = self._wallet(account, market.split("-")[1])
+            # 체결 누적 시 부동소수 오차가 있으므로 응답과 같은 소수 8자리 기준으로 비교
+            if round(coin["balance"], 8) < round(volume, 8):
+                return self._reject("insufficient_funds_ask", "주문가능한 수량이 부족합니다.")
+
+        order = self._submit(account_key, market, side, ord_type, price, volume)
+        self.order_count += 1
+        return order.to_dict()
+
+    def _reject(self, name: str, message: str) -> Dict[str, Any]:
+        self.reject_count += 1
+        return {"error": {"name": name, "message": message}, "_status": 400}
+
+    def _submit(self, account_key: str, market: str, side: str, ord_type: str,
+                price: Optional[float], volume: Optional[float]) -> MockOrder:
+        self._seq += 1
+        order = MockOrder(
+            uuid=str(uuid.uuid4()), account=account_key, market=market, side=side, ord_type=ord_type,
+            price=price, volume=volume, remaining_volume=volume or 0.0,
+            remaining_funds=price if ord_type == "price" else 0.0,
+            created_at=datetime.now(KST).isoformat(timespec="seconds"), seq=self._seq,
+        )
+        self.orders[order.uuid] = order
+
+        # 잔고 잠금
+        if account_key != MM_ACCOUNT:
+            account = self.account(account_key)
+            if side == "bid":
+                amount = (price if ord_type == "price" else price * volume) * (1 + self.config.fee_rate)
+                wallet = self._wallet(account, "KRW")
+            else:
+                amount = volume
+                wallet = self._wallet(account, market.split("-")[1])
+            wallet["balance"] -= amount
+            wallet["locked"] += amount
+            order.locked = amount
+
+        started = time.perf_counter()
+        self._match(order)
+        self.match_time += time.perf_counter() - started
+
+        state = self.markets[market]
+        if order.state == "wait":
+            if ord_type == "limit":
+                (state.bids if side == "bid" else state.asks).add(order)
+            else:
+                # 호가 소진으로 남은 시장가 잔량은 취소
+                self._close(order, "cancel")
+        if account_key != MM_ACCOUNT:
+            self._emit("orderbook", market)
+        return order
+
+    def _crosses(self, order: MockOrder, best: float) -> bool:
+        if order.ord_type != "limit":
+            return True
+        return best <= order.price if order.side == "bid" else best >= order.price
+
+    def _match(self, taker: MockOrder):
+        """가격-시간 우선 체결"""
+        state = self.markets[taker.market]
+        book = state.asks if taker.side == "bid" else state.bids
+        while True:
+            best = book.best()
+            if best is None or not self._crosses(taker, best):
+                break
+            maker = book.levels[best][0]
+            if taker.ord_type == "price":
+                quantity = min(maker.remaining_volume, round(taker.remaining_funds / best, 8))
+            else:
+                quantity = min(maker.remaining_volume, taker.remaining_volume)
+            if quantity <= 0:
+                # 시장가 매수 잔액이 최소 수량에 못 미침
+                if taker.ord_type == "price":
+                    self._close(taker, "done")
+                break
+
+            self._fill(taker, maker, best, quantity)
+            if maker.remaining_volume <= 1e-12:
+                book.pop_front(best)
+                self._close(maker, "done")
+            if self._is_filled(taker):
+                self._close(taker, "done")
+                break
+
+    @staticmethod
+    def _is_filled(order: MockOrder) -> bool:
+        if order.ord_type == "price":
+            return order.remaining_funds <= 1e-8
+        return order.remaining_volume <= 1e-12
+
+    def _fill(self, taker: MockOrder, maker: MockOrder, price: float, quantity: float):
+        funds = price * quantity
+        now_ms = int(time.time() * 1000)
+        for order in (taker, maker):
+            order.executed_volume += quantity
+            order.executed_funds += funds
+            if order.ord_type == "price":
+                order.remaining_funds = max(order.remaining_funds - funds, 0.0)
+            else:
+                order.remaining_volume = max(order.remaining_volume - quantity, 0.0)
+            fee = funds * self.config.fee_rate
+            order.paid_fee += fee
+            order.trades.append({
+                "market": order.market, "uuid": str(uuid.uuid4()), "price": _num(price),
+                "volume": _num(quantity), "funds": _num(funds), "side": order.side,
+                "created_at": datetime.now(KST).isoformat(timespec="seconds"),
+            })
+            self._settle(order, quantity, funds, fee)
+
+        state = self.markets[taker.market]
+        state.last_price = price
+        state.high_price = max(state.high_price, price)
+        state.low_price = min(state.low_price, price)
+        state.acc_trade_price += funds
+        state.acc_trade_volume += quantity
+        state.trade_timestamp = now_ms
+        self._update_candle(state, price, quantity, funds)
+        self.trade_count += 1
+        self._emit("trade", taker.market, {
+            "trade_price": price, "trade_volume": quantity,
+            "ask_bid": "BID" if taker.side == "bid" else "ASK", "trade_timestamp": now_ms,
+        })
+
+    def _settle(self, order: MockOrder, quantity: float, funds: float, fee: float):
+        if order.account == MM_ACCOUNT:
+            return
+        account = self.account(order.account)
+        currency = order.market.split("-")[1]
+        krw = self._wallet(account, "KRW")
+        coin = self._wallet(account, currency)
+        if order.side == "bid":
+            cost = funds + fee
+            krw["locked"] -= cost
+            order.locked -= cost
+            held = coin["balance"] + coin["locked"]
+            coin["avg_buy_price"] = (coin["avg_buy_price"] * held + funds) / (held + quantity)
+            coin["balance"] += quantity
+        else:
+            coin["locked"] -= quantity
+            order.locked -= quantity
+            krw["balance"] += funds - fee
+
+    def _close(self, order: MockOrder, state: str):
+        """주문 종료 - 남은 잠금 해제"""
+        order.state = state
+        if order.account != MM_ACCOUNT and order.locked > 0:
+            account = self.account(order.account)
+            wallet = self._wallet(account, "KRW" if order.side == "bid" else order.market.split("-")[1])
+            wallet["locked"] -= order.locked
+            wallet["balance"] += order.locked
+            order.locked = 0.0
+        if order.account == MM_ACCOUNT:
+            self.orders.pop(order.uuid, None)
+
+    def cancel_order(self, account_key: str, order_uuid: str) -> Dict[str, Any]:
+        order = self.orders.get(order_uuid)
+        if order is None or order.account != account_key:
+            return {"error": {"name": "order_not_found", "message": "주문을 찾지 못했습니다."}, "_status": 404}
+        if order.state != "wait":
+            return {"error": {"name": "canceled_order" if order.state == "cancel" else "done_order",
+                              "message": "이미 종료된 주문입니다."}, "_status": 400}
+        state = self.markets[order.market]
+        (state.bids if order.side == "bid" else state.asks).remove(order)
+        self._close(order, "cancel")
+        self._emit("orderbook", order.market)
+        return order.to_dict()
+
+    def get_order(self, account_key: str, order_uuid: str) -> Dict[str, Any]:
+        order = self.orders.get(order_uuid)
+        if order is None or order.account != account_key:
+            return {"error": {"name": "order_not_found", "message": "주문을 찾지 못했습니다."}, "_status": 404}
+        return order.to_dict(with_trades=True)
+
+    # ========== 시세 ==========
+
+    def _update_candle(self, state: MarketState, price: float, quantity: float, funds: float):
+        minute = int(time.time()) // 60 * 60
+        last = state.candles[-1] if state.candles else None
+        if last is None or last[0] < minute:
+            state.candles.append([minute, price, price, price, price, quantity, funds])
+        else:
+            last[2] = max(last[2], price)
+            last[3] = min(last[3], price)
+            last[4] = price
+            last[5] += quantity
+            last[6] += funds
+
+    def ticker(self, market: str) -> Dict[str, Any]:
+        state = self.markets[market]
+        now = datetime.now(KST)
+        change = state.last_price - state.prev_closing_price
+        return {
+            "market": market,
+            "trade_date": now.astimezone(timezone.utc).strftime("%Y%m%d"),
+            "trade_time": now.astimezone(timezone.utc).strftime("%H%M%S"),
+            "trade_timestamp": state.trade_timestamp,
+            "opening_price": state.opening_price,
+            "high_price": state.high_price,
+            "low_price": state.low_price,
+            "trade_price": state.last_price,
+            "prev_closing_price": state.prev_closing_price,
+            "change": "RISE" if change > 0 else ("FALL" if change < 0 else "EVEN"),
+            "change_price": abs(change),
+            "change_rate": abs(change) / state.prev_closing_price if state.prev_closing_price else 0,
+            "signed_change_price": change,
+            "signed_change_rate": change / state.prev_closing_price if state.prev_closing_price else 0,
+            "trade_volume": 0,
+            "acc_trade_price": state.acc_trade_price,
+            "acc_trade_price_24h": state.acc_trade_price,
+            "acc_trade_volume": state.acc_trade_volume,
+            "acc_trade_volume_24h": state.acc_trade_volume,
+            "timestamp": int(time.time() * 1000),
+        }
+
+    def orderbook(self, market: str, levels: int = 15) -> Dict[str, Any]:
+        state = self.markets[market]
+        asks = state.asks.depth(levels)
+        bids = state.bids.depth(levels)
+        units = []
+        for i in range(max(len(asks), len(bids))):
+            ask = asks[i] if i < len(asks) else (0, 0)
+            bid = bids[i] if i < len(bids) else (0, 0)
+            units.append({"ask_price": ask[0], "bid_price": bid[0], "ask_size": ask[1], "bid_size": bid[1]})
+        return {
+            "market": market,
+            "timestamp": int(time.time() * 1000),
+            "total_ask_size": sum(a[1] for a in asks),
+            "total_bid_size": sum(b[1] for b in bids),
+            "orderbook_units": units,
+        }
+
+    def candles(self, market: str, unit_minutes: int, count: int, to: Optional[str]) -> List[Dict[str, Any]]:
+        """1분봉을 unit 분 단위로 묶어 최신순 반환"""
+        state = self.markets[market]
+        end = None
+        if to:
+            try:
+                end = int(datetime.strptime(to.replace("T", " ")[:19], "%Y-%m-%d %H:%M:%S")
+                          .replace(tzinfo=timezone.utc).timestamp())
+            except ValueError:
+                end = None
+        # 일봉은 KST 09:00 (UTC 00:00) 경계
+        span = unit_minutes * 60
+        buckets: Dict[int, List[float]] = {}
+        order: List[int] = []
+        for ts, o, h, l, c, v, value in state.candles:
+            start = ts // span * span
+            if end is not None and start >= end:
+                continue
+            bucket = buckets.get(start)
+            if bucket is None:
+                buckets[start] = [start, o, h, l, c, v, value]
+                order.append(start)
+            else:
+                bucket[2] = max(bucket[2], h)
+                bucket[3] = min(bucket[3], l)
+                bucket[4] = c
+                bucket[5] += v
+                bucket[6] += value
+        result = []
+        for start in reversed(order[-count:]):
+            _, o, h, l, c, v, value = buckets[start]
+            utc = datetime.fromtimestamp(start, timezone.utc)
+            result.append({
+                "market": market,
+                "candle_date_time_utc": utc.strftime("%Y-%m-%dT%H:%M:%S"),
+                "candle_date_time_kst": utc.astimezone(KST).strftime("%Y-%m-%dT%H:%M:%S"),
+                "opening_price": o, "high_price": h, "low_price": l, "trade_price": c,
+                "timestamp": (start + span) * 1000 - 1,
+                "candle_acc_trade_price": value, "candle_acc_trade_volume": v,
+                "unit": unit_minutes,
+            })
+        return result
+
+    def accounts_for(self, account_key: str) -> List[Dict[str, Any]]:
+        result = []
+        for currency, wallet in self.account(account_key).items():
+            if currency != "KRW" and wallet["balance"] + wallet["locked"] <= 0:
+                continue
+            result.append({
+                "currency": currency,
+                "balance": _num(wallet["balance"]),
+                "locked": _num(wallet["locked"]),
+                "avg_buy_price": _num(wallet["avg_buy_price"]),
+                "avg_buy_price_modified": False,
+                "unit_currency": "KRW",
+            })
+        return result
+
+    def _emit(self, kind: str, market: str, payload: Optional[Dict[str, Any]] = None):
+        for listener in self.listeners:
+            listener(kind, market, payload or {})
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "orders": self.order_count,
+            "trades": self.trade_count,
+            "rejects": self.reject_count,
+            "open_orders": sum(1 for o in self.orders.values() if o.state == "wait" and o.account != MM_ACCOUNT),
+            "avg_match_us": round(self.match_time / max(self.order_count, 1) * 1e6, 2),
+            "accounts": len(self.accounts),
+        }
+
+
+class _RateLimiter:
+    """그룹 + 클라이언트별 1초 구간 요청 수 제한 (업비트와 같은 초 단위)"""
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = limits
+        self._windows: Dict[Tuple[str, str], deque] = defaultdict(deque)
+        self.throttled = 0
+
+    def check(self, group: str, client: str) -> Tuple[bool, int]:
+        """(허용 여부, 남은 횟수)"""
+        limit = self.limits.get(group)
+        if limit is None:
+            return True, 0
+        now = time.monotonic()
+        window = self._windows[(group, client)]
+        while window and now - window[0] >= 1.0:
+            window.popleft()
+        if len(window) >= limit:
+            self.throttled += 1
+            return False, 0
+        window.append(now)
+        return True, limit - len(window)
+
+
+class MockUpbitServer:
+    """업비트 호환 HTTP/WebSocket 서버"""
+
+    def __init__(self, config: Optional[MockExchangeConfig] = None):
+        self.config = config or MockExchangeConfig()
+        self.engine = MatchingEngine(self.config)
+        self.limiter = _RateLimiter(self.config.rate_limits) if self.config.rate_limits else None
+        self._subscribers: List[Tuple[web.WebSocketResponse, Dict[str, set]]] = []
+        self._tick_task: Optional[asyncio.Task] = None
+        self.request_count = 0
+        self.engine.listeners.append(self._on_event)
+
+    def build_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/v1/market/all", self._markets)
+        app.router.add_get("/v1/ticker", self._ticker)
+        app.router.add_get("/v1/orderbook", self._orderbook)
+        app.router.add_get("/v1/candles/minutes/{unit}", self._candles)
+        app.router.add_get("/v1/candles/days", self._candles)
+        app.router.add_get("/v1/candles/weeks", self._candles)
+        app.router.add_get("/v1/accounts", self._accounts)
+        app.router.add_post("/v1/orders", self._place_order)
+        app.router.add_get("/v1/order", self._get_order)
+        app.router.add_delete("/v1/order", self._cancel_order)
+        app.router.add_get("/websocket/v1", self._websocket)
+        app.router.add_get("/_mock/stats", self._stats)
+        app.router.add_post("/_mock/price", self._set_price)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app: web.Application):
+        self._tick_task = asyncio.ensure_future(self._tick_loop())
+
+    async def _on_cleanup(self, app: web.Application):
+        if self._tick_task:
+            self._tick_task.cancel()
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.config.tick_interval)
+            if self.config.volatility > 0:
+                self.engine.random_walk()
+            for market in self.engine.markets:
+                self._broadcast(market, "ticker", self.engine.ticker(market))
+
+    # ========== 공통 처리 ==========
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        if request.path.startswith("/_mock") or request.path == "/websocket/v1":
+            return await handler(request)
+        self.request_count += 1
+        group = request_group(request.method, request.path)
+        headers = {}
+        if self.limiter is not None:
+            client = request.headers.get("Authorization") and self._account_key(request) or request.remote or ""
+            allowed, remaining = self.limiter.check(group, client)
+            headers["Remaining-Req"] = f"group={group}; min=1800; sec={remaining}"
+            if not allowed:
+                return web.json_response({"error": {"name": "too_many_requests", "message": "Too many requests"}},
+                                         status=429, headers=headers)
+        if self.config.latency_ms or self.config.jitter_ms:
+            delay = self.config.latency_ms + random.uniform(0, self.config.jitter_ms)
+            await asyncio.sleep(delay / 1000)
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    @staticmethod
+    def _account_key(request: web.Request) -> Optional[str]:
+        """JWT 의 access_key (서명은 검증하지 않음)"""
+        auth = request.headers.get("Authorization", "")
+        if not auth.startswith("Bearer "):
+            return None
+        try:
+            payload = jwt.decode(auth[7:], options={"verify_signature": False})
+        except jwt.PyJWTError:
+            return None
+        return payload.get("access_key")
+
+    @staticmethod
+    def _unauthorized() -> web.Response:
+        return web.json_response({"error": {"name": "jwt_verification", "message": "잘못된 엑세스 키입니다."}},
+                                 status=401)
+
+    @staticmethod
+    def _respond(result: Dict[str, Any], status: int = 200) -> web.Response:
+        """엔진 결과 응답 (오류 결과는 _status 코드 사용)"""
+        return web.json_response(result, status=result.pop("_status", status))
+
+    def _markets_param(self, request: web.Request) -> List[str]:
+        return [m for m in request.query.get("markets", "").split(",") if m]
+
+    # ========== 시세 API ==========
+
+    async def _markets(self, request: web.Request) -> web.Response:
+        return web.json_response([
+            {"market": m, "korean_name": m.split("-")[1], "english_name": m.split("-")[1]}
+            for m in self.engine.markets
+        ])
+
+    async def _ticker(self, request: web.Request) -> web.Response:
+        markets = self._markets_param(request)
+        if not markets or any(m not in self.engine.markets for m in markets):
+            return web.json_response({"error": {"name": "404", "message": "Code not found"}}, status=404)
+        return web.json_response([self.engine.ticker(m) for m in markets])
+
+    async def _orderbook(self, request: web.Request) -> web.Response:
+        markets = [m for m in self._markets_param(request) if m in self.engine.markets]
+        return web.json_response([self.engine.orderbook(m) for m in markets])
+
+    async def _candles(self, request: web.Request) -> web.Response:
+        market = request.query.get("market")
+        if market not in self.engine.markets:
+            return web.json_response({"error": {"name": "404", "message": "Code not found"}}, status=404)
+        if "unit" in request.match_info:
+            unit = int(request.match_info["unit"])
+        else:
+            unit = 1440 if request.path.endswith("days") else 10080
+        count = min(int(request.query.get("count", 1)), 200)
+        return web.json_response(self.engine.candles(market, unit, count, request.query.get("to")))
+
+    # ========== 계좌/주문 API ==========
+
+    async def _accounts(self, request: web.Request) -> web.Response:
+        key = self._account_key(request)
+        if key is None:
+            return self._unauthorized()
+        return web.json_response(self.engine.accounts_for(key))
+
+    async def _place_order(self, request: web.Request) -> web.Response:
+        key = self._account_key(request)
+        if key is None:
+            return self._unauthorized()
+        try:
+            params = await request.json()
+        except ValueError:
+            params = dict(request.query)
+        return self._respond(self.engine.place_order(key, params), status=201)
+
+    async def _get_order(self, request: web.Request) -> web.Response:
+        key = self._account_key(request)
+        if key is None:
+            return self._unauthorized()
+        return self._respond(self.engine.get_order(key, request.query.get("uuid", "")))
+
+    async def _cancel_order(self, request: web.Request) -> web.Response:
+        key = self._account_key(request)
+        if key is None:
+            return self._unauthorized()
+        return self._respond(self.engine.cancel_order(key, request.query.get("uuid", "")))
+
+    # ========== WebSocket ==========
+
+    async def _websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        subscription: Dict[str, set] = {}
+        entry = (ws, subscription)
+        self._subscribers.append(entry)
+        try:
+            async for msg in ws:
+                try:
+                    items = json.loads(msg.data)
+                except (TypeError, ValueError):
+                    continue
+                for item in items if isinstance(items, list) else []:
+                    if isinstance(item, dict) and item.get("type") in ("ticker", "trade", "orderbook"):
+                        subscription[item["type"]] = set(item.get("codes") or [])
+                # 구독 직후 현재 상태 전송
+                for market in subscription.get("ticker", ()):
+                    if market in self.engine.markets:
+                        await ws.send_bytes(json.dumps(self._ws_payload("ticker", market, self.engine.ticker(market))).encode())
+                for market in subscription.get("orderbook", ()):
+                    if market in self.engine.markets:
+                        await ws.send_bytes(json.dumps(self._ws_payload("orderbook", market, self.engine.orderbook(market))).encode())
+        finally:
+            self._subscribers.remove(entry)
+        return ws
+
+    @staticmethod
+    def _ws_payload(kind: str, market: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        payload = dict(data)
+        payload["type"] = kind
+        payload["code"] = market
+        payload.pop("market", None)
+        return payload
+
+    def _on_event(self, kind: str, market: str, payload: Dict[str, Any]):
+        if not self._subscribers:
+            return
+        if kind == "orderbook":
+            payload = self.engine.orderbook(market)
+        self._broadcast(market, kind, payload)
+        if kind == "trade":
+            self._broadcast(market, "ticker", self.engine.ticker(market))
+
+    def _broadcast(self, market: str, kind: str, data: Dict[str, Any]):
+        message = None
+        for ws, subscription in list(self._subscribers):
+            if market not in subscription.get(kind, ()) or ws.closed:
+                continue
+            if message is None:
+                message = json.dumps(self._ws_payload(kind, market, data)).encode()
+            asyncio.ensure_future(ws.send_bytes(message))
+
+    # ========== 관리용 ==========
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        stats = self.engine.get_stats()
+        stats["requests"] = self.request_count
+        stats["throttled"] = self.limiter.throttled if self.limiter else 0
+        stats["ws_clients"] = len(self._subscribers)
+        return web.json_response(stats)
+
+    async def _set_price(self, request: web.Request) -> web.Response:
+        """기준가 강제 변경 (시나리오 테스트용) - {"market": ..., "price": ...}"""
+        data = await request.json()
+        market = data.get("market")
+        if market not in self.engine.markets:
+            return web.json_response({"error": {"name": "invalid_market"}}, status=404)
+        self.engine.markets[market].ref_price = float(data["price"])
+        self.engine.requote(market)
+        self.engine._emit("orderbook", market)
+        return web.json_response(self.engine.ticker(market))
+
+
+# ========== 부하 테스트 ==========
+
+async def run_load_test(base_url: str, orders: int = 1000, concurrency: int = 20,
+                        markets: Optional[List[str]] = None, amount: float = 10_000,
+                        access_key: str = "loadtest", secret_key: str = "loadtest") -> Dict[str, Any]:
+    """시장가 매수 → 체결 확인 → 시장가 매도 왕복을 동시에 실행, 주문~체결 확인 지연 측정"""
+    from async_upbit_client import AsyncUpbitClient
+
+    client = AsyncUpbitClient(access_key, secret_key, base_url=base_url, max_concurrency=concurrency)
+    markets = markets or await client.get_tickers()
+    latencies: List[float] = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fill(order: Dict[str, Any], signal_at: float) -> float:
+        """체결 확인까지 조회 - 체결 수량 반환"""
+        while order.get("state") == "wait":
+            order = await client.get_order(order["uuid"])
+        executed = float(order.get("executed_volume") or 0)
+        if executed > 0:
+            latencies.append(time.perf_counter() - signal_at)
+        return executed
+
+    async def round_trip(i: int):
+        """시장가 매수 후 체결 수량 그대로 시장가 매도"""
+        nonlocal failures
+        market = markets[i % len(markets)]
+        async with semaphore:
+            try:
+                signal_at = time.perf_counter()
+                volume = await fill(await client.buy_market_order(market, amount), signal_at)
+                if volume <= 0:
+                    failures += 1
+                    return
+                signal_at = time.perf_counter()
+                if await fill(await client.sell_market_order(market, volume), signal_at) <= 0:
+                    failures += 1
+            except Exception:
+                failures += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(round_trip(i) for i in range(orders // 2)))
+    elapsed = time.perf_counter() - started
+    await client.close()
+
+    latencies.sort()
+    pick = lambda q: round(latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000, 2) if latencies else None
+    return {
+        "orders": orders,
+        "filled": len(latencies),
+        "failures": failures,
+        "elapsed": round(elapsed, 2),
+        "orders_per_min": round(orders / elapsed * 60, 1) if elapsed else 0,
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모의 업비트 거래소")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="모의 거래소 서버 실행")
+    serve.add_argument("--port", type=int, default=8900)
+    serve.add_argument("--latency-ms", type=float, default=0)
+    serve.add_argument("--jitter-ms", type=float, default=0)
+    serve.add_argument("--fee", type=float, default=0.0005)
+    serve.add_argument("--rate-limit", action="store_true", help="업비트와 같은 초당 요청 제한 적용")
+    serve.add_argument("--volatility", type=float, default=0.0005)
+
+    load = sub.add_parser("loadtest", help="실행 중인 모의 거래소에 주문 부하")
+    load.add_argument("--port", type=int, default=8900)
+    load.add_argument("--orders", type=int, default=1000)
+    load.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        config = MockExchangeConfig(
+            latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, fee_rate=args.fee,
+            rate_limits={"quotation": 10, "exchange": 30, "order": 8} if args.rate_limit else None,
+            volatility=args.volatility,
+        )
+        print(f"[{datetime.now()}] 🏦 모의 거래소 시작 (포트 {args.port}, 마켓 {len(config.markets)}개)")
+        web.run_app(MockUpbitServer(config).build_app(), host="127.0.0.1", port=args.port, print=None)
+    else:
+        result = asyncio.run(run_load_test(f"http://127.0.0.1:{args.port}", args.orders, args.concurrency))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+주문 실행 파이프라인 모듈
+- 비동기 클라이언트로 주문 후 반환된 uuid를 지수 백오프로 조회(get_order)해 체결 확정
+- 결과(OrderFill)는 실제 체결 수량, 평균 체결가, 체결 금액, 수수료 (잔고 차이로 추정하지 않음)
+- 주문마다 독립 코루틴이라 여러 주문이 동시에 진행 (고정 대기 없음)
+- 주문/조회는 항상 봇 런타임 루프에서 실행 (전용 세션 유지)
+  동기 코드(작업 스레드)에서는 run()으로 제출 후 결과 대기
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Optional, Dict, Any, Awaitable
+
+from config import ORDER_POLL_INITIAL, ORDER_POLL_MAX, ORDER_FILL_TIMEOUT
+from async_upbit_client import AsyncUpbitClient
+from bot_runtime import bot_runtime
+from upbit_client import upbit_client, PRIORITY_ORDER
+
+
+# 주문 종료 상태 (시장가 매수는 잔여 금액 정리로 cancel 로 끝날 수 있음)
+FINAL_STATES = ("done", "cancel")
+
+
+@dataclass
+class OrderFill:
+    """주문 1건의 체결 결과"""
+    ticker: str
+    side: str                       # bid | ask
+    ord_type: str                   # price(시장가 매수) | market(시장가 매도) | limit
+    uuid: Optional[str] = None
+    state: str = "error"            # done | cancel | wait(제한 시간 초과) | error(접수 실패) | rejected(라우터 거부)
+    executed_volume: float = 0.0
+    avg_price: float = 0.0
+    funds: float = 0.0              # 체결 금액 합계 (수수료 제외)
+    paid_fee: float = 0.0
+    error: Optional[str] = None
+    reject_reason: Optional[str] = None     # 라우터 거부 분류 (owned | duplicate | invalid | max_positions | max_exposure)
+    polls: int = 0
+    latency_ms: float = 0.0         # 주문 ~ 체결 확인
+    raw: Dict[str, Any] = field(default_factory=dict, repr=False)
+
+    @property
+    def filled(self) -> bool:
+        """체결된 수량이 있는지 (제한 시간 초과 시 부분 체결 포함)"""
+        return self.executed_volume > 0
+
+    @property
+    def complete(self) -> bool:
+        return self.state in FINAL_STATES
+
+    @property
+    def net_krw(self) -> float:
+        """원화 기준 정산액 - 매도: 수령액(수수료 차감), 매수: 지출액(수수료 포함)"""
+        return self.funds - self.paid_fee if self.side == "ask" else self.funds + self.paid_fee
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("raw", None)
+        data["net_krw"] = self.net_krw
+        return data
+
+
+def parse_order(order: Dict[str, Any], fill: OrderFill):
+    """업비트 주문 조회 응답 → 체결 결과 반영"""
+    fill.raw = order
+    fill.state = order.get("state") or fill.state
+    trades = order.get("trades") or []
+    if trades:
+        volume = sum(float(t.get("volume") or 0) for t in trades)
+        funds = sum(float(t.get("funds") or 0) for t in trades)
+    else:
+        volume = float(order.get("executed_volume") or 0)
+        funds = float(order.get("executed_funds") or 0)
+    fill.executed_volume = volume
+    fill.funds = funds
+    fill.avg_price = funds / volume if volume > 0 else 0.0
+    fill.paid_fee = float(order.get("paid_fee") or 0)
+
+
+class OrderPipeline:
+    """주문 → 체결 확인 (봇 런타임 루프에서 동시 실행)"""
+
+    def __init__(self, client=upbit_client, poll_initial: float = ORDER_POLL_INITIAL,
+                 poll_max: float = ORDER_POLL_MAX, timeout: float = ORDER_FILL_TIMEOUT):
+        self.client = client
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.timeout = timeout
+        # 동기 클라이언트와 같은 스케줄러(주문 그룹 요청 속도 제한) 사용
+        self.aio = AsyncUpbitClient(client._access_key, client._secret_key, scheduler=client.scheduler)
+        bot_runtime.add_cleanup(self.aio.close)
+
+        # 통계
+        self.submitted = 0
+        self.filled = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.in_flight = 0
+        self.polls = 0
+        self.last_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._latency_total = 0.0
+
+    # ========== 주문 ==========
+
+    async def buy_market(self, ticker: str, amount: float) -> OrderFill:
+        """시장가 매수 (amount: 매수 금액 KRW) - 체결 확인까지 대기"""
+        return await self.execute(ticker, "bid", "price", price=amount)
+
+    async def sell_market(self, ticker: str, volume: float) -> OrderFill:
+        """시장가 매도 (volume: 매도 수량) - 체결 확인까지 대기"""
+        return await self.execute(ticker, "ask", "market", volume=volume)
+
+    async def execute(self, ticker: str, side: str, ord_type: str, price: Optional[float] = None,
+                      volume: Optional[float] = None) -> OrderFill:
+        """주문 접수 후 체결 확정 (다른 루프에서 호출하면 봇 런타임 루프에서 실행)"""
+        coro = self._execute(ticker, side, ord_type, price, volume)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not None and running is bot_runtime._loop:
+            return await coro
+        return await asyncio.wrap_future(bot_runtime.submit(coro))
+
+    def run(self, coro: Awaitable[OrderFill]) -> OrderFill:
+        """동기 코드(작업 스레드)에서 주문 실행 - 예: order_pipeline.run(order_pipeline.sell_market(t, v))"""
+        if bot_runtime._in_loop():
+            raise RuntimeError("봇 런타임 루프에서는 await 로 호출하세요")
+        return bot_runtime.submit(coro).result(timeout=self.timeout + 10)
+
+    async def _execute(self, ticker: str, side: str, ord_type: str, price: Optional[float],
+                       volume: Optional[float]) -> OrderFill:
+        fill = OrderFill(ticker=ticker, side=side, ord_type=ord_type)
+        data = {"market": ticker, "side": side, "ord_type": ord_type}
+        if price is not None:
+            data["price"] = str(price)
+        if volume is not None:
+            data["volume"] = str(volume)
+
+        # API 키 변경(reinitialize) 반영
+        self.aio.set_keys(self.client._access_key, self.client._secret_key)
+        started = time.monotonic()
+        self.submitted += 1
+        self.in_flight += 1
+        try:
+            try:
+                order = await self.aio._request("POST", "/v1/orders", data=data, private=True,
+                                                 priority=PRIORITY_ORDER, max_retries=0)
+            except Exception as e:
+                fill.error = str(e)
+                self.rejected += 1
+                print(f"[{datetime.now()}] ❌ 주문 실패 {ticker} {side}: {e}")
+                return fill
+            finally:
+                self.client.invalidate_accounts()
+
+            fill.uuid = order.get("uuid") if isinstance(order, dict) else None
+            if not fill.uuid:
+                fill.error = f"주문 응답에 uuid 없음: {order}"
+                self.rejected += 1
+                return fill
+            fill.state = order.get("state") or "wait"
+
+            await self._await_fill(fill, started)
+            return fill
+        finally:
+            self.in_flight -= 1
+            fill.latency_ms = round((time.monotonic() - started) * 1000, 2)
+
+    async def _await_fill(self, fill: OrderFill, started: float):
+        """주문 종료까지 조회 (간격 2배씩, 최대 poll_max) - 제한 시간 초과 시 그때까지 체결분"""
+        delay = self.poll_initial
+        deadline = started + self.timeout
+        while True:
+            # 시장가 주문은 접수 직후 체결되는 경우가 많아 첫 조회는 바로
+            if fill.polls > 0:
+                await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+                delay = min(delay * 2, self.poll_max)
+            try:
+                order = await self.aio._request("GET", "/v1/order", params={"uuid": fill.uuid},
+                                                private=True, priority=PRIORITY_ORDER)
+            except Exception as e:
+                # 일시적 조회 오류는 다음 조회에서 재시도
+                print(f"[OrderPipeline] {fill.ticker} 주문 조회 실패: {e}")
+                order = None
+            fill.polls += 1
+            self.polls += 1
+            if order:
+                parse_order(order, fill)
+            if fill.complete:
+                break
+            if time.monotonic() >= deadline:
+                self.timeouts += 1
+                fill.error = f"체결 확인 시간 초과 ({self.timeout:.0f}초, 상태 {fill.state})"
+                print(f"[{datetime.now()}] ⚠️ {fill.ticker} {fill.error}")
+                return
+
+        self.client.invalidate_accounts()
+        if fill.filled:
+            self.filled += 1
+        latency = (time.monotonic() - started) * 1000
+        self.last_latency_ms = latency
+        self.max_latency_ms = max(self.max_latency_ms, latency)
+        self._latency_total += latency
+
+    # ========== 상태 ==========
+
+    def get_stats(self) -> Dict[str, Any]:
+        """파이프라인 통계"""
+        confirmed = self.submitted - self.rejected - self.timeouts - self.in_flight
+        return {
+            "submitted": self.submitted,
+            "filled": self.filled,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "polls": self.polls,
+            "avg_polls": round(self.polls / (self.submitted - self.rejected), 2) if self.submitted > self.rejected else 0.0,
+            "last_latency_ms": round(self.last_latency_ms, 2),
+            "avg_latency_ms": round(self._latency_total / confirmed, 2) if confirmed > 0 else 0.0,
+            "max_latency_ms": round(self.max_latency_ms, 2),
+            "poll_initial": self.poll_initial,
+            "poll_max": self.poll_max,
+            "timeout": self.timeout,
+        }
+
+
+# 싱글톤 인스턴스
+order_pipeline = OrderPipeline()
@@ -0,0 +1,243 @@
+"""
+캔들 리샘플러 모듈
+- 종목별로 유지 중인 1분봉(캔들 캐시)에서 3/5/10/15/30/60/240분봉과 일봉을 메모리에서 생성
+  → 같은 종목의 여러 간격 조회가 1분봉 증분 조회 하나로 해결됨
+- 구간 경계는 업비트와 동일하게 UTC 00:00(= 09:00 KST) 기준 (240분봉: 09/13/17/21/01/05시, 일봉: 09시)
+- 이미 유지 중인 1분봉만 사용 (리샘플링을 위해 1분봉을 새로 받거나 늘리지 않음 - 없으면 API 조회)
+- 보유 1분봉 구간보다 긴 요청은 마감된 과거 캔들 + 1분봉으로 만든 최근 캔들을 이어 붙임
+  (과거 캔들은 1분봉 구간과 이어지지 않게 될 때만 다시 조회)
+- 첫 구간은 시작 전 1분봉이 빠져 있을 수 있어 항상 버림
+- 저장소에 기록된 업비트 캔들과 캔들 단위로 비교하는 검증 도구 포함
+
+사용 예:
+    python candle_store.py download KRW-BTC --interval minute1 --interval minute5 --interval day --days 7
+    python resampler.py verify KRW-BTC --interval minute5 --interval day
+"""
+import argparse
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import CANDLE_RESAMPLE_MAX_MINUTES
+from candle_cache import CandleCache, INTERVAL_SECONDS, KST
+from candle_store import CandleStore, candle_store, PRICE_COLUMNS, index_to_ts, ts_to_index
+
+
+# 1분봉에서 만들 수 있는 간격
+RESAMPLE_INTERVALS = ("minute3", "minute5", "minute10", "minute15", "minute30",
+                      "minute60", "minute240", "day")
+
+# 업비트 캔들 경계 - UTC 00:00 (KST 기준 epoch 초에서 9시간)
+BOUNDARY_OFFSET = 9 * 3600
+
+
+def bucket_starts(ts: np.ndarray, step: int) -> np.ndarray:
+    """KST epoch 초 -> 속한 캔들의 시작 시각"""
+    return (ts - BOUNDARY_OFFSET) // step * step + BOUNDARY_OFFSET
+
+
+def resample(minute1: pd.DataFrame, interval: str, drop_partial: bool = True) -> pd.DataFrame:
+    """1분봉 DataFrame -> 상위 간격 캔들 (pyupbit 형식, 체결이 없는 구간은 캔들 없음)
+
+    drop_partial=True면 첫 구간(이전 1분봉이 빠져 있을 수 있음)을 버림.
+    마지막 구간은 진행 중인 캔들 (업비트 응답의 마지막 캔들과 같음)
+    """
+    step = INTERVAL_SECONDS.get(interval)
+    if step is None or interval not in RESAMPLE_INTERVALS:
+        raise ValueError(f"1분봉에서 만들 수 없는 간격: {interval}")
+    if minute1 is None or len(minute1) == 0:
+        return pd.DataFrame(columns=PRICE_COLUMNS)
+
+    ts = index_to_ts(minute1.index)
+    buckets = bucket_starts(ts, step)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+
+    columns = {name: minute1[name].to_numpy(dtype=np.float64) for name in PRICE_COLUMNS}
+    df = pd.DataFrame({
+        "open": columns["open"][starts],
+        "high": np.maximum.reduceat(columns["high"], starts),
+        "low": np.minimum.reduceat(columns["low"], starts),
+        "close": columns["close"][ends],
+        "volume": np.add.reduceat(columns["volume"], starts),
+        "value": np.add.reduceat(columns["value"], starts),
+    }, index=ts_to_index(buckets[starts]))
+    return df.iloc[1:] if drop_partial else df
+
+
+class CandleResampler:
+    """1분봉 기반 상위 간격 캔들 제공 (업비트 클라이언트의 get_ohlcv에서 사용)"""
+
+    def __init__(self, cache: CandleCache, max_minutes: int = CANDLE_RESAMPLE_MAX_MINUTES,
+                 max_entries: int = 2000):
+        self.cache = cache
+        self.max_minutes = max_minutes      # 리샘플링에 사용할 1분봉 최대 개수 (보유 중인 구간 안에서)
+        self.max_entries = max_entries
+
+        # (ticker, interval) -> (마감된 과거 캔들, 조회 시각 KST)
+        self._history: "OrderedDict[Tuple[str, str], Tuple[pd.DataFrame, pd.Timestamp]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 통계
+        self.derived = 0
+        self.stitched = 0
+        self.history_loads = 0
+        self.fallbacks = 0
+
+    def get(self, ticker: str, interval: str = "day", count: int = 200) -> Optional[pd.DataFrame]:
+        """1분봉에서 만든 캔들 count개 - 만들 수 없으면 None (호출자가 API 조회)"""
+        if interval not in RESAMPLE_INTERVALS:
+            return None
+        # 1분봉을 유지 중인 종목만 (1분봉 여러 페이지 조회가 간격별 조회 한 번보다 비쌈)
+        held = self.cache.cached_length(ticker, "minute1")
+        if held == 0:
+            self.fallbacks += 1
+            return None
+        per_bar = INTERVAL_SECONDS[interval] // 60
+        minutes = min((count + 1) * per_bar, held, self.max_minutes)
+        minute1 = self.cache.get(ticker, "minute1", minutes)
+
+        if minute1 is None or len(minute1) == 0:
+            self.fallbacks += 1
+            return None
+        bars = resample(minute1, interval)
+        if len(bars) >= count:
+            self.derived += 1
+            return bars.iloc[-count:]
+        if len(bars) == 0:
+            self.fallbacks += 1
+            return None
+
+        # 모자란 앞쪽은 마감된 과거 캔들로 채움
+        history = self._get_history(ticker, interval, count, bars.index[0])
+        if history is None:
+            self.fallbacks += 1
+            return None
+        self.stitched += 1
+        return pd.concat([history[history.index < bars.index[0]], bars]).iloc[-count:]
+
+    def _get_history(self, ticker: str, interval: str, count: int,
+                     first: pd.Timestamp) -> Optional[pd.DataFrame]:
+        """first 이전 캔들이 빠짐없이 들어 있는 과거 캔들 (필요할 때만 재조회)"""
+        key = (ticker, interval)
+        with self._lock:
+            cached = self._history.get(key)
+        if cached is not None:
+            history, loaded_at = cached
+            # 조회 시점이 first 이후면 first 이전 캔들은 모두 마감된 상태로 들어 있음
+            if loaded_at >= first and len(history) > count:
+                return history
+
+        history = self.cache.get(ticker, interval, count + 1)
+        if history is None or len(history) == 0:
+            return None
+        self.history_loads += 1
+        with self._lock:
+            self._history[key] = (history, pd.Timestamp(datetime.now(KST).replace(tzinfo=None)))
+            self._history.move_to_end(key)
+            while len(self._history) > self.max_entries:
+                self._history.popitem(last=False)
+        return history
+
+    def invalidate(self, ticker: Optional[str] = None):
+        """저장된 과거 캔들 무효화 (미지정 시 전체)"""
+        with self._lock:
+            for key in list(self._history.keys()):
+                if ticker is None or key[0] == ticker:
+                    del self._history[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """리샘플러 통계"""
+        served = self.derived + self.stitched
+        return {
+            "derived": self.derived,
+            "stitched": self.stitched,
+            "history_loads": self.history_loads,
+            "fallbacks": self.fallbacks,
+            "history_entries": len(self._history),
+            "local_rate": round(served / (served + self.fallbacks) * 100, 2) if served + self.fallbacks else 0.0,
+            "max_minutes": self.max_minutes,
+        }
+
+
+# ========== 검증 ==========
+
+def verify(ticker: str, interval: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+           store: CandleStore = candle_store, rtol: float = 1e-9) -> Dict[str, Any]:
+    """저장소의 1분봉으로 만든 캔들과 저장소의 업비트 캔들을 캔들 단위로 비교
+
+    양쪽 모두 마감된 구간만 비교 (각 시리즈의 마지막 캔들은 기록 시점에 진행 중이었을 수 있음)
+    """
+    minute1 = store.read(ticker, "minute1", start, end)
+    reference = store.read(ticker, interval, start, end)
+    if minute1 is None or reference is None:
+        raise ValueError(f"저장소에 {ticker} minute1/{interval} 캔들이 없습니다")
+
+    derived = resample(minute1, interval)
+    if len(derived) < 2 or len(reference) < 2:
+        raise ValueError("비교할 캔들이 부족합니다")
+    lo = derived.index[0]
+    hi = min(derived.index[-1], reference.index[-1])
+    derived = derived[(derived.index >= lo) & (derived.index < hi)]
+    reference = reference[(reference.index >= lo) & (reference.index < hi)]
+
+    missing = reference.index.difference(derived.index)
+    extra = derived.index.difference(reference.index)
+    common = reference.index.intersection(derived.index)
+    ours = derived.loc[common, PRICE_COLUMNS].to_numpy(dtype=np.float64)
+    theirs = reference.loc[common, PRICE_COLUMNS].to_numpy(dtype=np.float64)
+
+    equal = np.isclose(ours, theirs, rtol=rtol, atol=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel = np.where(theirs != 0, np.abs(ours - theirs) / np.abs(theirs), np.abs(ours - theirs))
+    mismatched = ~equal.all(axis=1)
+
+    return {
+        "ticker": ticker,
+        "interval": interval,
+        "compared": len(common),
+        "matched": int((~mismatched).sum()),
+        "mismatched": int(mismatched.sum()),
+        "missing": len(missing),        # 업비트에는 있는데 만들지 못한 캔들
+        "extra": len(extra),            # 만들었는데 업비트에는 없는 캔들
+        "max_rel_diff": {name: float(rel[:, i].max()) if len(common) else 0.0
+                         for i, name in enumerate(PRICE_COLUMNS)},
+        "first_mismatch": str(common[mismatched][0]) if mismatched.any() else None,
+        "range": [str(lo), str(hi)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="1분봉 리샘플링 검증 (저장소의 업비트 캔들과 비교)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    check = sub.add_parser("verify", help="저장소 캔들과 캔들 단위 비교")
+    check.add_argument("tickers", nargs="+", help="대상 마켓")
+    check.add_argument("--interval", action="append", choices=RESAMPLE_INTERVALS,
+                       help="비교할 간격 (여러 번 지정 가능, 기본 minute5/minute60/day)")
+    check.add_argument("--days", type=float, help="최근 N일만 비교")
+    args = parser.parse_args()
+
+    start = datetime.now(KST).replace(tzinfo=None) - timedelta(days=args.days) if args.days else None
+    failed = False
+    for ticker in args.tickers:
+        for interval in args.interval or ["minute5", "minute60", "day"]:
+            try:
+                report = verify(ticker, interval, start=start)
+            except ValueError as e:
+                print(f"{ticker:<12} {interval:>10}  건너뜀: {e}")
+                continue
+            ok = report["mismatched"] == 0 and report["missing"] == 0 and report["extra"] == 0
+            failed |= not ok
+            print(f"{ticker:<12} {interval:>10}  {'일치' if ok else '불일치'}  "
+                  f"{report['matched']}/{report['compared']}개, 누락 {report['missing']}, 추가 {report['extra']}"
+                  f"{'' if ok else '  첫 불일치 ' + str(report['first_mismatch'])}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
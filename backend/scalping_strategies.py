@@ -1,16 +1,25 @@
 """
 검증된 단타(스캘핑) 전략 모듈
 - 전체 코인 스캔 + 실시간 매매
+- scan_all_strategies는 기본적으로 ScanContext에 종목·간격별 캔들을 한 번만 받아 두고
+  모든 전략이 같은 데이터를 평가 (전략마다 재조회하지 않음)
+- 증분 스캔: 전략별로 시세/캔들이 바뀐 종목만 다시 평가하고 나머지는 이전 시그널 재사용
 """
 import pandas as pd
 import numpy as np
-from typing import Optional, Dict, Any, Tuple, List
+from typing import Optional, Dict, Any, Tuple, List, Mapping
+from types import MappingProxyType
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 from enum import Enum
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
-from upbit_client import upbit_client
+import indicators as ta
+from upbit_client import upbit_client, request_priority, PRIORITY_SCAN
+from market_snapshot import MarketSnapshot
+from scan_state import IncrementalScanState
+from scan_service import scan_service
 
 
 class StrategyType(str, Enum):
@@ -175,11 +184,87 @@ class TradeSignal:
     timestamp: str
 
 
+# 전략별 필요 캔들 (간격, 개수) - ScanContext 선조회 범위
+STRATEGY_CANDLES: Dict[str, Tuple[str, int]] = {
+    'volatility_breakout': ("day", 2),
+    'rsi_reversal': ("day", 20),
+    'bollinger_bounce': ("day", 25),
+    'volume_surge': ("day", 10),
+    'momentum_breakout': ("day", 25),
+    'scalping_5min': ("minute5", 50),
+    'larry_williams_r': ("day", 20),
+    'larry_oops': ("day", 5),
+    'larry_smash_day': ("day", 5),
+    'larry_combo': ("day", 20),
+}
+
+# 5분봉 스캘핑은 상위 N개 종목만 (API 제한)
+SCALPING_5MIN_TICKERS = 30
+
+
+class ScanContext:
+    """스캔 1회분 공유 캔들 - (종목, 간격)마다 최대 필요 개수로 한 번만 조회
+    
+    get_ohlcv(ticker, interval, count)는 클라이언트와 같은 형식으로 최근 count개를 반환
+    """
+    
+    def __init__(self, client=None):
+        self.client = client or upbit_client
+        self._frames: Dict[Tuple[str, str], Optional[pd.DataFrame]] = {}
+        self.fetches = 0
+        self.hits = 0
+    
+    def _fetch(self, ticker: str, interval: str, count: int) -> Optional[pd.DataFrame]:
+        try:
+            with request_priority(PRIORITY_SCAN):
+                return self.client.get_ohlcv(ticker, interval=interval, count=count)
+        except Exception as e:
+            print(f"[ScanContext] {ticker} {interval} 조회 실패: {e}")
+            return None
+    
+    def prefetch(self, requests: Dict[str, Tuple[List[str], int]], max_workers: int = 8):
+        """간격별 (종목 목록, 개수)를 병렬로 한 번씩 조회"""
+        jobs = [(ticker, interval, count)
+                for interval, (tickers, count) in requests.items()
+                for ticker in tickers if (ticker, interval) not in self._frames]
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = executor.map(lambda job: self._fetch(*job), jobs)
+            for (ticker, interval, _), df in zip(jobs, frames):
+                self._frames[(ticker, interval)] = df
+        self.fetches += len(jobs)
+    
+    def get_ohlcv(self, ticker: str, interval: str = "day", count: int = 200) -> Optional[pd.DataFrame]:
+        """선조회한 캔들의 최근 count개 (없으면 그때 한 번 조회)"""
+        key = (ticker, interval)
+        if key in self._frames:
+            self.hits += 1
+        else:
+            self._frames[key] = self._fetch(ticker, interval, count)
+            self.fetches += 1
+        df = self._frames[key]
+        return df.tail(count) if df is not None else None
+    
+    def failed(self, ticker: str, interval: str) -> bool:
+        """선조회했지만 캔들을 받지 못한 종목"""
+        key = (ticker, interval)
+        return key in self._frames and self._frames[key] is None
+    
+    def get_stats(self) -> Dict[str, int]:
+        return {"series": len(self._frames), "fetches": self.fetches, "hits": self.hits}
+
+
 class ScalpingScanner:
     """전체 코인 스캔 및 단타 시그널 생성"""
     
     def __init__(self):
         self.client = upbit_client
+        self.last_scan_stats: Dict[str, Any] = {}
+        # 스캔 대상 최소 당일 거래대금 (캔들 조회 전 스냅샷으로 필터)
+        self.liquidity_threshold: float = 500_000_000
+        # 전략별 증분 스캔 상태 (종목별 이전 시그널)
+        self.scan_states: Dict[str, IncrementalScanState] = {}
         
     def get_all_krw_tickers(self) -> List[str]:
         """KRW 마켓 전체 티커 조회"""
@@ -190,29 +275,21 @@ class ScalpingScanner:
             return []
     
     def get_high_volume_tickers(self, min_volume: float = 1_000_000_000) -> List[str]:
-        """거래량 기준 필터링 (최소 10억원)"""
-        tickers = self.get_all_krw_tickers()
-        high_volume = []
+        """거래량 기준 필터링 (최소 10억원)
         
-        for ticker in tickers[:100]:  # 상위 100개만 확인
-            try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=1)
-                if df is not None and len(df) > 0:
-                    volume_krw = df.iloc[-1]['value']
-                    if volume_krw >= min_volume:
-                        high_volume.append(ticker)
-            except:
-                continue
-                
-        return high_volume
+        공유 시세 스냅샷의 당일 누적 거래대금(일봉 value 와 동일)으로 한 번에 필터링
+        """
+        snapshot = self.client.get_market_snapshot()
+        return snapshot.filter_by_trade_value(min_volume, self.get_all_krw_tickers())
     
-    async def scan_volatility_breakout(self, tickers: List[str], k: float = 0.5) -> List[TradeSignal]:
+    async def scan_volatility_breakout(self, tickers: List[str], k: float = 0.5, context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """변동성 돌파 스캔"""
+        source = context or self.client
         signals = []
         
         for ticker in tickers:
             try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=2)
+                df = source.get_ohlcv(ticker, interval="day", count=2)
                 if df is None or len(df) < 2:
                     continue
                 
@@ -247,25 +324,22 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_rsi_reversal(self, tickers: List[str], oversold: int = 30) -> List[TradeSignal]:
+    async def scan_rsi_reversal(self, tickers: List[str], oversold: int = 30, context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """RSI 반등 스캔"""
+        source = context or self.client
         signals = []
         
         for ticker in tickers:
             try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=20)
+                df = source.get_ohlcv(ticker, interval="day", count=20)
                 if df is None or len(df) < 15:
                     continue
                 
                 # RSI 계산
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
-                
-                current_rsi = rsi.iloc[-1]
-                prev_rsi = rsi.iloc[-2]
+                rsi = ta.rsi(df['close'], 14)
+                
+                current_rsi = rsi[-1]
+                prev_rsi = rsi[-2]
                 current_price = df['close'].iloc[-1]
                 
                 # RSI 30 이하에서 반등 시작
@@ -288,31 +362,29 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_bollinger_bounce(self, tickers: List[str]) -> List[TradeSignal]:
+    async def scan_bollinger_bounce(self, tickers: List[str], context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """볼린저 밴드 반등 스캔"""
+        source = context or self.client
         signals = []
         
         for ticker in tickers:
             try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=25)
+                df = source.get_ohlcv(ticker, interval="day", count=25)
                 if df is None or len(df) < 21:
                     continue
                 
                 # 볼린저 밴드 계산
-                middle = df['close'].rolling(window=20).mean()
-                std = df['close'].rolling(window=20).std()
-                upper = middle + (std * 2)
-                lower = middle - (std * 2)
+                upper, middle, lower = ta.bollinger(df['close'], 20)
                 
                 current_price = df['close'].iloc[-1]
                 prev_price = df['close'].iloc[-2]
-                lower_band = lower.iloc[-1]
-                middle_band = middle.iloc[-1]
+                lower_band = lower[-1]
+                middle_band = middle[-1]
                 
                 # 하단 밴드 터치 후 반등
-                if prev_price <= lower.iloc[-2] and current_price > lower_band:
+                if prev_price <= lower[-2] and current_price > lower_band:
                     # 밴드 폭 대비 위치
-                    band_width = upper.iloc[-1] - lower_band
+                    band_width = upper[-1] - lower_band
                     position_pct = (current_price - lower_band) / band_width * 100
                     
                     score = min(100, 70 + (30 - position_pct) / 2)
@@ -333,13 +405,14 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_volume_surge(self, tickers: List[str], volume_mult: float = 3.0) -> List[TradeSignal]:
+    async def scan_volume_surge(self, tickers: List[str], volume_mult: float = 3.0, context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """거래량 급증 스캔"""
+        source = context or self.client
         signals = []
         
         for ticker in tickers:
             try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=10)
+                df = source.get_ohlcv(ticker, interval="day", count=10)
                 if df is None or len(df) < 8:
                     continue
                 
@@ -371,13 +444,14 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_momentum_breakout(self, tickers: List[str]) -> List[TradeSignal]:
+    async def scan_momentum_breakout(self, tickers: List[str], context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """모멘텀 돌파 스캔 - 20일 신고가"""
+        source = context or self.client
         signals = []
         
         for ticker in tickers:
             try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=25)
+                df = source.get_ohlcv(ticker, interval="day", count=25)
                 if df is None or len(df) < 21:
                     continue
                 
@@ -408,33 +482,26 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_scalping_5min(self, tickers: List[str]) -> List[TradeSignal]:
+    async def scan_scalping_5min(self, tickers: List[str], context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """5분봉 스캘핑 스캔"""
+        source = context or self.client
         signals = []
         
-        for ticker in tickers[:30]:  # 상위 30개만 (API 제한)
+        for ticker in tickers[:SCALPING_5MIN_TICKERS]:  # 상위 N개만 (API 제한)
             try:
-                df = self.client.get_ohlcv(ticker, interval="minute5", count=50)
+                df = source.get_ohlcv(ticker, interval="minute5", count=50)
                 if df is None or len(df) < 30:
                     continue
                 
                 # RSI 계산
-                delta = df['close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                rs = gain / loss
-                rsi = 100 - (100 / (1 + rs))
+                rsi = ta.rsi(df['close'], 14)
                 
                 # MACD 계산
-                exp12 = df['close'].ewm(span=12, adjust=False).mean()
-                exp26 = df['close'].ewm(span=26, adjust=False).mean()
-                macd = exp12 - exp26
-                signal = macd.ewm(span=9, adjust=False).mean()
-                histogram = macd - signal
-                
-                current_rsi = rsi.iloc[-1]
-                current_macd = histogram.iloc[-1]
-                prev_macd = histogram.iloc[-2]
+                _, _, histogram = ta.macd(df['close'])
+                
+                current_rsi = rsi[-1]
+                current_macd = histogram[-1]
+                prev_macd = histogram[-2]
                 current_price = df['close'].iloc[-1]
                 
                 # RSI 40 이하 + MACD 상향 전환
@@ -457,31 +524,29 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_larry_williams_r(self, tickers: List[str]) -> List[TradeSignal]:
+    async def scan_larry_williams_r(self, tickers: List[str], context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """래리 윌리엄스 %R 지표 스캔
         
         %R = (최고가 - 현재가) / (최고가 - 최저가) × -100
         - -80 ~ -100: 과매도 (매수 신호)
         - -20 ~ 0: 과매수 (매도 신호)
         """
+        source = context or self.client
         signals = []
         
         for ticker in tickers:
             try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=20)
+                df = source.get_ohlcv(ticker, interval="day", count=20)
                 if df is None or len(df) < 15:
                     continue
                 
                 # Williams %R 계산 (14일 기준)
                 period = 14
-                highest_high = df['high'].rolling(window=period).max()
-                lowest_low = df['low'].rolling(window=period).min()
+                williams_r = ta.williams_r(df['high'], df['low'], df['close'], period)
                 
-                williams_r = ((highest_high - df['close']) / (highest_high - lowest_low)) * -100
-                
-                current_wr = williams_r.iloc[-1]
-                prev_wr = williams_r.iloc[-2]
-                prev2_wr = williams_r.iloc[-3]
+                current_wr = williams_r[-1]
+                prev_wr = williams_r[-2]
+                prev2_wr = williams_r[-3]
                 current_price = df['close'].iloc[-1]
                 
                 # 과매도 구간(-80 이하)에서 반등 시작
@@ -507,7 +572,7 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_larry_oops(self, tickers: List[str]) -> List[TradeSignal]:
+    async def scan_larry_oops(self, tickers: List[str], context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """래리 윌리엄스 OOPS! 패턴 스캔
         
         조건:
@@ -515,11 +580,12 @@ class ScalpingScanner:
         2. 전일 저가를 상향 돌파
         → 공포 매도 후 반등을 노리는 역발상 전략
         """
+        source = context or self.client
         signals = []
         
         for ticker in tickers:
             try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=5)
+                df = source.get_ohlcv(ticker, interval="day", count=5)
                 if df is None or len(df) < 2:
                     continue
                 
@@ -560,7 +626,7 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_larry_smash_day(self, tickers: List[str]) -> List[TradeSignal]:
+    async def scan_larry_smash_day(self, tickers: List[str], context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """래리 윌리엄스 Smash Day 패턴 스캔
         
         조건:
@@ -568,11 +634,12 @@ class ScalpingScanner:
         2. 당일 시가 상회 상승
         → 과매도 반등 + 추세 전환 포착
         """
+        source = context or self.client
         signals = []
         
         for ticker in tickers:
             try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=5)
+                df = source.get_ohlcv(ticker, interval="day", count=5)
                 if df is None or len(df) < 3:
                     continue
                 
@@ -613,7 +680,7 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_larry_combo(self, tickers: List[str], k: float = 0.5) -> List[TradeSignal]:
+    async def scan_larry_combo(self, tickers: List[str], k: float = 0.5, context: Optional[ScanContext] = None) -> List[TradeSignal]:
         """래리 윌리엄스 종합 전략 스캔
         
         변동성 돌파 + Williams %R + 자금관리 원칙 결합
@@ -621,11 +688,12 @@ class ScalpingScanner:
         - Williams %R이 과매도에서 반등 중
         - 거래량 증가
         """
+        source = context or self.client
         signals = []
         
         for ticker in tickers:
             try:
-                df = self.client.get_ohlcv(ticker, interval="day", count=20)
+                df = source.get_ohlcv(ticker, interval="day", count=20)
                 if df is None or len(df) < 15:
                     continue
                 
@@ -640,12 +708,10 @@ class ScalpingScanner:
                 
                 # 2. Williams %R 계산
                 period = 14
-                highest_high = df['high'].rolling(window=period).max()
-                lowest_low = df['low'].rolling(window=period).min()
-                williams_r = ((highest_high - df['close']) / (highest_high - lowest_low)) * -100
+                williams_r = ta.williams_r(df['high'], df['low'], df['close'], period)
                 
-                current_wr = williams_r.iloc[-1]
-                prev_wr = williams_r.iloc[-2]
+                current_wr = williams_r[-1]
+                prev_wr = williams_r[-2]
                 
                 # %R이 -80~-50 사이이고 상승 중 (과매도 탈출 중)
                 wr_signal = -80 <= current_wr <= -50 and current_wr > prev_wr
@@ -700,49 +766,106 @@ class ScalpingScanner:
                 
         return sorted(signals, key=lambda x: x.score, reverse=True)
     
-    async def scan_all_strategies(self, strategy_type: Optional[StrategyType] = None) -> Dict[str, List[TradeSignal]]:
-        """전체 전략 스캔 또는 특정 전략 스캔"""
-        # 거래량 기준 상위 코인 필터링
-        tickers = self.get_high_volume_tickers(min_volume=500_000_000)  # 5억원 이상
+    async def scan_all_strategies(self, strategy_type: Optional[StrategyType] = None,
+                                  shared: bool = True, incremental: bool = True,
+                                  strategies: Optional[List[str]] = None) -> Dict[str, List[TradeSignal]]:
+        """전체 전략 스캔 또는 특정 전략 스캔 (strategies: 여러 전략 지정)
+        
+        shared=True면 활성 전략에 필요한 캔들을 종목·간격별로 한 번만 선조회한 뒤 모든 전략이 공유
+        incremental=True면 전략마다 지난 스캔 이후 시세/캔들이 바뀐 종목만 다시 평가하고 나머지는 이전 시그널 사용
+        """
+        # 거래량 기준 상위 코인 필터링 (기본 5억원 이상)
+        tickers = await asyncio.to_thread(self.get_high_volume_tickers, min_volume=self.liquidity_threshold)
         
         if len(tickers) == 0:
-            tickers = self.get_all_krw_tickers()[:50]
+            tickers = (await asyncio.to_thread(self.get_all_krw_tickers))[:50]
         
-        results = {}
+        enabled = [key for key in STRATEGY_CANDLES
+                   if (strategy_type is None or strategy_type == StrategyType(key))
+                   and (strategies is None or key in strategies)]
         
-        if strategy_type is None or strategy_type == StrategyType.VOLATILITY_BREAKOUT:
-            results['volatility_breakout'] = await self.scan_volatility_breakout(tickers)
-            
-        if strategy_type is None or strategy_type == StrategyType.RSI_REVERSAL:
-            results['rsi_reversal'] = await self.scan_rsi_reversal(tickers)
-            
-        if strategy_type is None or strategy_type == StrategyType.BOLLINGER_BOUNCE:
-            results['bollinger_bounce'] = await self.scan_bollinger_bounce(tickers)
-            
-        if strategy_type is None or strategy_type == StrategyType.VOLUME_SURGE:
-            results['volume_surge'] = await self.scan_volume_surge(tickers)
-            
-        if strategy_type is None or strategy_type == StrategyType.MOMENTUM_BREAKOUT:
-            results['momentum_breakout'] = await self.scan_momentum_breakout(tickers)
-            
-        if strategy_type is None or strategy_type == StrategyType.SCALPING_5MIN:
-            results['scalping_5min'] = await self.scan_scalping_5min(tickers)
+        # 전략별 대상 종목 (5분봉은 상위 종목만)과 이번에 다시 평가할 종목
+        snapshot = await asyncio.to_thread(self._get_snapshot) if incremental else None
+        targets: Dict[str, List[str]] = {}
+        dirty: Dict[str, List[str]] = {}
+        for key in enabled:
+            targets[key] = tickers[:SCALPING_5MIN_TICKERS] if key == 'scalping_5min' else tickers
+            if incremental:
+                state = self.scan_states.setdefault(key, IncrementalScanState(STRATEGY_CANDLES[key][0]))
+                dirty[key] = state.plan(targets[key], snapshot)
+            else:
+                dirty[key] = targets[key]
         
-        # 래리 윌리엄스 전략들
-        if strategy_type is None or strategy_type == StrategyType.LARRY_WILLIAMS_R:
-            results['larry_williams_r'] = await self.scan_larry_williams_r(tickers)
-            
-        if strategy_type is None or strategy_type == StrategyType.LARRY_OOPS:
-            results['larry_oops'] = await self.scan_larry_oops(tickers)
-            
-        if strategy_type is None or strategy_type == StrategyType.LARRY_SMASH_DAY:
-            results['larry_smash_day'] = await self.scan_larry_smash_day(tickers)
+        context = None
+        if shared:
+            # 간격별 최대 개수로 한 번씩 선조회 (다시 평가할 종목만)
+            requests: Dict[str, Tuple[List[str], int]] = {}
+            for key in enabled:
+                interval, count = STRATEGY_CANDLES[key]
+                known, known_count = requests.get(interval, ([], 0))
+                requests[interval] = (list(dict.fromkeys(known + dirty[key])), max(known_count, count))
+            context = ScanContext(self.client)
+            await asyncio.to_thread(context.prefetch, requests)
+        
+        scanners = {
+            'volatility_breakout': self.scan_volatility_breakout,
+            'rsi_reversal': self.scan_rsi_reversal,
+            'bollinger_bounce': self.scan_bollinger_bounce,
+            'volume_surge': self.scan_volume_surge,
+            'momentum_breakout': self.scan_momentum_breakout,
+            'scalping_5min': self.scan_scalping_5min,
+            # 래리 윌리엄스 전략들
+            'larry_williams_r': self.scan_larry_williams_r,
+            'larry_oops': self.scan_larry_oops,
+            'larry_smash_day': self.scan_larry_smash_day,
+            'larry_combo': self.scan_larry_combo,
+        }
+        
+        results = {}
+        for key in enabled:
+            signals = await scanners[key](dirty[key], context=context)
+            if not incremental:
+                results[key] = signals
+                continue
             
-        if strategy_type is None or strategy_type == StrategyType.LARRY_COMBO:
-            results['larry_combo'] = await self.scan_larry_combo(tickers)
+            # 종목별로 저장 (캔들 조회 실패 종목은 다음 스캔에서 재평가) 후 전체 종목 순서로 병합
+            state = self.scan_states[key]
+            interval = STRATEGY_CANDLES[key][0]
+            by_ticker: Dict[str, List[TradeSignal]] = {}
+            for signal in signals:
+                by_ticker.setdefault(signal.ticker, []).append(signal)
+            state.commit({t: by_ticker.get(t) for t in dirty[key]
+                          if context is None or not context.failed(t, interval)})
+            state.record(len(targets[key]), len(dirty[key]))
+            merged = [s for found in state.results_for(targets[key]).values() for s in found]
+            results[key] = sorted(merged, key=lambda x: x.score, reverse=True)
         
+        if context is not None:
+            self.last_scan_stats = {"tickers": len(tickers), "strategies": len(enabled),
+                                    "rescanned": {key: len(dirty[key]) for key in enabled},
+                                    **context.get_stats()}
         return results
     
+    def produce_scan(self, strategies=None, subscriptions=None) -> Mapping[str, Tuple[TradeSignal, ...]]:
+        """스캔 서비스 생성기 - 구독 전략 합집합의 전략별 시그널 (점수순)"""
+        results = scan_service.run(self.scan_all_strategies(strategies=strategies))
+        return MappingProxyType({key: tuple(signals) for key, signals in results.items()})
+    
+    @staticmethod
+    def view_scan(results: Mapping[str, Tuple[TradeSignal, ...]], subscription) -> Dict[str, List[TradeSignal]]:
+        """스캔 서비스 뷰 - 구독 전략의 최소 점수 이상 시그널"""
+        return {key: [s for s in signals if s.score >= subscription.min_score]
+                for key, signals in results.items()
+                if subscription.strategies is None or key in subscription.strategies}
+    
+    def _get_snapshot(self) -> Optional[MarketSnapshot]:
+        """전체 마켓 시세 스냅샷 (실패 시 None - 전체 재평가)"""
+        try:
+            return self.client.get_market_snapshot()
+        except Exception as e:
+            print(f"[ScalpingScanner] 시세 스냅샷 조회 실패: {e}")
+            return None
+    
     def get_top_signals(self, results: Dict[str, List[TradeSignal]], top_n: int = 10) -> List[TradeSignal]:
         """전체 결과에서 상위 N개 시그널 추출"""
         all_signals = []
@@ -757,3 +880,6 @@ class ScalpingScanner:
 # 싱글톤 인스턴스
 scalping_scanner = ScalpingScanner()
 
+# 공유 스캔 서비스에 전략별 시그널 섹션 등록
+scan_service.register("signals", scalping_scanner.produce_scan, scalping_scanner.view_scan)
+
@@ -6,10 +6,13 @@ import asyncio
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from dataclasses import dataclass, asdict
-from threading import Thread, Event
 import time
 
-from upbit_client import upbit_client
+from upbit_client import upbit_client, request_priority, PRIORITY_ORDER, PRIORITY_EXIT
+from scan_service import scan_service, Subscription
+from bot_runtime import bot_runtime
+from execution_router import execution_router, MIN_ORDER_KRW
+from exit_engine import exit_engine, ExitEvent, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, EXIT_TIME
 from scalping_strategies import (
     scalping_scanner, 
     StrategyType, 
@@ -51,6 +54,11 @@ class Position:
 class ScalpingTrader:
     """단타 자동매매 트레이더"""
     
+    # 청산 엔진 (익절/손절은 체결가마다, 보유 시간 초과는 타이머로 처리)
+    EXIT_OWNER = "scalping_trader"
+    EXIT_REASONS = {EXIT_TAKE_PROFIT: "익절", EXIT_STOP_LOSS: "손절", EXIT_TIME: "시간초과"}
+    EXIT_RETRY_DELAY = 30.0  # 매도 실패 후 청산 조건 재등록까지 대기 (초)
+    
     def __init__(self):
         self.client = upbit_client
         self.scanner = scalping_scanner
@@ -66,12 +74,9 @@ class ScalpingTrader:
         self.positions: Dict[str, Position] = {}
         self.trade_logs: List[TradeRecord] = []
         self.scan_results: Dict[str, List[TradeSignal]] = {}
+        self._scan_subscription: Optional[Subscription] = None  # 공유 스캔 서비스 구독
         self.last_scan_time: Optional[str] = None
         
-        # 스레드 관리
-        self._stop_event = Event()
-        self._thread: Optional[Thread] = None
-        
     def get_status(self) -> Dict[str, Any]:
         """현재 상태 조회"""
         return {
@@ -128,9 +133,9 @@ class ScalpingTrader:
             raise ValueError("전략을 먼저 선택하세요")
         
         self.is_running = True
-        self._stop_event.clear()
-        self._thread = Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        for ticker in list(self.positions):
+            self._register_exit(ticker)
+        bot_runtime.start_bot("scalping_trader", self._run)
         
         return {
             "status": "started",
@@ -144,46 +149,54 @@ class ScalpingTrader:
             return {"status": "not_running"}
         
         self.is_running = False
-        self._stop_event.set()
+        bot_runtime.stop_bot("scalping_trader")
+        exit_engine.unregister_owner(self.EXIT_OWNER)
         
-        if self._thread:
-            self._thread.join(timeout=5)
+        # 공유 스캔 구독 해제
+        if self._scan_subscription is not None:
+            self._scan_subscription.close()
+            self._scan_subscription = None
         
         return {
             "status": "stopped",
             "message": "자동매매 중지됨"
         }
     
-    def _run_loop(self):
-        """자동매매 루프"""
+    async def _run(self):
+        """자동매매 루프 (봇 런타임 태스크 - 중지 시 취소됨)"""
         print(f"[{datetime.now()}] 🚀 단타 트레이더 시작 - 전략: {self.selected_strategy.value}")
         
-        while not self._stop_event.is_set():
-            try:
-                # 비동기 스캔 실행
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
+        try:
+            while self.is_running:
                 try:
-                    # 스캔
-                    self.scan_results = loop.run_until_complete(
-                        self.scanner.scan_all_strategies(self.selected_strategy)
-                    )
-                    self.last_scan_time = datetime.now().isoformat()
-                    
-                    # 매매 체크
-                    self._check_and_trade()
-                    
-                finally:
-                    loop.close()
+                    # 스캔 + 매매 체크 (동기 API 호출은 작업 스레드에서)
+                    await asyncio.to_thread(self._scan_and_trade)
+                except Exception as e:
+                    print(f"[{datetime.now()}] ❌ 트레이딩 오류: {e}")
                 
-            except Exception as e:
-                print(f"[{datetime.now()}] ❌ 트레이딩 오류: {e}")
-            
-            # 대기
-            self._stop_event.wait(self.scan_interval)
+                # 대기
+                await asyncio.sleep(self.scan_interval)
+        finally:
+            print(f"[{datetime.now()}] 🛑 단타 트레이더 종료")
+    
+    def _scan_and_trade(self):
+        """1회 스캔 후 매매 체크"""
+        # 스캔 (공유 스캔 서비스 - 다른 봇과 같은 스캔 결과 사용)
+        subscription = self._get_scan_subscription()
+        subscription.update([self.selected_strategy.value])
+        self.scan_results = subscription.get(max_age=self.scan_interval)
+        self.last_scan_time = datetime.now().isoformat()
         
-        print(f"[{datetime.now()}] 🛑 단타 트레이더 종료")
+        # 매매 체크
+        self._check_and_trade()
+    
+    def _get_scan_subscription(self) -> Subscription:
+        """공유 스캔 서비스 구독 (없으면 생성)"""
+        if self._scan_subscription is None or not self._scan_subscription.active:
+            self._scan_subscription = scan_service.subscribe(
+                "scalping_trader", "signals", strategies=[self.selected_strategy.value]
+            )
+        return self._scan_subscription
     
     def _check_and_trade(self):
         """매매 체크 및 실행"""
@@ -196,7 +209,8 @@ class ScalpingTrader:
         print(f"[{datetime.now()}] 📊 스캔 완료: {len(signals)}개 시그널")
         
         # 1. 기존 포지션 청산 체크
-        self._check_exit_positions()
+        with request_priority(PRIORITY_EXIT):
+            self._check_exit_positions()
         
         # 2. 새 진입 체크
         if len(self.positions) < self.max_positions:
@@ -205,48 +219,55 @@ class ScalpingTrader:
                     continue
                 
                 if signal.score >= 60:  # 60점 이상만
-                    self._execute_buy(signal)
+                    with request_priority(PRIORITY_ORDER):
+                        self._execute_buy(signal)
                     
                     if len(self.positions) >= self.max_positions:
                         break
     
     def _check_exit_positions(self):
-        """포지션 청산 체크"""
-        positions_to_close = []
-        
-        for ticker, pos in self.positions.items():
+        """포지션 청산 체크 - 조회한 현재가를 청산 엔진에 반영 (스트림이 끊겼을 때 대비, 발동 시 엔진이 매도)"""
+        for ticker in list(self.positions):
             try:
                 current_price = self.client.get_current_price(ticker)
                 if current_price is None:
                     continue
-                
-                profit_rate = (current_price - pos.entry_price) / pos.entry_price * 100
-                
-                # 익절
-                if current_price >= pos.target_price:
-                    positions_to_close.append((ticker, "익절", profit_rate, current_price))
-                    continue
-                
-                # 손절
-                if current_price <= pos.stop_loss:
-                    positions_to_close.append((ticker, "손절", profit_rate, current_price))
-                    continue
-                
-                # 시간 초과 (전략별)
-                entry_time = datetime.fromisoformat(pos.entry_time)
-                holding_hours = (datetime.now() - entry_time).total_seconds() / 3600
-                
-                # 스캘핑은 1시간, 다른 전략은 24시간
-                max_hours = 1 if pos.strategy == "scalping_5min" else 24
-                if holding_hours > max_hours:
-                    positions_to_close.append((ticker, "시간초과", profit_rate, current_price))
-                    
+                exit_engine.on_price(ticker, current_price)
             except Exception as e:
                 print(f"[{datetime.now()}] ⚠️ 포지션 체크 오류 ({ticker}): {e}")
-        
-        # 청산 실행
-        for ticker, reason, profit_rate, price in positions_to_close:
-            self._execute_sell(ticker, reason, profit_rate, price)
+    
+    def _register_exit(self, ticker: str) -> bool:
+        """익절/손절가와 보유 한도를 청산 엔진에 등록 - 다른 봇 소유 종목이면 False"""
+        pos = self.positions[ticker]
+        # 재시작 후 복원한 포지션도 이 봇 소유로 등록 (다른 봇의 매수/매도 차단)
+        if not execution_router.claim(self.EXIT_OWNER, ticker, pos.amount, pos.entry_price * pos.amount):
+            owner = execution_router.owner_of(ticker)
+            print(f"[{datetime.now()}] ⚠️ {pos.coin_name} {owner} 보유 종목 - 포지션 관리 안 함")
+            del self.positions[ticker]
+            return False
+        # 스캘핑은 1시간, 다른 전략은 24시간
+        max_hours = 1 if pos.strategy == "scalping_5min" else 24
+        exit_engine.register(
+            self.EXIT_OWNER, ticker, pos.entry_price,
+            stop_loss=pos.stop_loss,
+            take_profit=pos.target_price,
+            max_hold=max_hours * 3600,
+            opened_at=datetime.fromisoformat(pos.entry_time).timestamp(),
+            on_exit=self._on_exit_triggered,
+        )
+        return True
+    
+    async def _rearm_exit(self, ticker: str):
+        """매도 실패 후 잠시 뒤 청산 조건 재등록 (이미 넘어선 기준가라 바로 재등록하면 체결가마다 재발동)"""
+        await asyncio.sleep(self.EXIT_RETRY_DELAY)
+        if self.is_running and ticker in self.positions:
+            self._register_exit(ticker)
+    
+    def _on_exit_triggered(self, event: ExitEvent):
+        """청산 엔진 발동 → 매도 (작업 스레드에서 실행)"""
+        with request_priority(PRIORITY_ORDER):
+            self._execute_sell(event.ticker, self.EXIT_REASONS.get(event.reason, event.reason),
+                               event.profit_rate, event.price)
     
     def _execute_buy(self, signal: TradeSignal):
         """매수 실행"""
@@ -259,21 +280,22 @@ class ScalpingTrader:
                 print(f"[{datetime.now()}] ⚠️ 원화 부족: {krw_balance:,.0f}원")
                 return
             
-            # 시장가 매수
-            result = self.client.buy_market(ticker, self.trade_amount)
+            # 시장가 매수 (실행 라우터 경유, 작업 스레드에서 체결 확인까지 대기)
+            fill = execution_router.run(execution_router.buy(self.EXIT_OWNER, ticker, self.trade_amount))
             
-            if result:
-                # 포지션 기록
+            if fill.filled:
+                # 포지션 기록 (목표가/손절가는 신호 기준)
                 self.positions[ticker] = Position(
                     ticker=ticker,
                     coin_name=signal.coin_name,
                     strategy=signal.strategy,
-                    entry_price=signal.current_price,
-                    amount=self.trade_amount / signal.current_price,
+                    entry_price=fill.avg_price,
+                    amount=fill.executed_volume,
                     target_price=signal.target_price or signal.current_price * 1.03,
                     stop_loss=signal.stop_loss or signal.current_price * 0.98,
                     entry_time=datetime.now().isoformat()
                 )
+                self._register_exit(ticker)
                 
                 # 거래 기록
                 self.trade_logs.append(TradeRecord(
@@ -282,16 +304,16 @@ class ScalpingTrader:
                     coin_name=signal.coin_name,
                     action="buy",
                     strategy=signal.strategy,
-                    price=signal.current_price,
-                    amount=self.trade_amount / signal.current_price,
-                    total=self.trade_amount,
+                    price=fill.avg_price,
+                    amount=fill.executed_volume,
+                    total=fill.net_krw,
                     reason=signal.reason,
                     timestamp=datetime.now().isoformat()
                 ))
                 
-                print(f"[{datetime.now()}] ✅ 매수 완료: {signal.coin_name} @ {signal.current_price:,.0f} ({signal.strategy})")
+                print(f"[{datetime.now()}] ✅ 매수 완료: {signal.coin_name} @ {fill.avg_price:,.0f} ({signal.strategy})")
             else:
-                print(f"[{datetime.now()}] ❌ 매수 실패: {signal.coin_name}")
+                print(f"[{datetime.now()}] ❌ 매수 실패: {signal.coin_name} - {fill.error or fill.state}")
                 
         except Exception as e:
             print(f"[{datetime.now()}] ❌ 매수 오류: {e}")
@@ -301,6 +323,8 @@ class ScalpingTrader:
         try:
             if ticker not in self.positions:
                 return
+            # 다른 경로로 매도하는 경우에도 청산 엔진 규칙 해제
+            exit_engine.unregister(self.EXIT_OWNER, ticker)
             
             pos = self.positions[ticker]
             coin = ticker.replace("KRW-", "")
@@ -309,12 +333,17 @@ class ScalpingTrader:
             balance = self.client.get_balance(coin) or 0
             if balance <= 0:
                 del self.positions[ticker]
+                execution_router.release(self.EXIT_OWNER, ticker)
                 return
             
             # 시장가 매도
-            result = self.client.sell_market(ticker, balance)
+            fill = execution_router.run(execution_router.sell(self.EXIT_OWNER, ticker, balance))
             
-            if result:
+            if fill.filled:
+                sold_from = balance
+                price = fill.avg_price
+                balance = fill.executed_volume
+                profit_rate = (price - pos.entry_price) / pos.entry_price * 100 if pos.entry_price > 0 else profit_rate
                 profit = (price - pos.entry_price) * balance
                 
                 # 거래 기록
@@ -336,9 +365,23 @@ class ScalpingTrader:
                 emoji = "📈" if profit_rate >= 0 else "📉"
                 print(f"[{datetime.now()}] {emoji} 매도 완료: {pos.coin_name} @ {price:,.0f} ({reason}, {profit_rate:+.2f}%)")
                 
+                # 부분 체결 - 남은 수량이 최소 주문 금액 이상이면 포지션 유지 후 재매도
+                remaining = max(sold_from - balance, 0.0)
+                if remaining * price >= MIN_ORDER_KRW:
+                    pos.amount = remaining
+                    print(f"[{datetime.now()}] ⚠️ {pos.coin_name} 부분 체결 ({fill.state}) - 잔여 {remaining:.8f}개, "
+                          f"{self.EXIT_RETRY_DELAY:.0f}초 후 청산 조건 재등록")
+                    bot_runtime.submit(self._rearm_exit(ticker))
+                else:
+                    del self.positions[ticker]
+            elif fill.reject_reason == "owned":
+                # 다른 봇 소유 종목 - 이 봇이 매도할 포지션이 아님
+                print(f"[{datetime.now()}] 🚫 매도 거부: {pos.coin_name} - {fill.error} (포지션 관리 중단)")
                 del self.positions[ticker]
             else:
-                print(f"[{datetime.now()}] ❌ 매도 실패: {pos.coin_name}")
+                print(f"[{datetime.now()}] ❌ 매도 실패: {pos.coin_name} - {fill.error or fill.state} "
+                      f"({self.EXIT_RETRY_DELAY:.0f}초 후 청산 조건 재등록)")
+                bot_runtime.submit(self._rearm_exit(ticker))
                 
         except Exception as e:
             print(f"[{datetime.now()}] ❌ 매도 오류: {e}")
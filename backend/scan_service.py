@@ -0,0 +1,357 @@
+"""
+중앙 스캔 서비스 모듈
+- 모든 봇(TradingEngine, ScalpingTrader, AIScalpingTrader, AIScalper)이 하나의 스캔 결과를 공유
+- 스캐너 모듈이 섹션 생성기(coins, signals, ai)를 등록하고, 서비스가 한 일정으로 한 번만 실행
+- 활성 구독의 전략 합집합만 계산해 버전 번호가 붙은 불변 ScanResult로 발행
+- 봇은 자기 전략/최소 점수로 구독하고 결과를 걸러서 받음
+  (결과가 max_age보다 오래됐으면 갱신 - 동시 요청은 한 번만 스캔)
+- 비동기 생성기는 서비스가 유지하는 스캔 전용 이벤트 루프에서 실행 (스캔마다 루프를 만들지 않음)
+  작업 스레드 수에 상한이 있고, 시간 초과로 버린 조회 스레드는 기다리지 않음
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Optional, List, Dict, Any, Callable, FrozenSet, Iterable, Mapping, Awaitable
+
+from config import SCAN_SERVICE_INTERVAL, SCAN_SERVICE_WORKERS
+from upbit_client import request_priority, PRIORITY_SCAN
+
+
+# 섹션 생성기: (계산할 전략 집합(None이면 전체), 해당 섹션 구독 목록) -> 섹션 데이터
+Producer = Callable[[Optional[FrozenSet[str]], List["Subscription"]], Any]
+# 섹션 뷰: (섹션 데이터, 구독) -> 구독 조건으로 거른 결과
+View = Callable[[Any, "Subscription"], Any]
+
+
+@dataclass(frozen=True)
+class ScanResult:
+    """스캔 1회 결과 (불변, 버전별 발행)"""
+    version: int = 0
+    taken_at: float = 0.0                                   # 생성 시각 (time.time)
+    sections: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType({}))
+    coverage: Mapping[str, Optional[FrozenSet[str]]] = field(default_factory=lambda: MappingProxyType({}))
+    durations: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))
+    updated_at: Mapping[str, float] = field(default_factory=lambda: MappingProxyType({}))  # 섹션별 계산 시각
+
+    def age(self, section: Optional[str] = None) -> float:
+        """생성 이후 경과 시간 (초) - section 지정 시 해당 섹션 계산 이후"""
+        taken_at = self.taken_at if section is None else self.updated_at.get(section, 0.0)
+        return time.time() - taken_at if taken_at else float('inf')
+
+    def get(self, section: str, default: Any = None) -> Any:
+        return self.sections.get(section, default)
+
+    def covers(self, section: str, strategies: Optional[FrozenSet[str]]) -> bool:
+        """섹션이 해당 전략들까지 계산돼 있는지"""
+        if section not in self.sections:
+            return False
+        computed = self.coverage.get(section)
+        if computed is None:
+            return True
+        return strategies is not None and strategies <= computed
+
+
+class Subscription:
+    """봇 하나의 구독 - 섹션, 전략 선택, 최소 점수, 발행 콜백"""
+
+    def __init__(self, service: "ScanService", name: str, section: str,
+                 strategies: Optional[Iterable[str]] = None, min_score: float = 0,
+                 callback: Optional[Callable[["Subscription", Any, ScanResult], None]] = None,
+                 **options):
+        self.service = service
+        self.name = name
+        self.section = section
+        self.strategies: Optional[FrozenSet[str]] = frozenset(strategies) if strategies else None
+        self.min_score = min_score
+        self.callback = callback
+        self.options = options
+        self.active = True
+        self.last_version = 0
+
+    def update(self, strategies: Optional[Iterable[str]] = None, min_score: Optional[float] = None, **options):
+        """전략 선택/조건 변경 (None인 항목은 유지)"""
+        if strategies is not None:
+            self.strategies = frozenset(strategies) or None
+        if min_score is not None:
+            self.min_score = min_score
+        self.options.update(options)
+
+    def view(self, result: ScanResult) -> Any:
+        """결과에서 이 구독의 조건에 맞는 부분"""
+        return self.service.view(self, result)
+
+    def get(self, max_age: Optional[float] = None) -> Any:
+        """최신 결과의 이 구독 부분 (max_age 초과 또는 전략 미포함 시 갱신)"""
+        result = self.service.get_result(max_age, self)
+        self.last_version = result.version
+        return self.view(result)
+
+    def close(self):
+        self.service.unsubscribe(self)
+
+
+class ScanService:
+    """중앙 스캔 서비스 (주기 갱신 + 요청 시 갱신)"""
+
+    def __init__(self, interval: float = SCAN_SERVICE_INTERVAL, workers: int = SCAN_SERVICE_WORKERS):
+        self.interval = interval
+        self.workers = workers
+        self.is_running = False
+
+        self._producers: Dict[str, Producer] = {}
+        self._views: Dict[str, View] = {}
+        self._subscriptions: List[Subscription] = []
+        self._result = ScanResult()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+        # 통계
+        self.refresh_count = 0
+        self.failures = 0
+        self.last_duration = 0.0
+
+    # ========== 등록 / 구독 ==========
+
+    def register(self, section: str, producer: Producer, view: Optional[View] = None):
+        """섹션 생성기 등록 (스캐너 모듈에서 호출)"""
+        self._producers[section] = producer
+        if view is not None:
+            self._views[section] = view
+
+    def subscribe(self, name: str, section: str, strategies: Optional[Iterable[str]] = None,
+                  min_score: float = 0, callback=None, **options) -> Subscription:
+        """구독 추가 - 같은 이름의 구독은 교체"""
+        if section not in self._producers:
+            raise ValueError(f"등록되지 않은 스캔 섹션: {section}")
+        subscription = Subscription(self, name, section, strategies, min_score, callback, **options)
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s.name != name] + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscription.active = False
+        with self._lock:
+            self._subscriptions = [s for s in self._subscriptions if s is not subscription]
+
+    def view(self, subscription: Subscription, result: ScanResult) -> Any:
+        data = result.get(subscription.section)
+        view = self._views.get(subscription.section)
+        if data is None or view is None:
+            return data
+        return view(data, subscription)
+
+    # ========== 수명 주기 ==========
+
+    def start(self) -> bool:
+        """주기 갱신 시작"""
+        if self.is_running:
+            return False
+        self.is_running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name="ScanService")
+        self._thread.start()
+        print(f"[{datetime.now()}] 🛰️ 스캔 서비스 시작 ({self.interval:.0f}초 주기)")
+        return True
+
+    def stop(self) -> bool:
+        """주기 갱신 중지"""
+        if not self.is_running:
+            return False
+        self.is_running = False
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        return True
+
+    def _run_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                if self._subscriptions:
+                    self.refresh()
+            except Exception as e:
+                print(f"[ScanService] 갱신 오류: {e}")
+            self._stop_event.wait(self.interval)
+
+    # ========== 스캔 루프 ==========
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """스캔 전용 이벤트 루프 (없으면 전용 스레드에 생성, 이후 계속 재사용)"""
+        with self._loop_lock:
+            if self._loop is not None and not self._loop.is_closed():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            # to_thread 작업 스레드 상한 - 봇 루프의 기본 실행기와 분리
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ScanWorker"))
+            thread = threading.Thread(target=self._run_scan_loop, args=(loop,), daemon=True, name="ScanLoop")
+            self._loop = loop
+            thread.start()
+            return loop
+
+    @staticmethod
+    def _run_scan_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """생성기용 - 코루틴을 스캔 루프에서 실행하고 결과 반환 (요청 우선순위 등 호출 측 컨텍스트 유지)
+
+        코루틴이 끝나면 바로 반환 - 시간 초과로 버린 to_thread 조회는 작업 스레드에서 마저 끝나고 결과는 버려짐
+        """
+        loop = self._ensure_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("스캔 루프에서는 await 로 호출하세요")
+        return asyncio.run_coroutine_threadsafe(self._in_context(coro, contextvars.copy_context()), loop).result()
+
+    @staticmethod
+    async def _in_context(coro: Awaitable[Any], context: contextvars.Context) -> Any:
+        return await asyncio.get_running_loop().create_task(coro, context=context)
+
+    # ========== 조회 ==========
+
+    def latest(self) -> ScanResult:
+        """마지막 결과 (갱신하지 않음)"""
+        return self._result
+
+    def get_result(self, max_age: Optional[float] = None,
+                   subscription: Optional[Subscription] = None) -> ScanResult:
+        """공유 결과 조회 (max_age 초과 또는 구독 전략이 빠져 있으면 즉시 갱신)"""
+        limit = self.interval if max_age is None else max_age
+        if self._fresh(self._result, limit, subscription):
+            return self._result
+        return self.refresh(limit, subscription)
+
+    def _fresh(self, result: ScanResult, limit: float, subscription: Optional[Subscription]) -> bool:
+        if subscription is None:
+            return result.age() <= limit
+        return (result.age(subscription.section) <= limit
+                and result.covers(subscription.section, subscription.strategies))
+
+    def _plan(self) -> Dict[str, Optional[FrozenSet[str]]]:
+        """활성 구독 기준 섹션별 계산할 전략 합집합 (None = 전체)"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        plan: Dict[str, Optional[FrozenSet[str]]] = {}
+        for s in subscriptions:
+            if s.section in plan and plan[s.section] is None:
+                continue
+            if s.strategies is None:
+                plan[s.section] = None
+            else:
+                plan[s.section] = plan.get(s.section, frozenset()) | s.strategies
+        return plan
+
+    def refresh(self, max_age: float = 0, subscription: Optional[Subscription] = None) -> ScanResult:
+        """섹션 재계산 후 새 버전 발행 (동시 호출 시 한 번만 스캔)
+
+        max_age > 0이면 그 안에 계산됐고 필요한 전략을 포함한 섹션은 다시 계산하지 않음
+        (새 구독/전략 추가로 인한 갱신은 빠진 섹션만 계산)
+        """
+        with self._refresh_lock:
+            # 대기하는 동안 다른 호출자가 이미 갱신했으면 재사용
+            if max_age > 0 and self._fresh(self._result, max_age, subscription):
+                return self._result
+
+            plan = self._plan()
+            if subscription is not None and subscription.section not in plan:
+                plan[subscription.section] = subscription.strategies
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+
+            previous = self._result
+            started = time.monotonic()
+            sections: Dict[str, Any] = {}
+            coverage: Dict[str, Optional[FrozenSet[str]]] = {}
+            durations: Dict[str, float] = {}
+            updated_at: Dict[str, float] = {}
+            for section, strategies in plan.items():
+                producer = self._producers.get(section)
+                if producer is None:
+                    continue
+                if max_age > 0 and previous.age(section) <= max_age and previous.covers(section, strategies):
+                    sections[section] = previous.get(section)
+                    coverage[section] = previous.coverage.get(section)
+                    durations[section] = previous.durations.get(section, 0.0)
+                    updated_at[section] = previous.updated_at[section]
+                    continue
+                section_started = time.monotonic()
+                try:
+                    with request_priority(PRIORITY_SCAN):
+                        sections[section] = producer(strategies, [s for s in subscriptions if s.section == section])
+                except Exception as e:
+                    self.failures += 1
+                    print(f"[ScanService] {section} 스캔 실패: {e}")
+                    # 실패한 섹션은 이전 결과 유지
+                    if previous.get(section) is not None:
+                        sections[section] = previous.get(section)
+                        coverage[section] = previous.coverage.get(section)
+                        updated_at[section] = previous.updated_at.get(section, 0.0)
+                    continue
+                coverage[section] = strategies
+                durations[section] = round(time.monotonic() - section_started, 3)
+                updated_at[section] = time.time()
+
+            result = ScanResult(
+                version=previous.version + 1,
+                taken_at=time.time(),
+                sections=MappingProxyType(sections),
+                coverage=MappingProxyType(coverage),
+                durations=MappingProxyType(durations),
+                updated_at=MappingProxyType(updated_at),
+            )
+            self._result = result
+            self.refresh_count += 1
+            self.last_duration = time.monotonic() - started
+
+        self._publish(result)
+        return result
+
+    def _publish(self, result: ScanResult):
+        """구독 콜백 호출 (콜백 오류는 다른 구독에 영향 없음)"""
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if s.callback is not None]
+        for s in subscriptions:
+            try:
+                s.callback(s, s.view(result), result)
+            except Exception as e:
+                print(f"[ScanService] {s.name} 알림 실패: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """서비스 통계"""
+        result = self._result
+        return {
+            "is_running": self.is_running,
+            "interval": self.interval,
+            "version": result.version,
+            "age": round(result.age(), 1) if result.taken_at else None,
+            "sections": {s: sorted(c) if c is not None else "all" for s, c in result.coverage.items()},
+            "durations": dict(result.durations),
+            "subscriptions": [
+                {"name": s.name, "section": s.section,
+                 "strategies": sorted(s.strategies) if s.strategies else "all",
+                 "min_score": s.min_score, "last_version": s.last_version}
+                for s in self._subscriptions
+            ],
+            "refresh_count": self.refresh_count,
+            "failures": self.failures,
+            "last_duration_ms": round(self.last_duration * 1000, 1),
+        }
+
+
+# 싱글톤 인스턴스
+scan_service = ScanService()
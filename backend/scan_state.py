@@ -0,0 +1,152 @@
+"""
+증분 스캔 상태 모듈
+- 종목별 마지막 스캔 시점의 시세(현재가, 당일 거래대금)와 캔들 구간을 기억
+- 다음 스캔에서는 가격/거래대금이 바뀌었거나 캔들이 새로 열린 종목(dirty)만 다시 계산하고
+  나머지는 이전 결과를 그대로 사용
+- 기준값이 0(기본)이면 체결이 한 건이라도 있으면 재스캔 → 전체 스캔과 같은 결과
+- 일정 주기마다 전체 재스캔 (안전망), 스캔 설정이 바뀌면 전체 무효화
+"""
+import time
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Hashable
+
+from candle_cache import INTERVAL_SECONDS
+from config import SCAN_FULL_RESCAN_INTERVAL, SCAN_PRICE_THRESHOLD, SCAN_VALUE_THRESHOLD
+from market_snapshot import MarketSnapshot
+
+
+@dataclass(frozen=True)
+class ScanMark:
+    """종목의 마지막 스캔 시점 상태"""
+    price: float
+    acc_trade_price: float          # 당일 누적 거래대금 (체결마다 증가)
+    bucket: int                     # 캔들 구간 번호 (바뀌면 새 캔들)
+
+
+class IncrementalScanState:
+    """종목별 스캔 결과 + 재스캔 판단 (스캐너 하나당 하나)
+
+    plan()으로 이번에 다시 계산할 종목을 고르고, 계산 후 commit()으로 결과와 기준 시세를 저장
+    """
+
+    def __init__(self, interval: str = "day", price_threshold: float = SCAN_PRICE_THRESHOLD,
+                 value_threshold: float = SCAN_VALUE_THRESHOLD,
+                 full_rescan_interval: float = SCAN_FULL_RESCAN_INTERVAL):
+        self.interval = interval
+        self.step = INTERVAL_SECONDS.get(interval, 86400)
+        self.price_threshold = price_threshold
+        self.value_threshold = value_threshold
+        self.full_rescan_interval = full_rescan_interval
+
+        self._marks: Dict[str, ScanMark] = {}
+        self._results: Dict[str, Any] = {}
+        self._config_key: Optional[Hashable] = None
+        self._snapshot: Optional[MarketSnapshot] = None   # plan() 시점 스냅샷 (commit 기준 시세)
+        self._bucket_now = 0
+        self._last_full = 0.0
+        self._full = False
+
+        # 통계
+        self.scans = 0
+        self.full_scans = 0
+        self.rescanned = 0
+        self.reused = 0
+
+    def _bucket(self, now: float) -> int:
+        # 업비트 일봉은 00:00 UTC(09:00 KST) 시작 - 에포크 기준 나눗셈과 경계가 같음
+        return int(now // self.step)
+
+    def _changed(self, mark: ScanMark, price: float, value: float, bucket: int) -> bool:
+        if bucket != mark.bucket:
+            return True
+        if self.price_threshold <= 0:
+            if price != mark.price:
+                return True
+        elif mark.price > 0 and abs(price - mark.price) / mark.price >= self.price_threshold:
+            return True
+        if self.value_threshold <= 0:
+            return value != mark.acc_trade_price
+        return mark.acc_trade_price > 0 and abs(value - mark.acc_trade_price) / mark.acc_trade_price >= self.value_threshold
+
+    def plan(self, tickers: List[str], snapshot: Optional[MarketSnapshot],
+             config_key: Hashable = None, now: Optional[float] = None) -> List[str]:
+        """이번 스캔에서 다시 계산할 종목 (입력 순서 유지)
+
+        스냅샷이 비었거나 설정이 바뀌었거나 전체 재스캔 주기가 지났으면 전체를 반환.
+        반환된 종목의 이전 결과는 버림 - 계산하지 못하면(조회 실패, 시간 초과) 결과에서 빠짐
+        """
+        now = time.time() if now is None else now
+        self._snapshot = snapshot
+        self._bucket_now = self._bucket(now)
+        if config_key != self._config_key:
+            self.invalidate()
+            self._config_key = config_key
+
+        self._full = (snapshot is None or len(snapshot) == 0 or not self._marks
+                      or now - self._last_full >= self.full_rescan_interval)
+        if self._full:
+            self._last_full = now
+            dirty = list(tickers)
+        else:
+            dirty = []
+            for ticker in tickers:
+                mark = self._marks.get(ticker)
+                item = snapshot.get(ticker)
+                if mark is None or item is None or ticker not in self._results:
+                    dirty.append(ticker)
+                elif self._changed(mark, item.price, item.acc_trade_price, self._bucket_now):
+                    dirty.append(ticker)
+        for ticker in dirty:
+            self._results.pop(ticker, None)
+        return dirty
+
+    def commit(self, results: Dict[str, Any]):
+        """재계산한 종목 결과 저장 (결과 없음은 None) - 기준 시세는 plan() 시점 스냅샷
+
+        조회에 실패한 종목은 넣지 않으면 다음 스캔에서 다시 계산
+        """
+        for ticker, result in results.items():
+            item = self._snapshot.get(ticker) if self._snapshot is not None else None
+            if item is None:
+                # 기준 시세가 없으면 다음에도 재계산되도록 표시만 지움
+                self._marks.pop(ticker, None)
+                self._results[ticker] = result
+                continue
+            self._marks[ticker] = ScanMark(item.price, item.acc_trade_price, self._bucket_now)
+            self._results[ticker] = result
+
+    def results_for(self, tickers: List[str]) -> Dict[str, Any]:
+        """대상 종목의 저장된 결과 (입력 순서, 결과 없는 종목 제외)"""
+        return {t: self._results[t] for t in tickers if self._results.get(t) is not None}
+
+    def record(self, total: int, rescanned: int):
+        """스캔 1회 통계 기록"""
+        self.scans += 1
+        if self._full:
+            self.full_scans += 1
+        self.rescanned += rescanned
+        self.reused += total - rescanned
+
+    def invalidate(self, tickers: Optional[List[str]] = None):
+        """저장된 결과 무효화 (None이면 전체)"""
+        if tickers is None:
+            self._marks.clear()
+            self._results.clear()
+            self._last_full = 0.0
+            return
+        for ticker in tickers:
+            self._marks.pop(ticker, None)
+            self._results.pop(ticker, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.rescanned + self.reused
+        return {
+            "interval": self.interval,
+            "tracked": len(self._marks),
+            "scans": self.scans,
+            "full_scans": self.full_scans,
+            "rescanned": self.rescanned,
+            "reused": self.reused,
+            "reuse_rate": round(self.reused / total * 100, 1) if total else 0.0,
+            "last_full": self._full,
+        }
@@ -5,6 +5,7 @@ import pandas as pd
 import numpy as np
 from typing import Optional, Dict, Any, Tuple, List
 from datetime import datetime, timedelta
+import indicators as ta
 from upbit_client import upbit_client
 from config import VOLATILITY_K, RSI_OVERSOLD, RSI_OVERBOUGHT
 
@@ -91,8 +92,8 @@ class MovingAverageCross(TradingStrategy):
         if df is None or len(df) < self.long_window:
             return None, None
             
-        short_ma = df['close'].rolling(window=self.short_window).mean()
-        long_ma = df['close'].rolling(window=self.long_window).mean()
+        short_ma = pd.Series(ta.sma(df['close'], self.short_window), index=df.index)
+        long_ma = pd.Series(ta.sma(df['close'], self.long_window), index=df.index)
         
         return short_ma, long_ma
     
@@ -141,14 +142,7 @@ class RSIStrategy(TradingStrategy):
         if df is None or len(df) < self.period + 1:
             return None
             
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=self.period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=self.period).mean()
-        
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi.iloc[-1]
+        return float(ta.rsi(df['close'], self.period)[-1])
     
     def should_buy(self) -> Tuple[bool, str]:
         """과매도 구간 매수"""
@@ -221,59 +215,42 @@ class CombinedStrategy(TradingStrategy):
 # 기술적 지표 유틸리티 함수들
 def calculate_bollinger_bands(df: pd.DataFrame, window: int = 20, num_std: float = 2) -> Dict[str, pd.Series]:
     """볼린저 밴드 계산"""
-    middle = df['close'].rolling(window=window).mean()
-    std = df['close'].rolling(window=window).std()
+    upper, middle, lower = ta.bollinger(df['close'], window, num_std)
     
     return {
-        'upper': middle + (std * num_std),
-        'middle': middle,
-        'lower': middle - (std * num_std)
+        'upper': pd.Series(upper, index=df.index),
+        'middle': pd.Series(middle, index=df.index),
+        'lower': pd.Series(lower, index=df.index)
     }
 
 
 def calculate_macd(df: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9) -> Dict[str, pd.Series]:
     """MACD 계산"""
-    exp_fast = df['close'].ewm(span=fast, adjust=False).mean()
-    exp_slow = df['close'].ewm(span=slow, adjust=False).mean()
-    
-    macd_line = exp_fast - exp_slow
-    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
-    histogram = macd_line - signal_line
+    macd_line, signal_line, histogram = ta.macd(df['close'], fast, slow, signal)
     
     return {
-        'macd': macd_line,
-        'signal': signal_line,
-        'histogram': histogram
+        'macd': pd.Series(macd_line, index=df.index),
+        'signal': pd.Series(signal_line, index=df.index),
+        'histogram': pd.Series(histogram, index=df.index)
     }
 
 
 def calculate_stochastic(df: pd.DataFrame, k_period: int = 14, d_period: int = 3) -> Dict[str, pd.Series]:
     """스토캐스틱 계산"""
-    low_min = df['low'].rolling(window=k_period).min()
-    high_max = df['high'].rolling(window=k_period).max()
+    k, d = ta.stochastic(df['high'], df['low'], df['close'], k_period, d_period)
     
-    k = 100 * ((df['close'] - low_min) / (high_max - low_min))
-    d = k.rolling(window=d_period).mean()
-    
-    return {'k': k, 'd': d}
+    return {'k': pd.Series(k, index=df.index), 'd': pd.Series(d, index=df.index)}
 
 
 def calculate_williams_r(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """Williams %R 계산"""
-    high_max = df['high'].rolling(window=period).max()
-    low_min = df['low'].rolling(window=period).min()
-    wr = -100 * (high_max - df['close']) / (high_max - low_min)
-    return wr
+    wr = ta.williams_r(df['high'], df['low'], df['close'], period)
+    return pd.Series(wr, index=df.index)
 
 
 def calculate_rsi(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """RSI 계산"""
-    delta = df['close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-    rs = gain / loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    return pd.Series(ta.rsi(df['close'], period), index=df.index)
 
 
 class ProfitMaximizer(TradingStrategy):
@@ -294,9 +271,10 @@ class ProfitMaximizer(TradingStrategy):
         self.buy_threshold = 60  # 매수 점수 임계값
         self.sell_threshold = 60  # 매도 점수 임계값
         
-    def analyze(self) -> Dict[str, Any]:
-        """종합 분석 수행"""
-        df = self.client.get_ohlcv(self.ticker, interval="day", count=50)
+    def analyze(self, df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+        """종합 분석 수행 (df: 이미 조회한 일봉 50개 - 없으면 직접 조회)"""
+        if df is None:
+            df = self.client.get_ohlcv(self.ticker, interval="day", count=50)
         if df is None or len(df) < 30:
             return None
         
@@ -326,7 +304,7 @@ class ProfitMaximizer(TradingStrategy):
         williams_r = williams.iloc[-1]
         
         # 5. 거래량 분석
-        vol_ma20 = df['volume'].rolling(20).mean().iloc[-1]
+        vol_ma20 = ta.sma(df['volume'], 20)[-1]
         vol_current = df['volume'].iloc[-1]
         vol_ratio = vol_current / vol_ma20 if vol_ma20 > 0 else 1
         
@@ -336,9 +314,9 @@ class ProfitMaximizer(TradingStrategy):
         price_change_7d = (df['close'].iloc[-1] - df['close'].iloc[-8]) / df['close'].iloc[-8] * 100 if len(df) >= 8 else 0
         
         # 7. 추세 강도 (ADX 대용: 이동평균 기울기)
-        ma5 = df['close'].rolling(5).mean()
-        ma20 = df['close'].rolling(20).mean()
-        trend_strength = (ma5.iloc[-1] - ma5.iloc[-3]) / ma5.iloc[-3] * 100 if ma5.iloc[-3] > 0 else 0
+        ma5 = ta.sma(df['close'], 5)
+        ma20 = ta.sma(df['close'], 20)
+        trend_strength = (ma5[-1] - ma5[-3]) / ma5[-3] * 100 if ma5[-3] > 0 else 0
         
         return {
             'current_price': current_price,
@@ -358,8 +336,8 @@ class ProfitMaximizer(TradingStrategy):
             'price_change_3d': price_change_3d,
             'price_change_7d': price_change_7d,
             'trend_strength': trend_strength,
-            'ma5': ma5.iloc[-1],
-            'ma20': ma20.iloc[-1]
+            'ma5': ma5[-1],
+            'ma20': ma20[-1]
         }
     
     def calculate_buy_score(self, analysis: Dict) -> Tuple[int, List[str]]:
@@ -507,9 +485,9 @@ class ProfitMaximizer(TradingStrategy):
             
         return min(100, max(0, score)), reasons
     
-    def should_buy(self) -> Tuple[bool, str]:
+    def should_buy(self, df: Optional[pd.DataFrame] = None) -> Tuple[bool, str]:
         """매수 신호 확인"""
-        analysis = self.analyze()
+        analysis = self.analyze(df)
         if analysis is None:
             return False, "분석 데이터 부족"
         
@@ -521,9 +499,9 @@ class ProfitMaximizer(TradingStrategy):
             return True, f"🚀 수익률 최대화 매수! {reason_str}"
         return False, reason_str
     
-    def should_sell(self, entry_price: float = None) -> Tuple[bool, str]:
+    def should_sell(self, entry_price: float = None, df: Optional[pd.DataFrame] = None) -> Tuple[bool, str]:
         """매도 신호 확인"""
-        analysis = self.analyze()
+        analysis = self.analyze(df)
         if analysis is None:
             return False, "분석 데이터 부족"
         
@@ -535,9 +513,9 @@ class ProfitMaximizer(TradingStrategy):
             return True, f"🔔 수익률 최대화 매도! {reason_str}"
         return False, reason_str
     
-    def get_analysis_summary(self) -> Dict[str, Any]:
+    def get_analysis_summary(self, df: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
         """분석 요약 반환 (UI용)"""
-        analysis = self.analyze()
+        analysis = self.analyze(df)
         if analysis is None:
             return None
         
@@ -0,0 +1,435 @@
+"""
+스트리밍 지표 모듈 (캔들/체결마다 O(1) 갱신)
+- 확정 캔들은 update(), 아직 진행 중인 캔들은 peek()으로 상태를 바꾸지 않고 잠정값 계산
+- 이동평균/표준편차: 고정 길이 링 버퍼 + 누적합 (한 바퀴마다 다시 합산해 누적 오차 제거)
+- 이동 최고/최저: 단조 덱 (Williams %R, N일 고가)
+- EMA/MACD: adjust=False 재귀식 - indicators.ema와 같은 값
+- RSI: 기본은 indicators.rsi와 같은 단순 이동평균 방식, method="wilder"면 와일더 평활
+- CandleIndicators: 종목 하나의 캔들 흐름(시드 → 체결가 → 다음 캔들)을 묶어 관리
+"""
+import math
+from collections import deque
+from typing import Optional, Dict, Any, Deque, Tuple
+
+import pandas as pd
+
+from candle_cache import INTERVAL_SECONDS
+from candle_store import index_to_ts
+
+
+class StreamingSMA:
+    """단순 이동평균"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self._buffer = [0.0] * period
+        self._index = 0
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self.period if self.ready else None
+
+    def _outgoing(self) -> float:
+        return self._buffer[self._index] if self.ready else 0.0
+
+    def update(self, x: float) -> Optional[float]:
+        """확정값 추가"""
+        self._sum += x - self._outgoing()
+        self._buffer[self._index] = x
+        self._index = (self._index + 1) % self.period
+        self._count += 1
+        if self._index == 0:
+            self._sum = math.fsum(self._buffer)
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        """x가 다음 값이라면의 잠정값 (상태 변경 없음)"""
+        if self._count + 1 < self.period:
+            return None
+        return (self._sum + x - self._outgoing()) / self.period
+
+
+class StreamingStd:
+    """이동 평균/표본 표준편차 (창 단위 Welford 갱신)"""
+
+    def __init__(self, period: int, ddof: int = 1):
+        self.period = period
+        self.ddof = ddof
+        self._buffer = [0.0] * period
+        self._index = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        # 같은 값이 이어진 길이 - 창 전체가 같으면 누적 오차 없이 0
+        self._last: Optional[float] = None
+        self._run = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._mean if self.ready else None
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._std(self._m2, self._run) if self.ready else None
+
+    def _std(self, m2: float, run: int) -> float:
+        if run >= self.period:
+            return 0.0
+        return math.sqrt(max(m2, 0.0) / (self.period - self.ddof))
+
+    def _next_run(self, x: float) -> int:
+        return self._run + 1 if x == self._last else 1
+
+    def _step(self, x: float) -> Tuple[float, float]:
+        """x를 넣었을 때의 (평균, 제곱편차합)"""
+        if not self.ready:
+            n = self._count + 1
+            delta = x - self._mean
+            mean = self._mean + delta / n
+            return mean, self._m2 + delta * (x - mean)
+        old = self._buffer[self._index]
+        delta = x - old
+        mean = self._mean + delta / self.period
+        return mean, self._m2 + delta * (x - mean + old - self._mean)
+
+    def update(self, x: float) -> Optional[float]:
+        """확정값 추가"""
+        self._mean, self._m2 = self._step(x)
+        self._run = self._next_run(x)
+        self._last = x
+        self._buffer[self._index] = x
+        self._index = (self._index + 1) % self.period
+        self._count += 1
+        if self._index == 0:
+            self._mean = math.fsum(self._buffer) / self.period
+            self._m2 = math.fsum((v - self._mean) ** 2 for v in self._buffer)
+        return self.value
+
+    def peek(self, x: float) -> Tuple[Optional[float], Optional[float]]:
+        """x가 다음 값이라면의 (평균, 표준편차)"""
+        if self._count + 1 < self.period:
+            return None, None
+        mean, m2 = self._step(x)
+        return mean, self._std(m2, self._next_run(x))
+
+
+class RollingExtreme:
+    """이동 최고값/최저값 (단조 덱)"""
+
+    def __init__(self, period: int, mode: str = "max"):
+        if mode not in ("max", "min"):
+            raise ValueError(f"알 수 없는 mode: {mode}")
+        self.period = period
+        self.mode = mode
+        self._deque: Deque[Tuple[int, float]] = deque()
+        self._count = 0
+
+    def _better(self, a: float, b: float) -> bool:
+        return a >= b if self.mode == "max" else a <= b
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.period
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._deque[0][1] if self.ready else None
+
+    def update(self, x: float) -> Optional[float]:
+        """확정값 추가"""
+        while self._deque and self._better(x, self._deque[-1][1]):
+            self._deque.pop()
+        self._deque.append((self._count, x))
+        self._count += 1
+        if self._deque[0][0] <= self._count - 1 - self.period:
+            self._deque.popleft()
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        """x가 다음 값이라면의 잠정값"""
+        if self._count + 1 < self.period:
+            return None
+        # 다음 창에서 빠질 원소를 건너뛴 현재 최선값
+        oldest = self._count + 1 - self.period
+        for index, value in self._deque:
+            if index >= oldest:
+                return value if self._better(value, x) else x
+        return x
+
+
+class StreamingEMA:
+    """지수 이동평균 (adjust=False)"""
+
+    def __init__(self, span: float):
+        self.alpha = 2.0 / (span + 1.0)
+        self._value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+    def peek(self, x: float) -> float:
+        if self._value is None:
+            return x
+        return self._value + self.alpha * (x - self._value)
+
+    def update(self, x: float) -> float:
+        self._value = self.peek(x)
+        return self._value
+
+
+class StreamingMACD:
+    """MACD (MACD선, 시그널선, 히스토그램)"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = StreamingEMA(fast)
+        self._slow = StreamingEMA(slow)
+        self._signal = StreamingEMA(signal)
+
+    @property
+    def value(self) -> Optional[Tuple[float, float, float]]:
+        if not self._signal.ready:
+            return None
+        line = self._fast.value - self._slow.value
+        return line, self._signal.value, line - self._signal.value
+
+    def update(self, x: float) -> Tuple[float, float, float]:
+        line = self._fast.update(x) - self._slow.update(x)
+        signal = self._signal.update(line)
+        return line, signal, line - signal
+
+    def peek(self, x: float) -> Tuple[float, float, float]:
+        line = self._fast.peek(x) - self._slow.peek(x)
+        signal = self._signal.peek(line)
+        return line, signal, line - signal
+
+
+class StreamingRSI:
+    """RSI - method="sma"(indicators.rsi와 동일) 또는 "wilder"(와일더 평활)"""
+
+    def __init__(self, period: int = 14, method: str = "sma"):
+        if method not in ("sma", "wilder"):
+            raise ValueError(f"알 수 없는 RSI 방식: {method}")
+        self.period = period
+        self.method = method
+        self._prev: Optional[float] = None
+        self._gain = StreamingSMA(period)
+        self._loss = StreamingSMA(period)
+        # 와일더: 첫 period개 diff의 단순 평균으로 시작해 (이전*(p-1)+현재)/p
+        self._seed = [0.0, 0.0, 0]
+        self._avg: Optional[Tuple[float, float]] = None
+
+    @staticmethod
+    def _rsi(gain: Optional[float], loss: Optional[float]) -> Optional[float]:
+        if gain is None or loss is None:
+            return None
+        if loss == 0:
+            return None if gain == 0 else 100.0
+        return 100 - 100 / (1 + gain / loss)
+
+    def _split(self, x: float) -> Tuple[float, float]:
+        # 첫 값은 diff가 NaN -> 상승/하락 0 (pandas 구현과 동일)
+        delta = 0.0 if self._prev is None else x - self._prev
+        return max(delta, 0.0), max(-delta, 0.0)
+
+    def _wilder(self, gain: float, loss: float) -> Tuple[list, Optional[Tuple[float, float]]]:
+        """다음 (시드 누적, 평균) - 상태 변경 없음"""
+        if self._prev is None:
+            return self._seed, None
+        if self._avg is not None:
+            p = self.period
+            return self._seed, ((self._avg[0] * (p - 1) + gain) / p, (self._avg[1] * (p - 1) + loss) / p)
+        seed = [self._seed[0] + gain, self._seed[1] + loss, self._seed[2] + 1]
+        if seed[2] < self.period:
+            return seed, None
+        return seed, (seed[0] / self.period, seed[1] / self.period)
+
+    @property
+    def value(self) -> Optional[float]:
+        if self.method == "wilder":
+            return self._rsi(*(self._avg or (None, None)))
+        return self._rsi(self._gain.value, self._loss.value)
+
+    def update(self, x: float) -> Optional[float]:
+        """확정 종가 추가"""
+        gain, loss = self._split(x)
+        if self.method == "wilder":
+            self._seed, self._avg = self._wilder(gain, loss)
+        else:
+            self._gain.update(gain)
+            self._loss.update(loss)
+        self._prev = x
+        return self.value
+
+    def peek(self, x: float) -> Optional[float]:
+        """진행 중 캔들의 현재가로 잠정 RSI"""
+        gain, loss = self._split(x)
+        if self.method == "wilder":
+            return self._rsi(*(self._wilder(gain, loss)[1] or (None, None)))
+        return self._rsi(self._gain.peek(gain), self._loss.peek(loss))
+
+
+class StreamingBollinger:
+    """볼린저 밴드 (상단, 중간, 하단)"""
+
+    def __init__(self, period: int = 20, num_std: float = 2):
+        self.num_std = num_std
+        self._std = StreamingStd(period)
+
+    def _bands(self, mean: Optional[float], std: Optional[float]) -> Optional[Tuple[float, float, float]]:
+        if mean is None:
+            return None
+        return mean + std * self.num_std, mean, mean - std * self.num_std
+
+    @property
+    def value(self) -> Optional[Tuple[float, float, float]]:
+        return self._bands(self._std.mean, self._std.value)
+
+    def update(self, x: float) -> Optional[Tuple[float, float, float]]:
+        self._std.update(x)
+        return self.value
+
+    def peek(self, x: float) -> Optional[Tuple[float, float, float]]:
+        return self._bands(*self._std.peek(x))
+
+
+class StreamingWilliamsR:
+    """Williams %R (-100 ~ 0)"""
+
+    def __init__(self, period: int = 14):
+        self._high = RollingExtreme(period, "max")
+        self._low = RollingExtreme(period, "min")
+        self._value: Optional[float] = None
+
+    @staticmethod
+    def _wr(high: Optional[float], low: Optional[float], close: float) -> Optional[float]:
+        if high is None or low is None or high == low:
+            return None
+        return (high - close) / (high - low) * -100
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._value
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        self._value = self._wr(self._high.update(high), self._low.update(low), close)
+        return self._value
+
+    def peek(self, high: float, low: float, close: float) -> Optional[float]:
+        return self._wr(self._high.peek(high), self._low.peek(low), close)
+
+
+class CandleIndicators:
+    """종목 하나의 캔들 흐름에 대한 지표 묶음
+
+    - seed(df): 조회한 캔들로 초기화 (마지막 행은 진행 중 캔들)
+    - on_price(price, at): 체결가 반영 - 같은 캔들이면 잠정값만 갱신, 다음 캔들이면 이전 캔들 잠정 확정
+    - 캔들 경계를 넘으면 stale=True -> 호출 측이 거래소 캔들로 다시 seed
+      (조회 시점 가격으로 만든 캔들은 실제 시가/고가/저가/종가와 달라 누적되면 지표가 어긋남)
+    """
+
+    def __init__(self, interval: str = "minute5", rsi_period: int = 14,
+                 bb_period: int = 20, wr_period: int = 14, high_period: int = 20):
+        self.step = INTERVAL_SECONDS.get(interval)
+        if self.step is None:
+            raise ValueError(f"지원하지 않는 간격: {interval}")
+        self.interval = interval
+        self._periods = (rsi_period, bb_period, wr_period, high_period)
+        self._reset()
+
+    def _reset(self):
+        rsi_period, bb_period, wr_period, high_period = self._periods
+        self.rsi = StreamingRSI(rsi_period)
+        self.macd = StreamingMACD()
+        self.bollinger = StreamingBollinger(bb_period)
+        self.williams_r = StreamingWilliamsR(wr_period)
+        self.recent_high = RollingExtreme(high_period, "max")
+        self.bar_ts: Optional[int] = None
+        self.bar: Optional[Dict[str, float]] = None
+        self.stale = True
+
+    @staticmethod
+    def _epoch(at) -> int:
+        """시각 -> KST 기준 epoch 초 (캔들 인덱스와 같은 기준)"""
+        at = pd.Timestamp(at)
+        if at.tzinfo is not None:
+            at = at.tz_convert("Asia/Seoul").tz_localize(None)
+        return int(index_to_ts([at])[0])
+
+    def _commit(self):
+        """진행 중이던 캔들 확정"""
+        bar = self.bar
+        self.rsi.update(bar["close"])
+        self.macd.update(bar["close"])
+        self.bollinger.update(bar["close"])
+        self.williams_r.update(bar["high"], bar["low"], bar["close"])
+        self.recent_high.update(bar["high"])
+
+    def seed(self, df: pd.DataFrame):
+        """캔들 DataFrame(pyupbit 형식, KST 인덱스)으로 상태 초기화"""
+        self._reset()
+        if df is None or len(df) == 0:
+            return
+        rows = df[["high", "low", "close"]].to_numpy(dtype=float)
+        for high, low, close in rows[:-1]:
+            self.bar = {"high": high, "low": low, "close": close}
+            self._commit()
+        high, low, close = rows[-1]
+        self.bar = {"high": high, "low": low, "close": close}
+        self.bar_ts = self._epoch(df.index[-1])
+        self.stale = False
+
+    def on_price(self, price: float, at=None) -> Dict[str, Any]:
+        """체결가 반영 후 잠정 지표 반환 (at 없으면 현재 시각)"""
+        if self.bar is None:
+            self.stale = True
+            return {}
+        now = self._epoch(pd.Timestamp.now(tz="Asia/Seoul") if at is None else at)
+        # 시드한 캔들 시각 기준으로 경계 계산 (일봉 09:00 시작도 그대로 맞음)
+        bucket = self.bar_ts + (now - self.bar_ts) // self.step * self.step
+        if bucket > self.bar_ts:
+            # 직전 캔들은 조회한 가격으로만 만든 잠정값 -> 재시드 전까지만 사용
+            # (중간 캔들을 놓친 경우도 이어 붙이지 않고 재시드)
+            self.stale = True
+            self._commit()
+            self.bar_ts = bucket
+            self.bar = {"high": price, "low": price, "close": price}
+        elif bucket == self.bar_ts:
+            self.bar["high"] = max(self.bar["high"], price)
+            self.bar["low"] = min(self.bar["low"], price)
+            self.bar["close"] = price
+        return self.snapshot()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """진행 중 캔들까지 반영한 잠정 지표"""
+        if self.bar is None:
+            return {}
+        close = self.bar["close"]
+        bands = self.bollinger.peek(close)
+        macd = self.macd.peek(close)
+        return {
+            "close": close,
+            "rsi": self.rsi.peek(close),
+            "macd": macd[0],
+            "macd_signal": macd[1],
+            "macd_hist": macd[2],
+            "bb_upper": bands[0] if bands else None,
+            "bb_middle": bands[1] if bands else None,
+            "bb_lower": bands[2] if bands else None,
+            "williams_r": self.williams_r.peek(self.bar["high"], self.bar["low"], close),
+            "recent_high": self.recent_high.peek(self.bar["high"]),
+        }
@@ -0,0 +1,8 @@
+"""
+테스트 공용 설정
+- backend 디렉터리를 import 경로에 추가 (모듈이 패키지가 아니라 최상위 모듈로 import 됨)
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,223 @@
+"""
+주문 실행 라우터 테스트
+- 실제 주문 대신 스텁 파이프라인으로 체결 결과를 지정
+- 라우터 상태는 봇 런타임 루프에서만 바뀌므로 모든 코루틴은 봇 루프에서 실행
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bot_runtime import bot_runtime
+from execution_router import ExecutionRouter, Holding, OrderIntent
+from order_pipeline import OrderFill
+
+
+class StubPipeline:
+    """order_pipeline 대역 - 지정 가격에 체결 (sell_ratio < 1 이면 부분 체결 후 시간 초과)"""
+
+    def __init__(self, price: float = 1000.0):
+        self.price = price
+        self.sell_ratio = 1.0
+        self.gate: asyncio.Event = None
+        self.orders = []
+        self.accounts = []
+        self.client = SimpleNamespace(_access_key="", _secret_key="")
+        self.aio = SimpleNamespace(set_keys=lambda *_: None, get_accounts=self._get_accounts)
+
+    async def _get_accounts(self):
+        return self.accounts
+
+    async def _wait(self):
+        if self.gate is not None:
+            await self.gate.wait()
+
+    async def buy_market(self, ticker: str, amount: float) -> OrderFill:
+        self.orders.append(("bid", ticker, amount))
+        await self._wait()
+        return OrderFill(ticker=ticker, side="bid", ord_type="price", uuid="bid", state="cancel",
+                         executed_volume=amount / self.price, avg_price=self.price, funds=amount)
+
+    async def sell_market(self, ticker: str, volume: float) -> OrderFill:
+        self.orders.append(("ask", ticker, volume))
+        await self._wait()
+        sold = volume * self.sell_ratio
+        return OrderFill(ticker=ticker, side="ask", ord_type="market", uuid="ask",
+                         state="done" if self.sell_ratio >= 1 else "wait",
+                         executed_volume=sold, avg_price=self.price, funds=sold * self.price)
+
+    def get_stats(self):
+        return {}
+
+
+def run(coro):
+    """봇 런타임 루프에서 실행 후 결과 반환"""
+    return bot_runtime.submit(coro).result(timeout=5)
+
+
+@pytest.fixture
+def pipeline():
+    return StubPipeline()
+
+
+@pytest.fixture
+def router(pipeline):
+    return ExecutionRouter(pipeline=pipeline, dedupe_window=60, max_positions=0,
+                           max_exposure=0, reconcile_interval=0)
+
+
+async def gated(router, pipeline, intents):
+    """모든 주문이 한도 검사를 마친 뒤 한꺼번에 체결"""
+    pipeline.gate = asyncio.Event()
+    tasks = [asyncio.ensure_future(router.submit(intent)) for intent in intents]
+    await asyncio.sleep(0.05)
+    pipeline.gate.set()
+    return await asyncio.gather(*tasks)
+
+
+# ========== 한도 ==========
+
+def test_concurrent_buys_respect_max_positions(router, pipeline):
+    router.max_positions = 2
+    intents = [OrderIntent("bot", f"KRW-C{i}", "bid", amount=10000) for i in range(4)]
+    fills = run(gated(router, pipeline, intents))
+
+    assert sum(f.filled for f in fills) == 2
+    assert [f.reject_reason for f in fills if not f.filled] == ["max_positions", "max_positions"]
+    assert len(pipeline.orders) == 2
+    assert len(router._holdings) == 2 and not router._reserved
+
+
+def test_concurrent_buys_respect_max_exposure(router, pipeline):
+    router.max_exposure = 25000
+    intents = [OrderIntent("bot", f"KRW-C{i}", "bid", amount=10000) for i in range(3)]
+    fills = run(gated(router, pipeline, intents))
+
+    assert sum(f.filled for f in fills) == 2
+    assert [f.reject_reason for f in fills if not f.filled] == ["max_exposure"]
+    assert router.exposure() == pytest.approx(20000)
+
+
+def test_invalid_orders_are_rejected(router, pipeline):
+    assert run(router.buy("bot", "KRW-A", 1000)).reject_reason == "invalid"
+    assert run(router.sell("bot", "KRW-A", 0)).reject_reason == "invalid"
+    assert pipeline.orders == []
+
+
+# ========== 중복 차단 ==========
+
+def test_identical_inflight_intents_share_one_order(router, pipeline):
+    intents = [OrderIntent("bot", "KRW-A", "bid", amount=10000) for _ in range(3)]
+    fills = run(gated(router, pipeline, intents))
+
+    assert len(pipeline.orders) == 1
+    assert fills[0] is fills[1] is fills[2]
+    assert router.deduped == 2
+
+
+def test_recent_fill_rejects_only_identical_intent(router, pipeline):
+    assert run(router.buy("bot", "KRW-A", 10000)).filled
+
+    again = run(router.buy("bot", "KRW-A", 10000))
+    assert again.state == "rejected" and again.reject_reason == "duplicate"
+    # 금액이 다르거나 호출자 지정 ID가 다르면 다른 의도
+    assert run(router.buy("bot", "KRW-A", 20000)).filled
+    assert run(router.buy("bot", "KRW-A", 10000, intent_id="retry-1")).filled
+
+
+def test_remainder_sell_and_rebuy_are_not_duplicates(router, pipeline):
+    assert run(router.buy("bot", "KRW-A", 10000)).filled
+    pipeline.sell_ratio = 0.5
+    assert run(router.sell("bot", "KRW-A", 10)).executed_volume == pytest.approx(5)
+    # 부분 체결 후 잔여 수량 매도
+    pipeline.sell_ratio = 1.0
+    assert run(router.sell("bot", "KRW-A", 5)).filled
+    # 매도 직후 같은 금액으로 재매수
+    assert run(router.buy("bot", "KRW-A", 10000)).filled
+
+
+# ========== 소유권 ==========
+
+def test_other_owner_is_rejected_unless_forced(router, pipeline):
+    assert run(router.buy("bot_a", "KRW-A", 10000)).filled
+
+    assert run(router.sell("bot_b", "KRW-A", 10)).reject_reason == "owned"
+    assert run(router.buy("bot_b", "KRW-A", 10000)).reject_reason == "owned"
+    assert run(router.sell("manual", "KRW-A", 10, force=True)).filled
+    assert router.owner_of("KRW-A") is None
+
+
+def test_claim_and_release(router):
+    assert router.claim("bot_a", "KRW-A", 10, 10000)
+    assert router.claim("bot_a", "KRW-A")
+    assert not router.claim("bot_b", "KRW-A")
+    assert not router.release("bot_b", "KRW-A")
+    assert router.release("bot_a", "KRW-A")
+    assert router.owner_of("KRW-A") is None
+
+
+# ========== 체결 반영 ==========
+
+def test_partial_sell_scales_cost_and_keeps_remainder(router, pipeline):
+    run(router.buy("bot", "KRW-A", 20000))
+    holding = router._holdings["KRW-A"]
+    assert holding.volume == pytest.approx(20) and holding.cost == pytest.approx(20000)
+
+    pipeline.sell_ratio = 0.25
+    fill = run(router.sell("bot", "KRW-A", 20))
+    assert fill.state == "wait" and fill.executed_volume == pytest.approx(5)
+    assert holding.volume == pytest.approx(15)
+    assert holding.cost == pytest.approx(15000)
+    assert router.owner_of("KRW-A") == "bot"
+
+
+def test_sell_leaving_dust_releases_holding(router, pipeline):
+    run(router.buy("bot", "KRW-A", 20000))
+    pipeline.sell_ratio = 0.9
+    run(router.sell("bot", "KRW-A", 20))
+    # 잔여 2개 x 1000원 < 최소 주문 금액
+    assert router.owner_of("KRW-A") is None
+
+
+# ========== 계좌 대조 ==========
+
+def account(currency: str, balance: float, avg_buy_price: float, locked: float = 0.0):
+    return {"currency": currency, "unit_currency": "KRW", "balance": str(balance),
+            "locked": str(locked), "avg_buy_price": str(avg_buy_price)}
+
+
+def test_reconcile_drops_sold_and_rescales_changed(router, pipeline):
+    router._holdings["KRW-A"] = Holding("bot_a", volume=20, cost=20000)
+    router._holdings["KRW-B"] = Holding("bot_b", volume=10, cost=10000)
+    router._holdings["KRW-C"] = Holding("bot_c", volume=10, cost=10000)
+    pipeline.accounts = [
+        account("KRW", 100000, 0),
+        account("A", 8, 1000, locked=2),    # 일부 매도 (주문 중 수량 포함)
+        account("C", 1, 1000),              # 최소 주문 금액 미만
+    ]
+
+    assert run(router.reconcile()) == 2
+    assert set(router._holdings) == {"KRW-A"}
+    assert router._holdings["KRW-A"].volume == pytest.approx(10)
+    assert router._holdings["KRW-A"].cost == pytest.approx(10000)
+
+
+def test_reconcile_keeps_holdings_on_empty_accounts(router, pipeline):
+    router._holdings["KRW-A"] = Holding("bot", volume=10, cost=10000)
+    pipeline.accounts = []
+
+    assert run(router.reconcile()) == 0
+    assert "KRW-A" in router._holdings
+
+
+def test_reconcile_skips_markets_with_orders_in_progress(router, pipeline):
+    router._holdings["KRW-A"] = Holding("bot", volume=10, cost=10000)
+    pipeline.accounts = [account("KRW", 100000, 0)]
+
+    async def with_lock_held():
+        lock = router._locks["KRW-A"] = asyncio.Lock()
+        async with lock:
+            return await router.reconcile()
+
+    assert run(with_lock_held()) == 0
+    assert "KRW-A" in router._holdings
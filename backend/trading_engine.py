@@ -7,10 +7,11 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from enum import Enum
-import threading
 import time
 
 from upbit_client import upbit_client
+from bot_runtime import bot_runtime
+from execution_router import execution_router, to_order_result, OWNER_MANUAL
 from strategies import (
     VolatilityBreakout, 
     MovingAverageCross, 
@@ -19,6 +20,7 @@ from strategies import (
 )
 from config import DEFAULT_TRADE_AMOUNT, MAX_COINS
 from coin_scanner import coin_scanner
+from scan_service import scan_service
 
 
 from database import db
@@ -63,6 +65,8 @@ class BotStatus:
 class TradingEngine:
     """자동매매 엔진"""
     
+    ORDER_OWNER = "trading_engine"  # 실행 라우터 종목 소유자
+    
     def __init__(self):
         self.client = upbit_client
         self.is_running = False
@@ -71,8 +75,6 @@ class TradingEngine:
         self.trade_amount = DEFAULT_TRADE_AMOUNT
         self.trade_logs: List[TradeLog] = []
         self.positions: Dict[str, Dict[str, Any]] = {}  # 보유 포지션
-        self._thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
         self.check_interval = 60  # 체크 주기 (초)
         self.last_check: Optional[str] = None
         self.callbacks: List[callable] = []  # WebSocket 콜백
@@ -82,6 +84,7 @@ class TradingEngine:
         self.min_volume = 1_000_000_000  # 최소 거래대금 10억
         self.min_score = 65  # 최소 점수
         self.scan_interval = 300  # 스캔 주기 (초, 5분)
+        self._scan_subscription = None  # 공유 스캔 서비스 구독 (실행 중에만)
         
     def add_callback(self, callback: callable):
         """콜백 추가"""
@@ -158,9 +161,7 @@ class TradingEngine:
             return {"status": "already_running"}
             
         self.is_running = True
-        self._stop_event.clear()
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
+        bot_runtime.start_bot("trading_engine", self._run)
         
         return {"status": "started", "config": asdict(self.get_status())}
     
@@ -170,28 +171,30 @@ class TradingEngine:
             return {"status": "not_running"}
             
         self.is_running = False
-        self._stop_event.set()
+        bot_runtime.stop_bot("trading_engine")
         
-        if self._thread:
-            self._thread.join(timeout=5)
-            self._thread = None
+        # 공유 스캔 구독 해제
+        if self._scan_subscription is not None:
+            self._scan_subscription.close()
+            self._scan_subscription = None
             
         return {"status": "stopped"}
     
-    def _run_loop(self):
-        """메인 루프"""
+    async def _run(self):
+        """메인 루프 (봇 런타임 태스크 - 중지 시 취소됨)"""
         print(f"[{datetime.now()}] 자동매매 시작 - 전략: {self.strategy_type.value}")
         
-        while not self._stop_event.is_set():
-            try:
-                self._check_and_trade()
-                self.last_check = datetime.now().isoformat()
-            except Exception as e:
-                print(f"[{datetime.now()}] 체크 오류: {e}")
-                
-            self._stop_event.wait(self.check_interval)
-            
-        print(f"[{datetime.now()}] 자동매매 종료")
+        try:
+            while self.is_running:
+                try:
+                    await asyncio.to_thread(self._check_and_trade)
+                    self.last_check = datetime.now().isoformat()
+                except Exception as e:
+                    print(f"[{datetime.now()}] 체크 오류: {e}")
+                    
+                await asyncio.sleep(self.check_interval)
+        finally:
+            print(f"[{datetime.now()}] 자동매매 종료")
     
     def _check_and_trade(self):
         """시그널 체크 및 거래 실행"""
@@ -227,8 +230,11 @@ class TradingEngine:
         """전체 코인 스캔 및 자동 거래"""
         print(f"[{datetime.now()}] 전체 코인 스캔 모드 실행...")
         
-        # 전체 코인 스캔
-        results = coin_scanner.scan_all_coins(min_volume=self.min_volume)
+        # 전체 코인 스캔 (공유 스캔 서비스 결과 - 다른 봇과 같은 스캔 사용)
+        if self._scan_subscription is None or not self._scan_subscription.active:
+            self._scan_subscription = scan_service.subscribe("trading_engine", "coins", min_volume=self.min_volume)
+        self._scan_subscription.update(min_volume=self.min_volume)
+        results = self._scan_subscription.get(max_age=self.check_interval)
         
         # 보유 코인 매도 체크
         balances = self.client.get_balances()
@@ -247,7 +253,8 @@ class TradingEngine:
                         self._execute_sell(ticker, balance, reason)
         
         # 매수 후보 선정
-        buy_candidates = coin_scanner.get_buy_candidates(self.min_score)
+        buy_candidates = [c for c in results
+                          if c.score >= self.min_score and c.recommendation in ['buy', 'strong_buy']]
         
         if buy_candidates:
             # 현재 보유 코인 수 확인
@@ -291,18 +298,18 @@ class TradingEngine:
             print(f"[{datetime.now()}] KRW 잔고 부족: {krw_balance:,.0f}")
             return
             
-        # 매수 실행
-        current_price = self.client.get_current_price(ticker)
-        result = self.client.buy_market_order(ticker, self.trade_amount)
+        # 매수 실행 (실행 라우터 경유 - 다른 봇 보유 종목/한도 초과 시 거부)
+        fill = execution_router.run(execution_router.buy(self.ORDER_OWNER, ticker, self.trade_amount))
+        result = to_order_result(fill)
         
-        success = 'error' not in result
+        success = fill.filled
         log = TradeLog(
             timestamp=datetime.now().isoformat(),
             ticker=ticker,
             side="buy",
-            price=current_price or 0,
-            volume=self.trade_amount / (current_price or 1),
-            amount=self.trade_amount,
+            price=fill.avg_price,
+            volume=fill.executed_volume,
+            amount=fill.net_krw if success else self.trade_amount,
             strategy=self.strategy_type.value,
             reason=reason,
             success=success,
@@ -318,17 +325,17 @@ class TradingEngine:
     
     def _execute_sell(self, ticker: str, volume: float, reason: str):
         """매도 실행"""
-        current_price = self.client.get_current_price(ticker)
-        result = self.client.sell_market_order(ticker, volume)
+        fill = execution_router.run(execution_router.sell(self.ORDER_OWNER, ticker, volume))
+        result = to_order_result(fill)
         
-        success = 'error' not in result
+        success = fill.filled
         log = TradeLog(
             timestamp=datetime.now().isoformat(),
             ticker=ticker,
             side="sell",
-            price=current_price or 0,
-            volume=volume,
-            amount=volume * (current_price or 0),
+            price=fill.avg_price,
+            volume=fill.executed_volume if success else volume,
+            amount=fill.net_krw,
             strategy=self.strategy_type.value,
             reason=reason,
             success=success,
@@ -342,20 +349,20 @@ class TradingEngine:
         else:
             print(f"[{datetime.now()}] 매도 실패: {ticker} - {result.get('error')}")
     
-    def manual_buy(self, ticker: str, amount: int = None) -> Dict[str, Any]:
+    async def manual_buy(self, ticker: str, amount: int = None) -> Dict[str, Any]:
         """수동 매수"""
         amount = amount or self.trade_amount
-        current_price = self.client.get_current_price(ticker)
-        result = self.client.buy_market_order(ticker, amount)
+        fill = await execution_router.buy(OWNER_MANUAL, ticker, amount, force=True)
+        result = to_order_result(fill)
         
-        success = 'error' not in result
+        success = fill.filled
         log = TradeLog(
             timestamp=datetime.now().isoformat(),
             ticker=ticker,
             side="buy",
-            price=current_price or 0,
-            volume=amount / (current_price or 1),
-            amount=amount,
+            price=fill.avg_price,
+            volume=fill.executed_volume,
+            amount=fill.net_krw if success else amount,
             strategy="manual",
             reason="수동 매수",
             success=success,
@@ -369,26 +376,26 @@ class TradingEngine:
             "log": asdict(log)
         }
     
-    def manual_sell(self, ticker: str, volume: float = None) -> Dict[str, Any]:
-        """수동 매도"""
+    async def manual_sell(self, ticker: str, volume: float = None) -> Dict[str, Any]:
+        """수동 매도 (다른 봇 보유 종목도 매도)"""
         coin = ticker.replace("KRW-", "")
         if volume is None:
-            volume = self.client.get_balance(coin)
+            volume = await asyncio.to_thread(self.client.get_balance, coin)
             
         if volume <= 0:
             return {"success": False, "error": "보유량 없음"}
             
-        current_price = self.client.get_current_price(ticker)
-        result = self.client.sell_market_order(ticker, volume)
+        fill = await execution_router.sell(OWNER_MANUAL, ticker, volume, force=True)
+        result = to_order_result(fill)
         
-        success = 'error' not in result
+        success = fill.filled
         log = TradeLog(
             timestamp=datetime.now().isoformat(),
             ticker=ticker,
             side="sell",
-            price=current_price or 0,
-            volume=volume,
-            amount=volume * (current_price or 0),
+            price=fill.avg_price,
+            volume=fill.executed_volume if success else volume,
+            amount=fill.net_krw,
             strategy="manual",
             reason="수동 매도",
             success=success,
@@ -0,0 +1,367 @@
+"""
+외부 트래픽 녹화/재생 모듈
+- 녹화: 업비트 REST/WebSocket, OpenRouter 요청을 실제 서버로 중계하면서 요청/응답/시각을 파일에 기록
+- 재생: 녹화 파일의 응답을 로컬 서버에서 결정적으로 돌려줌 (배속 지정 가능, 네트워크 불필요)
+- 클라이언트는 환경변수로 접속 주소만 바꾸면 됨 (UPBIT_API_URL, UPBIT_WS_URL, OPENROUTER_BASE_URL)
+- 인증 헤더는 기록하지 않음 (응답 본문은 그대로 기록되므로 계좌 조회 결과 취급 주의)
+
+사용 예:
+    python traffic_replay.py record capture.jsonl.gz --port 8765
+    python traffic_replay.py replay capture.jsonl.gz --port 8765 --speed 10
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+
+import aiohttp
+from aiohttp import web
+from yarl import URL
+
+
+# 서비스별 실제 서버 주소 (접두 경로 -> 원본 주소)
+UPSTREAMS = {
+    "upbit": "https://api.upbit.com",
+    "openrouter": "https://openrouter.ai",
+}
+UPBIT_WS_UPSTREAM = "wss://api.upbit.com/websocket/v1"
+
+# 응답에서 보존할 헤더 (요청 제한 스케줄러가 사용)
+KEPT_RESPONSE_HEADERS = ("Content-Type", "Remaining-Req")
+# 중계 시 넘기지 않는 요청 헤더
+DROPPED_REQUEST_HEADERS = {"host", "content-length", "accept-encoding", "connection", "transfer-encoding"}
+
+
+def request_signature(service: str, method: str, path: str, query: List[Tuple[str, str]],
+                      body: bytes) -> str:
+    """요청 식별 키 (쿼리 순서 무관, 본문은 해시)"""
+    normalized = "&".join(f"{k}={v}" for k, v in sorted(query))
+    # 업비트 주문 본문 등은 nonce 가 헤더에만 있으므로 본문 해시로 충분
+    digest = hashlib.sha1(body).hexdigest()[:16] if body else ""
+    return f"{service} {method.upper()} {path}?{normalized} #{digest}"
+
+
+def env_for(port: int, host: str = "127.0.0.1") -> Dict[str, str]:
+    """녹화/재생 서버를 사용하도록 클라이언트에 지정할 환경변수"""
+    base = f"http://{host}:{port}"
+    return {
+        "UPBIT_API_URL": f"{base}/upbit",
+        "UPBIT_WS_URL": f"ws://{host}:{port}/upbit/websocket/v1",
+        "OPENROUTER_BASE_URL": f"{base}/openrouter/api/v1",
+    }
+
+
+def load_records(path: str) -> List[Dict[str, Any]]:
+    """녹화 파일 읽기 (.gz 이면 gzip)"""
+    opener = gzip.open if path.endswith(".gz") else open
+    records = []
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+class TrafficRecorder:
+    """실제 서버로 중계하며 교환 내용을 기록하는 프록시"""
+
+    def __init__(self, path: str, upstreams: Optional[Dict[str, str]] = None,
+                 ws_upstream: str = UPBIT_WS_UPSTREAM):
+        self.path = path
+        self.upstreams = upstreams or UPSTREAMS
+        self.ws_upstream = ws_upstream
+        self._file = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._started = 0.0
+        self._ws_seq = 0
+
+        # 통계
+        self.http_count = 0
+        self.ws_message_count = 0
+
+    def _write(self, record: Dict[str, Any]):
+        record["t"] = round(time.monotonic() - self._started, 6)
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    async def _on_startup(self, app: web.Application):
+        opener = gzip.open if self.path.endswith(".gz") else open
+        self._file = opener(self.path, "wt", encoding="utf-8")
+        self._started = time.monotonic()
+        self._session = aiohttp.ClientSession(auto_decompress=True)
+        self._write({"kind": "meta", "created_at": datetime.now().isoformat(), "upstreams": self.upstreams})
+
+    async def _on_cleanup(self, app: web.Application):
+        if self._session is not None:
+            await self._session.close()
+        if self._file is not None:
+            self._file.close()
+        print(f"[TrafficRecorder] 기록 종료: HTTP {self.http_count}건, WS 메시지 {self.ws_message_count}건 -> {self.path}")
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        app.router.add_get("/upbit/websocket/v1", self._handle_ws)
+        app.router.add_route("*", "/{service}/{path:.*}", self._handle_http)
+        return app
+
+    async def _handle_http(self, request: web.Request) -> web.Response:
+        service = request.match_info["service"]
+        upstream = self.upstreams.get(service)
+        if upstream is None:
+            return web.json_response({"error": {"name": "unknown_service", "message": service}}, status=404)
+
+        path = "/" + request.match_info["path"]
+        body = await request.read()
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in DROPPED_REQUEST_HEADERS}
+        query = list(request.query.items())
+        # 인증 토큰의 query_hash 가 깨지지 않도록 쿼리 문자열은 받은 그대로 전달
+        raw_query = request.rel_url.raw_query_string
+        url = URL(f"{upstream}{request.rel_url.raw_path[len(service) + 1:]}"
+                  + (f"?{raw_query}" if raw_query else ""), encoded=True)
+
+        started = time.monotonic()
+        async with self._session.request(request.method, url, data=body or None,
+                                         headers=headers) as response:
+            payload = await response.read()
+            status = response.status
+            kept = {k: response.headers[k] for k in KEPT_RESPONSE_HEADERS if k in response.headers}
+        elapsed = time.monotonic() - started
+
+        self.http_count += 1
+        self._write({
+            "kind": "http",
+            "service": service,
+            "method": request.method,
+            "path": path,
+            "query": query,
+            "key": request_signature(service, request.method, path, query, body),
+            "status": status,
+            "headers": kept,
+            "body": payload.decode("utf-8", errors="replace"),
+            "elapsed": round(elapsed, 6),
+        })
+        return web.Response(body=payload, status=status, headers=kept)
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        self._ws_seq += 1
+        conn = self._ws_seq
+        client_ws = web.WebSocketResponse(heartbeat=20)
+        await client_ws.prepare(request)
+        self._write({"kind": "ws_open", "conn": conn})
+
+        async with self._session.ws_connect(self.ws_upstream, heartbeat=20, max_msg_size=0) as upstream_ws:
+            async def client_to_upstream():
+                async for msg in client_ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        self._write({"kind": "ws_send", "conn": conn, "data": msg.data})
+                        await upstream_ws.send_str(msg.data)
+                    elif msg.type == aiohttp.WSMsgType.BINARY:
+                        await upstream_ws.send_bytes(msg.data)
+                await upstream_ws.close()
+
+            async def upstream_to_client():
+                async for msg in upstream_ws:
+                    if msg.type == aiohttp.WSMsgType.BINARY:
+                        # 업비트 스트림은 UTF-8 JSON 을 바이너리 프레임으로 보내므로 텍스트로 보관
+                        try:
+                            record = {"kind": "ws_recv", "conn": conn, "data": msg.data.decode("utf-8"), "binary": True}
+                        except UnicodeDecodeError:
+                            record = {"kind": "ws_recv", "conn": conn, "b64": base64.b64encode(msg.data).decode("ascii")}
+                        self._write(record)
+                        await client_ws.send_bytes(msg.data)
+                    elif msg.type == aiohttp.WSMsgType.TEXT:
+                        self._write({"kind": "ws_recv", "conn": conn, "data": msg.data})
+                        await client_ws.send_str(msg.data)
+                    else:
+                        continue
+                    self.ws_message_count += 1
+                await client_ws.close()
+
+            tasks = [asyncio.ensure_future(client_to_upstream()), asyncio.ensure_future(upstream_to_client())]
+            try:
+                await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for task in tasks:
+                    task.cancel()
+        self._write({"kind": "ws_close", "conn": conn})
+        return client_ws
+
+
+class ReplayServer:
+    """녹화 파일 기반 로컬 대역 서버"""
+
+    # 요청 본문이 매번 달라지는 서비스 (프롬프트에 시각/시세 포함) - 경로 단위로 녹화 순서대로 응답
+    LOOSE_SERVICES = ("openrouter",)
+
+    def __init__(self, records: List[Dict[str, Any]], speed: float = 1.0,
+                 simulate_latency: bool = False, loop_stream: bool = False):
+        self.speed = speed                      # 배속 (0 이하면 대기 없이 즉시)
+        self.simulate_latency = simulate_latency
+        self.loop_stream = loop_stream
+
+        # 같은 요청이 여러 번 녹화되었으면 녹화 순서대로 응답, 소진되면 마지막 응답 반복
+        self._responses: Dict[str, deque] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._loose: Dict[str, deque] = defaultdict(deque)
+        self._ws_messages: List[Tuple[float, Dict[str, Any]]] = []
+        first_conn = None
+        for record in records:
+            kind = record.get("kind")
+            if kind == "http":
+                self._responses[record["key"]].append(record)
+                if record["service"] in self.LOOSE_SERVICES:
+                    self._loose[self._loose_key(record["service"], record["method"], record["path"])].append(record)
+            elif kind == "ws_recv":
+                # 첫 WebSocket 연결의 메시지 흐름만 재생 (재연결 중복 방지)
+                if first_conn is None:
+                    first_conn = record["conn"]
+                if record["conn"] == first_conn:
+                    self._ws_messages.append((record["t"], record))
+
+        # 통계
+        self.served = 0
+        self.loose_matches = 0
+        self.misses = 0
+        self.miss_keys: Dict[str, int] = defaultdict(int)
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ReplayServer":
+        return cls(load_records(path), **kwargs)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/upbit/websocket/v1", self._handle_ws)
+        app.router.add_get("/_replay/stats", self._handle_stats)
+        app.router.add_route("*", "/{service}/{path:.*}", self._handle_http)
+        return app
+
+    @staticmethod
+    def _loose_key(service: str, method: str, path: str) -> str:
+        return f"{service} {method.upper()} {path}"
+
+    def _next_response(self, key: str) -> Optional[Dict[str, Any]]:
+        queue = self._responses.get(key)
+        if queue:
+            record = queue.popleft()
+            self._last[key] = record
+            return record
+        return self._last.get(key)
+
+    def _next_loose_response(self, loose_key: str) -> Optional[Dict[str, Any]]:
+        queue = self._loose.get(loose_key)
+        if not queue:
+            return None
+        record = queue[0]
+        if len(queue) > 1:
+            queue.popleft()
+        self.loose_matches += 1
+        return record
+
+    async def _sleep(self, seconds: float):
+        if self.speed > 0 and seconds > 0:
+            await asyncio.sleep(seconds / self.speed)
+
+    async def _handle_http(self, request: web.Request) -> web.Response:
+        service = request.match_info["service"]
+        path = "/" + request.match_info["path"]
+        body = await request.read()
+        key = request_signature(service, request.method, path, list(request.query.items()), body)
+
+        record = self._next_response(key)
+        if record is None and service in self.LOOSE_SERVICES:
+            record = self._next_loose_response(self._loose_key(service, request.method, path))
+        if record is None:
+            self.misses += 1
+            self.miss_keys[key] += 1
+            return web.json_response(
+                {"error": {"name": "replay_miss", "message": f"녹화되지 않은 요청: {key}"}}, status=404
+            )
+
+        if self.simulate_latency:
+            await self._sleep(record.get("elapsed", 0))
+        self.served += 1
+        return web.Response(text=record["body"], status=record["status"], headers=record.get("headers") or {})
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(heartbeat=20)
+        await ws.prepare(request)
+        # 구독 메시지 수신 후 스트림 시작
+        await ws.receive()
+
+        while not ws.closed:
+            previous = None
+            for t, record in self._ws_messages:
+                if previous is not None:
+                    await self._sleep(t - previous)
+                previous = t
+                if ws.closed:
+                    break
+                if "b64" in record:
+                    await ws.send_bytes(base64.b64decode(record["b64"]))
+                elif record.get("binary"):
+                    await ws.send_bytes(record["data"].encode("utf-8"))
+                else:
+                    await ws.send_str(record["data"])
+            if not self.loop_stream:
+                break
+
+        # 스트림이 끝나도 연결은 유지 (클라이언트 재연결 폭주 방지)
+        async for _ in ws:
+            pass
+        return ws
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.get_stats())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """재생 통계"""
+        return {
+            "served": self.served,
+            "loose_matches": self.loose_matches,
+            "misses": self.misses,
+            "recorded_requests": sum(len(q) for q in self._responses.values()) + len(self._last),
+            "ws_messages": len(self._ws_messages),
+            "speed": self.speed,
+            "top_misses": sorted(self.miss_keys.items(), key=lambda x: x[1], reverse=True)[:10],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="업비트/OpenRouter 트래픽 녹화/재생")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="실제 서버로 중계하며 녹화")
+    record.add_argument("path", help="녹화 파일 (.jsonl 또는 .jsonl.gz)")
+    record.add_argument("--port", type=int, default=8765)
+
+    replay = sub.add_parser("replay", help="녹화 파일로 로컬 서버 실행")
+    replay.add_argument("path", help="녹화 파일")
+    replay.add_argument("--port", type=int, default=8765)
+    replay.add_argument("--speed", type=float, default=1.0, help="배속 (0 = 대기 없음)")
+    replay.add_argument("--latency", action="store_true", help="녹화된 응답 지연 재현")
+    replay.add_argument("--loop", action="store_true", help="시세 스트림 반복 재생")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        app = TrafficRecorder(args.path).build_app()
+    else:
+        server = ReplayServer.from_file(args.path, speed=args.speed,
+                                        simulate_latency=args.latency, loop_stream=args.loop)
+        app = server.build_app()
+
+    print(f"[{datetime.now()}] 🎞️ {args.command} 서버 시작 (포트 {args.port}) - 클라이언트 환경변수:")
+    for name, value in env_for(args.port).items():
+        print(f"    export {name}={value}")
+    web.run_app(app, host="127.0.0.1", port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+가격 트리거 인덱스 모듈
+- 마켓별로 상향(가격 ≥ 기준가) / 하향(가격 ≤ 기준가) 트리거를 기준가 순으로 정렬해 보관
+- 체결가 하나가 들어오면 이분 탐색으로 넘어선 구간만 잘라냄 → O(log n + k) (k = 발동 트리거 수)
+  두 목록 모두 발동 구간이 리스트 끝에 오도록 정렬 (상향은 기준가 부호를 뒤집어 저장)
+- 손절/익절/트레일링 스탑/사용자 가격 알림을 같은 인덱스에 등록 (트리거는 한 번 발동 후 제거)
+- 트레일링 스탑처럼 기준가가 바뀌는 트리거는 move()로 제자리에서 재정렬
+- 벤치마크: 10만 개 트리거에서 종목별 선형 검사와 비교
+
+사용 예:
+    python trigger_index.py bench --triggers 100000 --markets 200 --ticks 200000
+"""
+import argparse
+import itertools
+import random
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Tuple
+
+
+ABOVE = "above"     # 가격 ≥ 기준가에서 발동 (익절, 신고가, 상향 알림)
+BELOW = "below"     # 가격 ≤ 기준가에서 발동 (손절, 트레일링 스탑, 하향 알림)
+
+
+@dataclass(eq=False)
+class Trigger:
+    """가격 트리거 1개"""
+    id: int
+    ticker: str
+    side: str                   # above | below
+    threshold: float
+    kind: str = ""
+    owner: Any = None           # 발동 시 처리할 대상 (청산 규칙, 알림 등)
+
+    @property
+    def key(self) -> Tuple[float, int]:
+        """정렬 키 - 발동 구간이 목록 끝에 오도록 상향은 부호 반전"""
+        return (-self.threshold if self.side == ABOVE else self.threshold), self.id
+
+
+class _Book:
+    """마켓 하나의 정렬된 트리거 목록"""
+    __slots__ = ("above", "below")
+
+    def __init__(self):
+        self.above: List[Tuple[float, int]] = []    # (-기준가, id) 오름차순
+        self.below: List[Tuple[float, int]] = []    # (기준가, id) 오름차순
+
+    def side(self, side: str) -> List[Tuple[float, int]]:
+        return self.above if side == ABOVE else self.below
+
+    def __len__(self) -> int:
+        return len(self.above) + len(self.below)
+
+
+class TriggerIndex:
+    """마켓별 정렬 트리거 인덱스 (스레드 안전하지 않음 - 호출자가 잠금)"""
+
+    def __init__(self):
+        self._books: Dict[str, _Book] = {}
+        self._triggers: Dict[int, Trigger] = {}
+        self._ids = itertools.count(1)
+
+        # 통계
+        self.lookups = 0
+        self.fired = 0
+        self.moves = 0
+
+    def __len__(self) -> int:
+        return len(self._triggers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._books
+
+    def tickers(self) -> List[str]:
+        return list(self._books.keys())
+
+    def get(self, trigger_id: int) -> Optional[Trigger]:
+        return self._triggers.get(trigger_id)
+
+    def add(self, ticker: str, side: str, threshold: float, kind: str = "", owner: Any = None) -> Trigger:
+        """트리거 등록 - O(log n) 탐색 + 삽입"""
+        if side not in (ABOVE, BELOW):
+            raise ValueError(f"잘못된 트리거 방향: {side}")
+        trigger = Trigger(next(self._ids), ticker, side, float(threshold), kind, owner)
+        book = self._books.get(ticker)
+        if book is None:
+            book = self._books[ticker] = _Book()
+        insort(book.side(side), trigger.key)
+        self._triggers[trigger.id] = trigger
+        return trigger
+
+    def remove(self, trigger: Trigger) -> bool:
+        """트리거 제거 - 이미 발동/제거됐으면 False"""
+        if self._triggers.pop(trigger.id, None) is None:
+            return False
+        book = self._books[trigger.ticker]
+        entries = book.side(trigger.side)
+        del entries[bisect_left(entries, trigger.key)]
+        if not book:
+            del self._books[trigger.ticker]
+        return True
+
+    def move(self, trigger: Trigger, threshold: float) -> bool:
+        """기준가 변경 (트레일링 스탑 상향 등) - 같은 트리거를 제자리에서 재정렬"""
+        if trigger.id not in self._triggers:
+            return False
+        entries = self._books[trigger.ticker].side(trigger.side)
+        del entries[bisect_left(entries, trigger.key)]
+        trigger.threshold = float(threshold)
+        insort(entries, trigger.key)
+        self.moves += 1
+        return True
+
+    def crossed(self, ticker: str, price: float) -> List[Trigger]:
+        """price에서 발동하는 트리거를 꺼냄 (꺼낸 트리거는 제거됨) - O(log n + k)"""
+        book = self._books.get(ticker)
+        if book is None:
+            return []
+        self.lookups += 1
+        fired: List[Trigger] = []
+        # 하향: 기준가 ≥ price / 상향: -기준가 ≥ -price  → 둘 다 목록 끝 구간
+        for entries, bound in ((book.below, price), (book.above, -price)):
+            start = bisect_left(entries, (bound, 0))
+            if start < len(entries):
+                fired.extend(self._triggers.pop(trigger_id) for _, trigger_id in entries[start:])
+                del entries[start:]
+        if not book:
+            del self._books[ticker]
+        self.fired += len(fired)
+        return fired
+
+    def triggers_for(self, ticker: str) -> List[Trigger]:
+        """마켓의 트리거 목록 (조회용 - O(n))"""
+        book = self._books.get(ticker)
+        if book is None:
+            return []
+        return [self._triggers[i] for _, i in itertools.chain(book.below, book.above)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "triggers": len(self._triggers),
+            "markets": len(self._books),
+            "lookups": self.lookups,
+            "fired": self.fired,
+            "moves": self.moves,
+        }
+
+
+# ========== 벤치마크 ==========
+
+def benchmark(triggers: int = 100_000, markets: int = 200, ticks: int = 200_000,
+              trailing_share: float = 0.2, seed: int = 7) -> Dict[str, Any]:
+    """무작위 보행 시세로 인덱스와 종목별 선형 검사를 비교 (발동 결과가 같은지도 확인)
+
+    트리거의 trailing_share 비율은 가격이 오를 때 기준가를 따라 올리는 트레일링 스탑
+    """
+    rng = random.Random(seed)
+    tickers = [f"KRW-T{i:04d}" for i in range(markets)]
+    prices = {t: 1000.0 for t in tickers}
+    specs = []
+    for _ in range(triggers):
+        ticker = rng.choice(tickers)
+        side = rng.choice((ABOVE, BELOW))
+        gap = rng.uniform(0.005, 0.2)
+        threshold = prices[ticker] * (1 + gap if side == ABOVE else 1 - gap)
+        trailing = side == BELOW and rng.random() < trailing_share * 2
+        specs.append((ticker, side, threshold, trailing, gap))
+    moves = []
+    for _ in range(ticks):
+        ticker = rng.choice(tickers)
+        prices[ticker] *= 1 + rng.gauss(0, 0.004)
+        moves.append((ticker, prices[ticker]))
+
+    # 인덱스
+    index = TriggerIndex()
+    trailing_by_ticker: Dict[str, List[Tuple[Trigger, float]]] = {}
+    for ticker, side, threshold, trailing, gap in specs:
+        trigger = index.add(ticker, side, threshold, "trailing" if trailing else "")
+        if trailing:
+            trailing_by_ticker.setdefault(ticker, []).append((trigger, gap))
+    highs = {t: 1000.0 for t in tickers}
+    started = time.perf_counter()
+    index_fired = 0
+    for ticker, price in moves:
+        index_fired += len(index.crossed(ticker, price))
+        if price > highs[ticker]:
+            # 신고가 → 트레일링 스탑 재정렬 (신고가일 때만)
+            highs[ticker] = price
+            for trigger, gap in trailing_by_ticker.get(ticker, ()):
+                if trigger.id in index._triggers:
+                    index.move(trigger, price * (1 - gap))
+    index_seconds = time.perf_counter() - started
+
+    # 종목별 선형 검사 (틱마다 해당 종목 트리거 전부 확인)
+    linear: Dict[str, List[list]] = {}
+    for ticker, side, threshold, trailing, gap in specs:
+        linear.setdefault(ticker, []).append([side, threshold, trailing, gap, True])
+    highs = {t: 1000.0 for t in tickers}
+    started = time.perf_counter()
+    linear_fired = 0
+    for ticker, price in moves:
+        new_high = price > highs[ticker]
+        if new_high:
+            highs[ticker] = price
+        for item in linear.get(ticker, ()):
+            if not item[4]:
+                continue
+            side, threshold = item[0], item[1]
+            if (side == ABOVE and price >= threshold) or (side == BELOW and price <= threshold):
+                item[4] = False
+                linear_fired += 1
+            elif new_high and item[2]:
+                item[1] = price * (1 - item[3])
+    linear_seconds = time.perf_counter() - started
+
+    return {
+        "triggers": triggers,
+        "markets": markets,
+        "ticks": ticks,
+        "fired": index_fired,
+        "matches_linear": index_fired == linear_fired,
+        "moves": index.moves,
+        "index_us_per_tick": round(index_seconds / ticks * 1e6, 2),
+        "linear_us_per_tick": round(linear_seconds / ticks * 1e6, 2),
+        "speedup": round(linear_seconds / index_seconds, 1) if index_seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가격 트리거 인덱스 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="인덱스 vs 종목별 선형 검사")
+    bench.add_argument("--triggers", type=int, default=100_000)
+    bench.add_argument("--markets", type=int, default=200)
+    bench.add_argument("--ticks", type=int, default=200_000)
+    bench.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    report = benchmark(args.triggers, args.markets, args.ticks, seed=args.seed)
+    print(f"트리거 {report['triggers']:,}개 / 마켓 {report['markets']}개 / 틱 {report['ticks']:,}개")
+    print(f"  발동 {report['fired']:,}건 (선형 검사와 {'일치' if report['matches_linear'] else '불일치'}), "
+          f"트레일링 재정렬 {report['moves']:,}회")
+    print(f"  인덱스     {report['index_us_per_tick']:>10.2f} µs/틱")
+    print(f"  선형 검사  {report['linear_us_per_tick']:>10.2f} µs/틱  (x{report['speedup']})")
+    raise SystemExit(0 if report["matches_linear"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,543 @@
 """
 업비트 API 클라이언트 모듈
+- 모든 REST 요청은 그룹별(시세/거래소/주문) 토큰 버킷 스케줄러를 거침
+- Remaining-Req 헤더와 429 응답으로 요청 속도를 조정
 """
-import pyupbit
+import copy
+import heapq
+import itertools
+import threading
 import pandas as pd
 import requests
 import time
-from typing import Optional, List, Dict, Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, List, Dict, Any, Callable, Awaitable
 from datetime import datetime, timedelta
 import asyncio
-from config import UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY
+from config import (
+    UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY, UPBIT_API_URL, ACCOUNT_CACHE_TTL, MARKET_DATA_MAX_AGE,
+    CANDLE_RESAMPLE_ENABLED
+)
+from market_data import market_data_hub
+from candle_cache import CandleCache
+from candle_store import candle_store
+from resampler import CandleResampler
+from market_snapshot import MarketSnapshotService, MarketSnapshot
+from async_upbit_client import (
+    AsyncUpbitClient, UpbitAPIError, create_auth_headers, candles_to_dataframe, request_group,
+    request_key, CANDLE_PATHS, CANDLE_PAGE_SIZE
+)
+
+
+# ========== 요청 스케줄러 ==========
+
+# 요청 우선순위 (작을수록 먼저 처리)
+PRIORITY_ORDER = 0      # 주문 및 주문 직전 조회
+PRIORITY_EXIT = 1       # 보유 포지션 청산 판단용 시세
+PRIORITY_DEFAULT = 2    # 일반 조회 (API 핸들러 등)
+PRIORITY_SCAN = 3       # 대량 스캔
+
+_request_priority: ContextVar[int] = ContextVar("upbit_request_priority", default=PRIORITY_DEFAULT)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """현재 스레드/태스크에서 발생하는 업비트 요청의 우선순위 지정"""
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+class _TokenBucket:
+    """초당 요청 수 토큰 버킷"""
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        # 업비트는 초 단위 구간으로 제한하므로 몰아서 보내지 않고 1/rate 간격으로 분산
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.backoff = 0.0
+
+    def refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """다음 토큰까지 대기 시간 (0 이면 즉시 가능)"""
+        wait = self.blocked_until - now
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return max(wait, 0.0)
+
+
+def _loop_running() -> bool:
+    """현재 스레드에서 이벤트 루프가 실행 중인지"""
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class RequestScheduler:
+    """업비트 요청 그룹별 토큰 버킷 스케줄러 (우선순위 대기열)"""
+
+    # 업비트 공식 제한 (초당): 시세 조회 그룹 10회, 거래소 API 30회, 주문 8회
+    GROUP_LIMITS = {"quotation": 10, "exchange": 30, "order": 8}
+
+    def __init__(self, limits: Optional[Dict[str, float]] = None):
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._queues: Dict[str, List[tuple]] = {}
+        self._cancelled: set = set()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        for group, rate in (limits or self.GROUP_LIMITS).items():
+            self._buckets[group] = _TokenBucket(rate)
+            self._queues[group] = []
+            self._stats[group] = {
+                "acquired": 0,
+                "total_wait": 0.0,
+                "max_wait": 0.0,
+                "throttled": 0,
+                "remaining_sec": None,
+                "server_group": None,
+                "loop_calls": 0,
+            }
+
+    def acquire(self, group: str, priority: Optional[int] = None) -> float:
+        """요청 허가 대기 (블로킹) - 대기 시간(초) 반환"""
+        start = time.monotonic()
+        if _loop_running():
+            return self._acquire_unqueued(group, start)
+        with self._cond:
+            entry = self._push(group, priority)
+            try:
+                while True:
+                    wait = self._try_take(group, entry)
+                    if wait is None:
+                        break
+                    self._cond.wait(timeout=wait)
+            except BaseException:
+                self._cancelled.add(entry)
+                raise
+            return self._record_wait(group, start)
+
+    def _acquire_unqueued(self, group: str, start: float) -> float:
+        """이벤트 루프 스레드의 동기 요청 - 대기열에 들어가지 않고 토큰만 대기
+
+        같은 루프의 acquire_async 대기자가 대기열 앞에 있으면 루프가 막혀 차례가 오지 않으므로
+        (교착) 순서를 건너뛰고 토큰 버킷 속도만 지킴. 루프에서는 asyncio.to_thread 또는 aio 사용
+        """
+        with self._cond:
+            if group not in self._buckets:
+                raise ValueError(f"알 수 없는 요청 그룹: {group}")
+            stats = self._stats[group]
+            stats["loop_calls"] += 1
+            if stats["loop_calls"] == 1:
+                print(f"[RequestScheduler] ⚠️ 이벤트 루프에서 동기 {group} 요청 - 루프가 막힘 (to_thread/aio 사용 권장)")
+            bucket = self._buckets[group]
+            while True:
+                now = time.monotonic()
+                bucket.refill(now)
+                wait = bucket.wait_time(now)
+                if wait <= 0:
+                    break
+                self._cond.wait(timeout=wait)
+            bucket.tokens -= 1
+            self._cond.notify_all()
+            return self._record_wait(group, start)
+
+    async def acquire_async(self, group: str, priority: Optional[int] = None) -> float:
+        """요청 허가 대기 (이벤트 루프를 막지 않음) - 대기 시간(초) 반환"""
+        start = time.monotonic()
+        with self._cond:
+            entry = self._push(group, priority)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(group, entry)
+                if wait is None:
+                    break
+                await asyncio.sleep(min(wait, 0.05))
+        except BaseException:
+            with self._cond:
+                self._cancelled.add(entry)
+            raise
+        with self._cond:
+            return self._record_wait(group, start)
+
+    def record_response(self, group: str, status: int, remaining_req: Optional[str] = None):
+        """응답 반영: Remaining-Req 헤더로 잔여 토큰 보정, 429 시 백오프"""
+        bucket = self._buckets.get(group)
+        if bucket is None:
+            return
+        with self._cond:
+            now = time.monotonic()
+            bucket.refill(now)
+            stats = self._stats[group]
+
+            if remaining_req:
+                fields = dict(
+                    part.strip().split("=", 1) for part in remaining_req.split(";") if "=" in part
+                )
+                stats["server_group"] = fields.get("group")
+                try:
+                    sec = int(fields.get("sec", -1))
+                except ValueError:
+                    sec = -1
+                if sec >= 0:
+                    stats["remaining_sec"] = sec
+                    # 거래소가 알려준 잔여 횟수보다 많이 보내지 않도록 보정
+                    bucket.tokens = min(bucket.tokens, float(sec))
+
+            if status == 429:
+                stats["throttled"] += 1
+                bucket.backoff = min(max(bucket.backoff * 2, 0.5), 8.0)
+                bucket.blocked_until = now + bucket.backoff
+                bucket.tokens = 0.0
+                print(f"[RequestScheduler] ⚠️ {group} 요청 제한 초과 - {bucket.backoff:.1f}초 대기")
+            elif status < 400:
+                bucket.backoff = 0.0
+            self._cond.notify_all()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """그룹별 대기열/대기 시간 통계"""
+        with self._cond:
+            now = time.monotonic()
+            result = {}
+            for group, bucket in self._buckets.items():
+                bucket.refill(now)
+                stats = self._stats[group]
+                queue_depth = sum(1 for entry in self._queues[group] if entry not in self._cancelled)
+                result[group] = {
+                    "rate": bucket.rate,
+                    "tokens": round(bucket.tokens, 2),
+                    "queue_depth": queue_depth,
+                    "acquired": stats["acquired"],
+                    "avg_wait_ms": round(stats["total_wait"] / stats["acquired"] * 1000, 2) if stats["acquired"] else 0.0,
+                    "max_wait_ms": round(stats["max_wait"] * 1000, 2),
+                    "throttled": stats["throttled"],
+                    "remaining_sec": stats["remaining_sec"],
+                    "server_group": stats["server_group"],
+                    "loop_calls": stats["loop_calls"],
+                    "blocked_for": round(max(bucket.blocked_until - now, 0.0), 3),
+                }
+            return result
+
+    # ========== 내부 처리 (self._cond 보유 상태에서 호출) ==========
+
+    def _push(self, group: str, priority: Optional[int]) -> tuple:
+        if group not in self._buckets:
+            raise ValueError(f"알 수 없는 요청 그룹: {group}")
+        if priority is None:
+            priority = _request_priority.get()
+        entry = (priority, next(self._seq))
+        heapq.heappush(self._queues[group], entry)
+        return entry
+
+    def _try_take(self, group: str, entry: tuple) -> Optional[float]:
+        """차례가 되었고 토큰이 있으면 소비 후 None, 아니면 대기할 시간 반환"""
+        queue = self._queues[group]
+        while queue and queue[0] in self._cancelled:
+            self._cancelled.discard(heapq.heappop(queue))
+
+        if not queue or queue[0] != entry:
+            return 0.05
+
+        bucket = self._buckets[group]
+        now = time.monotonic()
+        bucket.refill(now)
+        wait = bucket.wait_time(now)
+        if wait > 0:
+            return wait
+
+        bucket.tokens -= 1
+        heapq.heappop(queue)
+        self._cond.notify_all()
+        return None
+
+    def _record_wait(self, group: str, start: float) -> float:
+        waited = time.monotonic() - start
+        stats = self._stats[group]
+        stats["acquired"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+        return waited
+
+
+# ========== 동일 요청 병합 ==========
+
+class _Call:
+    """진행 중인 요청 (스레드 호출자용)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """같은 키의 동시 요청을 하나로 합쳐 결과 공유 (스레드/asyncio 모두 지원)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Any, _Call] = {}
+        self._tasks: Dict[tuple, asyncio.Task] = {}
+        self._followers: Dict[asyncio.Task, int] = {}
+
+        # 통계
+        self.executed = 0
+        self.deduplicated = 0
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """동기 호출 - 같은 키가 진행 중이면 그 결과를 기다려 공유"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.deduplicated += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # 호출자가 결과를 수정해도 서로 영향이 없도록 복사본 전달 (원본은 리더가 사용)
+            return copy.deepcopy(call.result)
+
+        result = None
+        try:
+            result = fn()
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+                waiters = call.waiters
+            if waiters and call.error is None:
+                # 리더가 원본을 수정하기 전에 대기자용 스냅샷을 만든 뒤 깨움
+                call.result = copy.deepcopy(result)
+            call.done.set()
+
+    async def do_async(self, key: Any, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """비동기 호출 - 같은 이벤트 루프에서 같은 키가 진행 중이면 결과 공유"""
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key)
+            leader = task is None
+            if leader:
+                task = loop.create_task(coro_fn())
+                self._tasks[task_key] = task
+                task.add_done_callback(lambda t: self._finish_task(task_key, t))
+                self.executed += 1
+            else:
+                self._followers[task] = self._followers.get(task, 0) + 1
+                self.deduplicated += 1
+
+        # 한 호출자가 취소되어도 공유 요청은 나머지 호출자를 위해 계속 진행
+        # 태스크 결과(원본)는 누구에게도 그대로 주지 않음 → 복사 중 다른 호출자가 수정할 수 없음
+        if not leader:
+            return copy.deepcopy(await asyncio.shield(task))
+        try:
+            result = await asyncio.shield(task)
+        finally:
+            # 리더가 깨어날 때는 _finish_task가 먼저 실행되어 새 대기자가 붙을 수 없음
+            with self._lock:
+                followers = self._followers.pop(task, 0)
+        return copy.deepcopy(result) if followers else result
+
+    def _finish_task(self, task_key: tuple, task: asyncio.Task):
+        with self._lock:
+            if self._tasks.get(task_key) is task:
+                del self._tasks[task_key]
+        # 모든 호출자가 취소된 경우 예외 미확인 경고 방지
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """병합 통계"""
+        total = self.executed + self.deduplicated
+        return {
+            "executed": self.executed,
+            "deduplicated": self.deduplicated,
+            "in_flight": len(self._calls) + len(self._tasks),
+            "dedup_rate": round(self.deduplicated / total * 100, 2) if total else 0.0,
+        }
 
 
 class UpbitClient:
-    """업비트 API 래퍼 클래스"""
+    """업비트 API 래퍼 클래스 (async 경로는 self.aio 사용)"""
     
     def __init__(self):
-        self.upbit = pyupbit.Upbit(UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY)
         self._access_key = UPBIT_ACCESS_KEY
         self._secret_key = UPBIT_SECRET_KEY
+        self.scheduler = request_scheduler
+        self.single_flight = single_flight
+        self.candles = CandleCache(self._fetch_ohlcv, store=candle_store)
+        self.resampler = CandleResampler(self.candles)
+        self.resample_enabled = CANDLE_RESAMPLE_ENABLED
+        self.snapshots = MarketSnapshotService(self)
+        # keep-alive 커넥션 재사용
+        self.session = requests.Session()
+        self.aio = AsyncUpbitClient(UPBIT_ACCESS_KEY, UPBIT_SECRET_KEY, scheduler=request_scheduler,
+                                    single_flight=single_flight)
+        # 계좌 조회 결과 단기 캐시 (주문 시 무효화)
+        self.account_cache_ttl = ACCOUNT_CACHE_TTL
+        self._accounts_cache: Optional[List[Dict[str, Any]]] = None
+        self._accounts_cached_at = 0.0
+        self._accounts_lock = threading.Lock()
+        # 현재가 일괄 조회 시 존재하지 않는 마켓 제외용
+        self._known_markets: Optional[set] = None
     
     def reinitialize(self, access_key: str, secret_key: str):
         """API 키 변경 후 재초기화"""
         self._access_key = access_key
         self._secret_key = secret_key
-        self.upbit = pyupbit.Upbit(access_key, secret_key)
+        self.aio.set_keys(access_key, secret_key)
+        self.invalidate_accounts()
         print(f"[UpbitClient] API 키 재설정됨: {access_key[:8]}...")
-        
-    # ========== 시세 조회 ==========
     
-    def get_current_price(self, ticker: str, max_retries: int = 3) -> Optional[float]:
-        """현재가 조회 (재시도 및 직접 API 폴백 포함)"""
-        for attempt in range(max_retries):
-            try:
-                price = pyupbit.get_current_price(ticker)
-                if price and price > 0:
-                    return price
-            except Exception:
-                pass
-            
-            # 직접 API 호출 폴백
+    # ========== 공통 요청 ==========
+    
+    def _request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                 data: Optional[Dict[str, Any]] = None, private: bool = False,
+                 priority: Optional[int] = None, max_retries: int = 2) -> Any:
+        """REST 요청 (스케줄러 경유, 429/네트워크 오류 시 재시도, 동시 GET 요청은 병합)"""
+        if method.upper() == "GET":
+            key = request_key(method, path, params, private, self._access_key)
+            return self.single_flight.do(
+                key, lambda: self._send(method, path, params, data, private, priority, max_retries)
+            )
+        return self._send(method, path, params, data, private, priority, max_retries)
+    
+    def _send(self, method: str, path: str, params: Optional[Dict[str, Any]], data: Optional[Dict[str, Any]],
+              private: bool, priority: Optional[int], max_retries: int) -> Any:
+        """실제 REST 요청 전송"""
+        group = request_group(method, path)
+        url = f"{UPBIT_API_URL}{path}"
+        
+        for attempt in range(max_retries + 1):
+            self.scheduler.acquire(group, priority)
+            headers = {"Accept": "application/json"}
+            if private:
+                headers.update(create_auth_headers(self._access_key, self._secret_key, data or params))
             try:
-                response = requests.get(
-                    f"https://api.upbit.com/v1/ticker?markets={ticker}",
-                    timeout=5
+                response = self.session.request(
+                    method, url, params=params, json=data, headers=headers, timeout=10
                 )
-                if response.status_code == 200:
-                    data = response.json()
-                    if data and len(data) > 0:
-                        return float(data[0].get('trade_price', 0))
-            except Exception:
-                pass
+            except requests.RequestException:
+                if attempt < max_retries:
+                    time.sleep(0.2)
+                    continue
+                raise
             
-            if attempt < max_retries - 1:
-                time.sleep(0.2)
+            self.scheduler.record_response(group, response.status_code, response.headers.get("Remaining-Req"))
+            if response.status_code == 429 and attempt < max_retries:
+                continue
+            
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text
+            if response.status_code >= 400:
+                raise UpbitAPIError(response.status_code, body)
+            return body
         
-        return None
+    # ========== 시세 조회 ==========
     
-    def get_current_prices(self, tickers: List[str]) -> Dict[str, float]:
-        """여러 코인 현재가 조회"""
-        try:
-            result = pyupbit.get_current_price(tickers)
-            if isinstance(result, dict):
-                return result
-            # 단일 티커인 경우 dict로 변환
-            if len(tickers) == 1 and result:
-                return {tickers[0]: result}
-        except Exception:
-            pass
+    def get_current_price(self, ticker: str, max_retries: int = 3) -> Optional[float]:
+        """현재가 조회 (실시간 시세 우선, 스케줄러 경유 REST 폴백)"""
+        price = market_data_hub.get_price(ticker)
+        if price:
+            return price
         
-        # 폴백: 직접 API 호출
         try:
-            markets = ",".join(tickers[:100])  # 최대 100개
-            response = requests.get(
-                f"https://api.upbit.com/v1/ticker?markets={markets}",
-                timeout=10
-            )
-            if response.status_code == 200:
-                data = response.json()
-                return {item['market']: float(item['trade_price']) for item in data}
+            data = self._request("GET", "/v1/ticker", params={"markets": ticker}, max_retries=max_retries - 1)
+            if data:
+                return float(data[0].get('trade_price', 0)) or None
         except Exception:
             pass
+        return None
+    
+    def get_current_prices(self, tickers: List[str]) -> Dict[str, float]:
+        """여러 코인 현재가 조회 (실시간 시세 → 최신 스냅샷 → REST 순)"""
+        prices = market_data_hub.get_prices(tickers)
+        missing = [t for t in tickers if t not in prices]
+        if not missing:
+            return prices
+        
+        snapshot = self.snapshots.latest()
+        if snapshot.age() <= MARKET_DATA_MAX_AGE:
+            for ticker in missing:
+                item = snapshot.get(ticker)
+                if item and item.price > 0:
+                    prices[ticker] = item.price
+            missing = [t for t in missing if t not in prices]
+            if not missing:
+                return prices
         
-        return {}
+        prices.update(self._fetch_current_prices(missing))
+        return prices
+    
+    def get_market_snapshot(self, max_age: Optional[float] = None) -> MarketSnapshot:
+        """전체 KRW 마켓 시세 스냅샷 (공유, 불변)"""
+        return self.snapshots.get_snapshot(max_age)
+    
+    def _fetch_ticker_data(self, tickers: List[str], batch_size: int = 100) -> List[Dict[str, Any]]:
+        """현재가 원본 데이터 REST 조회 (batch_size 단위)"""
+        result = []
+        for i in range(0, len(tickers), batch_size):
+            chunk = tickers[i:i + batch_size]
+            try:
+                data = self._request("GET", "/v1/ticker", params={"markets": ",".join(chunk)})
+            except UpbitAPIError as e:
+                # 상장되지 않은 마켓이 하나라도 섞이면 묶음 전체가 404 → 유효한 마켓만 재요청
+                if e.status != 404:
+                    print(f"현재가 조회 실패: {e}")
+                    continue
+                valid = [t for t in chunk if t in self._get_known_markets()]
+                if not valid or len(valid) == len(chunk):
+                    continue
+                try:
+                    data = self._request("GET", "/v1/ticker", params={"markets": ",".join(valid)})
+                except Exception as retry_error:
+                    print(f"현재가 조회 실패: {retry_error}")
+                    continue
+            except Exception as e:
+                print(f"현재가 조회 실패: {e}")
+                continue
+            if isinstance(data, list):
+                result.extend(data)
+        return result
+    
+    def _get_known_markets(self) -> set:
+        """상장 마켓 코드 집합 (최초 1회 조회)"""
+        if not self._known_markets:
+            try:
+                markets = self._request("GET", "/v1/market/all", params={"isDetails": "false"})
+                self._known_markets = {m['market'] for m in markets}
+            except Exception as e:
+                print(f"마켓 목록 조회 실패: {e}")
+                return set()
+        return self._known_markets
+    
+    def _fetch_current_prices(self, tickers: List[str]) -> Dict[str, float]:
+        """여러 코인 현재가 REST 조회"""
+        return {item['market']: float(item['trade_price']) for item in self._fetch_ticker_data(tickers)}
     
     def get_ohlcv(self, ticker: str, interval: str = "day", count: int = 200) -> pd.DataFrame:
         """OHLCV 데이터 조회
@@ -91,18 +547,46 @@ class UpbitClient:
             interval: minute1, minute3, minute5, minute10, minute15, minute30, 
                      minute60, minute240, day, week, month
             count: 조회할 캔들 수
+        
+        (ticker, interval) 단위 캐시에서 count 만큼 잘라서 반환.
+        분/일봉은 가능하면 유지 중인 1분봉에서 만들어 반환 (간격별 API 요청 없음)
         """
-        try:
-            df = pyupbit.get_ohlcv(ticker, interval=interval, count=count)
-            return df if df is not None else pd.DataFrame()
-        except Exception as e:
-            print(f"OHLCV 조회 실패: {e}")
-            return pd.DataFrame()
+        df = None
+        if self.resample_enabled:
+            df = self.resampler.get(ticker, interval=interval, count=count)
+        if df is None:
+            df = self.candles.get(ticker, interval=interval, count=count)
+        return df if df is not None else pd.DataFrame()
+    
+    def _fetch_ohlcv(self, ticker: str, interval: str, count: int,
+                     to: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """OHLCV 원본 조회 (캔들 캐시 fetcher, 200개 초과 시 페이지 단위)"""
+        path = CANDLE_PATHS.get(interval)
+        if path is None:
+            return None
+        
+        candles: List[Dict[str, Any]] = []
+        remaining = count
+        cursor = to
+        while remaining > 0:
+            params = {"market": ticker, "count": min(remaining, CANDLE_PAGE_SIZE)}
+            if cursor:
+                params["to"] = cursor
+            page = self._request("GET", path, params=params)
+            if not page:
+                break
+            candles.extend(page)
+            remaining -= len(page)
+            if len(page) < params["count"]:
+                break
+            cursor = page[-1]["candle_date_time_utc"].replace("T", " ")
+        
+        return candles_to_dataframe(candles) if candles else None
     
     def get_orderbook(self, ticker: str) -> Dict[str, Any]:
         """호가 정보 조회"""
         try:
-            orderbook = pyupbit.get_orderbook(ticker)
+            orderbook = self._request("GET", "/v1/orderbook", params={"markets": ticker})
             if orderbook:
                 return orderbook[0] if isinstance(orderbook, list) else orderbook
             return {}
@@ -112,18 +596,60 @@ class UpbitClient:
     
     # ========== 잔고 조회 ==========
     
+    def get_accounts(self, use_cache: bool = True) -> Any:
+        """계좌 원본 조회 (오류 시 업비트 오류 응답 dict, 통신 실패 시 None)
+        
+        정상 응답은 account_cache_ttl 동안 캐시하며, 주문 시 무효화됨
+        """
+        with self._accounts_lock:
+            if (use_cache and self._accounts_cache is not None
+                    and time.monotonic() - self._accounts_cached_at < self.account_cache_ttl):
+                return [dict(a) for a in self._accounts_cache]
+        try:
+            accounts = self._request("GET", "/v1/accounts", private=True)
+            if isinstance(accounts, list):
+                with self._accounts_lock:
+                    self._accounts_cache = accounts
+                    self._accounts_cached_at = time.monotonic()
+                return [dict(a) for a in accounts]
+            return accounts
+        except UpbitAPIError as e:
+            if isinstance(e.body, dict) and 'error' in e.body:
+                return e.body
+            return {'error': {'message': str(e)}}
+        except Exception as e:
+            print(f"잔고 조회 실패: {e}")
+            return None
+    
+    def invalidate_accounts(self):
+        """계좌 캐시 무효화"""
+        with self._accounts_lock:
+            self._accounts_cache = None
+    
+    def _find_account(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """티커(KRW-BTC 또는 BTC)에 해당하는 계좌 조회"""
+        accounts = self.get_accounts()
+        if not isinstance(accounts, list):
+            return None
+        currency = ticker.split("-")[-1]
+        for account in accounts:
+            if account.get('currency') == currency:
+                return account
+        return None
+    
     def get_balance(self, ticker: str = "KRW") -> float:
         """잔고 조회"""
         try:
-            return self.upbit.get_balance(ticker)
+            account = self._find_account(ticker)
+            return float(account.get('balance', 0)) if account else 0.0
         except Exception as e:
             print(f"잔고 조회 실패: {e}")
             return 0.0
     
     def get_balances(self) -> List[Dict[str, Any]]:
-        """전체 잔고 조회"""
+        """전체 잔고 조회 (보유 코인 현재가는 한 번에 일괄 조회)"""
         try:
-            balances = self.upbit.get_balances()
+            balances = self.get_accounts()
             
             # 에러 발생 시 처리
             if isinstance(balances, dict) and 'error' in balances:
@@ -134,6 +660,14 @@ class UpbitClient:
             if not isinstance(balances, list):
                 print(f"잔고 조회 실패: 예상치 못한 응답 형식 {type(balances)}")
                 return []
+            
+            # 보유 코인 현재가 일괄 조회 (실시간 시세 우선, 나머지는 단일 요청)
+            held_markets = [
+                f"KRW-{b.get('currency')}" for b in balances
+                if isinstance(b, dict) and b.get('currency') != 'KRW'
+                and (float(b.get('balance', 0)) > 0 or float(b.get('locked', 0)) > 0)
+            ]
+            prices = self.get_current_prices(held_markets) if held_markets else {}
                 
             result = []
             for b in balances:
@@ -147,7 +681,7 @@ class UpbitClient:
                     avg_buy_price = float(b.get('avg_buy_price', 0))
                     
                     # 현재가 조회 (KRW 제외)
-                    current_price = 1 if currency == 'KRW' else self.get_current_price(f"KRW-{currency}")
+                    current_price = 1 if currency == 'KRW' else prices.get(f"KRW-{currency}")
                     current_price = current_price or avg_buy_price
                     
                     # 평가금액 및 수익률 계산
@@ -178,13 +712,21 @@ class UpbitClient:
     def get_avg_buy_price(self, ticker: str) -> float:
         """평균 매수가 조회"""
         try:
-            return self.upbit.get_avg_buy_price(ticker)
+            account = self._find_account(ticker)
+            return float(account.get('avg_buy_price', 0)) if account else 0.0
         except Exception as e:
             print(f"평균 매수가 조회 실패: {e}")
             return 0.0
     
     # ========== 주문 ==========
     
+    def _order(self, data: Dict[str, Any]) -> Any:
+        """주문 요청 (중복 주문 방지를 위해 재시도하지 않음)"""
+        try:
+            return self._request("POST", "/v1/orders", data=data, private=True, max_retries=0)
+        finally:
+            self.invalidate_accounts()
+    
     def buy_market_order(self, ticker: str, amount: float) -> Dict[str, Any]:
         """시장가 매수
         
@@ -193,7 +735,7 @@ class UpbitClient:
             amount: 매수 금액 (KRW)
         """
         try:
-            result = self.upbit.buy_market_order(ticker, amount)
+            result = self._order({"market": ticker, "side": "bid", "price": str(amount), "ord_type": "price"})
             return result if result else {'error': '주문 실패'}
         except Exception as e:
             print(f"시장가 매수 실패: {e}")
@@ -207,7 +749,7 @@ class UpbitClient:
             volume: 매도 수량
         """
         try:
-            result = self.upbit.sell_market_order(ticker, volume)
+            result = self._order({"market": ticker, "side": "ask", "volume": str(volume), "ord_type": "market"})
             return result if result else {'error': '주문 실패'}
         except Exception as e:
             print(f"시장가 매도 실패: {e}")
@@ -216,7 +758,7 @@ class UpbitClient:
     def buy_limit_order(self, ticker: str, price: float, volume: float) -> Dict[str, Any]:
         """지정가 매수"""
         try:
-            result = self.upbit.buy_limit_order(ticker, price, volume)
+            result = self._order({"market": ticker, "side": "bid", "volume": str(volume), "price": str(price), "ord_type": "limit"})
             return result if result else {'error': '주문 실패'}
         except Exception as e:
             print(f"지정가 매수 실패: {e}")
@@ -225,7 +767,7 @@ class UpbitClient:
     def sell_limit_order(self, ticker: str, price: float, volume: float) -> Dict[str, Any]:
         """지정가 매도"""
         try:
-            result = self.upbit.sell_limit_order(ticker, price, volume)
+            result = self._order({"market": ticker, "side": "ask", "volume": str(volume), "price": str(price), "ord_type": "limit"})
             return result if result else {'error': '주문 실패'}
         except Exception as e:
             print(f"지정가 매도 실패: {e}")
@@ -234,7 +776,8 @@ class UpbitClient:
     def cancel_order(self, uuid: str) -> Dict[str, Any]:
         """주문 취소"""
         try:
-            result = self.upbit.cancel_order(uuid)
+            result = self._request("DELETE", "/v1/order", params={"uuid": uuid}, private=True, max_retries=0)
+            self.invalidate_accounts()
             return result if result else {'error': '취소 실패'}
         except Exception as e:
             print(f"주문 취소 실패: {e}")
@@ -243,18 +786,18 @@ class UpbitClient:
     def get_order(self, uuid: str) -> Dict[str, Any]:
         """주문 조회"""
         try:
-            return self.upbit.get_order(uuid) or {}
+            return self._request("GET", "/v1/order", params={"uuid": uuid}, private=True) or {}
         except Exception as e:
             print(f"주문 조회 실패: {e}")
             return {}
     
     # ========== 마켓 정보 ==========
     
-    @staticmethod
-    def get_tickers(fiat: str = "KRW") -> List[str]:
+    def get_tickers(self, fiat: str = "KRW") -> List[str]:
         """마켓 코드 목록 조회"""
         try:
-            return pyupbit.get_tickers(fiat=fiat)
+            markets = self._request("GET", "/v1/market/all", params={"isDetails": "false"})
+            return [m['market'] for m in markets if m['market'].startswith(f"{fiat}-")]
         except Exception as e:
             print(f"마켓 목록 조회 실패: {e}")
             return []
@@ -262,48 +805,53 @@ class UpbitClient:
     def get_all_tickers(self, fiat: str = "KRW") -> List[str]:
         """거래량 상위 순으로 정렬된 마켓 코드 목록"""
         try:
-            tickers = pyupbit.get_tickers(fiat=fiat)
+            if fiat == "KRW":
+                # 공유 스냅샷의 거래대금(acc_trade_price_24h) 기준 정렬
+                snapshot = self.get_market_snapshot()
+                if len(snapshot) > 0:
+                    return snapshot.sorted_by_volume()
             
-            # 거래대금 기준 정렬
-            response = requests.get(
-                f"https://api.upbit.com/v1/ticker?markets={','.join(tickers[:100])}",
-                timeout=10
-            )
-            if response.status_code == 200:
-                data = response.json()
-                # 거래대금(acc_trade_price_24h) 기준 정렬
+            tickers = self.get_tickers(fiat=fiat)
+            data = self._fetch_ticker_data(tickers)
+            if data:
                 sorted_data = sorted(data, key=lambda x: float(x.get('acc_trade_price_24h', 0)), reverse=True)
                 return [item['market'] for item in sorted_data]
             
             return tickers
         except Exception as e:
             print(f"전체 마켓 조회 실패: {e}")
-            return pyupbit.get_tickers(fiat=fiat) or []
+            return self.get_tickers(fiat=fiat)
     
-    @staticmethod
-    def get_ticker_info() -> List[Dict[str, Any]]:
-        """전체 코인 정보 조회"""
+    def get_ticker_info(self) -> List[Dict[str, Any]]:
+        """전체 코인 정보 조회 (공유 스냅샷 기반)"""
         try:
-            tickers = pyupbit.get_tickers(fiat="KRW")
-            prices = pyupbit.get_current_price(tickers)
+            snapshot = self.get_market_snapshot()
             
             result = []
-            for ticker in tickers:
-                price = prices.get(ticker, 0) if isinstance(prices, dict) else prices
+            for ticker, item in snapshot.tickers.items():
                 coin_name = ticker.replace("KRW-", "")
                 result.append({
                     'ticker': ticker,
                     'coin': coin_name,
-                    'price': price
+                    'price': item.price,
+                    'change_rate': round(item.signed_change_rate * 100, 2),
+                    'acc_trade_price_24h': item.acc_trade_price_24h
                 })
             return result
         except Exception as e:
             print(f"코인 정보 조회 실패: {e}")
             return []
+    
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """요청 스케줄러 통계"""
+        return self.scheduler.get_stats()
+    
+    def get_single_flight_stats(self) -> Dict[str, Any]:
+        """동일 요청 병합 통계"""
+        return self.single_flight.get_stats()
 
 
 # 싱글톤 인스턴스
+request_scheduler = RequestScheduler()
+single_flight = SingleFlight()
 upbit_client = UpbitClient()
-
-
-